@@ -191,6 +191,8 @@ class DataWidget(gtk.VBox):
       self.data.get_buffer().set_text("")
     elif not self.node.active:
       self.data.get_buffer().set_text("Inactive node")
+    elif self.node.get_sidecar_file() is not None:
+      self.data.get_buffer().set_text("Data stored in binary file " + self.node.get_sidecar_file())
     elif self.node.datatype is None:
       self.data.get_buffer().set_text("No data")
     elif self.node.is_tensor(self.geometry_dim_tree):
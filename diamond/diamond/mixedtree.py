@@ -222,6 +222,14 @@ class MixedTree:
       except:   
         return "python"
 
+  def get_sidecar_file(self):
+    """
+    Return the name of the binary file holding the data of the current
+    MixedTree, or None if its data is held in the options file.
+    """
+
+    return self.child.get_sidecar_file()
+
   def get_name_path(self, leaf = True):
     return self.parent.get_name_path(leaf)
 
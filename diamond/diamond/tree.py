@@ -470,6 +470,17 @@ class Tree(gobject.GObject):
     except:   
       return "python"
 
+  def get_sidecar_file(self):
+    """
+    Return the name of the binary file holding the data of the current Tree,
+    or None if its data is held in the options file.
+    """
+
+    if self.name in ["integer_value", "real_value"] and "file" in self.attrs.keys():
+      return self.attrs["file"][1]
+
+    return None
+
   def get_display_name(self):
     """
     This is a fluidity hack, allowing the name displayed in the treeview on the
@@ -29,8 +29,24 @@
 #ifndef CSPUD_H
 #define CSPUD_H
 
+#include <stddef.h>
+
 #include "spud_enums.h"
 
+#ifdef __cplusplus
+  namespace Spud{
+    class OptionContext;
+  }
+
+  typedef Spud::OptionContext SpudContext;
+  typedef Spud::OptionHandle SpudOptionHandle;
+  typedef Spud::OptionInfo SpudOptionInfo;
+#else
+  typedef struct SpudContext SpudContext;
+  typedef struct SpudOptionHandle SpudOptionHandle;
+  typedef struct SpudOptionInfo SpudOptionInfo;
+#endif
+
 #ifdef __cplusplus
 extern "C" {
 #endif
@@ -40,12 +56,31 @@ extern "C" {
   void spud_set_manager(void* m);
   
   int spud_load_options(const char* filename, const int filename_len);
+  int spud_load_lazy_options(const char* filename, const int filename_len);
   int spud_write_options(const char* filename, const int filename_len);
+  int spud_write_options_sidecar(const char* filename, const int filename_len, const size_t sidecar_threshold);
+  int spud_write_snapshot(const char* filename, const int filename_len);
+
+  int spud_write_options_buffer(const char* key, const int key_len, char* buffer, const size_t buffer_size, size_t* size);
+  int spud_load_options_buffer(const char* key, const int key_len, const char* buffer, const size_t size);
+
+  int spud_freeze_options(const char* filename, const int filename_len);
+  int spud_load_frozen_options(const char* filename, const int filename_len);
+
+  void spud_get_load_statistics(double* load_time, size_t* peak_buffer_size);
+  int spud_get_lazy_statistics(char* keys, const int key_len, const int max_count, int* count, int* max_key_len, size_t* sizes, int* converted);
+
+  void spud_get_allocation_statistics(size_t* allocations, size_t* deallocations, size_t* system_allocations, size_t* bytes_in_use, size_t* bytes_reserved);
+
+  void spud_start_profiling(const char* filename, const int filename_len);
+  int spud_stop_profiling();
 
   int spud_get_child_name(const char* key, const int key_len, const int index, char* child_name, const int child_name_len);
 
   int spud_get_number_of_children(const char* key, const int key_len, int* child_count);
 
+  int spud_get_child_names(const char* key, const int key_len, char* child_names, const int child_name_len, const int max_count, int* count, int* max_name_len);
+
   int spud_option_count(const char* key, const int key_len);
 
   int spud_have_option(const char* key, const int key_len);
@@ -56,6 +91,32 @@ extern "C" {
 
   int spud_get_option(const char* key, const int key_len, void* val);
 
+  int spud_get_option_handle(const char* key, const int key_len, SpudOptionHandle* handle);
+  int spud_get_child_handle(const SpudOptionHandle* parent, const char* key, const int key_len, SpudOptionHandle* handle);
+  int spud_get_child_handle_by_index(const SpudOptionHandle* parent, const int index, SpudOptionHandle* handle);
+
+  int spud_get_child_name_by_handle(const SpudOptionHandle* parent, const int index, char* child_name, const int child_name_len);
+  int spud_get_number_of_children_by_handle(const SpudOptionHandle* parent, int* child_count);
+
+  int spud_get_option_type_by_handle(const SpudOptionHandle* handle, int* type);
+  int spud_get_option_rank_by_handle(const SpudOptionHandle* handle, int* rank);
+  int spud_get_option_shape_by_handle(const SpudOptionHandle* handle, int* shape);
+
+  int spud_get_option_by_handle(const SpudOptionHandle* handle, void* val);
+
+  int spud_get_option_checked(const char* key, const int key_len, const int type, const int rank, int* shape, void* val);
+  int spud_get_option_checked_by_handle(const SpudOptionHandle* handle, const int type, const int rank, int* shape, void* val);
+
+  int spud_get_option_view(const char* key, const int key_len, const void** data, size_t* size, int* shape);
+  int spud_get_option_view_by_handle(const SpudOptionHandle* handle, const void** data, size_t* size, int* shape);
+
+  int spud_get_option_info(const char* keys, const int key_len, const int key_count, SpudOptionInfo* info);
+  int spud_get_option_info_by_prefix(const char* prefix, const int prefix_len, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, SpudOptionInfo* info);
+
+  int spud_find_options(const char* pattern, const int pattern_len, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, SpudOptionHandle* handles);
+
+  int spud_set_options(const char* keys, const int key_len, const int key_count, const SpudOptionInfo* values, int* errors);
+
   int spud_add_option(const char* key, const int key_len);
 
   int spud_set_option(const char* key, const int key_len, const void* val, const int type, const int rank, const int* shape);
@@ -67,8 +128,105 @@ extern "C" {
    
   int spud_delete_option(const char* key, const int key_len);
 
+  long spud_get_generation();
+  int spud_have_changed(const char* key, const int key_len, const long since);
+  int spud_get_changes(const long since, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, int* changes);
+  int spud_write_changes(const char* filename, const int filename_len, const long since);
+  int spud_load_changes(const char* filename, const int filename_len);
+
   void spud_print_options();
 
+  /* Independent sets of options. Each of the routines above has a version
+   * taking a context as its first argument, which acts on the options of that
+   * context, or on the default options if context is NULL. */
+  SpudContext* spud_create_context();
+  void spud_destroy_context(SpudContext* context);
+
+  void spud_context_clear_options(SpudContext* context);
+  void* spud_context_get_manager(SpudContext* context);
+  void spud_context_set_manager(SpudContext* context, void* m);
+  
+  int spud_context_load_options(SpudContext* context, const char* filename, const int filename_len);
+  int spud_context_load_lazy_options(SpudContext* context, const char* filename, const int filename_len);
+  int spud_context_write_options(SpudContext* context, const char* filename, const int filename_len);
+  int spud_context_write_options_sidecar(SpudContext* context, const char* filename, const int filename_len, const size_t sidecar_threshold);
+  int spud_context_write_snapshot(SpudContext* context, const char* filename, const int filename_len);
+
+  int spud_context_write_options_buffer(SpudContext* context, const char* key, const int key_len, char* buffer, const size_t buffer_size, size_t* size);
+  int spud_context_load_options_buffer(SpudContext* context, const char* key, const int key_len, const char* buffer, const size_t size);
+
+  int spud_context_freeze_options(SpudContext* context, const char* filename, const int filename_len);
+  int spud_context_load_frozen_options(SpudContext* context, const char* filename, const int filename_len);
+
+  void spud_context_get_load_statistics(SpudContext* context, double* load_time, size_t* peak_buffer_size);
+  int spud_context_get_lazy_statistics(SpudContext* context, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, size_t* sizes, int* converted);
+
+  void spud_context_get_allocation_statistics(SpudContext* context, size_t* allocations, size_t* deallocations, size_t* system_allocations, size_t* bytes_in_use, size_t* bytes_reserved);
+
+  void spud_context_start_profiling(SpudContext* context, const char* filename, const int filename_len);
+  int spud_context_stop_profiling(SpudContext* context);
+
+  int spud_context_get_child_name(SpudContext* context, const char* key, const int key_len, const int index, char* child_name, const int child_name_len);
+
+  int spud_context_get_number_of_children(SpudContext* context, const char* key, const int key_len, int* child_count);
+
+  int spud_context_get_child_names(SpudContext* context, const char* key, const int key_len, char* child_names, const int child_name_len, const int max_count, int* count, int* max_name_len);
+
+  int spud_context_option_count(SpudContext* context, const char* key, const int key_len);
+
+  int spud_context_have_option(SpudContext* context, const char* key, const int key_len);
+
+  int spud_context_get_option_type(SpudContext* context, const char* key, const int key_len, int* type);
+  int spud_context_get_option_rank(SpudContext* context, const char* key, const int key_len, int* rank);
+  int spud_context_get_option_shape(SpudContext* context, const char* key, const int key_len, int* shape);
+
+  int spud_context_get_option(SpudContext* context, const char* key, const int key_len, void* val);
+
+  int spud_context_get_option_handle(SpudContext* context, const char* key, const int key_len, SpudOptionHandle* handle);
+  int spud_context_get_child_handle(SpudContext* context, const SpudOptionHandle* parent, const char* key, const int key_len, SpudOptionHandle* handle);
+  int spud_context_get_child_handle_by_index(SpudContext* context, const SpudOptionHandle* parent, const int index, SpudOptionHandle* handle);
+
+  int spud_context_get_child_name_by_handle(SpudContext* context, const SpudOptionHandle* parent, const int index, char* child_name, const int child_name_len);
+  int spud_context_get_number_of_children_by_handle(SpudContext* context, const SpudOptionHandle* parent, int* child_count);
+
+  int spud_context_get_option_type_by_handle(SpudContext* context, const SpudOptionHandle* handle, int* type);
+  int spud_context_get_option_rank_by_handle(SpudContext* context, const SpudOptionHandle* handle, int* rank);
+  int spud_context_get_option_shape_by_handle(SpudContext* context, const SpudOptionHandle* handle, int* shape);
+
+  int spud_context_get_option_by_handle(SpudContext* context, const SpudOptionHandle* handle, void* val);
+
+  int spud_context_get_option_checked(SpudContext* context, const char* key, const int key_len, const int type, const int rank, int* shape, void* val);
+  int spud_context_get_option_checked_by_handle(SpudContext* context, const SpudOptionHandle* handle, const int type, const int rank, int* shape, void* val);
+
+  int spud_context_get_option_view(SpudContext* context, const char* key, const int key_len, const void** data, size_t* size, int* shape);
+  int spud_context_get_option_view_by_handle(SpudContext* context, const SpudOptionHandle* handle, const void** data, size_t* size, int* shape);
+
+  int spud_context_get_option_info(SpudContext* context, const char* keys, const int key_len, const int key_count, SpudOptionInfo* info);
+  int spud_context_get_option_info_by_prefix(SpudContext* context, const char* prefix, const int prefix_len, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, SpudOptionInfo* info);
+
+  int spud_context_find_options(SpudContext* context, const char* pattern, const int pattern_len, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, SpudOptionHandle* handles);
+
+  int spud_context_set_options(SpudContext* context, const char* keys, const int key_len, const int key_count, const SpudOptionInfo* values, int* errors);
+
+  int spud_context_add_option(SpudContext* context, const char* key, const int key_len);
+
+  int spud_context_set_option(SpudContext* context, const char* key, const int key_len, const void* val, const int type, const int rank, const int* shape);
+
+  int spud_context_set_option_attribute(SpudContext* context, const char* key, const int key_len, const char* val, const int val_len);
+
+  int spud_context_move_option(SpudContext* context, const char* key1, const int key1_len, const char* key2, const int key2_len);
+  int spud_context_copy_option(SpudContext* context, const char* key1, const int key1_len, const char* key2, const int key2_len);
+   
+  int spud_context_delete_option(SpudContext* context, const char* key, const int key_len);
+
+  long spud_context_get_generation(SpudContext* context);
+  int spud_context_have_changed(SpudContext* context, const char* key, const int key_len, const long since);
+  int spud_context_get_changes(SpudContext* context, const long since, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, int* changes);
+  int spud_context_write_changes(SpudContext* context, const char* filename, const int filename_len, const long since);
+  int spud_context_load_changes(SpudContext* context, const char* filename, const int filename_len);
+
+  void spud_context_print_options(SpudContext* context);
+
 #ifdef __cplusplus
 }
 #endif
@@ -29,6 +29,8 @@
 #ifndef SPUD_ENUMS_H
 #define SPUD_ENUMS_H
 
+#include <stddef.h>
+
 #ifdef __cplusplus
 namespace Spud{
 #endif
@@ -55,10 +57,57 @@ namespace Spud{
     SPUD_RANK_ERROR              = 3,
     SPUD_SHAPE_ERROR             = 4,
     SPUD_FILE_ERROR              = 5,
+    SPUD_HANDLE_ERROR            = 6,
     SPUD_NEW_KEY_WARNING         = -1,
     SPUD_ATTR_SET_FAILED_WARNING = -2,
   };
 
+  /* The kind of the most recent change to an option, as recorded in the
+   * journal of changes. A copied option is recorded as added, and the key an
+   * option was moved from as deleted. */
+#ifdef __cplusplus
+  enum OptionChange{
+#else
+  enum SpudOptionChange{
+#endif
+    SPUD_CHANGE_SET    = 0,
+    SPUD_CHANGE_ADD    = 1,
+    SPUD_CHANGE_MOVE   = 2,
+    SPUD_CHANGE_DELETE = 3,
+  };
+
+  /* A pre-resolved option key. A handle is invalidated by any subsequent
+   * change to the options tree, after which it must be resolved again. */
+#ifdef __cplusplus
+  struct OptionHandle{
+#else
+  struct SpudOptionHandle{
+#endif
+    void* option;
+    long generation;
+  };
+
+  /* The type, rank, shape and data of an option, as returned for each key by a
+   * batched query, and as accepted by a batched set. data points to the
+   * doubles, ints or characters of the option, according to type, without
+   * copying them, and size is the number of values. For a query, data
+   * remains valid until the option is next set or is deleted, and handle
+   * as for any other handle. */
+#ifdef __cplusplus
+  struct OptionInfo{
+    OptionHandle handle;
+#else
+  struct SpudOptionInfo{
+    struct SpudOptionHandle handle;
+#endif
+    int error;
+    int type;
+    int rank;
+    int shape[2];
+    const void* data;
+    size_t size;
+  };
+
 #ifdef __cplusplus
 }
 #endif
@@ -1,4 +1,5 @@
 #include <Python.h>
+#include <limits.h>
 #include <string.h>
 #include "spud.h"
 #include <stdio.h>
@@ -16,6 +17,158 @@ static PyObject *SpudRankError;
 
 void* manager;
 
+/* A copy of a rank 1 or rank 2 real or integer option, which exposes its data
+ * through the buffer protocol, so that it can be wrapped without a further
+ * copy by numpy.asarray or memoryview. */
+typedef struct {
+    PyObject_HEAD
+    void *data;
+    int type;
+    int ndim;
+    Py_ssize_t itemsize;
+    Py_ssize_t shape[2];
+    Py_ssize_t strides[2];
+} OptionArray;
+
+static void
+OptionArray_dealloc(OptionArray *self)
+{
+    PyMem_Free(self->data);
+    PyObject_Del(self);
+}
+
+static int
+OptionArray_getbuffer(OptionArray *self, Py_buffer *view, int flags)
+{
+    view->obj = (PyObject*) self;
+    Py_INCREF(self);
+    view->buf = self->data;
+    view->itemsize = self->itemsize;
+    view->len = self->itemsize * self->shape[0] * (self->ndim == 2 ? self->shape[1] : 1);
+    view->readonly = 0;
+    view->format = (flags & PyBUF_FORMAT) ? (self->type == SPUD_DOUBLE ? "d" : "i") : NULL;
+    view->ndim = self->ndim;
+    view->shape = (flags & PyBUF_ND) ? self->shape : NULL;
+    view->strides = ((flags & PyBUF_STRIDES) == PyBUF_STRIDES) ? self->strides : NULL;
+    view->suboffsets = NULL;
+    view->internal = NULL;
+
+    return 0;
+}
+
+static PyBufferProcs OptionArray_as_buffer = {
+    NULL,                                   /* bf_getreadbuffer */
+    NULL,                                   /* bf_getwritebuffer */
+    NULL,                                   /* bf_getsegcount */
+    NULL,                                   /* bf_getcharbuffer */
+    (getbufferproc) OptionArray_getbuffer,  /* bf_getbuffer */
+    NULL,                                   /* bf_releasebuffer */
+};
+
+static PyTypeObject OptionArrayType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "libspud.OptionArray",                  /* tp_name */
+    sizeof(OptionArray),                    /* tp_basicsize */
+    0,                                      /* tp_itemsize */
+    (destructor) OptionArray_dealloc,       /* tp_dealloc */
+    0,                                      /* tp_print */
+    0,                                      /* tp_getattr */
+    0,                                      /* tp_setattr */
+    0,                                      /* tp_compare */
+    0,                                      /* tp_repr */
+    0,                                      /* tp_as_number */
+    0,                                      /* tp_as_sequence */
+    0,                                      /* tp_as_mapping */
+    0,                                      /* tp_hash */
+    0,                                      /* tp_call */
+    0,                                      /* tp_str */
+    0,                                      /* tp_getattro */
+    0,                                      /* tp_setattro */
+    &OptionArray_as_buffer,                 /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_NEWBUFFER, /* tp_flags */
+    PyDoc_STR("Copy of option data exposing the buffer protocol."), /* tp_doc */
+};
+
+/* An independent set of options. A Context has the same methods as the module,
+ * which act on the options of the context rather than on the default options. */
+typedef struct {
+    PyObject_HEAD
+    SpudContext *context;
+} Context;
+
+static PyObject *
+Context_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+    Context *self;
+
+    self = (Context*) type->tp_alloc(type, 0);
+    if (self == NULL){
+        return NULL;
+    }
+    self->context = spud_create_context();
+
+    return (PyObject*) self;
+}
+
+static void
+Context_dealloc(Context *self)
+{
+    spud_destroy_context(self->context);
+    Py_TYPE(self)->tp_free((PyObject*) self);
+}
+
+/* tp_methods is set to the module methods on initialisation */
+static PyTypeObject ContextType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "libspud.Context",                      /* tp_name */
+    sizeof(Context),                        /* tp_basicsize */
+    0,                                      /* tp_itemsize */
+    (destructor) Context_dealloc,           /* tp_dealloc */
+    0,                                      /* tp_print */
+    0,                                      /* tp_getattr */
+    0,                                      /* tp_setattr */
+    0,                                      /* tp_compare */
+    0,                                      /* tp_repr */
+    0,                                      /* tp_as_number */
+    0,                                      /* tp_as_sequence */
+    0,                                      /* tp_as_mapping */
+    0,                                      /* tp_hash */
+    0,                                      /* tp_call */
+    0,                                      /* tp_str */
+    0,                                      /* tp_getattro */
+    0,                                      /* tp_setattro */
+    0,                                      /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,                     /* tp_flags */
+    PyDoc_STR("An independent set of options, with the same methods as the module."), /* tp_doc */
+    0,                                      /* tp_traverse */
+    0,                                      /* tp_clear */
+    0,                                      /* tp_richcompare */
+    0,                                      /* tp_weaklistoffset */
+    0,                                      /* tp_iter */
+    0,                                      /* tp_iternext */
+    0,                                      /* tp_methods */
+    0,                                      /* tp_members */
+    0,                                      /* tp_getset */
+    0,                                      /* tp_base */
+    0,                                      /* tp_dict */
+    0,                                      /* tp_descr_get */
+    0,                                      /* tp_descr_set */
+    0,                                      /* tp_dictoffset */
+    0,                                      /* tp_init */
+    0,                                      /* tp_alloc */
+    Context_new,                            /* tp_new */
+};
+
+static SpudContext *
+get_context(PyObject *self)
+{   // this function returns the context of a Context, or NULL for the default options when called as a module function
+    if (self != NULL && PyObject_TypeCheck(self, &ContextType)){
+        return ((Context*) self)->context;
+    }
+
+    return NULL;
+}
+
 static PyObject *
 error_checking(int outcome, char *functionname)
 {
@@ -74,6 +227,7 @@ error_checking(int outcome, char *functionname)
 static PyObject *
 libspud_load_options(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char *key;
     int key_len;
     int outcomeLoadOptions;
@@ -81,7 +235,7 @@ libspud_load_options(PyObject *self, PyObject *args)
     if (!PyArg_ParseTuple(args, "s", &key))
         return NULL;
     key_len = strlen(key);
-    outcomeLoadOptions = spud_load_options(key,key_len);
+    outcomeLoadOptions = spud_context_load_options(context, key,key_len);
 
     return error_checking(outcomeLoadOptions, "load options");
 }
@@ -89,7 +243,8 @@ libspud_load_options(PyObject *self, PyObject *args)
 static PyObject*
 libspud_print_options(PyObject *self, PyObject *args)
 {
-    spud_print_options();
+    SpudContext *context = get_context(self);
+    spud_context_print_options(context);
 
     Py_RETURN_NONE;
 }
@@ -97,7 +252,8 @@ libspud_print_options(PyObject *self, PyObject *args)
 static PyObject*
 libspud_clear_options(PyObject *self, PyObject *args)
 {
-    spud_clear_options();
+    SpudContext *context = get_context(self);
+    spud_context_clear_options(context);
 
     Py_RETURN_NONE;
 }
@@ -105,6 +261,7 @@ libspud_clear_options(PyObject *self, PyObject *args)
 static PyObject *
 libspud_get_number_of_children(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char *key;
     int key_len;
     int child_count;
@@ -113,7 +270,7 @@ libspud_get_number_of_children(PyObject *self, PyObject *args)
     if (!PyArg_ParseTuple(args, "s", &key))
         return NULL;
     key_len = strlen(key);
-    outcomeGetNumChildren = spud_get_number_of_children(key, key_len, &child_count);
+    outcomeGetNumChildren = spud_context_get_number_of_children(context, key, key_len, &child_count);
     if (error_checking(outcomeGetNumChildren, "get number of children") == NULL){
         return NULL;
     }
@@ -124,6 +281,7 @@ libspud_get_number_of_children(PyObject *self, PyObject *args)
 static PyObject *
 libspud_get_child_name(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char *key;
     int key_len;
     int index;
@@ -138,7 +296,7 @@ libspud_get_child_name(PyObject *self, PyObject *args)
         return NULL;
     }
     key_len = strlen(key);
-    outcomeGetChildName = spud_get_child_name(key, key_len, index, child_name, MAXLENGTH);
+    outcomeGetChildName = spud_context_get_child_name(context, key, key_len, index, child_name, MAXLENGTH);
     if (error_checking(outcomeGetChildName, "get child name") == NULL){
         return NULL;
     }
@@ -146,9 +304,55 @@ libspud_get_child_name(PyObject *self, PyObject *args)
     return Py_BuildValue("s", child_name);
 }
 
+static PyObject *
+libspud_get_child_names(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    const char *key;
+    int key_len;
+    char *child_names;
+    int child_name_len;
+    int count;
+    int max_name_len;
+    int i;
+    int outcomeGetChildNames;
+    PyObject *pylist;
+
+    if (!PyArg_ParseTuple(args, "s", &key)){
+        return NULL;
+    }
+    key_len = strlen(key);
+
+    // Find the number and length of the names, and then fetch them
+    outcomeGetChildNames = spud_context_get_child_names(context, key, key_len, NULL, 0, 0, &count, &max_name_len);
+    if (error_checking(outcomeGetChildNames, "get child names") == NULL){
+        return NULL;
+    }
+    child_name_len = (max_name_len > 0) ? max_name_len : 1;
+    child_names = PyMem_Malloc(count * child_name_len + 1);
+    if (child_names == NULL){
+        return PyErr_NoMemory();
+    }
+    spud_context_get_child_names(context, key, key_len, child_names, child_name_len, count, &count, &max_name_len);
+
+    pylist = PyList_New(count);
+    for (i = 0; pylist != NULL && i < count; i++){
+        const char *child_name = child_names + i * child_name_len;
+        int len = child_name_len;
+        while (len > 0 && child_name[len - 1] == ' '){
+            len--;
+        }
+        PyList_SET_ITEM(pylist, i, PyString_FromStringAndSize(child_name, len));
+    }
+    PyMem_Free(child_names);
+
+    return pylist;
+}
+
 static PyObject *
 libspud_option_count(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char *key;
     int key_len;
     int numoptions;
@@ -157,7 +361,7 @@ libspud_option_count(PyObject *self, PyObject *args)
         return NULL;
     }
     key_len = strlen(key);
-    numoptions = spud_option_count(key, key_len);
+    numoptions = spud_context_option_count(context, key, key_len);
 
     return Py_BuildValue("i", numoptions);
 }
@@ -165,6 +369,7 @@ libspud_option_count(PyObject *self, PyObject *args)
 static PyObject *
 libspud_have_option(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char *key;
     int key_len;
     int haveoption;
@@ -173,7 +378,7 @@ libspud_have_option(PyObject *self, PyObject *args)
         return NULL;
     }
     key_len = strlen(key);
-    haveoption = spud_have_option(key, key_len);
+    haveoption = spud_context_have_option(context, key, key_len);
 
     if (haveoption == 0){
         Py_RETURN_FALSE;
@@ -186,6 +391,7 @@ libspud_have_option(PyObject *self, PyObject *args)
 static PyObject *
 libspud_add_option(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char *key;
     int key_len;
     int outcomeAddOption;
@@ -194,14 +400,33 @@ libspud_add_option(PyObject *self, PyObject *args)
         return NULL;
     }
     key_len = strlen(key);
-    outcomeAddOption = spud_add_option(key, key_len);
+    outcomeAddOption = spud_context_add_option(context, key, key_len);
     return error_checking(outcomeAddOption, "add option");
 
 }
 
+static PyObject*
+option_type_object(int type)
+{   // this function returns the python type corresponding to an option type
+    if (type == SPUD_DOUBLE){
+        Py_INCREF(&PyFloat_Type);
+        return (PyObject*) &PyFloat_Type;
+    }
+    else if (type == SPUD_INT){
+        Py_INCREF(&PyInt_Type);
+        return (PyObject*) &PyInt_Type;
+    }
+    else if (type == SPUD_STRING){
+        Py_INCREF(&PyString_Type);
+        return (PyObject*) &PyString_Type;
+    }
+    Py_RETURN_NONE;
+}
+
 static PyObject *
 libspud_get_option_type(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char *key;
     int key_len;
     int type;
@@ -211,33 +436,22 @@ libspud_get_option_type(PyObject *self, PyObject *args)
         return NULL;
     }
     key_len = strlen(key);
-    outcomeGetOptionType = spud_get_option_type(key, key_len, &type);
+    outcomeGetOptionType = spud_context_get_option_type(context, key, key_len, &type);
     if (error_checking(outcomeGetOptionType, "get option type") == NULL){
         return NULL;
     }
-    if (type == SPUD_DOUBLE){
-        Py_INCREF(&PyFloat_Type);
-        return (PyObject*) &PyFloat_Type;
-    }
-    else if (type == SPUD_INT){
-        Py_INCREF(&PyInt_Type);
-        return (PyObject*) &PyInt_Type;
-    }
-    else if (type == SPUD_NONE){
-        Py_RETURN_NONE;
-    }
-    else if (type == SPUD_STRING){
-        Py_INCREF(&PyString_Type);
-        return (PyObject*) &PyString_Type;
+    if (type != SPUD_DOUBLE && type != SPUD_INT && type != SPUD_NONE && type != SPUD_STRING){
+        PyErr_SetString(SpudError,"Error: Get option type function failed");
+        return NULL;
     }
 
-    PyErr_SetString(SpudError,"Error: Get option type function failed");
-    return NULL;
+    return option_type_object(type);
 }
 
 static PyObject *
 libspud_get_option_rank(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char *key;
     int key_len;
     int rank;
@@ -247,7 +461,7 @@ libspud_get_option_rank(PyObject *self, PyObject *args)
         return NULL;
     }
     key_len = strlen(key);
-    outcomeGetOptionRank = spud_get_option_rank(key, key_len, &rank);
+    outcomeGetOptionRank = spud_context_get_option_rank(context, key, key_len, &rank);
     if (error_checking(outcomeGetOptionRank, "get option rank") == NULL){
         return NULL;
     }
@@ -258,6 +472,7 @@ libspud_get_option_rank(PyObject *self, PyObject *args)
 static PyObject *
 libspud_get_option_shape(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char *key;
     int key_len;
     int shape[2];
@@ -267,7 +482,7 @@ libspud_get_option_shape(PyObject *self, PyObject *args)
         return NULL;
     }
     key_len = strlen(key);
-    outcomeGetOptionShape = spud_get_option_shape(key, key_len, shape);
+    outcomeGetOptionShape = spud_context_get_option_shape(context, key, key_len, shape);
     if (error_checking(outcomeGetOptionShape, "get option shape") == NULL){
         return NULL;
     }
@@ -276,62 +491,131 @@ libspud_get_option_shape(PyObject *self, PyObject *args)
 }
 
 static PyObject*
-spud_get_option_aux_list_ints(const char *key, int key_len, int type, int rank, int *shape)
-{   // this function is for getting option when the option is of type a list of ints
-    int outcomeGetOption;
-    int size = shape[0];
-    int val [size];
-    int j;
+option_data_to_list(int type, const void *data, size_t size)
+{   // this function builds a list from the data of a list of ints or doubles
+    size_t j;
 
-    outcomeGetOption = spud_get_option(key, key_len, val);
-    if (error_checking(outcomeGetOption, "get option aux list") == NULL){
-        return NULL;
-    }
     PyObject* pylist = PyList_New(size);
     if (pylist == NULL){
         printf("New list error.");
         return NULL;
     }
     for (j = 0; j < size; j++){
-        PyObject* element = Py_BuildValue("i", val[j]);
-        PyList_SetItem(pylist, j, element);
+        if (type == SPUD_INT){
+            PyList_SET_ITEM(pylist, j, PyInt_FromLong(((const int*) data)[j]));
+        }
+        else{
+            PyList_SET_ITEM(pylist, j, PyFloat_FromDouble(((const double*) data)[j]));
+        }
     }
 
     return pylist;
 }
 
 static PyObject*
-spud_get_option_aux_list_doubles(const char *key, int key_len, int type, int rank, int *shape)
-{   // this function is for getting option when the option is of type a list of doubles
+option_data_to_tensor(int type, const void *data, const int *shape)
+{   // this function builds a list of lists from the data of a tensor of ints or doubles
+    int rowsize;
+    int colsize;
+    int m;
+    int n;
+    int counter;
+
+    rowsize = shape[0];
+    colsize = shape[1];
+    PyObject* pylist = PyList_New(rowsize);
+    if (pylist == NULL){
+        printf("New list error");
+        return NULL;
+    }
+    counter = 0;
+    for (m = 0; m < rowsize; m++){
+        PyObject* pysublist = PyList_New(colsize);
+        if (pysublist == NULL){
+            printf("New sublist error");
+            Py_DECREF(pylist);
+            return NULL;
+        }
+        for (n = 0; n < colsize; n++){
+            if (type == SPUD_INT){
+                PyList_SET_ITEM(pysublist, n, PyInt_FromLong(((const int*) data)[counter]));
+            }
+            else{
+                PyList_SET_ITEM(pysublist, n, PyFloat_FromDouble(((const double*) data)[counter]));
+            }
+            counter++;
+        }
+        PyList_SET_ITEM(pylist, m, pysublist);
+    }
+
+    return pylist;
+}
+
+static PyObject*
+option_data_to_array(int type, int rank, const int *shape, const void *data, size_t size)
+{   // this function copies the data of a list or tensor of ints or doubles into an OptionArray
+    OptionArray *array;
+
+    array = PyObject_New(OptionArray, &OptionArrayType);
+    if (array == NULL){
+        return NULL;
+    }
+    array->type = type;
+    array->ndim = rank;
+    array->itemsize = (type == SPUD_DOUBLE) ? sizeof(double) : sizeof(int);
+    array->shape[0] = shape[0];
+    array->shape[1] = (rank == 2) ? shape[1] : 1;
+    array->strides[0] = array->itemsize * array->shape[1];
+    array->strides[1] = array->itemsize;
+    array->data = PyMem_Malloc(size * array->itemsize + 1);
+    if (array->data == NULL){
+        Py_DECREF(array);
+        return PyErr_NoMemory();
+    }
+    if (size > 0){
+        memcpy(array->data, data, size * array->itemsize);
+    }
+
+    return (PyObject*) array;
+}
+
+static PyObject*
+spud_get_option_aux_list_ints(SpudContext *context, const char *key, int key_len, int type, int rank, int *shape)
+{   // this function is for getting option when the option is of type a list of ints
     int outcomeGetOption;
-    int size = shape[0];
-    double val [size];
-    int j;
+    const void *data;
+    size_t size;
 
-    outcomeGetOption = spud_get_option(key, key_len, val);
+    outcomeGetOption = spud_context_get_option_view(context, key, key_len, &data, &size, shape);
     if (error_checking(outcomeGetOption, "get option aux list") == NULL){
         return NULL;
     }
-    PyObject* pylist = PyList_New(size);
-    if (pylist == NULL){
-        printf("New list error.");
+
+    return option_data_to_list(SPUD_INT, data, size);
+}
+
+static PyObject*
+spud_get_option_aux_list_doubles(SpudContext *context, const char *key, int key_len, int type, int rank, int *shape)
+{   // this function is for getting option when the option is of type a list of doubles
+    int outcomeGetOption;
+    const void *data;
+    size_t size;
+
+    outcomeGetOption = spud_context_get_option_view(context, key, key_len, &data, &size, shape);
+    if (error_checking(outcomeGetOption, "get option aux list") == NULL){
         return NULL;
     }
-    for (j = 0; j < size; j++){
-        PyObject* element = Py_BuildValue("d", val[j]);
-        PyList_SetItem(pylist, j, element);
-    }
 
-    return pylist;
+    return option_data_to_list(SPUD_DOUBLE, data, size);
 }
 
 static PyObject *
-spud_get_option_aux_scalar_or_string(const char *key, int key_len, int type, int rank, int *shape)
+spud_get_option_aux_scalar_or_string(SpudContext *context, const char *key, int key_len, int type, int rank, int *shape)
 {   // this function is for getting option when the option is of type a scalar or string
     int outcomeGetOption;
     if (type == SPUD_DOUBLE){
         double val;
-        outcomeGetOption = spud_get_option(key, key_len, &val);
+        outcomeGetOption = spud_context_get_option(context, key, key_len, &val);
         if (error_checking(outcomeGetOption, "get option aux scalar or string") == NULL){
             return NULL;
         }
@@ -339,7 +623,7 @@ spud_get_option_aux_scalar_or_string(const char *key, int key_len, int type, int
     }
     else if (type == SPUD_INT){
         int val;
-        outcomeGetOption = spud_get_option(key, key_len, &val);
+        outcomeGetOption = spud_context_get_option(context, key, key_len, &val);
         if (error_checking(outcomeGetOption, "get option aux scalar or string") == NULL){
             return NULL;
         }
@@ -347,16 +631,21 @@ spud_get_option_aux_scalar_or_string(const char *key, int key_len, int type, int
     }
     else if (type == SPUD_STRING) {
         int size = shape[0];
-        char val[size+1];
-        int i;
-        for (i = 0; i < size+1; i++)
-          val[i] = '\0';
-          
-        outcomeGetOption = spud_get_option(key, key_len, val);
+        char *val = PyMem_Malloc(size+1);
+        PyObject *pystring;
+        if (val == NULL){
+            return PyErr_NoMemory();
+        }
+        memset(val, '\0', size+1);
+
+        outcomeGetOption = spud_context_get_option(context, key, key_len, val);
         if (error_checking(outcomeGetOption, "get option aux scalar or string") == NULL){
+            PyMem_Free(val);
             return NULL;
         }
-        return Py_BuildValue("s", val);
+        pystring = Py_BuildValue("s", val);
+        PyMem_Free(val);
+        return pystring;
     }
 
     PyErr_SetString(SpudError,"Error: Get option aux scalar failed");
@@ -364,86 +653,55 @@ spud_get_option_aux_scalar_or_string(const char *key, int key_len, int type, int
 }
 
 static PyObject*
-spud_get_option_aux_tensor_doubles(const char *key, int key_len, int type, int rank, int *shape)
-{   // this function is for getting option when the option is of type a tensor o doubles
+spud_get_option_aux_tensor_doubles(SpudContext *context, const char *key, int key_len, int type, int rank, int *shape)
+{   // this function is for getting option when the option is of type a tensor of doubles
     int outcomeGetOption;
-    int rowsize = shape[0];
-    int colsize = shape[1];
-    int size = rowsize*colsize;
-    double val [size];
-    int m;
-    int n;
-    int counter;
+    const void *data;
+    size_t size;
 
-    outcomeGetOption = spud_get_option(key, key_len, val);
+    outcomeGetOption = spud_context_get_option_view(context, key, key_len, &data, &size, shape);
     if (error_checking(outcomeGetOption, "get option aux tensor") == NULL){
         return NULL;
     }
-    PyObject* pylist = PyList_New(rowsize);
-    if (pylist == NULL){
-        printf("New list error");
-        return NULL;
-    }
-    counter = 0;
-    for (m = 0; m < rowsize; m++){
-        PyObject* pysublist = PyList_New(colsize);
-        if (pysublist == NULL){
-            printf("New sublist error");
-            return NULL;
-        }
-        for (n = 0; n < colsize; n++){
-            PyObject* element = Py_BuildValue("d", val[counter]);
-            PyList_SetItem(pysublist, n, element);
-            counter++;
-        }
-        PyList_SetItem(pylist, m, pysublist);
-    }
 
-    return pylist;
+    return option_data_to_tensor(SPUD_DOUBLE, data, shape);
 }
 
 static PyObject*
-spud_get_option_aux_tensor_ints(const char *key, int key_len, int type, int rank, int *shape)
+spud_get_option_aux_tensor_ints(SpudContext *context, const char *key, int key_len, int type, int rank, int *shape)
 {   // this function is for getting option when the option is of type a tensor of ints
     int outcomeGetOption;
-    int rowsize = shape[0];
-    int colsize = shape[1];
-    int size = rowsize*colsize;
-    int val [size];
-    int m;
-    int n;
-    int counter;
+    const void *data;
+    size_t size;
 
-    outcomeGetOption = spud_get_option(key, key_len, val);
+    outcomeGetOption = spud_context_get_option_view(context, key, key_len, &data, &size, shape);
     if (error_checking(outcomeGetOption, "get option aux tensor") == NULL){
         return NULL;
     }
-    PyObject* pylist = PyList_New(rowsize);
-    if (pylist == NULL){
-        printf("New list error");
+
+    return option_data_to_tensor(SPUD_INT, data, shape);
+}
+
+static PyObject*
+spud_get_option_aux_array(SpudContext *context, const char *key, int key_len, int type, int rank, int *shape)
+{   // this function is for getting option as an OptionArray when the option is a list or tensor of ints or doubles
+    int outcomeGetOption;
+    const void *data;
+    size_t size;
+
+    outcomeGetOption = spud_context_get_option_view(context, key, key_len, &data, &size, shape);
+    if (error_checking(outcomeGetOption, "get option aux array") == NULL){
         return NULL;
     }
-    counter = 0;
-    for (m = 0; m < rowsize; m++){
-        PyObject* pysublist = PyList_New(colsize);
-        if (pysublist == NULL){
-            printf("New sublist error");
-            return NULL;
-        }
-        for (n = 0; n < colsize; n++){
-            PyObject* element = Py_BuildValue("i", val[counter]);
-            PyList_SetItem(pysublist, n, element);
-            counter++;
-        }
-        PyList_SetItem(pylist, m, pysublist);
-    }
 
-    return pylist;
+    return option_data_to_array(type, rank, shape, data, size);
 }
 
 static PyObject *
-libspud_get_option(PyObject *self, PyObject *args)
+libspud_get_option(PyObject *self, PyObject *args, PyObject *kwargs)
 {
+    SpudContext *context = get_context(self);
+    static char *kwlist[] = {"key", "array", NULL};
     const char *key;
     int key_len;
     int type;
@@ -452,20 +710,21 @@ libspud_get_option(PyObject *self, PyObject *args)
     int outcomeGetOptionType;
     int outcomeGetOptionRank;
     int outcomeGetOptionShape;
+    PyObject *array = NULL;
 
-    if(!PyArg_ParseTuple(args, "s", &key)){
+    if(!PyArg_ParseTupleAndKeywords(args, kwargs, "s|O", kwlist, &key, &array)){
         return NULL;
     }
     key_len = strlen(key);
-    outcomeGetOptionRank = spud_get_option_rank(key, key_len, &rank);
+    outcomeGetOptionRank = spud_context_get_option_rank(context, key, key_len, &rank);
     if (error_checking(outcomeGetOptionRank, "get option") == NULL){
         return NULL;
     }
-    outcomeGetOptionType = spud_get_option_type(key, key_len, &type);
+    outcomeGetOptionType = spud_context_get_option_type(context, key, key_len, &type);
     if (error_checking(outcomeGetOptionType, "get option") == NULL){
         return NULL;
     }
-    outcomeGetOptionShape = spud_get_option_shape(key, key_len, shape);
+    outcomeGetOptionShape = spud_context_get_option_shape(context, key, key_len, shape);
     if (error_checking(outcomeGetOptionShape, "get option") == NULL){
         return NULL;
     }
@@ -478,25 +737,28 @@ libspud_get_option(PyObject *self, PyObject *args)
         return NULL;
     }
     else if (rank == 0){ // scalar
-        return spud_get_option_aux_scalar_or_string(key, key_len, type, rank, shape);
+        return spud_get_option_aux_scalar_or_string(context, key, key_len, type, rank, shape);
+    }
+    else if (array != NULL && PyObject_IsTrue(array) && (type == SPUD_DOUBLE || type == SPUD_INT)){ // list or tensor as an OptionArray
+        return spud_get_option_aux_array(context, key, key_len, type, rank, shape);
     }
     else if (rank == 1){ // list or string
         if (type == SPUD_INT){  //a list of ints
-            return spud_get_option_aux_list_ints(key, key_len, type, rank, shape);
+            return spud_get_option_aux_list_ints(context, key, key_len, type, rank, shape);
         }
         else if (type == SPUD_DOUBLE){  //a list of doubles
-            return spud_get_option_aux_list_doubles(key, key_len, type, rank, shape);
+            return spud_get_option_aux_list_doubles(context, key, key_len, type, rank, shape);
         }
         else if (type == SPUD_STRING){  //string
-            return spud_get_option_aux_scalar_or_string(key, key_len, type, rank, shape);
+            return spud_get_option_aux_scalar_or_string(context, key, key_len, type, rank, shape);
         }
     }
     else if (rank == 2){ // tensor
         if (type == SPUD_DOUBLE){  //a tensor of doubles
-            return spud_get_option_aux_tensor_doubles(key, key_len, type, rank, shape);
+            return spud_get_option_aux_tensor_doubles(context, key, key_len, type, rank, shape);
         }
         else if (type == SPUD_INT){  //a tensor of ints
-            return spud_get_option_aux_tensor_ints(key, key_len, type, rank, shape);
+            return spud_get_option_aux_tensor_ints(context, key, key_len, type, rank, shape);
         } 
     }
 
@@ -504,22 +766,26 @@ libspud_get_option(PyObject *self, PyObject *args)
     return NULL;
 }
 static PyObject*
-set_option_aux_list_ints(PyObject *pylist, const char *key, int key_len, int type, int rank, int *shape)
+set_option_aux_list_ints(SpudContext *context, PyObject *pylist, const char *key, int key_len, int type, int rank, int *shape)
 {   // this function is for setting option when the second argument is of type a list of ints
     int j;
     int psize = PyList_Size(pylist);
     shape[0] = psize;
-    int val[psize] ;
+    int *val = PyMem_Malloc(psize * sizeof(int) + 1);
     int outcomeSetOption;
     int element;
 
+    if (val == NULL){
+        return PyErr_NoMemory();
+    }
     for (j = 0; j < psize; j++){
         element = -1;
         PyObject* pelement = PyList_GetItem(pylist, j);
         PyArg_Parse(pelement, "i", &element);
         val[j] = element;
     }
-    outcomeSetOption = spud_set_option(key, key_len, val, type, rank, shape);
+    outcomeSetOption = spud_context_set_option(context, key, key_len, val, type, rank, shape);
+    PyMem_Free(val);
     if (error_checking(outcomeSetOption, "set option aux list ints") == NULL){
         return NULL;
     }
@@ -527,22 +793,26 @@ set_option_aux_list_ints(PyObject *pylist, const char *key, int key_len, int typ
 }
 
 static PyObject*
-set_option_aux_list_doubles(PyObject *pylist, const char *key, int key_len, int type, int rank, int *shape)
+set_option_aux_list_doubles(SpudContext *context, PyObject *pylist, const char *key, int key_len, int type, int rank, int *shape)
 {   // this function is for setting option when the second argument is of type a list of doubles
     int j;
     int psize = PyList_Size(pylist);
     shape[0] = psize;
-    double val [psize];
+    double *val = PyMem_Malloc(psize * sizeof(double) + 1);
     int outcomeSetOption;
     double element;
 
+    if (val == NULL){
+        return PyErr_NoMemory();
+    }
     for (j = 0; j < psize; j++){
         element = -1.0;
         PyObject* pelement = PyList_GetItem(pylist, j);
         element = PyFloat_AS_DOUBLE(pelement);
         val[j] = element;
     }
-    outcomeSetOption = spud_set_option(key, key_len, val, type, rank, shape);
+    outcomeSetOption = spud_context_set_option(context, key, key_len, val, type, rank, shape);
+    PyMem_Free(val);
     if (error_checking(outcomeSetOption, "set option aux list ints") == NULL){
         return NULL;
     }
@@ -551,16 +821,17 @@ set_option_aux_list_doubles(PyObject *pylist, const char *key, int key_len, int
 }
 
 static PyObject*
-set_option_aux_string(PyObject *pystring, const char *key, int key_len, int type, int rank, int *shape)
+set_option_aux_string(SpudContext *context, PyObject *pystring, const char *key, int key_len, int type, int rank, int *shape)
 {   // this function is for setting option when the second argument is of type string
     char *val = PyString_AsString(pystring);
-    int outcomeSetOption = spud_set_option(key, key_len, val, type, rank, shape);
+    int outcomeSetOption = spud_context_set_option(context, key, key_len, val, type, rank, shape);
     return error_checking(outcomeSetOption, "set option aux string");
 }
 
 static PyObject*
 libspud_set_option_attribute(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char*key;
     int key_len;
     PyObject* firstArg;
@@ -575,13 +846,14 @@ libspud_set_option_attribute(PyObject *self, PyObject *args)
     key_len = strlen(key);
     PyArg_Parse(secondArg, "s", &val);
     val_len = strlen(val);
-    outcomeSetOption = spud_set_option_attribute(key, key_len, val, val_len);
+    outcomeSetOption = spud_context_set_option_attribute(context, key, key_len, val, val_len);
     return error_checking(outcomeSetOption, "set option attribute");
 }
 
 static PyObject*
 libspud_delete_option(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char*key;
     int key_len;
     PyObject* firstArg;
@@ -590,12 +862,127 @@ libspud_delete_option(PyObject *self, PyObject *args)
     firstArg = PyTuple_GetItem(args, 0);
     PyArg_Parse(firstArg, "s", &key);
     key_len = strlen(key);
-    outcomeDeleteOption = spud_delete_option(key, key_len);
+    outcomeDeleteOption = spud_context_delete_option(context, key, key_len);
     return error_checking(outcomeDeleteOption, "delete option");
 }
 
 static PyObject*
-set_option_aux_tensor_doubles(PyObject *pylist, const char *key, int key_len, int type, int rank, int *shape)
+libspud_copy_option(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    const char *key1;
+    const char *key2;
+
+    if (!PyArg_ParseTuple(args, "ss", &key1, &key2)){
+        return NULL;
+    }
+
+    return error_checking(spud_context_copy_option(context, key1, strlen(key1), key2, strlen(key2)), "copy option");
+}
+
+static PyObject*
+libspud_get_generation(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+
+    return PyInt_FromLong(spud_context_get_generation(context));
+}
+
+static PyObject*
+libspud_have_changed(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    const char *key;
+    long since;
+
+    if (!PyArg_ParseTuple(args, "sl", &key, &since)){
+        return NULL;
+    }
+
+    if (spud_context_have_changed(context, key, strlen(key), since) == 0){
+        Py_RETURN_FALSE;
+    }
+    else{
+        Py_RETURN_TRUE;
+    }
+}
+
+static PyObject*
+libspud_get_changes(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    static const char *change_names[] = {"set", "add", "move", "delete"};
+    long since;
+    PyObject *pylist;
+    char *keys;
+    int *changes;
+    int key_len;
+    int count;
+    int max_key_len;
+    int i;
+
+    if (!PyArg_ParseTuple(args, "l", &since)){
+        return NULL;
+    }
+
+    // Find the number and length of the keys, and then fetch them
+    spud_context_get_changes(context, since, NULL, 0, 0, &count, &max_key_len, NULL);
+    key_len = (max_key_len > 0) ? max_key_len : 1;
+    keys = PyMem_Malloc(count * key_len + 1);
+    changes = PyMem_Malloc(count * sizeof(int) + 1);
+    if (keys == NULL || changes == NULL){
+        PyMem_Free(keys);
+        PyMem_Free(changes);
+        return PyErr_NoMemory();
+    }
+    spud_context_get_changes(context, since, keys, key_len, count, &count, &max_key_len, changes);
+
+    pylist = PyList_New(count);
+    for (i = 0; pylist != NULL && i < count; i++){
+        const char *key = keys + i * key_len;
+        int len = key_len;
+        while (len > 0 && key[len - 1] == ' '){
+            len--;
+        }
+        PyList_SET_ITEM(pylist, i, Py_BuildValue("(s#s)", key, len, change_names[changes[i]]));
+    }
+    PyMem_Free(keys);
+    PyMem_Free(changes);
+
+    return pylist;
+}
+
+static PyObject*
+libspud_write_changes(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    char *filename;
+    long since;
+    int outcomeWriteChanges;
+
+    if (!PyArg_ParseTuple(args, "sl", &filename, &since)){
+        return NULL;
+    }
+    outcomeWriteChanges = spud_context_write_changes(context, filename, strlen(filename), since);
+    return error_checking(outcomeWriteChanges, "write changes");
+}
+
+static PyObject*
+libspud_load_changes(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    char *filename;
+    int outcomeLoadChanges;
+
+    if (!PyArg_ParseTuple(args, "s", &filename)){
+        return NULL;
+    }
+    outcomeLoadChanges = spud_context_load_changes(context, filename, strlen(filename));
+    return error_checking(outcomeLoadChanges, "load changes");
+}
+
+static PyObject*
+set_option_aux_tensor_doubles(SpudContext *context, PyObject *pylist, const char *key, int key_len, int type, int rank, int *shape)
 {   // this function is for setting option when the second argument is of type a tensor of doubles
     int i;
     int j;
@@ -606,8 +993,11 @@ set_option_aux_tensor_doubles(PyObject *pylist, const char *key, int key_len, in
     int size = shape[0]*shape[1];
     
     double element;
-    double val [size];
-    
+    double *val = PyMem_Malloc(size * sizeof(double) + 1);
+
+    if (val == NULL){
+        return PyErr_NoMemory();
+    }
     for (i = 0; i < shape[0]; i++){
         PyObject* pysublist = PyList_GetItem(pylist, i);
         for (j = 0; j < shape[1]; j++){
@@ -618,22 +1008,26 @@ set_option_aux_tensor_doubles(PyObject *pylist, const char *key, int key_len, in
         }
     }
 
-    outcomeSetOption = spud_set_option(key, key_len, val, type, rank, shape);
+    outcomeSetOption = spud_context_set_option(context, key, key_len, val, type, rank, shape);
+    PyMem_Free(val);
     return error_checking(outcomeSetOption, "set option aux tensor doubles");
 }
 
 static PyObject*
-set_option_aux_tensor_ints(PyObject *pylist, const char *key, int key_len, int type, int rank, int *shape)
+set_option_aux_tensor_ints(SpudContext *context, PyObject *pylist, const char *key, int key_len, int type, int rank, int *shape)
 {   // this function is for setting option when the second argument is of type a tensor of ints
     int i;
     int j;
     int counter = 0;
     int size = shape[0]*shape[1];
-    int val [size];
+    int *val = PyMem_Malloc(size * sizeof(int) + 1);
     int outcomeSetOption;
 
     int element;
 
+    if (val == NULL){
+        return PyErr_NoMemory();
+    }
     for (i = 0; i < shape[0]; i++){
         PyObject* pysublist = PyList_GetItem(pylist, i);
         for (j = 0; j < shape[1]; j++){
@@ -645,32 +1039,145 @@ set_option_aux_tensor_ints(PyObject *pylist, const char *key, int key_len, int t
         }
     }
 
-    outcomeSetOption = spud_set_option(key, key_len, val, type, rank, shape);
+    outcomeSetOption = spud_context_set_option(context, key, key_len, val, type, rank, shape);
+    PyMem_Free(val);
     return error_checking(outcomeSetOption, "set option aux tensor ints");
 }
 
 static PyObject*
-set_option_aux_scalar(PyObject *pyscalar, const char *key, int key_len, int type, int rank, int *shape)
+set_option_aux_scalar(SpudContext *context, PyObject *pyscalar, const char *key, int key_len, int type, int rank, int *shape)
 {   // this function is for setting option when the second argument is of type scalar
     int outcomeSetOption = SPUD_NO_ERROR;
 
     if (type == SPUD_DOUBLE){ //scalar is double
         double val = PyFloat_AS_DOUBLE(pyscalar);
-        outcomeSetOption = spud_set_option(key, key_len, &val, type, rank, shape);
+        outcomeSetOption = spud_context_set_option(context, key, key_len, &val, type, rank, shape);
     }
     else if (type == SPUD_INT){
         int val;
         PyArg_Parse(pyscalar, "i", &val);
-        outcomeSetOption = spud_set_option(key, key_len, &val, type, rank, shape);
+        outcomeSetOption = spud_context_set_option(context, key, key_len, &val, type, rank, shape);
     }
 
     return error_checking(outcomeSetOption, "set option aux scalar");
 }
 
 
+static int
+buffer_option_type(const Py_buffer *view, const char **format)
+{   // this function returns the option type for the items of a buffer, or -1 if there is none
+    // Native byte order and alignment only
+    *format = (view->format == NULL) ? "B" : view->format;
+    if ((*format)[0] == '@'){
+        (*format)++;
+    }
+    if (strcmp(*format, "d") == 0 || strcmp(*format, "f") == 0){
+        return SPUD_DOUBLE;
+    }
+    else if (strlen(*format) == 1 && strchr("bhilq", (*format)[0]) != NULL){
+        return SPUD_INT;
+    }
+
+    return -1;
+}
+
+static int
+buffer_copy_items(const Py_buffer *view, const char *format, int type, void *val)
+{   // this function copies the items of a buffer into doubles or ints, returning -1 on overflow
+    Py_ssize_t size = view->len / view->itemsize;
+    Py_ssize_t i;
+
+    if ((type == SPUD_DOUBLE && format[0] == 'd') || (type == SPUD_INT && format[0] == 'i')){
+        memcpy(val, view->buf, view->len);
+        return 0;
+    }
+    for (i = 0; i < size; i++){
+        const char *item = (const char*) view->buf + i * view->itemsize;
+        long long element;
+        switch (format[0]){
+            case 'f':
+                ((double*) val)[i] = *(const float*) item;
+                continue;
+            case 'b':
+                element = *(const signed char*) item;
+                break;
+            case 'h':
+                element = *(const short*) item;
+                break;
+            case 'l':
+                element = *(const long*) item;
+                break;
+            default:
+                element = *(const long long*) item;
+                break;
+        }
+        if (element < INT_MIN || element > INT_MAX){
+            PyErr_SetString(PyExc_OverflowError, "Error: integer option value out of range in set option aux buffer");
+            return -1;
+        }
+        ((int*) val)[i] = (int) element;
+    }
+
+    return 0;
+}
+
+static PyObject*
+set_option_aux_buffer(SpudContext *context, PyObject *pybuffer, const char *key, int key_len)
+{   // this function is for setting option when the second argument supports the buffer protocol
+    Py_buffer view;
+    const char *format;
+    int type;
+    int rank;
+    int shape[2];
+    Py_ssize_t size;
+    void *val;
+    int outcomeSetOption;
+
+    if (PyObject_GetBuffer(pybuffer, &view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0){
+        return NULL;
+    }
+    if (view.ndim < 1 || view.ndim > 2){
+        PyBuffer_Release(&view);
+        return error_checking(SPUD_RANK_ERROR, "set option aux buffer");
+    }
+    rank = view.ndim;
+    shape[0] = view.shape[0];
+    shape[1] = (rank == 2) ? view.shape[1] : -1;
+    size = view.len / view.itemsize;
+
+    type = buffer_option_type(&view, &format);
+    if (type < 0){
+        PyBuffer_Release(&view);
+        return error_checking(SPUD_TYPE_ERROR, "set option aux buffer");
+    }
+
+    if ((type == SPUD_DOUBLE && format[0] == 'd') || (type == SPUD_INT && format[0] == 'i')){
+        // No conversion required
+        outcomeSetOption = spud_context_set_option(context, key, key_len, view.buf, type, rank, shape);
+        PyBuffer_Release(&view);
+        return error_checking(outcomeSetOption, "set option aux buffer");
+    }
+
+    val = PyMem_Malloc(size * (type == SPUD_DOUBLE ? sizeof(double) : sizeof(int)) + 1);
+    if (val == NULL){
+        PyBuffer_Release(&view);
+        return PyErr_NoMemory();
+    }
+    if (buffer_copy_items(&view, format, type, val) < 0){
+        PyMem_Free(val);
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+    outcomeSetOption = spud_context_set_option(context, key, key_len, val, type, rank, shape);
+    PyMem_Free(val);
+    PyBuffer_Release(&view);
+    return error_checking(outcomeSetOption, "set option aux buffer");
+}
+
 static PyObject*
 libspud_set_option(PyObject *self, PyObject *args)
 {
+    SpudContext *context = get_context(self);
     const char *key;
     int key_len;
     int type=-1;
@@ -689,8 +1196,8 @@ libspud_set_option(PyObject *self, PyObject *args)
     PyArg_Parse(firstArg, "s", &key);
     key_len = strlen(key);
     
-    if (!spud_have_option(key, key_len)){ //option does not exist yet
-        int outcomeAddOption = spud_add_option(key, key_len);
+    if (!spud_context_have_option(context, key, key_len)){ //option does not exist yet
+        int outcomeAddOption = spud_context_add_option(context, key, key_len);
         error_checking(outcomeAddOption, "set option");
     } 
     
@@ -742,27 +1249,30 @@ libspud_set_option(PyObject *self, PyObject *args)
             shape[1] = pysublistSize;
         }
     }
+    else if (PyObject_CheckBuffer(secondArg)){ // an array, set in bulk
+        set_option_aux_buffer(context, secondArg, key, key_len);
+    }
     
     if (rank == 0){ // scalar
-        set_option_aux_scalar(secondArg, key, key_len, type, rank, shape);
+        set_option_aux_scalar(context, secondArg, key, key_len, type, rank, shape);
     }
     else if (rank == 1){ // list or string
         if (PyString_Check(secondArg)){ // pystring
-            set_option_aux_string(secondArg, key, key_len, type, rank, shape);
+            set_option_aux_string(context, secondArg, key, key_len, type, rank, shape);
         }
         else if (type == SPUD_INT) { // list of ints
-            set_option_aux_list_ints(secondArg, key, key_len, type, rank, shape);
+            set_option_aux_list_ints(context, secondArg, key, key_len, type, rank, shape);
         }    
         else if (type == SPUD_DOUBLE){ // list of doubles
-            set_option_aux_list_doubles(secondArg, key, key_len, type, rank, shape);
+            set_option_aux_list_doubles(context, secondArg, key, key_len, type, rank, shape);
         } 
     }
     else if (rank == 2){ // tensor
         if (type == SPUD_DOUBLE) { // tensor of doubles
-            set_option_aux_tensor_doubles(secondArg, key, key_len, type, rank, shape);
+            set_option_aux_tensor_doubles(context, secondArg, key, key_len, type, rank, shape);
         }
         else if (type == SPUD_INT) { // tensor of ints
-            set_option_aux_tensor_ints(secondArg, key, key_len, type, rank, shape);
+            set_option_aux_tensor_ints(context, secondArg, key, key_len, type, rank, shape);
         }
     }
 
@@ -774,21 +1284,603 @@ libspud_set_option(PyObject *self, PyObject *args)
     }
 }
 
+static char*
+keys_to_array(PyObject *seq, int *key_len)
+{   // this function packs a sequence of keys into an array of fixed width, NUL padded keys
+    Py_ssize_t key_count = PySequence_Fast_GET_SIZE(seq);
+    Py_ssize_t i;
+    char *keys;
+
+    *key_len = 1;
+    for (i = 0; i < key_count; i++){
+        PyObject *pykey = PySequence_Fast_GET_ITEM(seq, i);
+        if (!PyString_Check(pykey)){
+            PyErr_SetString(PyExc_TypeError, "Error: option keys must be strings.");
+            return NULL;
+        }
+        if (PyString_GET_SIZE(pykey) > *key_len){
+            *key_len = PyString_GET_SIZE(pykey);
+        }
+    }
+    keys = PyMem_Malloc(key_count * *key_len + 1);
+    if (keys == NULL){
+        PyErr_NoMemory();
+        return NULL;
+    }
+    memset(keys, '\0', key_count * *key_len + 1);
+    for (i = 0; i < key_count; i++){
+        PyObject *pykey = PySequence_Fast_GET_ITEM(seq, i);
+        memcpy(keys + i * *key_len, PyString_AS_STRING(pykey), PyString_GET_SIZE(pykey));
+    }
+
+    return keys;
+}
+
 static PyObject*
-libspud_write_options(PyObject *self, PyObject *args)
+option_info_to_tuple(const SpudOptionInfo *info, int array)
+{   // this function builds a (type, rank, shape, value) tuple from option info
+    PyObject *value;
+
+    if (info->type == SPUD_NONE){
+        Py_INCREF(Py_None);
+        value = Py_None;
+    }
+    else if (info->type == SPUD_STRING){
+        value = PyString_FromStringAndSize((const char*) info->data, info->size);
+    }
+    else if (info->rank == 0){
+        if (info->type == SPUD_DOUBLE){
+            value = PyFloat_FromDouble(*(const double*) info->data);
+        }
+        else{
+            value = PyInt_FromLong(*(const int*) info->data);
+        }
+    }
+    else if (array){
+        value = option_data_to_array(info->type, info->rank, info->shape, info->data, info->size);
+    }
+    else if (info->rank == 1){
+        value = option_data_to_list(info->type, info->data, info->size);
+    }
+    else{
+        value = option_data_to_tensor(info->type, info->data, info->shape);
+    }
+    if (value == NULL){
+        return NULL;
+    }
+
+    return Py_BuildValue("(Ni(i,i)N)", option_type_object(info->type), info->rank,
+                         info->shape[0], info->shape[1], value);
+}
+
+static PyObject*
+libspud_get_options(PyObject *self, PyObject *args, PyObject *kwargs)
 {
-    PyObject* firstArg;
+    SpudContext *context = get_context(self);
+    static char *kwlist[] = {"keys", "array", NULL};
+    PyObject *pykeys;
+    PyObject *array = NULL;
+    PyObject *seq;
+    PyObject *pylist;
+    char *keys;
+    int key_len;
+    int key_count;
+    int i;
+    SpudOptionInfo *info;
+
+    if(!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O", kwlist, &pykeys, &array)){
+        return NULL;
+    }
+    seq = PySequence_Fast(pykeys, "Error: get_options takes a sequence of keys.");
+    if (seq == NULL){
+        return NULL;
+    }
+    key_count = PySequence_Fast_GET_SIZE(seq);
+    keys = keys_to_array(seq, &key_len);
+    Py_DECREF(seq);
+    if (keys == NULL){
+        return NULL;
+    }
+    info = PyMem_Malloc(key_count * sizeof(SpudOptionInfo) + 1);
+    if (info == NULL){
+        PyMem_Free(keys);
+        return PyErr_NoMemory();
+    }
+
+    spud_context_get_option_info(context, keys, key_len, key_count, info);
+    PyMem_Free(keys);
+
+    pylist = PyList_New(key_count);
+    for (i = 0; pylist != NULL && i < key_count; i++){
+        PyObject *pyinfo;
+        if (info[i].error == SPUD_KEY_ERROR){ // missing option
+            Py_INCREF(Py_None);
+            pyinfo = Py_None;
+        }
+        else if (info[i].error != SPUD_NO_ERROR){
+            pyinfo = error_checking(info[i].error, "get options");
+        }
+        else{
+            pyinfo = option_info_to_tuple(&info[i], array != NULL && PyObject_IsTrue(array));
+        }
+        if (pyinfo == NULL){
+            Py_CLEAR(pylist);
+            break;
+        }
+        PyList_SET_ITEM(pylist, i, pyinfo);
+    }
+    PyMem_Free(info);
+
+    return pylist;
+}
+
+static PyObject*
+libspud_get_options_by_prefix(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    SpudContext *context = get_context(self);
+    static char *kwlist[] = {"prefix", "array", NULL};
+    const char *prefix;
+    int prefix_len;
+    PyObject *array = NULL;
+    PyObject *pylist;
+    char *keys;
+    int key_len;
+    int count;
+    int max_key_len;
+    int i;
+    int outcomeGetOptionInfo;
+    SpudOptionInfo *info;
+
+    if(!PyArg_ParseTupleAndKeywords(args, kwargs, "s|O", kwlist, &prefix, &array)){
+        return NULL;
+    }
+    prefix_len = strlen(prefix);
+
+    // Find the number and length of the keys, and then fetch them
+    outcomeGetOptionInfo = spud_context_get_option_info_by_prefix(context, prefix, prefix_len, NULL, 0, 0, &count, &max_key_len, NULL);
+    if (error_checking(outcomeGetOptionInfo, "get options by prefix") == NULL){
+        return NULL;
+    }
+    key_len = (max_key_len > 0) ? max_key_len : 1;
+    keys = PyMem_Malloc(count * key_len + 1);
+    info = PyMem_Malloc(count * sizeof(SpudOptionInfo) + 1);
+    if (keys == NULL || info == NULL){
+        PyMem_Free(keys);
+        PyMem_Free(info);
+        return PyErr_NoMemory();
+    }
+    spud_context_get_option_info_by_prefix(context, prefix, prefix_len, keys, key_len, count, &count, &max_key_len, info);
+
+    pylist = PyList_New(count);
+    for (i = 0; pylist != NULL && i < count; i++){
+        const char *key = keys + i * key_len;
+        int len = key_len;
+        PyObject *pyinfo;
+        while (len > 0 && key[len - 1] == ' '){
+            len--;
+        }
+        if (info[i].error != SPUD_NO_ERROR){
+            pyinfo = error_checking(info[i].error, "get options by prefix");
+        }
+        else{
+            pyinfo = option_info_to_tuple(&info[i], array != NULL && PyObject_IsTrue(array));
+        }
+        if (pyinfo == NULL){
+            Py_CLEAR(pylist);
+            break;
+        }
+        PyList_SET_ITEM(pylist, i, Py_BuildValue("(s#N)", key, len, pyinfo));
+    }
+    PyMem_Free(keys);
+    PyMem_Free(info);
+
+    return pylist;
+}
+
+static PyObject*
+libspud_find_options(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    const char *pattern;
+    int pattern_len;
+    PyObject *pylist;
+    char *keys;
+    SpudOptionHandle *handles;
+    int key_len;
+    int count;
+    int max_key_len;
+    int i;
+    int outcomeFindOptions;
+
+    if(!PyArg_ParseTuple(args, "s", &pattern)){
+        return NULL;
+    }
+    pattern_len = strlen(pattern);
+
+    // Find the number and length of the keys, and then fetch them
+    outcomeFindOptions = spud_context_find_options(context, pattern, pattern_len, NULL, 0, 0, &count, &max_key_len, NULL);
+    if (error_checking(outcomeFindOptions, "find options") == NULL){
+        return NULL;
+    }
+    key_len = (max_key_len > 0) ? max_key_len : 1;
+    keys = PyMem_Malloc(count * key_len + 1);
+    handles = PyMem_Malloc(count * sizeof(SpudOptionHandle) + 1);
+    if (keys == NULL || handles == NULL){
+        PyMem_Free(keys);
+        PyMem_Free(handles);
+        return PyErr_NoMemory();
+    }
+    spud_context_find_options(context, pattern, pattern_len, keys, key_len, count, &count, &max_key_len, handles);
+
+    pylist = PyList_New(count);
+    for (i = 0; pylist != NULL && i < count; i++){
+        const char *key = keys + i * key_len;
+        int len = key_len;
+        while (len > 0 && key[len - 1] == ' '){
+            len--;
+        }
+        PyList_SET_ITEM(pylist, i, PyString_FromStringAndSize(key, len));
+    }
+    PyMem_Free(keys);
+    PyMem_Free(handles);
+
+    return pylist;
+}
+
+static int
+copy_list_items(PyObject *pylist, int type, void *val)
+{   // this function copies the items of a list into doubles or ints, returning -1 on failure
+    Py_ssize_t j;
+
+    for (j = 0; j < PyList_GET_SIZE(pylist); j++){
+        PyObject *pelement = PyList_GET_ITEM(pylist, j);
+        if (type == SPUD_INT){
+            long element = PyInt_AsLong(pelement);
+            if (element == -1 && PyErr_Occurred()){
+                return -1;
+            }
+            if (element < INT_MIN || element > INT_MAX){
+                PyErr_SetString(PyExc_OverflowError, "Error: integer option value out of range in set options");
+                return -1;
+            }
+            ((int*) val)[j] = (int) element;
+        }
+        else{
+            double element = PyFloat_AsDouble(pelement);
+            if (element == -1.0 && PyErr_Occurred()){
+                return -1;
+            }
+            ((double*) val)[j] = element;
+        }
+    }
+
+    return 0;
+}
+
+static int
+option_info_from_value(PyObject *value, SpudOptionInfo *info)
+{   // this function describes a python value as option info for set options, copying its data
+    size_t itemsize;
+
+    info->rank = 0;
+    info->shape[0] = -1;
+    info->shape[1] = -1;
+    info->size = 1;
+
+    if (PyInt_Check(value)){ // an int
+        info->type = SPUD_INT;
+    }
+    else if (PyFloat_Check(value)){ // a double
+        info->type = SPUD_DOUBLE;
+    }
+    else if (PyString_Check(value)){ // a string
+        char *val = PyMem_Malloc(PyString_GET_SIZE(value) + 1);
+        if (val == NULL){
+            PyErr_NoMemory();
+            return -1;
+        }
+        memcpy(val, PyString_AS_STRING(value), PyString_GET_SIZE(value));
+        info->type = SPUD_STRING;
+        info->rank = 1;
+        info->shape[0] = PyString_GET_SIZE(value);
+        info->size = PyString_GET_SIZE(value);
+        info->data = val;
+        return 0;
+    }
+    else if (PyList_Check(value) && PyList_GET_SIZE(value) > 0){
+        PyObject *listElement = PyList_GET_ITEM(value, 0);
+        info->rank = 1;
+        info->shape[0] = PyList_GET_SIZE(value);
+        if (PyList_Check(listElement)){ // list of lists
+            Py_ssize_t i;
+            info->rank = 2;
+            info->shape[1] = PyList_GET_SIZE(listElement);
+            for (i = 0; i < PyList_GET_SIZE(value); i++){
+                PyObject *pysublist = PyList_GET_ITEM(value, i);
+                if (!PyList_Check(pysublist) || PyList_GET_SIZE(pysublist) != info->shape[1]){
+                    error_checking(SPUD_SHAPE_ERROR, "set options");
+                    return -1;
+                }
+            }
+            listElement = (info->shape[1] > 0) ? PyList_GET_ITEM(listElement, 0) : NULL;
+        }
+        if (listElement != NULL && PyInt_Check(listElement)){
+            info->type = SPUD_INT;
+        }
+        else if (listElement != NULL && PyFloat_Check(listElement)){
+            info->type = SPUD_DOUBLE;
+        }
+        else{
+            error_checking(SPUD_TYPE_ERROR, "set options");
+            return -1;
+        }
+        info->size = info->shape[0] * (info->rank == 2 ? info->shape[1] : 1);
+    }
+    else if (PyObject_CheckBuffer(value)){ // an array
+        Py_buffer view;
+        const char *format;
+        void *val;
+        if (PyObject_GetBuffer(value, &view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0){
+            return -1;
+        }
+        if (view.ndim < 1 || view.ndim > 2){
+            PyBuffer_Release(&view);
+            error_checking(SPUD_RANK_ERROR, "set options");
+            return -1;
+        }
+        info->type = buffer_option_type(&view, &format);
+        if (info->type < 0){
+            PyBuffer_Release(&view);
+            error_checking(SPUD_TYPE_ERROR, "set options");
+            return -1;
+        }
+        info->rank = view.ndim;
+        info->shape[0] = view.shape[0];
+        info->shape[1] = (view.ndim == 2) ? view.shape[1] : -1;
+        info->size = view.len / view.itemsize;
+        itemsize = (info->type == SPUD_DOUBLE) ? sizeof(double) : sizeof(int);
+        val = PyMem_Malloc(info->size * itemsize + 1);
+        if (val == NULL){
+            PyBuffer_Release(&view);
+            PyErr_NoMemory();
+            return -1;
+        }
+        info->data = val;
+        if (buffer_copy_items(&view, format, info->type, val) < 0){
+            PyBuffer_Release(&view);
+            return -1;
+        }
+        PyBuffer_Release(&view);
+        return 0;
+    }
+    else{
+        error_checking(SPUD_TYPE_ERROR, "set options");
+        return -1;
+    }
+
+    itemsize = (info->type == SPUD_DOUBLE) ? sizeof(double) : sizeof(int);
+    info->data = PyMem_Malloc(info->size * itemsize + 1);
+    if (info->data == NULL){
+        PyErr_NoMemory();
+        return -1;
+    }
+    if (info->rank == 0){
+        PyObject *pylist = PyList_New(1);
+        int outcome;
+        if (pylist == NULL){
+            return -1;
+        }
+        Py_INCREF(value);
+        PyList_SET_ITEM(pylist, 0, value);
+        outcome = copy_list_items(pylist, info->type, (void*) info->data);
+        Py_DECREF(pylist);
+        return outcome;
+    }
+    else if (info->rank == 1){
+        return copy_list_items(value, info->type, (void*) info->data);
+    }
+    else{
+        Py_ssize_t i;
+        for (i = 0; i < info->shape[0]; i++){
+            if (copy_list_items(PyList_GET_ITEM(value, i), info->type, (char*) info->data + i * info->shape[1] * itemsize) < 0){
+                return -1;
+            }
+        }
+        return 0;
+    }
+}
+
+static PyObject*
+libspud_set_options(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    PyObject *options;
+    PyObject *items;
+    PyObject *pykeys;
+    PyObject *result = NULL;
+    char *keys = NULL;
+    int key_len;
+    int key_count;
+    int i;
+    int *errors = NULL;
+    SpudOptionInfo *info = NULL;
+
+    if (!PyArg_ParseTuple(args, "O", &options)){
+        return NULL;
+    }
+    if (PyDict_Check(options)){
+        items = PyDict_Items(options);
+    }
+    else{
+        items = PySequence_Fast(options, "Error: set_options takes a dict or a sequence of (key, value) pairs.");
+    }
+    if (items == NULL){
+        return NULL;
+    }
+    key_count = PySequence_Fast_GET_SIZE(items);
+    pykeys = PyList_New(key_count);
+    info = PyMem_Malloc(key_count * sizeof(SpudOptionInfo) + 1);
+    errors = PyMem_Malloc(key_count * sizeof(int) + 1);
+    if (pykeys == NULL || info == NULL || errors == NULL){
+        if (pykeys != NULL){
+            PyErr_NoMemory();
+        }
+        goto cleanup;
+    }
+    memset(info, 0, key_count * sizeof(SpudOptionInfo));
+
+    for (i = 0; i < key_count; i++){
+        PyObject *item = PySequence_Fast_GET_ITEM(items, i);
+        PyObject *value;
+        if (!PySequence_Check(item) || PySequence_Size(item) != 2){
+            PyErr_SetString(PyExc_TypeError, "Error: set_options takes a dict or a sequence of (key, value) pairs.");
+            goto cleanup;
+        }
+        PyList_SET_ITEM(pykeys, i, PySequence_GetItem(item, 0));
+        value = PySequence_GetItem(item, 1);
+        if (value == NULL || PyList_GET_ITEM(pykeys, i) == NULL){
+            Py_XDECREF(value);
+            goto cleanup;
+        }
+        if (option_info_from_value(value, &info[i]) < 0){
+            Py_DECREF(value);
+            goto cleanup;
+        }
+        Py_DECREF(value);
+    }
+    keys = keys_to_array(pykeys, &key_len);
+    if (keys == NULL){
+        goto cleanup;
+    }
+
+    spud_context_set_options(context, keys, key_len, key_count, info, errors);
+
+    // New key warnings are not errors
+    for (i = 0; i < key_count; i++){
+        if (errors[i] > 0){
+            error_checking(errors[i], "set options");
+            goto cleanup;
+        }
+    }
+    Py_INCREF(Py_None);
+    result = Py_None;
+
+cleanup:
+    if (info != NULL){
+        for (i = 0; i < key_count; i++){
+            PyMem_Free((void*) info[i].data);
+        }
+    }
+    PyMem_Free(info);
+    PyMem_Free(errors);
+    PyMem_Free(keys);
+    Py_XDECREF(pykeys);
+    Py_DECREF(items);
+    return result;
+}
+
+static PyObject*
+libspud_write_options(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    SpudContext *context = get_context(self);
+    static char *kwlist[] = {"filename", "sidecar_threshold", NULL};
     char *filename;
     int filename_len;
+    Py_ssize_t sidecar_threshold = 0;
     int outcomeWriteOptions;
 
-    firstArg = PyTuple_GetItem(args, 0);
-    PyArg_Parse(firstArg, "s", &filename);
+    if(!PyArg_ParseTupleAndKeywords(args, kwargs, "s|n", kwlist, &filename, &sidecar_threshold)){
+        return NULL;
+    }
+    if(sidecar_threshold < 0){
+        PyErr_SetString(PyExc_ValueError, "sidecar_threshold must not be negative");
+        return NULL;
+    }
     filename_len = strlen(filename);
-    outcomeWriteOptions = spud_write_options (filename, filename_len);
+    outcomeWriteOptions = spud_context_write_options_sidecar(context, filename, filename_len, sidecar_threshold);
     return error_checking(outcomeWriteOptions, "write options");
 }
 
+static PyObject*
+libspud_write_snapshot(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    char *filename;
+    int outcomeWriteSnapshot;
+
+    if (!PyArg_ParseTuple(args, "s", &filename)){
+        return NULL;
+    }
+    outcomeWriteSnapshot = spud_context_write_snapshot(context, filename, strlen(filename));
+    return error_checking(outcomeWriteSnapshot, "write snapshot");
+}
+
+static PyObject*
+libspud_freeze_options(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    char *filename;
+    int outcome;
+
+    if (!PyArg_ParseTuple(args, "s", &filename)){
+        return NULL;
+    }
+    outcome = spud_context_freeze_options(context, filename, strlen(filename));
+    return error_checking(outcome, "freeze options");
+}
+
+static PyObject*
+libspud_load_frozen_options(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    char *filename;
+    int outcome;
+
+    if (!PyArg_ParseTuple(args, "s", &filename)){
+        return NULL;
+    }
+    outcome = spud_context_load_frozen_options(context, filename, strlen(filename));
+    return error_checking(outcome, "load frozen options");
+}
+
+static PyObject*
+libspud_load_lazy_options(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    char *filename;
+    int outcome;
+
+    if (!PyArg_ParseTuple(args, "s", &filename)){
+        return NULL;
+    }
+    outcome = spud_context_load_lazy_options(context, filename, strlen(filename));
+    return error_checking(outcome, "load lazy options");
+}
+
+static PyObject*
+libspud_start_profiling(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    char *filename;
+
+    if (!PyArg_ParseTuple(args, "s", &filename)){
+        return NULL;
+    }
+    spud_context_start_profiling(context, filename, strlen(filename));
+
+    Py_RETURN_NONE;
+}
+
+static PyObject*
+libspud_stop_profiling(PyObject *self, PyObject *args)
+{
+    SpudContext *context = get_context(self);
+    int outcome;
+
+    outcome = spud_context_stop_profiling(context);
+    return error_checking(outcome, "stop profiling");
+}
+
 static PyMethodDef libspudMethods[] = {
     {"load_options",  libspud_load_options, METH_VARARGS,
      PyDoc_STR("Reads the xml file into the options tree.")},
@@ -800,6 +1892,8 @@ static PyMethodDef libspudMethods[] = {
      PyDoc_STR("get number of children under key.")},
     {"get_child_name",  libspud_get_child_name, METH_VARARGS,
      PyDoc_STR("Get name of the indexth child of key.")},
+    {"get_child_names",  libspud_get_child_names, METH_VARARGS,
+     PyDoc_STR("Get the names of all children of key, in order, in one call.")},
     {"option_count",  libspud_option_count, METH_VARARGS,
      PyDoc_STR("Return the number of options matching key.")},
     {"have_option",  libspud_have_option, METH_VARARGS,
@@ -810,14 +1904,66 @@ static PyMethodDef libspudMethods[] = {
      PyDoc_STR("Return the rank of option specified by key.")},
     {"get_option_shape",  libspud_get_option_shape, METH_VARARGS,
      PyDoc_STR("Return the shape of option specified by key.")},
-    {"get_option",  libspud_get_option, METH_VARARGS,
-     PyDoc_STR("Retrives option values from the options dictionary.")},
+    {"get_option",  (PyCFunction) libspud_get_option, METH_VARARGS | METH_KEYWORDS,
+     PyDoc_STR("Retrives option values from the options dictionary. If array is true, \
+     lists and tensors of ints or doubles are returned as an OptionArray, which supports \
+     the buffer protocol, rather than as lists.")},
     {"set_option",  libspud_set_option, METH_VARARGS,
-     PyDoc_STR("Sets options in the options tree.")},
-    {"write_options",  libspud_write_options, METH_VARARGS,
-     PyDoc_STR("Write options tree out to the xml file specified by name.")},
+     PyDoc_STR("Sets options in the options tree. Objects supporting the buffer protocol, \
+     such as NumPy arrays, with one or two C contiguous dimensions of ints or doubles are set in bulk.")},
+    {"get_options",  (PyCFunction) libspud_get_options, METH_VARARGS | METH_KEYWORDS,
+     PyDoc_STR("Returns a list of (type, rank, shape, value) tuples for the options at a \
+     sequence of keys, or None for missing keys, in one call. array is as for get_option.")},
+    {"get_options_by_prefix",  (PyCFunction) libspud_get_options_by_prefix, METH_VARARGS | METH_KEYWORDS,
+     PyDoc_STR("Returns a list of (key, (type, rank, shape, value)) pairs for all options \
+     below prefix, in document order, in one call. array is as for get_option.")},
+    {"find_options",  libspud_find_options, METH_VARARGS,
+     PyDoc_STR("Returns a list of the keys of all options matching a pattern, such as \
+     /material_phase/*/scalar_field::*/prognostic, in document order, in one tree walk.")},
+    {"set_options",  libspud_set_options, METH_VARARGS,
+     PyDoc_STR("Sets the options in a dict, or a sequence of (key, value) pairs, in one call. \
+     Values are as for set_option.")},
+    {"write_options",  (PyCFunction) libspud_write_options, METH_VARARGS | METH_KEYWORDS,
+     PyDoc_STR("Write options tree out to the xml file specified by name. Arrays of at \
+     least sidecar_threshold values, if given, are written to .npy files alongside it.")},
+    {"write_snapshot",  libspud_write_snapshot, METH_VARARGS,
+     PyDoc_STR("Write a binary snapshot of the options tree next to the xml file \
+     specified by name, which load_options uses while the xml file is unchanged.")},
+    {"freeze_options",  libspud_freeze_options, METH_VARARGS,
+     PyDoc_STR("Write the options tree out to a read-only options image file specified \
+     by name, for load_frozen_options.")},
+    {"load_frozen_options",  libspud_load_frozen_options, METH_VARARGS,
+     PyDoc_STR("Map the options image file specified by name, written by freeze_options, \
+     in place of the options tree. Options are read from the image without copying it, \
+     until they are changed.")},
+    {"load_lazy_options",  libspud_load_lazy_options, METH_VARARGS,
+     PyDoc_STR("Reads the xml file into the options tree, keeping real and integer \
+     data as text until it is first read.")},
+    {"start_profiling",  libspud_start_profiling, METH_VARARGS,
+     PyDoc_STR("Start recording the lookups, misses, lookup time and changes of each key. \
+     The report is written to the file specified by name, as JSON if the name ends in .json \
+     and as CSV otherwise, on clear_options and stop_profiling.")},
+    {"stop_profiling",  libspud_stop_profiling, METH_VARARGS,
+     PyDoc_STR("Write the profiling report and stop profiling.")},
     {"delete_option",  libspud_delete_option, METH_VARARGS,
      PyDoc_STR("Delete options at the specified key.")},
+    {"copy_option",  libspud_copy_option, METH_VARARGS,
+     PyDoc_STR("Copy the option at the first key, and the options below it, to the second key.")},
+    {"get_generation",  libspud_get_generation, METH_VARARGS,
+     PyDoc_STR("Get the generation of the options, which increases with every change.")},
+    {"have_changed",  libspud_have_changed, METH_VARARGS,
+     PyDoc_STR("Test if the option at the specified key, or any option below it, has \
+     changed since the specified generation.")},
+    {"get_changes",  libspud_get_changes, METH_VARARGS,
+     PyDoc_STR("Get a list of (key, change) pairs for the options changed since the \
+     specified generation, in the order in which they were last changed. change is one \
+     of 'set', 'add', 'move' and 'delete'.")},
+    {"write_changes",  libspud_write_changes, METH_VARARGS,
+     PyDoc_STR("Write the options changed since the specified generation to the file \
+     specified by name, to be applied by load_changes.")},
+    {"load_changes",  libspud_load_changes, METH_VARARGS,
+     PyDoc_STR("Apply the changes in the file specified by name, written by write_changes, \
+     to the options tree.")},
     {"set_option_attribute",  libspud_set_option_attribute, METH_VARARGS,
      PyDoc_STR("As set_option, but additionally attempts to mark the option at the \
      specified key as an attribute. Set_option_attribute accepts only string data for val.")},
@@ -836,6 +1982,17 @@ initlibspud(void)
     if (m == NULL)
         return;
 
+    if (PyType_Ready(&OptionArrayType) < 0)
+        return;
+    Py_INCREF(&OptionArrayType);
+    PyModule_AddObject(m, "OptionArray", (PyObject*) &OptionArrayType);
+
+    ContextType.tp_methods = libspudMethods;
+    if (PyType_Ready(&ContextType) < 0)
+        return;
+    Py_INCREF(&ContextType);
+    PyModule_AddObject(m, "Context", (PyObject*) &ContextType);
+
     SpudError = PyErr_NewException("Spud.error", NULL, NULL);
     SpudNewKeyWarning = PyErr_NewException("SpudNewKey.warning", NULL, NULL);
     SpudKeyError = PyErr_NewException("SpudKey.error", NULL, NULL);
@@ -1,4 +1,7 @@
+import json
 import libspud
+import os
+import struct
 
 libspud.load_options('test.flml')
 
@@ -8,6 +11,9 @@ assert libspud.get_option('/timestepping/timestep') == 0.025
 
 assert libspud.get_number_of_children('/geometry') == 5
 assert libspud.get_child_name('geometry', 0) == "dimension"
+assert libspud.get_child_names('/geometry')[0] == "dimension"
+assert libspud.get_child_names('/geometry') == \
+  [libspud.get_child_name('/geometry', i) for i in range(libspud.get_number_of_children('/geometry'))]
 
 assert libspud.option_count('/problem_type') == 1
 assert libspud.have_option('/problem_type')
@@ -70,6 +76,16 @@ except libspud.SpudNewKeyWarning, e:
 
 assert libspud.get_option('/foo/bar') == "foobar"
   
+libspud.copy_option('/foo', '/foo_copy')
+assert libspud.get_option('/foo_copy/bar') == "foobar"
+libspud.delete_option('/foo_copy')
+
+try:
+  libspud.copy_option('/foo', '/geometry')
+  assert False
+except libspud.SpudKeyError, e:
+  pass
+
 libspud.delete_option('/foo')
 assert libspud.option_count('/foo') == 0
 
@@ -119,6 +135,151 @@ try:
   assert False
 except libspud.SpudError, e:
   pass
-  
+
+libspud.set_option('/test',[1.0,2.0,3.0])
+
+array = libspud.get_option('/test', array=True)
+assert isinstance(array, libspud.OptionArray)
+assert memoryview(array).format == 'd'
+assert memoryview(array).shape == (3,)
+assert struct.unpack('3d', memoryview(array).tobytes()) == (1.0,2.0,3.0)
+
+libspud.set_option('/test',[[1,2,3],[4,5,6]])
+
+array = libspud.get_option('/test', array=True)
+assert memoryview(array).format == 'i'
+assert memoryview(array).shape == (2,3)
+assert struct.unpack('6i', memoryview(array).tobytes()) == (1,2,3,4,5,6)
+
+libspud.set_option('/test',[0])
+libspud.set_option('/test',memoryview(array))
+
+assert libspud.get_option('/test') == [[1,2,3],[4,5,6]]
+
+try:
+  libspud.set_option('/test',bytearray('Hallo'))
+  assert False
+except libspud.SpudTypeError, e:
+  pass
+
+libspud.set_options({'/batch/real': 4.3, '/batch/list': [1, 2, 3], '/batch/string': "Hallo"})
+libspud.set_options([('/batch/tensor', [[1.0, 2.0], [3.0, 4.0]]), ('/batch/array', memoryview(array))])
+
+assert libspud.get_options(['/batch/real', '/batch/list', '/batch/missing']) == \
+  [(float, 0, (-1, -1), 4.3), (int, 1, (3, -1), [1, 2, 3]), None]
+assert libspud.get_options(['/batch/tensor'])[0][3] == [[1.0, 2.0], [3.0, 4.0]]
+assert libspud.get_options(['/batch/array'])[0][3] == [[1, 2, 3], [4, 5, 6]]
+
+options = libspud.get_options_by_prefix('/batch', array=True)
+assert [key for key, info in options][3:] == ['/batch/tensor', '/batch/array']
+options = dict(options)
+assert sorted(options.keys()) == \
+  ['/batch/array', '/batch/list', '/batch/real', '/batch/string', '/batch/tensor']
+assert options['/batch/string'] == (str, 1, (5, -1), "Hallo")
+assert memoryview(options['/batch/array'][3]).shape == (2, 3)
+
+try:
+  libspud.set_options({'/batch/tensor': [[1.0, 2.0], [3.0]]})
+  assert False
+except libspud.SpudShapeError, e:
+  pass
+
+try:
+  libspud.get_options_by_prefix('/batch/missing')
+  assert False
+except libspud.SpudKeyError, e:
+  pass
+
+assert sorted(libspud.find_options('/b*/*t*')) == ['/batch/list', '/batch/string', '/batch/tensor']
+assert libspud.find_options('/batch/missing/*') == []
+
+try:
+  libspud.find_options('/batch[x]')
+  assert False
+except libspud.SpudKeyError, e:
+  pass
+
+libspud.write_snapshot('test_out.flml')
+libspud.load_options('test_out.flml')
+assert libspud.get_option('/batch/real') == 4.3
+os.remove('test_out.flml.snapshot')
+
+libspud.freeze_options('test_out.img')
+libspud.clear_options()
+libspud.load_frozen_options('test_out.img')
+assert libspud.get_option('/batch/real') == 4.3
+assert memoryview(libspud.get_option('/batch/array', array=True)).shape == (2, 3)
+libspud.set_option('/batch/real', 4.4)
+assert libspud.get_option('/batch/real') == 4.4
+assert libspud.get_option('/batch/string') == "Hallo"
+os.remove('test_out.img')
+
+libspud.write_options('test_lazy.flml')
+libspud.load_lazy_options('test_lazy.flml')
+assert libspud.get_option('/batch/real') == 4.4
+assert memoryview(libspud.get_option('/batch/array', array=True)).shape == (2, 3)
+assert libspud.get_option('/batch/string') == "Hallo"
+os.remove('test_lazy.flml')
+
+libspud.write_options('test_compressed.flml.gz')
+assert open('test_compressed.flml.gz', 'rb').read(2) == '\x1f\x8b'
+libspud.load_options('test_compressed.flml.gz')
+assert libspud.get_option('/batch/array') == [[1,2,3],[4,5,6]]
+os.remove('test_compressed.flml.gz')
+
+libspud.write_options('test_sidecar.flml', sidecar_threshold=6)
+sidecars = sorted(f for f in os.listdir('.') if f.startswith('test_sidecar.flml.'))
+assert len(sidecars) > 0
+header = open(sidecars[0], 'rb').read(10)
+assert header[:6] == '\x93NUMPY'
+assert (10 + struct.unpack('<H', header[8:10])[0]) % 64 == 0
+libspud.load_options('test_sidecar.flml')
+assert libspud.get_option('/batch/array') == [[1,2,3],[4,5,6]]
+assert libspud.get_option('/batch/list') == [1,2,3]
+for f in sidecars + ['test_sidecar.flml']:
+  os.remove(f)
+
+generation = libspud.get_generation()
+libspud.set_option('/batch/real', 4.5)
+assert libspud.have_changed('/batch/real', generation)
+assert not libspud.have_changed('/batch/string', generation)
+assert libspud.get_changes(generation) == [('/batch/real', 'set')]
+libspud.write_changes('test_changes.xml', generation)
+libspud.set_option('/batch/real', 4.4)
+libspud.load_changes('test_changes.xml')
+assert libspud.get_option('/batch/real') == 4.5
+os.remove('test_changes.xml')
+
+try:
+  libspud.write_snapshot('missing.flml')
+  assert False
+except libspud.SpudFileError, e:
+  pass
+
+context = libspud.Context()
+other_context = libspud.Context()
+for c, value in [(context, 1), (other_context, 2)]:
+  try:
+    c.set_option('/context/value', value)
+    assert False
+  except libspud.SpudNewKeyWarning, e:
+    pass
+assert context.get_option('/context/value') == 1
+assert other_context.get_option('/context/value') == 2
+assert not libspud.have_option('/context')
+context.clear_options()
+assert not context.have_option('/context')
+assert other_context.have_option('/context/value')
+del context, other_context
+
+libspud.start_profiling('test_profile.json')
+libspud.get_option('/batch/real')
+libspud.get_option('/batch/real')
+assert not libspud.have_option('/batch/missing')
+libspud.stop_profiling()
+profile = dict((entry['key'], entry) for entry in json.load(open('test_profile.json')))
+assert profile['/batch/real']['hits'] >= 2
+assert profile['/batch/missing']['misses'] == 1
+os.remove('test_profile.json')
 
 print "All tests passed!"
@@ -0,0 +1,129 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+
+// Checkpoints options in which a few options change between checkpoints, as
+// an adaptive run changing its timestep and adapt settings does, first by
+// writing all of the options with write_options and then by writing only the
+// changes with write_changes. Reports the mean time and file size of each
+// checkpoint, for options holding 10^2 to 10^max_exponent fields.
+//
+// Usage: benchmark_checkpoint [max_exponent] [checkpoints]
+
+#include <sys/time.h>
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include "spud"
+
+using namespace std;
+
+const char* filename = "benchmark_checkpoint.xml";
+const char* changes_filename = "benchmark_checkpoint_changes.xml";
+
+double wall_time(){
+  timeval now;
+  gettimeofday(&now, NULL);
+
+  return now.tv_sec + now.tv_usec * 1.0e-6;
+}
+
+size_t file_bytes(const string& name){
+  FILE* file = fopen(name.c_str(), "rb");
+  if(file == NULL){
+    return 0;
+  }
+  fseek(file, 0, SEEK_END);
+  size_t bytes = ftell(file);
+  fclose(file);
+
+  return bytes;
+}
+
+void build_options(const int& fields){
+  Spud::clear_options();
+  Spud::set_option("/timestepping/timestep", 1.0);
+  Spud::set_option("/mesh_adaptivity/period", 10);
+  for(int f = 0;f < fields;f++){
+    ostringstream field;
+    field << "/material_phase::Fluid/scalar_field::Field" << f << "/prognostic";
+    Spud::set_option(field.str() + "/initial_condition::WholeMesh/constant", 0.0);
+    Spud::set_option(field.str() + "/boundary_conditions::Top/type::dirichlet/constant", 1.0);
+    Spud::set_option(field.str() + "/temporal_discretisation/theta", 0.5);
+  }
+}
+
+// Change the options as a run does between checkpoints
+void advance(const int& checkpoint){
+  Spud::set_option("/timestepping/timestep", 1.0 / (checkpoint + 2));
+  Spud::set_option("/mesh_adaptivity/period", 10 + checkpoint);
+}
+
+int main(int argc, char** argv){
+  int max_exponent = argc > 1 ? atoi(argv[1]) : 5;
+  int checkpoints = argc > 2 ? atoi(argv[2]) : 10;
+
+  printf("%-10s %14s %14s %14s %14s\n", "fields", "full (s)", "full bytes", "changes (s)", "changes bytes");
+  int fields = 100;
+  for(int exponent = 2;exponent <= max_exponent;exponent++, fields *= 10){
+    build_options(fields);
+
+    double full_time = 0.0, changes_time = 0.0;
+    size_t full_size = 0, changes_size = 0;
+    for(int i = 0;i < checkpoints;i++){
+      long generation = Spud::get_generation();
+      advance(i);
+
+      // Files are removed rather than overwritten, as some file systems
+      // flush a file to disk when it is truncated
+      remove(changes_filename);
+      remove(filename);
+
+      double start = wall_time();
+      Spud::write_changes(changes_filename, generation);
+      changes_time += wall_time() - start;
+      changes_size = file_bytes(changes_filename);
+
+      start = wall_time();
+      Spud::write_options(filename);
+      full_time += wall_time() - start;
+      full_size = file_bytes(filename);
+    }
+
+    printf("%-10d %14.6f %14lu %14.6f %14lu\n", fields, full_time / checkpoints, (unsigned long)full_size,
+      changes_time / checkpoints, (unsigned long)changes_size);
+  }
+  remove(filename);
+  remove(changes_filename);
+  Spud::clear_options();
+
+  return 0;
+}
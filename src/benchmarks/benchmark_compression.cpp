@@ -0,0 +1,130 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+// Writes an options file of many named fields as plain text and compressed
+// with each supported format, and reports the size of each file and the time
+// to load it from the local disk. The time to load it from a network
+// filesystem is estimated by adding the time to transfer the file at the
+// supplied bandwidth, in MB/s. To measure this instead, give a directory on
+// the network filesystem to write the files to.
+//
+// Usage: benchmark_compression [fields] [bandwidth] [directory]
+
+#include <sys/stat.h>
+#include <sys/time.h>
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include "spud"
+
+using namespace std;
+
+const char* suffixes[] = {"", ".gz", ".bz2", ".zst"};
+const size_t n_suffixes = sizeof(suffixes) / sizeof(suffixes[0]);
+
+double wall_time(){
+  timeval now;
+  gettimeofday(&now, NULL);
+
+  return now.tv_sec + now.tv_usec * 1.0e-6;
+}
+
+size_t file_size(const string& filename){
+  struct stat file_stat;
+  return stat(filename.c_str(), &file_stat) == 0 ? file_stat.st_size : 0;
+}
+
+// Set the options to fields named fields, each with a few scalar options and
+// a short array of random values
+void set_options(const string& filename, const int& fields){
+  FILE* file = fopen(filename.c_str(), "w");
+  if(file == NULL){
+    cerr << "Failed to open " << filename << endl;
+    exit(1);
+  }
+  fprintf(file, "<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n<options/>\n");
+  fclose(file);
+
+  Spud::clear_options();
+  Spud::load_options(filename);
+  srand(42);
+  vector<double> val(20);
+  for(int i = 0;i < fields;i++){
+    ostringstream field;
+    field << "/material_phase::Phase" << i % 10 << "/scalar_field::Field" << i;
+    Spud::set_option(field.str() + "/prognostic/mesh/name", "VelocityMesh");
+    Spud::set_option(field.str() + "/prognostic/timestep", 0.025);
+    Spud::set_option(field.str() + "/prognostic/iterations", i % 7 + 1);
+    for(size_t j = 0;j < val.size();j++){
+      val[j] = rand() / (double)RAND_MAX;
+    }
+    Spud::set_option(field.str() + "/prognostic/initial_condition/values", val);
+  }
+}
+
+int main(int argc, char** argv){
+  int fields = argc > 1 ? atoi(argv[1]) : 20000;
+  double bandwidth = argc > 2 ? atof(argv[2]) : 100.0;
+  string directory = argc > 3 ? string(argv[3]) + "/" : "";
+  const string filename = directory + "benchmark_compression.xml";
+
+  set_options(filename, fields);
+
+  printf("%8s %12s %12s %12s %14s\n", "format", "bytes", "write (s)", "load (s)", "network (s)");
+  for(size_t i = 0;i < n_suffixes;i++){
+    const string compressed_filename = filename + suffixes[i];
+    double start = wall_time();
+    if(Spud::write_options(compressed_filename) != Spud::SPUD_NO_ERROR){
+      printf("%8s %12s\n", suffixes[i], "unsupported");
+      continue;
+    }
+    double write_time = wall_time() - start;
+
+    Spud::clear_options();
+    start = wall_time();
+    if(Spud::load_options(compressed_filename) != Spud::SPUD_NO_ERROR){
+      cerr << "Failed to load " << compressed_filename << endl;
+      exit(1);
+    }
+    double load_time = wall_time() - start;
+    size_t size = file_size(compressed_filename);
+
+    printf("%8s %12lu %12.6f %12.6f %14.6f\n", i == 0 ? "plain" : suffixes[i], (unsigned long)size, write_time, load_time,
+      load_time + size / (bandwidth * 1.0e6));
+    if(i > 0){
+      remove(compressed_filename.c_str());
+    }
+  }
+  Spud::clear_options();
+  remove(filename.c_str());
+
+  return 0;
+}
@@ -0,0 +1,140 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+
+// Clones a template subtree many times with copy_option, as tools building
+// per-material or per-field blocks do, then changes one option deep inside
+// each clone, moves each clone, and deletes them all. Reports the mean time
+// of each step per clone and the memory held by the options after cloning and
+// after changing the clones, for templates of depth 2 to max_depth with
+// fanout children per element.
+//
+// Usage: benchmark_copy [max_depth] [fanout] [clones]
+
+#include <sys/time.h>
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <sstream>
+#include <string>
+
+#include "spud"
+
+using namespace std;
+
+double wall_time(){
+  timeval now;
+  gettimeofday(&now, NULL);
+
+  return now.tv_sec + now.tv_usec * 1.0e-6;
+}
+
+size_t arena_bytes(){
+  size_t allocations, deallocations, system_allocations, bytes_in_use, bytes_reserved;
+  Spud::get_allocation_statistics(allocations, deallocations, system_allocations, bytes_in_use, bytes_reserved);
+
+  return bytes_in_use;
+}
+
+// Build a template at key with depth levels of fanout children, each holding
+// a real vector, and return the number of elements in the template
+size_t build_template(const string& key, const int& depth, const int& fanout){
+  vector<double> val(10, 1.0);
+  Spud::set_option(key + "/value", val);
+  size_t count = 2;
+  if(depth > 1){
+    for(int i = 0;i < fanout;i++){
+      ostringstream child;
+      child << key << "/child::Child" << i;
+      count += build_template(child.str(), depth - 1, fanout);
+    }
+  }
+
+  return count;
+}
+
+// The key of an option at the bottom of a template of the supplied depth
+string deep_key(const string& key, const int& depth){
+  string deep = key;
+  for(int i = 1;i < depth;i++){
+    deep += "/child::Child0";
+  }
+
+  return deep + "/value";
+}
+
+string clone_key(const string& prefix, const int& i){
+  ostringstream key;
+  key << prefix << "::Clone" << i;
+
+  return key.str();
+}
+
+int main(int argc, char** argv){
+  int max_depth = argc > 1 ? atoi(argv[1]) : 5;
+  int fanout = argc > 2 ? atoi(argv[2]) : 4;
+  int clones = argc > 3 ? atoi(argv[3]) : 100;
+
+  printf("%6s %10s %12s %12s %12s %12s %14s %14s\n", "depth", "elements", "copy (s)", "change (s)", "move (s)", "delete (s)", "copied bytes", "changed bytes");
+  for(int depth = 2;depth <= max_depth;depth++){
+    Spud::clear_options();
+    size_t elements = build_template("/template", depth, fanout);
+    size_t base_bytes = arena_bytes();
+
+    double start = wall_time();
+    for(int i = 0;i < clones;i++){
+      Spud::copy_option("/template", clone_key("/material", i));
+    }
+    double copy_time = wall_time() - start;
+    size_t copied_bytes = arena_bytes() - base_bytes;
+
+    start = wall_time();
+    for(int i = 0;i < clones;i++){
+      Spud::set_option(deep_key(clone_key("/material", i), depth), vector<double>(10, 2.0));
+    }
+    double change_time = wall_time() - start;
+    size_t changed_bytes = arena_bytes() - base_bytes;
+
+    start = wall_time();
+    for(int i = 0;i < clones;i++){
+      Spud::move_option(clone_key("/material", i), clone_key("/moved", i));
+    }
+    double move_time = wall_time() - start;
+
+    start = wall_time();
+    for(int i = 0;i < clones;i++){
+      Spud::delete_option(clone_key("/moved", i));
+    }
+    double delete_time = wall_time() - start;
+
+    printf("%6d %10lu %12.3e %12.3e %12.3e %12.3e %14lu %14lu\n", depth, (unsigned long)elements, copy_time / clones, change_time / clones,
+      move_time / clones, delete_time / clones, (unsigned long)copied_bytes, (unsigned long)changed_bytes);
+  }
+  Spud::clear_options();
+
+  return 0;
+}
@@ -0,0 +1,167 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+// Loads an options file holding a few scalar options and many large real
+// arrays, as a tool reading only a few keys of a coupled configuration does,
+// with load_options and with load_lazy_options. Reports the time to load the
+// file and read the scalar options, and the time to then read every array,
+// for 100 arrays of 10^2 to 10^max_exponent values each.
+//
+// Usage: benchmark_lazy [max_exponent]
+
+#include <sys/time.h>
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include "spud"
+
+using namespace std;
+
+const char* filename = "benchmark_lazy.xml";
+const int arrays = 100;
+const int scalars = 3;
+
+double wall_time(){
+  timeval now;
+  gettimeofday(&now, NULL);
+
+  return now.tv_sec + now.tv_usec * 1.0e-6;
+}
+
+string array_key(const int& i){
+  ostringstream key;
+  key << "/component::Component" << i << "/field/values";
+  return key.str();
+}
+
+string scalar_key(const int& i){
+  ostringstream key;
+  key << "/timestepping/parameter::Parameter" << i;
+  return key.str();
+}
+
+// Write an options file holding the scalar options and arrays of size random
+// values each, and return the size of the file in bytes
+size_t write_options(const size_t& size){
+  FILE* file = fopen(filename, "w");
+  if(file == NULL){
+    cerr << "Failed to open " << filename << endl;
+    exit(1);
+  }
+
+  fprintf(file, "<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n<options>\n  <timestepping>\n");
+  for(int i = 0;i < scalars;i++){
+    fprintf(file, "    <parameter name=\"Parameter%d\">\n      <real_value rank=\"0\">%d.5</real_value>\n    </parameter>\n", i, i);
+  }
+  fprintf(file, "  </timestepping>\n");
+  srand(42);
+  for(int i = 0;i < arrays;i++){
+    fprintf(file, "  <component name=\"Component%d\">\n    <field>\n      <values>\n", i);
+    fprintf(file, "        <real_value rank=\"1\" shape=\"%lu\">", (unsigned long)size);
+    for(size_t j = 0;j < size;j++){
+      fprintf(file, j > 0 ? " %.17g" : "%.17g", rand() / (double)RAND_MAX);
+    }
+    fprintf(file, "</real_value>\n      </values>\n    </field>\n  </component>\n");
+  }
+  fprintf(file, "</options>\n");
+  long bytes = ftell(file);
+  fclose(file);
+
+  return bytes;
+}
+
+// Load the options, lazily or not, and read the scalar options. Returns the
+// time taken.
+double load_and_read_scalars(const bool& lazy){
+  Spud::clear_options();
+  double start = wall_time();
+  Spud::OptionError load_err = lazy ? Spud::load_lazy_options(filename) : Spud::load_options(filename);
+  if(load_err != Spud::SPUD_NO_ERROR){
+    cerr << "Failed to load " << filename << endl;
+    exit(1);
+  }
+  for(int i = 0;i < scalars;i++){
+    double val;
+    if(Spud::get_option(scalar_key(i), val) != Spud::SPUD_NO_ERROR or val != i + 0.5){
+      cerr << "Incorrect value for " << scalar_key(i) << endl;
+      exit(1);
+    }
+  }
+
+  return wall_time() - start;
+}
+
+// Read every array, and return the time taken
+double read_arrays(const size_t& size){
+  double start = wall_time();
+  for(int i = 0;i < arrays;i++){
+    vector<double> val;
+    if(Spud::get_option(array_key(i), val) != Spud::SPUD_NO_ERROR or val.size() != size){
+      cerr << "Incorrect value for " << array_key(i) << endl;
+      exit(1);
+    }
+  }
+
+  return wall_time() - start;
+}
+
+int main(int argc, char** argv){
+  int max_exponent = argc > 1 ? atoi(argv[1]) : 5;
+
+  printf("%10s %12s %12s %12s %12s %12s %12s\n", "values", "file bytes", "eager (s)", "lazy (s)", "speedup", "unconverted", "read all (s)");
+  size_t size = 100;
+  for(int exponent = 2;exponent <= max_exponent;exponent++, size *= 10){
+    size_t bytes = write_options(size);
+
+    double eager_time = load_and_read_scalars(false);
+    double lazy_time = load_and_read_scalars(true);
+
+    vector<string> keys;
+    vector<size_t> sizes;
+    vector<Spud::logical_t> converted;
+    Spud::get_lazy_statistics(keys, sizes, converted);
+    size_t unconverted = 0;
+    for(size_t i = 0;i < keys.size();i++){
+      if(!converted[i]){
+        unconverted += sizes[i];
+      }
+    }
+
+    double read_time = read_arrays(size);
+
+    printf("%10lu %12lu %12.4f %12.4f %12.1f %12lu %12.4f\n", (unsigned long)(size * arrays), (unsigned long)bytes, eager_time, lazy_time, eager_time / lazy_time,
+      (unsigned long)unconverted, read_time);
+  }
+  Spud::clear_options();
+  remove(filename);
+
+  return 0;
+}
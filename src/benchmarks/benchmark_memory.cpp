@@ -0,0 +1,211 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+
+// Reports the heap memory held by a loaded options tree, per option node, for
+// a synthetic model configuration of 10^2 to 10^max_exponent fields and for
+// any options files given on the command line. Each field is laid out as in a
+// typical Fluidity configuration, so that names such as __value, rank, shape,
+// name and prescribed repeat many times. Heap memory is measured by counting
+// the bytes passing through operator new and operator delete, together with
+// the memory taken from the system for the arena holding the options tree.
+//
+// Usage: benchmark_memory [max_exponent] [options files...]
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <new>
+#include <string>
+
+#include "spud"
+
+using namespace std;
+
+const char* filename = "benchmark_memory.xml";
+
+// Heap bytes currently allocated through operator new
+size_t live_bytes = 0;
+
+// Each allocation is preceded by its size, padded to keep the alignment of
+// the allocation itself
+const size_t header_size = 16;
+
+void* counted_new(size_t size){
+  char* block = (char*)malloc(size + header_size);
+  if(block == NULL){
+    throw bad_alloc();
+  }
+  *(size_t*)block = size;
+  live_bytes += size;
+
+  return block + header_size;
+}
+
+void counted_delete(void* ptr){
+  if(ptr == NULL){
+    return;
+  }
+  char* block = (char*)ptr - header_size;
+  live_bytes -= *(size_t*)block;
+  free(block);
+}
+
+void* operator new(size_t size){
+  return counted_new(size);
+}
+
+void* operator new[](size_t size){
+  return counted_new(size);
+}
+
+void operator delete(void* ptr) throw(){
+  counted_delete(ptr);
+}
+
+void operator delete[](void* ptr) throw(){
+  counted_delete(ptr);
+}
+
+// Write an options file containing size fields, and return the size of the
+// file in bytes
+size_t write_options_file(const size_t& size){
+  FILE* file = fopen(filename, "w");
+  if(file == NULL){
+    cerr << "Failed to open " << filename << endl;
+    exit(1);
+  }
+
+  fprintf(file, "<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n<fluidity_options>\n");
+  fprintf(file, "  <material_phase name=\"Fluid\">\n");
+  srand(42);
+  for(size_t i = 0;i < size;i++){
+    fprintf(file, "    <scalar_field rank=\"0\" name=\"Tracer%lu\">\n", (unsigned long)i);
+    if(i % 2 == 0){
+      fprintf(file, "      <prescribed>\n");
+      fprintf(file, "        <mesh name=\"VelocityMesh\"/>\n");
+      fprintf(file, "        <value name=\"WholeMesh\">\n");
+      fprintf(file, "          <constant>\n            <real_value rank=\"0\">%.17g</real_value>\n          </constant>\n", rand() / (double)RAND_MAX);
+      fprintf(file, "        </value>\n");
+      fprintf(file, "        <output/>\n        <stat/>\n        <detectors>\n          <exclude_from_detectors/>\n        </detectors>\n");
+      fprintf(file, "      </prescribed>\n");
+    }else{
+      fprintf(file, "      <prognostic>\n");
+      fprintf(file, "        <mesh name=\"VelocityMesh\"/>\n");
+      fprintf(file, "        <equation name=\"AdvectionDiffusion\"/>\n");
+      fprintf(file, "        <spatial_discretisation>\n          <continuous_galerkin>\n");
+      fprintf(file, "            <stabilisation>\n              <no_stabilisation/>\n            </stabilisation>\n");
+      fprintf(file, "          </continuous_galerkin>\n");
+      fprintf(file, "          <conservative_advection>\n            <real_value rank=\"0\">%.17g</real_value>\n          </conservative_advection>\n", rand() / (double)RAND_MAX);
+      fprintf(file, "        </spatial_discretisation>\n");
+      fprintf(file, "        <temporal_discretisation>\n          <theta>\n            <real_value rank=\"0\">0.5</real_value>\n          </theta>\n        </temporal_discretisation>\n");
+      fprintf(file, "        <solver>\n          <iterative_method name=\"gmres\">\n            <restart>\n              <integer_value rank=\"0\">30</integer_value>\n            </restart>\n          </iterative_method>\n");
+      fprintf(file, "          <relative_error>\n            <real_value rank=\"0\">1.0e-7</real_value>\n          </relative_error>\n");
+      fprintf(file, "          <max_iterations>\n            <integer_value rank=\"0\">1000</integer_value>\n          </max_iterations>\n        </solver>\n");
+      fprintf(file, "        <initial_condition name=\"WholeMesh\">\n          <constant>\n            <real_value rank=\"0\">0.0</real_value>\n          </constant>\n        </initial_condition>\n");
+      fprintf(file, "        <boundary_conditions name=\"Inflow\">\n          <surface_ids>\n            <integer_value rank=\"1\" shape=\"2\">%d %d</integer_value>\n          </surface_ids>\n", rand() % 10, rand() % 10);
+      fprintf(file, "          <type name=\"dirichlet\">\n            <constant>\n              <real_value rank=\"0\">1.0</real_value>\n            </constant>\n          </type>\n        </boundary_conditions>\n");
+      fprintf(file, "        <output/>\n        <stat/>\n");
+      fprintf(file, "      </prognostic>\n");
+    }
+    fprintf(file, "    </scalar_field>\n");
+  }
+  fprintf(file, "  </material_phase>\n</fluidity_options>\n");
+  size_t bytes = ftell(file);
+  fclose(file);
+
+  return bytes;
+}
+
+// Count the option nodes at and below the supplied handle, including the
+// nodes holding option data and attributes
+size_t count_nodes(const Spud::OptionHandle& handle){
+  int child_count;
+  Spud::get_number_of_children(handle, child_count);
+  size_t count = 1;
+  for(int i = 0;i < child_count;i++){
+    Spud::OptionHandle child;
+    Spud::get_child_handle(handle, i, child);
+    count += count_nodes(child);
+  }
+
+  return count;
+}
+
+// Heap bytes currently allocated through operator new or held by the arena
+size_t heap_bytes(){
+  size_t allocations, deallocations, system_allocations, bytes_in_use, bytes_reserved;
+  Spud::get_allocation_statistics(allocations, deallocations, system_allocations, bytes_in_use, bytes_reserved);
+
+  return live_bytes + bytes_reserved;
+}
+
+// Load the supplied options file and print the heap memory held by the
+// options tree
+void report_memory(const string& label, const string& options_filename, const size_t& bytes){
+  Spud::clear_options();
+  size_t base_bytes = heap_bytes();
+  if(Spud::load_options(options_filename) != Spud::SPUD_NO_ERROR){
+    cerr << "Failed to load " << options_filename << endl;
+    exit(1);
+  }
+  size_t tree_bytes = heap_bytes() - base_bytes;
+
+  Spud::OptionHandle root;
+  Spud::get_option_handle("/", root);
+  size_t nodes = count_nodes(root);
+
+  printf("%-24s %12lu %10lu %14lu %14.1f\n", label.c_str(), (unsigned long)bytes, (unsigned long)nodes, (unsigned long)tree_bytes, nodes > 0 ? tree_bytes / (double)nodes : 0.0);
+}
+
+int main(int argc, char** argv){
+  int max_exponent = argc > 1 ? atoi(argv[1]) : 4;
+
+  printf("%-24s %12s %10s %14s %14s\n", "options", "file bytes", "nodes", "heap bytes", "bytes/node");
+  size_t size = 100;
+  for(int exponent = 2;exponent <= max_exponent;exponent++, size *= 10){
+    size_t bytes = write_options_file(size);
+    char label[32];
+    snprintf(label, sizeof(label), "%lu fields", (unsigned long)size);
+    report_memory(label, filename, bytes);
+  }
+  remove(filename);
+
+  for(int i = 2;i < argc;i++){
+    FILE* file = fopen(argv[i], "rb");
+    if(file == NULL){
+      cerr << "Failed to open " << argv[i] << endl;
+      return 1;
+    }
+    fseek(file, 0, SEEK_END);
+    size_t bytes = ftell(file);
+    fclose(file);
+    report_memory(argv[i], argv[i], bytes);
+  }
+  Spud::clear_options();
+
+  return 0;
+}
@@ -0,0 +1,111 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+
+// Measures the throughput of loading real_value and integer_value data, in
+// MB/s of array text, for synthetic arrays of 10^3 to 10^max_exponent values.
+// Real values are written both with full round trip precision and with six
+// significant figures, as is typical of hand written options files.
+//
+// Usage: benchmark_numeric_parsing [max_exponent]
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <string>
+
+#include "spud"
+
+using namespace std;
+
+const char* filename = "benchmark_numeric_parsing.xml";
+
+// Write an options file containing a single array of size values, each written
+// with the printf format, and return the number of bytes of array text written
+size_t write_array(const string& type, const string& format, const size_t& size){
+  FILE* file = fopen(filename, "w");
+  if(file == NULL){
+    cerr << "Failed to open " << filename << endl;
+    exit(1);
+  }
+
+  fprintf(file, "<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n<options>\n  <array>\n");
+  fprintf(file, "    <%s rank=\"1\" shape=\"%lu\">", type.c_str(), (unsigned long)size);
+  long start = ftell(file);
+  srand(42);
+  for(size_t i = 0;i < size;i++){
+    if(i > 0){
+      fputc(' ', file);
+    }
+    if(type == "real_value"){
+      fprintf(file, format.c_str(), (rand() - RAND_MAX / 2) / (double)rand());
+    }else{
+      fprintf(file, format.c_str(), rand() - RAND_MAX / 2);
+    }
+  }
+  long end = ftell(file);
+  fprintf(file, "</%s>\n  </array>\n</options>\n", type.c_str());
+  fclose(file);
+
+  return end - start;
+}
+
+int main(int argc, char** argv){
+  int max_exponent = argc > 1 ? atoi(argv[1]) : 7;
+
+  const string types[] = {"real_value", "real_value", "integer_value"};
+  const string formats[] = {"%.17g", "%.6g", "%d"};
+  printf("%-14s %-6s %10s %12s %10s %10s\n", "type", "format", "values", "bytes", "seconds", "MB/s");
+  for(size_t i = 0;i < 3;i++){
+    size_t size = 1000;
+    for(int exponent = 3;exponent <= max_exponent;exponent++, size *= 10){
+      size_t bytes = write_array(types[i], formats[i], size);
+
+      // Repeat small loads so that the timing is meaningful
+      double total_time = 0.0;
+      int repeats = 0;
+      while(total_time < 0.5 or repeats < 3){
+        Spud::clear_options();
+        if(Spud::load_options(filename) != Spud::SPUD_NO_ERROR){
+          cerr << "Failed to load " << filename << endl;
+          return 1;
+        }
+        double load_time;
+        size_t peak_buffer_size;
+        Spud::get_load_statistics(load_time, peak_buffer_size);
+        total_time += load_time;
+        repeats++;
+      }
+      double load_time = total_time / repeats;
+
+      printf("%-14s %-6s %10lu %12lu %10.4f %10.1f\n", types[i].c_str(), formats[i].c_str(), (unsigned long)size, (unsigned long)bytes, load_time, load_time > 0.0 ? bytes / load_time / 1.0e6 : 0.0);
+    }
+  }
+  Spud::clear_options();
+  remove(filename);
+
+  return 0;
+}
@@ -0,0 +1,155 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+
+// Finds the boundary conditions of all prognostic fields of all material
+// phases, first by enumerating the options one key at a time with
+// option_count, have_option and get_option, as models do when setting up
+// their fields, and then with a single find_options query. Reports the mean
+// time of each, for synthetic configurations of two material phases with
+// 10^1 to 10^max_exponent fields each, half of them prognostic with three
+// boundary conditions.
+//
+// Usage: benchmark_query [max_exponent] [repeats]
+
+#include <sys/time.h>
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include "spud"
+
+using namespace std;
+
+const int phases = 2;
+const int boundary_conditions = 3;
+
+double wall_time(){
+  timeval now;
+  gettimeofday(&now, NULL);
+
+  return now.tv_sec + now.tv_usec * 1.0e-6;
+}
+
+void build_options(const int& fields){
+  Spud::clear_options();
+  for(int p = 0;p < phases;p++){
+    for(int f = 0;f < fields;f++){
+      ostringstream field;
+      field << "/material_phase::Phase" << p << "/scalar_field::Field" << f;
+      if(f % 2 == 0){
+        Spud::set_option(field.str() + "/diagnostic/algorithm", string("Internal"));
+        continue;
+      }
+      Spud::set_option(field.str() + "/prognostic/temporal_discretisation/theta", 0.5);
+      for(int b = 0;b < boundary_conditions;b++){
+        ostringstream bc;
+        bc << field.str() << "/prognostic/boundary_conditions::BC" << b << "/type::dirichlet/constant";
+        Spud::set_option(bc.str(), 1.0);
+      }
+    }
+  }
+}
+
+// Find the boundary conditions one key at a time, and return their keys
+vector<string> enumerate_boundary_conditions(){
+  vector<string> keys;
+  int phase_count = Spud::option_count("/material_phase");
+  for(int p = 0;p < phase_count;p++){
+    ostringstream phase;
+    phase << "/material_phase[" << p << "]";
+    string phase_name;
+    Spud::get_option(phase.str() + "/name", phase_name);
+
+    int field_count = Spud::option_count(phase.str() + "/scalar_field");
+    for(int f = 0;f < field_count;f++){
+      ostringstream field;
+      field << phase.str() << "/scalar_field[" << f << "]";
+      if(!Spud::have_option(field.str() + "/prognostic")){
+        continue;
+      }
+      string field_name;
+      Spud::get_option(field.str() + "/name", field_name);
+
+      int bc_count = Spud::option_count(field.str() + "/prognostic/boundary_conditions");
+      for(int b = 0;b < bc_count;b++){
+        ostringstream bc;
+        bc << field.str() << "/prognostic/boundary_conditions[" << b << "]";
+        string bc_name;
+        Spud::get_option(bc.str() + "/name", bc_name);
+        keys.push_back("/material_phase::" + phase_name + "/scalar_field::" + field_name + "/prognostic/boundary_conditions::" + bc_name);
+      }
+    }
+  }
+
+  return keys;
+}
+
+vector<string> query_boundary_conditions(){
+  vector<string> keys;
+  vector<Spud::OptionHandle> handles;
+  Spud::find_options("/material_phase::*/scalar_field::*/prognostic/boundary_conditions::*", keys, handles);
+
+  return keys;
+}
+
+int main(int argc, char** argv){
+  int max_exponent = argc > 1 ? atoi(argv[1]) : 4;
+  int repeats = argc > 2 ? atoi(argv[2]) : 10;
+
+  printf("%-16s %10s %16s %16s %10s\n", "fields", "matches", "enumerate (s)", "find (s)", "speedup");
+  int fields = 10;
+  for(int exponent = 1;exponent <= max_exponent;exponent++, fields *= 10){
+    build_options(fields);
+
+    vector<string> enumerated, found;
+    double start = wall_time();
+    for(int i = 0;i < repeats;i++){
+      enumerated = enumerate_boundary_conditions();
+    }
+    double enumerate_time = (wall_time() - start) / repeats;
+
+    start = wall_time();
+    for(int i = 0;i < repeats;i++){
+      found = query_boundary_conditions();
+    }
+    double find_time = (wall_time() - start) / repeats;
+
+    if(found != enumerated){
+      cerr << "find_options and enumeration found different options" << endl;
+      exit(1);
+    }
+
+    printf("%-16d %10lu %16.6f %16.6f %10.1f\n", fields * phases, (unsigned long)found.size(), enumerate_time, find_time, enumerate_time / find_time);
+  }
+  Spud::clear_options();
+
+  return 0;
+}
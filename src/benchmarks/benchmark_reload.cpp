@@ -0,0 +1,144 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+
+// Reloads an options file many times, as a parameter sweep driver does, and
+// reports the time taken by each reload and by clearing the options, together
+// with the allocations made in the options arena and the blocks of memory
+// taken from the system per reload. Options are reloaded both from XML and
+// from a binary snapshot, for synthetic files of 10^2 to 10^max_exponent
+// fields.
+//
+// Usage: benchmark_reload [max_exponent] [reloads]
+
+#include <sys/time.h>
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <string>
+
+#include "spud"
+
+using namespace std;
+
+const char* filename = "benchmark_reload.xml";
+
+// Write an options file containing size fields, and return the size of the
+// file in bytes
+size_t write_options_file(const size_t& size){
+  FILE* file = fopen(filename, "w");
+  if(file == NULL){
+    cerr << "Failed to open " << filename << endl;
+    exit(1);
+  }
+
+  fprintf(file, "<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n<options>\n");
+  srand(42);
+  for(size_t i = 0;i < size;i++){
+    fprintf(file, "  <scalar_field rank=\"0\" name=\"Tracer%lu\">\n", (unsigned long)i);
+    fprintf(file, "    <prognostic>\n");
+    fprintf(file, "      <mesh name=\"VelocityMesh\"/>\n");
+    fprintf(file, "      <temporal_discretisation>\n        <theta>\n          <real_value rank=\"0\">%.17g</real_value>\n        </theta>\n      </temporal_discretisation>\n", rand() / (double)RAND_MAX);
+    fprintf(file, "      <solver>\n        <iterative_method name=\"gmres\">\n          <restart>\n            <integer_value rank=\"0\">30</integer_value>\n          </restart>\n        </iterative_method>\n      </solver>\n");
+    fprintf(file, "      <boundary_conditions name=\"Inflow\">\n        <surface_ids>\n          <integer_value rank=\"1\" shape=\"2\">%d %d</integer_value>\n        </surface_ids>\n      </boundary_conditions>\n", rand() % 10, rand() % 10);
+    fprintf(file, "      <output/>\n      <stat/>\n");
+    fprintf(file, "    </prognostic>\n");
+    fprintf(file, "  </scalar_field>\n");
+  }
+  fprintf(file, "</options>\n");
+  size_t bytes = ftell(file);
+  fclose(file);
+
+  return bytes;
+}
+
+double wall_time(){
+  timeval now;
+  gettimeofday(&now, NULL);
+
+  return now.tv_sec + now.tv_usec * 1.0e-6;
+}
+
+// Reload the options file reloads times, and print the mean time per reload
+// and per clear, and the mean arena allocations and system allocations per
+// reload
+void report_reloads(const string& label, const int& reloads){
+  size_t allocations, deallocations, system_allocations, bytes_in_use, bytes_reserved;
+  Spud::clear_options();
+  if(Spud::load_options(filename) != Spud::SPUD_NO_ERROR){
+    cerr << "Failed to load " << filename << endl;
+    exit(1);
+  }
+  Spud::get_allocation_statistics(allocations, deallocations, system_allocations, bytes_in_use, bytes_reserved);
+  size_t base_allocations = allocations, base_system_allocations = system_allocations;
+
+  double reload_time = 0.0, clear_time = 0.0;
+  for(int i = 0;i < reloads;i++){
+    double start = wall_time();
+    Spud::load_options(filename);
+    reload_time += wall_time() - start;
+  }
+  Spud::get_allocation_statistics(allocations, deallocations, system_allocations, bytes_in_use, bytes_reserved);
+  for(int i = 0;i < reloads;i++){
+    Spud::load_options(filename);
+    double start = wall_time();
+    Spud::clear_options();
+    clear_time += wall_time() - start;
+  }
+
+  printf("%-24s %14.6f %14.6f %14.1f %14.1f %14lu\n", label.c_str(), reload_time / reloads, clear_time / reloads,
+    (allocations - base_allocations) / double(reloads), (system_allocations - base_system_allocations) / double(reloads), (unsigned long)bytes_reserved);
+}
+
+int main(int argc, char** argv){
+  int max_exponent = argc > 1 ? atoi(argv[1]) : 4;
+  int reloads = argc > 2 ? atoi(argv[2]) : 20;
+  string snapshot_filename = string(filename) + ".snapshot";
+
+  printf("%-24s %14s %14s %14s %14s %14s\n", "options", "reload (s)", "clear (s)", "allocations", "system allocs", "arena bytes");
+  size_t size = 100;
+  for(int exponent = 2;exponent <= max_exponent;exponent++, size *= 10){
+    write_options_file(size);
+    remove(snapshot_filename.c_str());
+    char label[32];
+    snprintf(label, sizeof(label), "%lu fields (XML)", (unsigned long)size);
+    report_reloads(label, reloads);
+
+    Spud::load_options(filename);
+    if(Spud::write_snapshot(filename) != Spud::SPUD_NO_ERROR){
+      cerr << "Failed to write snapshot of " << filename << endl;
+      exit(1);
+    }
+    snprintf(label, sizeof(label), "%lu fields (snapshot)", (unsigned long)size);
+    report_reloads(label, reloads);
+  }
+  remove(filename);
+  remove(snapshot_filename.c_str());
+  Spud::clear_options();
+
+  return 0;
+}
@@ -0,0 +1,129 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+// Writes an options file holding a single large real array, as text and with
+// the array in a binary sidecar file, and reports the time to load each file
+// and then read the array, for arrays of 10^3 to 10^max_exponent values.
+//
+// Usage: benchmark_sidecar [max_exponent]
+
+#include <sys/stat.h>
+#include <sys/time.h>
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <string>
+#include <vector>
+
+#include "spud"
+
+using namespace std;
+
+const char* text_filename = "benchmark_sidecar_text.xml";
+const char* sidecar_filename = "benchmark_sidecar.xml";
+const char* key = "/field/values";
+
+double wall_time(){
+  timeval now;
+  gettimeofday(&now, NULL);
+
+  return now.tv_sec + now.tv_usec * 1.0e-6;
+}
+
+size_t file_size(const string& filename){
+  struct stat file_stat;
+  return stat(filename.c_str(), &file_stat) == 0 ? file_stat.st_size : 0;
+}
+
+// Write the options with an array of size random values, as text and with a
+// sidecar file
+void write_options(const size_t& size){
+  FILE* file = fopen(text_filename, "w");
+  if(file == NULL){
+    cerr << "Failed to open " << text_filename << endl;
+    exit(1);
+  }
+  fprintf(file, "<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n<options/>\n");
+  fclose(file);
+
+  Spud::clear_options();
+  Spud::load_options(text_filename);
+  srand(42);
+  vector<double> val(size);
+  for(size_t i = 0;i < size;i++){
+    val[i] = rand() / (double)RAND_MAX;
+  }
+  Spud::set_option(key, val);
+  if(Spud::write_options(text_filename) != Spud::SPUD_NO_ERROR or Spud::write_options(sidecar_filename, 1000) != Spud::SPUD_NO_ERROR){
+    cerr << "Failed to write options" << endl;
+    exit(1);
+  }
+}
+
+// Load the options, returning the time taken in load_time and the time to
+// then read the array in read_time
+void load_and_read(const char* filename, const size_t& size, double& load_time, double& read_time){
+  Spud::clear_options();
+  double start = wall_time();
+  if(Spud::load_options(filename) != Spud::SPUD_NO_ERROR){
+    cerr << "Failed to load " << filename << endl;
+    exit(1);
+  }
+  load_time = wall_time() - start;
+
+  start = wall_time();
+  vector<double> val;
+  if(Spud::get_option(key, val) != Spud::SPUD_NO_ERROR or val.size() != size){
+    cerr << "Incorrect value for " << key << endl;
+    exit(1);
+  }
+  read_time = wall_time() - start;
+}
+
+int main(int argc, char** argv){
+  int max_exponent = argc > 1 ? atoi(argv[1]) : 7;
+
+  printf("%10s %12s %12s %12s %12s %12s %12s\n", "values", "text bytes", "text (s)", "read (s)", "npy bytes", "sidecar (s)", "read (s)");
+  size_t size = 1000;
+  for(int exponent = 3;exponent <= max_exponent;exponent++, size *= 10){
+    write_options(size);
+    const string sidecar = string(sidecar_filename) + ".0.npy";
+
+    double text_load_time, text_read_time, sidecar_load_time, sidecar_read_time;
+    load_and_read(text_filename, size, text_load_time, text_read_time);
+    load_and_read(sidecar_filename, size, sidecar_load_time, sidecar_read_time);
+
+    printf("%10lu %12lu %12.6f %12.6f %12lu %12.6f %12.6f\n", (unsigned long)size, (unsigned long)file_size(text_filename), text_load_time, text_read_time,
+      (unsigned long)file_size(sidecar), sidecar_load_time, sidecar_read_time);
+    remove(sidecar.c_str());
+  }
+  Spud::clear_options();
+  remove(text_filename);
+  remove(sidecar_filename);
+
+  return 0;
+}
@@ -0,0 +1,129 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+
+// Compares the time taken to load an options file from XML and from its binary
+// snapshot, for synthetic files of 10^2 to 10^max_exponent named elements. Each
+// element holds a real scalar, a real vector of 100 values, an integer tensor
+// and a string, as typical of a model configuration with a field per element.
+//
+// Usage: benchmark_snapshot [max_exponent]
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <string>
+
+#include "spud"
+
+using namespace std;
+
+const char* filename = "benchmark_snapshot.xml";
+
+// Write an options file containing size named elements, and return the size of
+// the file in bytes
+size_t write_options_file(const size_t& size){
+  FILE* file = fopen(filename, "w");
+  if(file == NULL){
+    cerr << "Failed to open " << filename << endl;
+    exit(1);
+  }
+
+  fprintf(file, "<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n<options>\n");
+  srand(42);
+  for(size_t i = 0;i < size;i++){
+    fprintf(file, "  <field name=\"Field%lu\">\n", (unsigned long)i);
+    fprintf(file, "    <scalar>\n      <real_value rank=\"0\">%.17g</real_value>\n    </scalar>\n", rand() / (double)RAND_MAX);
+    fprintf(file, "    <vector>\n      <real_value rank=\"1\" shape=\"100\">");
+    for(int j = 0;j < 100;j++){
+      fprintf(file, j > 0 ? " %.17g" : "%.17g", rand() / (double)RAND_MAX);
+    }
+    fprintf(file, "</real_value>\n    </vector>\n");
+    fprintf(file, "    <tensor>\n      <integer_value rank=\"2\" shape=\"3 3\">");
+    for(int j = 0;j < 9;j++){
+      fprintf(file, j > 0 ? " %d" : "%d", rand() % 1000);
+    }
+    fprintf(file, "</integer_value>\n    </tensor>\n");
+    fprintf(file, "    <description>\n      <string_value lines=\"1\">Field number %lu</string_value>\n    </description>\n", (unsigned long)i);
+    fprintf(file, "  </field>\n");
+  }
+  fprintf(file, "</options>\n");
+  size_t bytes = ftell(file);
+  fclose(file);
+
+  return bytes;
+}
+
+// Return the mean time taken to load the options file, repeating small loads so
+// that the timing is meaningful
+double time_load(){
+  double total_time = 0.0;
+  int repeats = 0;
+  while(total_time < 0.5 or repeats < 3){
+    Spud::clear_options();
+    if(Spud::load_options(filename) != Spud::SPUD_NO_ERROR){
+      cerr << "Failed to load " << filename << endl;
+      exit(1);
+    }
+    double load_time;
+    size_t peak_buffer_size;
+    Spud::get_load_statistics(load_time, peak_buffer_size);
+    total_time += load_time;
+    repeats++;
+  }
+
+  return total_time / repeats;
+}
+
+int main(int argc, char** argv){
+  int max_exponent = argc > 1 ? atoi(argv[1]) : 4;
+  string snapshot = string(filename) + ".snapshot";
+
+  printf("%10s %12s %12s %12s %12s %8s\n", "elements", "XML bytes", "snap bytes", "XML s", "snapshot s", "speedup");
+  size_t size = 100;
+  for(int exponent = 2;exponent <= max_exponent;exponent++, size *= 10){
+    size_t bytes = write_options_file(size);
+    remove(snapshot.c_str());
+
+    double xml_time = time_load();
+    if(Spud::write_snapshot(filename) != Spud::SPUD_NO_ERROR){
+      cerr << "Failed to write snapshot of " << filename << endl;
+      return 1;
+    }
+    FILE* file = fopen(snapshot.c_str(), "rb");
+    fseek(file, 0, SEEK_END);
+    size_t snapshot_bytes = ftell(file);
+    fclose(file);
+    double snapshot_time = time_load();
+
+    printf("%10lu %12lu %12lu %12.4f %12.4f %8.1f\n", (unsigned long)size, (unsigned long)bytes, (unsigned long)snapshot_bytes, xml_time, snapshot_time, snapshot_time > 0.0 ? xml_time / snapshot_time : 0.0);
+  }
+  Spud::clear_options();
+  remove(filename);
+  remove(snapshot.c_str());
+
+  return 0;
+}
@@ -0,0 +1,159 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+
+// Checkpoints options holding large real arrays with write_options, as a
+// model writing its state does, and reports the time taken to write the file,
+// the size of the file, and the largest amount of heap memory allocated while
+// writing beyond that held by the options themselves. Options hold a real
+// vector of 10^3 to 10^max_exponent random values, and are written both as
+// plain XML and gzip compressed.
+//
+// Usage: benchmark_write [max_exponent]
+
+#include <sys/time.h>
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <new>
+#include <string>
+#include <vector>
+
+#include "spud"
+
+using namespace std;
+
+const char* filename = "benchmark_write.xml";
+
+// Heap bytes currently allocated through operator new, and the largest number
+// allocated at any one time
+size_t live_bytes = 0, peak_bytes = 0;
+
+// Each allocation is preceded by its size, padded to keep the alignment of
+// the allocation itself
+const size_t header_size = 16;
+
+void* counted_new(size_t size){
+  char* block = (char*)malloc(size + header_size);
+  if(block == NULL){
+    throw bad_alloc();
+  }
+  *(size_t*)block = size;
+  live_bytes += size;
+  if(live_bytes > peak_bytes){
+    peak_bytes = live_bytes;
+  }
+
+  return block + header_size;
+}
+
+void counted_delete(void* ptr){
+  if(ptr == NULL){
+    return;
+  }
+  char* block = (char*)ptr - header_size;
+  live_bytes -= *(size_t*)block;
+  free(block);
+}
+
+void* operator new(size_t size){
+  return counted_new(size);
+}
+
+void* operator new[](size_t size){
+  return counted_new(size);
+}
+
+void operator delete(void* ptr) throw(){
+  counted_delete(ptr);
+}
+
+void operator delete[](void* ptr) throw(){
+  counted_delete(ptr);
+}
+
+double wall_time(){
+  timeval now;
+  gettimeofday(&now, NULL);
+
+  return now.tv_sec + now.tv_usec * 1.0e-6;
+}
+
+size_t file_bytes(const string& name){
+  FILE* file = fopen(name.c_str(), "rb");
+  if(file == NULL){
+    return 0;
+  }
+  fseek(file, 0, SEEK_END);
+  size_t bytes = ftell(file);
+  fclose(file);
+
+  return bytes;
+}
+
+// Write the options to the supplied file, and print the time taken, the size
+// of the file and the peak heap memory allocated while writing
+void report_write(const string& label, const string& name){
+  peak_bytes = live_bytes;
+  size_t base_bytes = live_bytes;
+  double start = wall_time();
+  if(Spud::write_options(name) != Spud::SPUD_NO_ERROR){
+    printf("%-24s %14s\n", label.c_str(), "unavailable");
+    return;
+  }
+  double write_time = wall_time() - start;
+
+  printf("%-24s %14.6f %14lu %14lu\n", label.c_str(), write_time, (unsigned long)file_bytes(name), (unsigned long)(peak_bytes - base_bytes));
+  remove(name.c_str());
+}
+
+int main(int argc, char** argv){
+  int max_exponent = argc > 1 ? atoi(argv[1]) : 7;
+
+  printf("%-24s %14s %14s %14s\n", "options", "write (s)", "file bytes", "peak heap");
+  size_t size = 1000;
+  srand(42);
+  for(int exponent = 3;exponent <= max_exponent;exponent++, size *= 10){
+    Spud::clear_options();
+    vector<double> val(size);
+    for(size_t i = 0;i < size;i++){
+      val[i] = rand() / (double)RAND_MAX;
+    }
+    Spud::set_option("/checkpoint/state/real_vector", val);
+    val.clear();
+    vector<double>().swap(val);
+
+    char label[32];
+    snprintf(label, sizeof(label), "%lu values", (unsigned long)size);
+    report_write(label, filename);
+    snprintf(label, sizeof(label), "%lu values (gzip)", (unsigned long)size);
+    report_write(label, string(filename) + ".gz");
+  }
+  Spud::clear_options();
+
+  return 0;
+}
@@ -0,0 +1,107 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+// Writes a synthetic options file for the benchmark suite. The root holds
+// fanout elements, each repeated as named siblings name::Name0,
+// name::Name1, ... when named is greater than zero, and each of those holds
+// the same again, to depth levels. Each element at the bottom holds a real
+// scalar, an integer scalar, a string and real and integer arrays of
+// array_size values.
+//
+// Usage: generate_options [depth] [fanout] [named] [array_size] [filename]
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include "spud"
+
+using namespace std;
+
+// Add the options below key, to depth further levels, and return the number
+// of options added
+size_t generate(const string& key, const int& depth, const int& fanout, const int& named, const int& array_size){
+  if(depth == 0){
+    vector<double> real_val(array_size);
+    vector<int> integer_val(array_size);
+    for(int i = 0;i < array_size;i++){
+      real_val[i] = rand() / (double)RAND_MAX;
+      integer_val[i] = rand() % 1000;
+    }
+    Spud::set_option(key + "/real_scalar", rand() / (double)RAND_MAX);
+    Spud::set_option(key + "/integer_scalar", rand() % 1000);
+    Spud::set_option(key + "/string", "VelocityMesh");
+    Spud::set_option(key + "/real_array", real_val);
+    Spud::set_option(key + "/integer_array", integer_val);
+
+    return 5;
+  }
+
+  size_t count = 0;
+  for(int i = 0;i < fanout;i++){
+    for(int j = 0;j < max(named, 1);j++){
+      ostringstream child;
+      child << key << "/level" << depth << "_" << i;
+      if(named > 0){
+        child << "::Name" << j;
+      }
+      count += 1 + generate(child.str(), depth - 1, fanout, named, array_size);
+    }
+  }
+
+  return count;
+}
+
+int main(int argc, char** argv){
+  int depth = argc > 1 ? atoi(argv[1]) : 4;
+  int fanout = argc > 2 ? atoi(argv[2]) : 3;
+  int named = argc > 3 ? atoi(argv[3]) : 2;
+  int array_size = argc > 4 ? atoi(argv[4]) : 10;
+  const char* filename = argc > 5 ? argv[5] : "suite_options.xml";
+
+  FILE* file = fopen(filename, "w");
+  if(file == NULL){
+    cerr << "Failed to open " << filename << endl;
+    exit(1);
+  }
+  fprintf(file, "<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n<options/>\n");
+  fclose(file);
+
+  Spud::load_options(filename);
+  srand(42);
+  size_t count = generate("", depth, fanout, named, array_size);
+  if(Spud::write_options(filename) != Spud::SPUD_NO_ERROR){
+    cerr << "Failed to write " << filename << endl;
+    exit(1);
+  }
+  cerr << "Wrote " << count << " options to " << filename << endl;
+  Spud::clear_options();
+
+  return 0;
+}
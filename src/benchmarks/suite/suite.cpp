@@ -0,0 +1,253 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+// Times libspud operations on an options file, such as one written by
+// generate_options, and writes one JSON object per operation to standard
+// output. suite.f90 and suite.py run the same operations, on the same keys in
+// the same order, through the Fortran and Python interfaces.
+//
+// The keys are found by walking the options tree. get_option and set_option
+// are timed on the real, integer and string options of rank 0 and 1, and
+// have_option and option_count on all keys, each in tree order and in a
+// random order which is the same in every language. set_option skips the
+// name attributes of named elements, as changing them renames the element. copy_option and
+// delete_option copy each child of the root to /suite_copy and delete the
+// copies. Each operation is repeated repeats times.
+//
+// Usage: suite [filename] [repeats]
+
+#include <sys/time.h>
+
+#include <cstdio>
+#include <cstdlib>
+#include <iostream>
+#include <string>
+#include <vector>
+
+#include "spud"
+
+using namespace std;
+
+const char* output_filename = "suite_output.xml";
+
+struct KeyInfo{
+  string key;
+  Spud::OptionType type;
+  int rank;
+  int size;
+  bool name;
+};
+
+double wall_time(){
+  timeval now;
+  gettimeofday(&now, NULL);
+
+  return now.tv_sec + now.tv_usec * 1.0e-6;
+}
+
+// Append the keys below key, in tree order, to keys, and the data options of
+// rank 0 or 1 among them to data
+void walk(const string& key, vector<string>& keys, vector<KeyInfo>& data){
+  vector<string> children;
+  Spud::get_child_names(key, children);
+  for(size_t i = 0;i < children.size();i++){
+    if(children[i] == "__value"){
+      continue;
+    }
+    KeyInfo info;
+    info.key = (key == "/" ? "" : key) + "/" + children[i];
+    info.name = children[i] == "name";
+    keys.push_back(info.key);
+    Spud::get_option_type(info.key, info.type);
+    Spud::get_option_rank(info.key, info.rank);
+    if(info.type != Spud::SPUD_NONE and info.rank <= 1){
+      vector<int> shape;
+      Spud::get_option_shape(info.key, shape);
+      info.size = info.rank == 0 ? 1 : shape[0];
+      data.push_back(info);
+    }
+    walk(info.key, keys, data);
+  }
+}
+
+// The indices 0 to size - 1, in a random order if shuffle is true. The
+// random order comes from a linear congruential generator which suite.f90 and
+// suite.py repeat exactly
+vector<size_t> ordering(const size_t& size, const bool& shuffle){
+  vector<size_t> order(size);
+  for(size_t i = 0;i < size;i++){
+    order[i] = i;
+  }
+  unsigned long long state = 42;
+  for(size_t i = size;shuffle and i > 1;i--){
+    state = (state * 1103515245 + 12345) % 2147483648ULL;
+    swap(order[i - 1], order[state % i]);
+  }
+
+  return order;
+}
+
+void report(const string& filename, const size_t& options, const string& operation, const string& order, const size_t& calls, const double& seconds){
+  printf("{\"language\": \"c++\", \"file\": \"%s\", \"options\": %lu, \"operation\": \"%s\", \"order\": \"%s\", \"calls\": %lu, \"seconds\": %.6e, \"ns_per_call\": %.3f}\n",
+    filename.c_str(), (unsigned long)options, operation.c_str(), order.c_str(), (unsigned long)calls, seconds, calls > 0 ? seconds * 1.0e9 / calls : 0.0);
+}
+
+void fail(const string& operation, const string& key){
+  cerr << operation << " failed for " << key << endl;
+  exit(1);
+}
+
+void check(const Spud::OptionError& err, const string& operation, const string& key){
+  if(err != Spud::SPUD_NO_ERROR){
+    fail(operation, key);
+  }
+}
+
+void get_option(const KeyInfo& info, double& real_val, vector<double>& real_vector, int& integer_val, vector<int>& integer_vector, string& string_val){
+  switch(info.type){
+    case(Spud::SPUD_DOUBLE):
+      check(info.rank == 0 ? Spud::get_option(info.key, real_val) : Spud::get_option(info.key, real_vector), "get_option", info.key);
+      break;
+    case(Spud::SPUD_INT):
+      check(info.rank == 0 ? Spud::get_option(info.key, integer_val) : Spud::get_option(info.key, integer_vector), "get_option", info.key);
+      break;
+    default:
+      check(Spud::get_option(info.key, string_val), "get_option", info.key);
+      break;
+  }
+}
+
+void set_option(const KeyInfo& info){
+  Spud::OptionError set_err;
+  switch(info.type){
+    case(Spud::SPUD_DOUBLE):
+      set_err = info.rank == 0 ? Spud::set_option(info.key, 1.5) : Spud::set_option(info.key, vector<double>(info.size, 1.5));
+      break;
+    case(Spud::SPUD_INT):
+      set_err = info.rank == 0 ? Spud::set_option(info.key, 3) : Spud::set_option(info.key, vector<int>(info.size, 3));
+      break;
+    default:
+      set_err = Spud::set_option(info.key, string(info.size, 'x'));
+      break;
+  }
+  check(set_err, "set_option", info.key);
+}
+
+int main(int argc, char** argv){
+  const string filename = argc > 1 ? argv[1] : "suite_options.xml";
+  int repeats = argc > 2 ? atoi(argv[2]) : 3;
+
+  double start = wall_time();
+  for(int i = 0;i < repeats;i++){
+    check(Spud::load_options(filename), "load_options", filename);
+  }
+  double load_time = wall_time() - start;
+
+  vector<string> keys;
+  vector<KeyInfo> data;
+  walk("/", keys, data);
+  report(filename, keys.size(), "load_options", "none", repeats, load_time);
+
+  const char* orders[] = {"sequential", "random"};
+  double real_val;
+  vector<double> real_vector;
+  int integer_val;
+  vector<int> integer_vector;
+  string string_val;
+  for(int o = 0;o < 2;o++){
+    vector<size_t> data_order = ordering(data.size(), o == 1), key_order = ordering(keys.size(), o == 1);
+
+    start = wall_time();
+    for(int r = 0;r < repeats;r++){
+      for(size_t i = 0;i < data.size();i++){
+        get_option(data[data_order[i]], real_val, real_vector, integer_val, integer_vector, string_val);
+      }
+    }
+    report(filename, keys.size(), "get_option", orders[o], repeats * data.size(), wall_time() - start);
+
+    start = wall_time();
+    for(int r = 0;r < repeats;r++){
+      for(size_t i = 0;i < keys.size();i++){
+        if(!Spud::have_option(keys[key_order[i]])){
+          fail("have_option", keys[key_order[i]]);
+        }
+      }
+    }
+    report(filename, keys.size(), "have_option", orders[o], repeats * keys.size(), wall_time() - start);
+
+    start = wall_time();
+    for(int r = 0;r < repeats;r++){
+      for(size_t i = 0;i < keys.size();i++){
+        if(Spud::option_count(keys[key_order[i]]) != 1){
+          fail("option_count", keys[key_order[i]]);
+        }
+      }
+    }
+    report(filename, keys.size(), "option_count", orders[o], repeats * keys.size(), wall_time() - start);
+  }
+
+  size_t set_calls = 0;
+  start = wall_time();
+  for(int r = 0;r < repeats;r++){
+    for(size_t i = 0;i < data.size();i++){
+      if(!data[i].name){
+        set_option(data[i]);
+        set_calls++;
+      }
+    }
+  }
+  report(filename, keys.size(), "set_option", "sequential", set_calls, wall_time() - start);
+
+  vector<string> children;
+  Spud::get_child_names("/", children);
+  double copy_time = 0.0, delete_time = 0.0;
+  for(int r = 0;r < repeats;r++){
+    start = wall_time();
+    for(size_t i = 0;i < children.size();i++){
+      check(Spud::copy_option("/" + children[i], "/suite_copy/" + children[i]), "copy_option", children[i]);
+    }
+    copy_time += wall_time() - start;
+
+    start = wall_time();
+    for(size_t i = 0;i < children.size();i++){
+      check(Spud::delete_option("/suite_copy/" + children[i]), "delete_option", children[i]);
+    }
+    delete_time += wall_time() - start;
+    Spud::delete_option("/suite_copy");
+  }
+  report(filename, keys.size(), "copy_option", "sequential", repeats * children.size(), copy_time);
+  report(filename, keys.size(), "delete_option", "sequential", repeats * children.size(), delete_time);
+
+  start = wall_time();
+  for(int r = 0;r < repeats;r++){
+    check(Spud::write_options(output_filename), "write_options", output_filename);
+  }
+  report(filename, keys.size(), "write_options", "none", repeats, wall_time() - start);
+  remove(output_filename);
+  Spud::clear_options();
+
+  return 0;
+}
@@ -0,0 +1,365 @@
+!    Copyright (C) 2007 Imperial College London and others.
+!
+!    Please see the AUTHORS file in the main source directory for a full list
+!    of copyright holders.
+!
+!    Applied Modelling and Computation Group
+!    Department of Earth Science and Engineering
+!    Imperial College London
+!
+!    David.Ham@Imperial.ac.uk
+!
+!    This library is free software; you can redistribute it and/or
+!    modify it under the terms of the GNU Lesser General Public
+!    License as published by the Free Software Foundation,
+!    version 2.1 of the License.
+!
+!    This library is distributed in the hope that it will be useful,
+!    but WITHOUT ANY WARRANTY; without even the implied warranty of
+!    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+!    Lesser General Public License for more details.
+!
+!    You should have received a copy of the GNU Lesser General Public
+!    License along with this library; if not, write to the Free Software
+!    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+!    USA
+
+! Times libspud operations through the Fortran interface, as suite.cpp does
+! through the C++ interface, on the same keys in the same order, and writes
+! one JSON object per operation to standard output. get_option_allocatable,
+! which has no counterpart in the other interfaces, is timed on the rank 1
+! options only.
+!
+! Usage: suite_fortran [filename] [repeats]
+
+program suite_fortran
+
+  use iso_fortran_env, only : error_unit, int64
+  use spud
+
+  implicit none
+
+  integer, parameter :: D = kind(0.0D0)
+  integer, parameter :: max_key_len = 1024
+
+  type key_info
+    character(len = :), allocatable :: key
+    integer :: type = SPUD_NONE
+    integer :: rank = -1
+    integer :: size = 0
+    logical :: name = .false.
+  end type key_info
+
+  character(len = max_key_len) :: argument, filename, string_val
+  character(len = 10), dimension(2), parameter :: orders = (/"sequential", "random    "/)
+  character(len = *), parameter :: output_filename = "suite_output.xml"
+  character(len = :), allocatable :: string_alloc
+  integer :: alloc_calls, child_count, i, key_count, o, data_count, r, repeats, set_calls, stat
+  integer, dimension(:), allocatable :: integer_alloc
+  integer, dimension(:), allocatable :: data_order, integer_vector, key_order
+  integer :: integer_val
+  real(D) :: copy_time, delete_time, start, time
+  real(D) :: real_val
+  real(D), dimension(:), allocatable :: real_alloc, real_vector
+  type(key_info), dimension(:), allocatable :: children, data, keys
+
+  filename = "suite_options.xml"
+  repeats = 3
+  if(command_argument_count() > 0) call get_command_argument(1, filename)
+  if(command_argument_count() > 1) then
+    call get_command_argument(2, argument)
+    read(argument, *) repeats
+  end if
+
+  start = wall_time()
+  do r = 1, repeats
+    call load_options(trim(filename), stat)
+    call check(stat, "load_options", trim(filename))
+  end do
+  time = wall_time() - start
+
+  allocate(keys(16), data(16))
+  key_count = 0
+  data_count = 0
+  call walk("/")
+  call report("load_options", "none", repeats, time)
+
+  allocate(real_vector(maxval(data(:data_count)%size)), integer_vector(maxval(data(:data_count)%size)))
+  real_vector = 1.5_D
+  integer_vector = 3
+  do o = 1, size(orders)
+    data_order = ordering(data_count, o == 2)
+    key_order = ordering(key_count, o == 2)
+
+    start = wall_time()
+    do r = 1, repeats
+      do i = 1, data_count
+        call get_data(data(data_order(i)))
+      end do
+    end do
+    call report("get_option", trim(orders(o)), repeats * data_count, wall_time() - start)
+
+    alloc_calls = 0
+    start = wall_time()
+    do r = 1, repeats
+      do i = 1, data_count
+        if(data(data_order(i))%rank == 1) then
+          call get_data_allocatable(data(data_order(i)))
+          alloc_calls = alloc_calls + 1
+        end if
+      end do
+    end do
+    call report("get_option_allocatable", trim(orders(o)), alloc_calls, wall_time() - start)
+
+    start = wall_time()
+    do r = 1, repeats
+      do i = 1, key_count
+        if(.not. have_option(keys(key_order(i))%key)) call fail("have_option", keys(key_order(i))%key)
+      end do
+    end do
+    call report("have_option", trim(orders(o)), repeats * key_count, wall_time() - start)
+
+    start = wall_time()
+    do r = 1, repeats
+      do i = 1, key_count
+        if(option_count(keys(key_order(i))%key) /= 1) call fail("option_count", keys(key_order(i))%key)
+      end do
+    end do
+    call report("option_count", trim(orders(o)), repeats * key_count, wall_time() - start)
+  end do
+
+  set_calls = 0
+  start = wall_time()
+  do r = 1, repeats
+    do i = 1, data_count
+      if(.not. data(i)%name) then
+        call set_data(data(i))
+        set_calls = set_calls + 1
+      end if
+    end do
+  end do
+  call report("set_option", "sequential", set_calls, wall_time() - start)
+
+  call get_number_of_children("/", child_count)
+  allocate(children(child_count))
+  do i = 1, child_count
+    call get_child_name("/", i - 1, argument)
+    children(i)%key = trim(argument)
+  end do
+  copy_time = 0.0_D
+  delete_time = 0.0_D
+  do r = 1, repeats
+    start = wall_time()
+    do i = 1, child_count
+      call copy_option("/" // children(i)%key, "/suite_copy/" // children(i)%key, stat)
+      call check(stat, "copy_option", children(i)%key)
+    end do
+    copy_time = copy_time + wall_time() - start
+
+    start = wall_time()
+    do i = 1, child_count
+      call delete_option("/suite_copy/" // children(i)%key, stat)
+      call check(stat, "delete_option", children(i)%key)
+    end do
+    delete_time = delete_time + wall_time() - start
+    call delete_option("/suite_copy", stat)
+  end do
+  call report("copy_option", "sequential", repeats * child_count, copy_time)
+  call report("delete_option", "sequential", repeats * child_count, delete_time)
+
+  start = wall_time()
+  do r = 1, repeats
+    call write_options(output_filename, stat)
+    call check(stat, "write_options", output_filename)
+  end do
+  call report("write_options", "none", repeats, wall_time() - start)
+  open(unit = 10, file = output_filename, status = "old")
+  close(10, status = "delete")
+  call clear_options()
+
+contains
+
+  function wall_time()
+    real(D) :: wall_time
+
+    integer(int64) :: count, count_rate
+
+    call system_clock(count, count_rate)
+    wall_time = real(count, D) / real(count_rate, D)
+
+  end function wall_time
+
+  ! Append the keys below key, in tree order, to keys, and the data options of
+  ! rank 0 or 1 among them to data
+  recursive subroutine walk(key)
+    character(len = *), intent(in) :: key
+
+    character(len = max_key_len) :: child_name
+    integer :: i, n_children
+    integer, dimension(2) :: shape
+    type(key_info) :: info
+
+    call get_number_of_children(key, n_children)
+    do i = 0, n_children - 1
+      call get_child_name(key, i, child_name)
+      if(trim(child_name) == "__value") cycle
+      if(key == "/") then
+        info%key = "/" // trim(child_name)
+      else
+        info%key = key // "/" // trim(child_name)
+      end if
+      info%name = trim(child_name) == "name"
+      info%type = option_type(info%key)
+      info%rank = option_rank(info%key)
+      key_count = key_count + 1
+      if(key_count > size(keys)) call grow(keys)
+      keys(key_count) = info
+      if(info%type /= SPUD_NONE .and. info%rank <= 1) then
+        shape = option_shape(info%key)
+        info%size = merge(1, shape(1), info%rank == 0)
+        data_count = data_count + 1
+        if(data_count > size(data)) call grow(data)
+        data(data_count) = info
+      end if
+      call walk(info%key)
+    end do
+
+  end subroutine walk
+
+  subroutine grow(list)
+    type(key_info), dimension(:), allocatable, intent(inout) :: list
+
+    type(key_info), dimension(:), allocatable :: new_list
+
+    allocate(new_list(2 * size(list)))
+    new_list(:size(list)) = list
+    call move_alloc(new_list, list)
+
+  end subroutine grow
+
+  ! The indices 1 to n, in a random order if shuffle is true, from the linear
+  ! congruential generator used by suite.cpp
+  function ordering(n, shuffle)
+    integer, intent(in) :: n
+    logical, intent(in) :: shuffle
+
+    integer, dimension(n) :: ordering
+
+    integer :: i, j, swap
+    integer(int64) :: state
+
+    ordering = (/(i, i = 1, n)/)
+    if(.not. shuffle) return
+    state = 42
+    do i = n, 2, -1
+      state = mod(state * 1103515245_int64 + 12345_int64, 2147483648_int64)
+      j = int(mod(state, int(i, int64))) + 1
+      swap = ordering(i)
+      ordering(i) = ordering(j)
+      ordering(j) = swap
+    end do
+
+  end function ordering
+
+  subroutine get_data(info)
+    type(key_info), intent(in) :: info
+
+    integer :: stat
+
+    select case(info%type)
+      case(SPUD_REAL)
+        if(info%rank == 0) then
+          call get_option(info%key, real_val, stat)
+        else
+          call get_option(info%key, real_vector(:info%size), stat)
+        end if
+      case(SPUD_INTEGER)
+        if(info%rank == 0) then
+          call get_option(info%key, integer_val, stat)
+        else
+          call get_option(info%key, integer_vector(:info%size), stat)
+        end if
+      case default
+        call get_option(info%key, string_val, stat)
+    end select
+    call check(stat, "get_option", info%key)
+
+  end subroutine get_data
+
+  subroutine get_data_allocatable(info)
+    type(key_info), intent(in) :: info
+
+    integer :: stat
+
+    select case(info%type)
+      case(SPUD_REAL)
+        call get_option_allocatable(info%key, real_alloc, stat)
+      case(SPUD_INTEGER)
+        call get_option_allocatable(info%key, integer_alloc, stat)
+      case default
+        call get_option_allocatable(info%key, string_alloc, stat)
+    end select
+    call check(stat, "get_option_allocatable", info%key)
+
+  end subroutine get_data_allocatable
+
+  subroutine set_data(info)
+    type(key_info), intent(in) :: info
+
+    integer :: stat
+
+    select case(info%type)
+      case(SPUD_REAL)
+        if(info%rank == 0) then
+          call set_option(info%key, 1.5_D, stat)
+        else
+          call set_option(info%key, real_vector(:info%size), stat)
+        end if
+      case(SPUD_INTEGER)
+        if(info%rank == 0) then
+          call set_option(info%key, 3, stat)
+        else
+          call set_option(info%key, integer_vector(:info%size), stat)
+        end if
+      case default
+        call set_option(info%key, repeat("x", info%size), stat)
+    end select
+    call check(stat, "set_option", info%key)
+
+  end subroutine set_data
+
+  subroutine report(operation, order, calls, seconds)
+    character(len = *), intent(in) :: operation
+    character(len = *), intent(in) :: order
+    integer, intent(in) :: calls
+    real(D), intent(in) :: seconds
+
+    character(len = 32) :: seconds_string, ns_string
+
+    write(seconds_string, "(es13.6e2)") seconds
+    write(ns_string, "(f0.3)") merge(seconds * 1.0e9_D / max(calls, 1), 0.0_D, calls > 0)
+    write(*, "(a,i0,a,i0,a)") '{"language": "fortran", "file": "' // trim(filename) // '", "options": ', key_count, &
+      & ', "operation": "' // operation // '", "order": "' // order // '", "calls": ', calls, &
+      & ', "seconds": ' // trim(adjustl(seconds_string)) // ', "ns_per_call": ' // trim(ns_string) // '}'
+
+  end subroutine report
+
+  subroutine fail(operation, key)
+    character(len = *), intent(in) :: operation
+    character(len = *), intent(in) :: key
+
+    write(error_unit, "(a)") operation // " failed for " // key
+    stop 1
+
+  end subroutine fail
+
+  subroutine check(stat, operation, key)
+    integer, intent(in) :: stat
+    character(len = *), intent(in) :: operation
+    character(len = *), intent(in) :: key
+
+    if(stat /= SPUD_NO_ERROR) call fail(operation, key)
+
+  end subroutine check
+
+end program suite_fortran
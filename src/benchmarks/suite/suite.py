@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+#    Copyright (C) 2007 Imperial College London and others.
+#
+#    Please see the AUTHORS file in the main source directory for a full list
+#    of copyright holders.
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation,
+#    version 2.1 of the License.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+#    USA
+
+# Times libspud operations through the Python interface, as suite.cpp does
+# through the C++ interface, on the same keys in the same order, and writes
+# one JSON object per operation to standard output.
+#
+# Usage: suite.py [filename] [repeats]
+
+import collections
+import json
+import os
+import sys
+import timeit
+
+import libspud
+
+output_filename = "suite_output.xml"
+
+def walk(key, keys, data):
+  """Append the keys below key, in tree order, to keys, and the data options
+  of rank 0 or 1 among them to data as (key, type, rank, size, name)
+  tuples."""
+  for child in libspud.get_child_names(key):
+    if child == "__value":
+      continue
+    child_key = ("" if key == "/" else key) + "/" + child
+    keys.append(child_key)
+    option_type = libspud.get_option_type(child_key)
+    rank = libspud.get_option_rank(child_key)
+    if option_type is not None and rank <= 1:
+      size = 1 if rank == 0 else libspud.get_option_shape(child_key)[0]
+      data.append((child_key, option_type, rank, size, child == "name"))
+    walk(child_key, keys, data)
+
+def ordering(size, shuffle):
+  """The indices 0 to size - 1, in a random order if shuffle is true, from the
+  linear congruential generator used by suite.cpp."""
+  order = list(range(size))
+  if shuffle:
+    state = 42
+    for i in range(size, 1, -1):
+      state = (state * 1103515245 + 12345) % 2147483648
+      j = state % i
+      order[i - 1], order[j] = order[j], order[i - 1]
+  return order
+
+def set_value(option_type, rank, size):
+  """A value of the supplied type and shape for set_option."""
+  if option_type is str:
+    return "x" * size
+  value = 1.5 if option_type is float else 3
+  return value if rank == 0 else [value] * size
+
+def report(filename, options, operation, order, calls, seconds):
+  print(json.dumps(collections.OrderedDict([("language", "python"), ("file", filename), ("options", options),
+    ("operation", operation), ("order", order), ("calls", calls), ("seconds", seconds),
+    ("ns_per_call", seconds * 1.0e9 / calls if calls > 0 else 0.0)])))
+
+def main():
+  filename = sys.argv[1] if len(sys.argv) > 1 else "suite_options.xml"
+  repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+  timer = timeit.default_timer
+
+  start = timer()
+  for r in range(repeats):
+    libspud.load_options(filename)
+  load_time = timer() - start
+
+  keys = []
+  data = []
+  walk("/", keys, data)
+  report(filename, len(keys), "load_options", "none", repeats, load_time)
+
+  for order in ["sequential", "random"]:
+    data_order = [data[i][0] for i in ordering(len(data), order == "random")]
+    key_order = [keys[i] for i in ordering(len(keys), order == "random")]
+
+    start = timer()
+    for r in range(repeats):
+      for key in data_order:
+        libspud.get_option(key)
+    report(filename, len(keys), "get_option", order, repeats * len(data), timer() - start)
+
+    start = timer()
+    for r in range(repeats):
+      for key in key_order:
+        if not libspud.have_option(key):
+          raise libspud.SpudKeyError("have_option failed for " + key)
+    report(filename, len(keys), "have_option", order, repeats * len(keys), timer() - start)
+
+    start = timer()
+    for r in range(repeats):
+      for key in key_order:
+        if libspud.option_count(key) != 1:
+          raise libspud.SpudKeyError("option_count failed for " + key)
+    report(filename, len(keys), "option_count", order, repeats * len(keys), timer() - start)
+
+  values = [(key, set_value(option_type, rank, size)) for key, option_type, rank, size, name in data if not name]
+  start = timer()
+  for r in range(repeats):
+    for key, value in values:
+      libspud.set_option(key, value)
+  report(filename, len(keys), "set_option", "sequential", repeats * len(values), timer() - start)
+
+  children = libspud.get_child_names("/")
+  copy_time = 0.0
+  delete_time = 0.0
+  for r in range(repeats):
+    start = timer()
+    for child in children:
+      libspud.copy_option("/" + child, "/suite_copy/" + child)
+    copy_time += timer() - start
+
+    start = timer()
+    for child in children:
+      libspud.delete_option("/suite_copy/" + child)
+    delete_time += timer() - start
+    libspud.delete_option("/suite_copy")
+  report(filename, len(keys), "copy_option", "sequential", repeats * len(children), copy_time)
+  report(filename, len(keys), "delete_option", "sequential", repeats * len(children), delete_time)
+
+  start = timer()
+  for r in range(repeats):
+    libspud.write_options(output_filename)
+  report(filename, len(keys), "write_options", "none", repeats, timer() - start)
+  os.remove(output_filename)
+  libspud.clear_options()
+
+if __name__ == "__main__":
+  main()
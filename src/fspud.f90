@@ -45,29 +45,130 @@ module spud
     & SPUD_RANK_ERROR              = 3, &
     & SPUD_SHAPE_ERROR             = 4, &
     & SPUD_FILE_ERROR             = 5, &
+    & SPUD_HANDLE_ERROR            = 6, &
     & SPUD_NEW_KEY_WARNING         = -1, &
     & SPUD_ATTR_SET_FAILED_WARNING = -2
 
+  ! The kind of the most recent change to an option, as returned by
+  ! get_changes
+  integer, parameter, public :: &
+    & SPUD_CHANGE_SET    = 0, &
+    & SPUD_CHANGE_ADD    = 1, &
+    & SPUD_CHANGE_MOVE   = 2, &
+    & SPUD_CHANGE_DELETE = 3
+
+  ! A pre-resolved option key. A handle is invalidated by any subsequent change
+  ! to the options tree, after which it must be resolved again.
+  type, bind(c), public :: option_handle
+    type(c_ptr) :: option = c_null_ptr
+    integer(c_long) :: generation = -1
+  end type option_handle
+
+  ! The type, rank, shape and data of an option, as returned by
+  ! get_option_info. data points to the option data, which is not copied, and
+  ! size is the number of values. For rank 2 options shape is as returned by
+  ! option_shape. error is the error for this option, if any.
+  type, bind(c), public :: option_info
+    type(option_handle) :: handle
+    integer(c_int) :: error = SPUD_KEY_ERROR
+    integer(c_int) :: type = SPUD_NONE
+    integer(c_int) :: rank = -1
+    integer(c_int), dimension(2) :: shape = -1
+    type(c_ptr) :: data = c_null_ptr
+    integer(c_size_t) :: size = 0
+  end type option_info
+
+  ! An independent set of options, created by create_context. Every routine
+  ! may be passed a context, and then acts on the options of that context
+  ! rather than on the default options. A context which has not been created
+  ! refers to the default options.
+  type, public :: option_context
+    type(c_ptr) :: ptr = c_null_ptr
+  end type option_context
+
+  ! Used in place of a key in error messages from routines taking a handle
+  character(len = *), parameter :: handle_key = "(option handle)"
+
   public :: &
+    & create_context, &
+    & destroy_context, &
     & clear_options, &
     & load_options, &
+    & load_lazy_options, &
     & write_options, &
+    & write_snapshot, &
+    & write_options_buffer, &
+    & load_options_buffer, &
+    & freeze_options, &
+    & load_frozen_options, &
+    & start_profiling, &
+    & stop_profiling, &
     & get_child_name, &
     & get_number_of_children, &
+    & get_child_names, &
     & option_count, &
     & have_option, &
     & option_type, &
     & option_rank, &
     & option_shape, &
     & get_option, &
+    & get_option_allocatable, &
+    & get_option_view, &
+    & get_option_info, &
+    & find_options, &
+    & get_option_handle, &
+    & get_child_handle, &
     & add_option, &
     & set_option, &
     & set_option_attribute, &
     & move_option, &
     & copy_option, &
     & delete_option, &
+    & get_generation, &
+    & have_changed, &
+    & get_changes, &
+    & write_changes, &
+    & load_changes, &
     & print_options
 
+  ! Children may be enumerated by index from a handle to their parent, without
+  ! resolving the key of the parent again for each child
+  interface get_child_name
+    module procedure &
+      & get_child_name, &
+      & get_child_name_handle
+  end interface
+
+  interface get_number_of_children
+    module procedure &
+      & get_number_of_children, &
+      & get_number_of_children_handle
+  end interface
+
+  interface get_child_handle
+    module procedure &
+      & get_child_handle, &
+      & get_child_handle_index
+  end interface
+
+  interface option_type
+    module procedure &
+      & option_type, &
+      & option_type_handle
+  end interface
+
+  interface option_rank
+    module procedure &
+      & option_rank, &
+      & option_rank_handle
+  end interface
+
+  interface option_shape
+    module procedure &
+      & option_shape, &
+      & option_shape_handle
+  end interface
+
   interface get_option
     module procedure &
       & get_option_real_scalar, &
@@ -79,7 +180,50 @@ module spud
       & get_option_integer_scalar, &
       & get_option_integer_vector, &
       & get_option_integer_tensor, &
-      & get_option_character
+      & get_option_character, &
+      & get_option_real_scalar_handle, &
+      & get_option_real_vector_handle, &
+      & get_option_real_tensor_handle, &
+      & get_option_real_scalar_sp_handle, &
+      & get_option_real_vector_sp_handle, &
+      & get_option_real_tensor_sp_handle, &
+      & get_option_integer_scalar_handle, &
+      & get_option_integer_vector_handle, &
+      & get_option_integer_tensor_handle, &
+      & get_option_character_handle
+  end interface
+
+  ! Real, integer and character options of any shape, returned in arrays and
+  ! strings allocated to fit
+  interface get_option_allocatable
+    module procedure &
+      & get_option_allocatable_real_vector, &
+      & get_option_allocatable_real_tensor, &
+      & get_option_allocatable_integer_vector, &
+      & get_option_allocatable_integer_tensor, &
+      & get_option_allocatable_character
+  end interface
+
+  ! Pointers to real and integer option data, which are not copied. A view is
+  ! valid until the option is next set or deleted, and must not be modified.
+  interface get_option_view
+    module procedure &
+      & get_option_view_real_vector, &
+      & get_option_view_real_tensor, &
+      & get_option_view_integer_vector, &
+      & get_option_view_integer_tensor, &
+      & get_option_view_real_vector_handle, &
+      & get_option_view_real_tensor_handle, &
+      & get_option_view_integer_vector_handle, &
+      & get_option_view_integer_tensor_handle
+  end interface
+
+  ! Information on many options in one call, either at a list of keys or at
+  ! all keys below a prefix
+  interface get_option_info
+    module procedure &
+      & get_option_info_keys, &
+      & get_option_info_prefix
   end interface
 
   interface set_option
@@ -98,157 +242,523 @@ module spud
 
   ! C interfaces
   interface
-     subroutine spud_clear_options() bind(c)
-     end subroutine spud_clear_options
+     function spud_create_context() bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr) :: spud_create_context
+     end function spud_create_context
+
+     subroutine spud_destroy_context(context) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+     end subroutine spud_destroy_context
+
+     subroutine spud_context_clear_options(context) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+     end subroutine spud_context_clear_options
+
+     function spud_context_load_options(context, key, key_len) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       integer(c_int) :: spud_context_load_options
+     end function spud_context_load_options
+
+     function spud_context_load_lazy_options(context, key, key_len) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       integer(c_int) :: spud_context_load_lazy_options
+     end function spud_context_load_lazy_options
+
+     function spud_context_write_options(context, key, key_len) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       integer(c_int) :: spud_context_write_options
+     end function spud_context_write_options
+
+     function spud_context_write_options_sidecar(context, key, key_len, sidecar_threshold) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       integer(c_size_t), intent(in), value :: sidecar_threshold
+       integer(c_int) :: spud_context_write_options_sidecar
+     end function spud_context_write_options_sidecar
+
+     function spud_context_write_snapshot(context, key, key_len) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       integer(c_int) :: spud_context_write_snapshot
+     end function spud_context_write_snapshot
+
+     function spud_context_write_options_buffer(context, key, key_len, buffer, buffer_size, size) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       integer(c_size_t), intent(in), value :: buffer_size
+       character(len=1,kind=c_char), dimension(*), intent(out) :: buffer
+       integer(c_size_t), intent(out) :: size
+       integer(c_int) :: spud_context_write_options_buffer
+     end function spud_context_write_options_buffer
+
+     function spud_context_load_options_buffer(context, key, key_len, buffer, size) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       integer(c_size_t), intent(in), value :: size
+       character(len=1,kind=c_char), dimension(size), intent(in) :: buffer
+       integer(c_int) :: spud_context_load_options_buffer
+     end function spud_context_load_options_buffer
 
-     function spud_load_options(key, key_len) bind(c)
+     function spud_context_freeze_options(context, key, key_len) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
-       integer(c_int) :: spud_load_options
-     end function spud_load_options
+       integer(c_int) :: spud_context_freeze_options
+     end function spud_context_freeze_options
 
-     function spud_write_options(key, key_len) bind(c)
+     function spud_context_load_frozen_options(context, key, key_len) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
-       integer(c_int) :: spud_write_options
-     end function spud_write_options
+       integer(c_int) :: spud_context_load_frozen_options
+     end function spud_context_load_frozen_options
+
+     subroutine spud_context_start_profiling(context, key, key_len) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+     end subroutine spud_context_start_profiling
+
+     function spud_context_stop_profiling(context) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int) :: spud_context_stop_profiling
+     end function spud_context_stop_profiling
 
-     function spud_get_child_name(key, key_len, index, child_name, child_name_len) bind(c)
+     function spud_context_get_child_name(context, key, key_len, index, child_name, child_name_len) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        integer(c_int), intent(in), value :: child_name_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
        integer(c_int), intent(in), value :: index
        character(len=1,kind=c_char), dimension(child_name_len), intent(out) :: child_name
-       integer(c_int) :: spud_get_child_name
-     end function spud_get_child_name
+       integer(c_int) :: spud_context_get_child_name
+     end function spud_context_get_child_name
 
-     function spud_get_number_of_children(key, key_len, child_count) bind(c)
+     function spud_context_get_number_of_children(context, key, key_len, child_count) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
        integer(c_int), intent(out) :: child_count
-       integer(c_int) :: spud_get_number_of_children
-     end function spud_get_number_of_children
+       integer(c_int) :: spud_context_get_number_of_children
+     end function spud_context_get_number_of_children
 
-     function spud_option_count(key, key_len) bind(c)
+     function spud_context_get_child_names(context, key, key_len, child_names, child_name_len, max_count, &
+       & count, max_name_len) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len, child_name_len, max_count
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       character(len=1,kind=c_char), dimension(child_name_len * max_count), intent(inout) :: child_names
+       integer(c_int), intent(out) :: count, max_name_len
+       integer(c_int) :: spud_context_get_child_names
+     end function spud_context_get_child_names
+
+     function spud_context_option_count(context, key, key_len) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
-       integer(c_int) :: spud_option_count
-     end function spud_option_count
+       integer(c_int) :: spud_context_option_count
+     end function spud_context_option_count
 
-     function spud_have_option(key, key_len) bind(c)
+     function spud_context_have_option(context, key, key_len) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
-       integer(c_int) :: spud_have_option
-     end function spud_have_option
+       integer(c_int) :: spud_context_have_option
+     end function spud_context_have_option
 
-     function spud_get_option_type(key, key_len, option_type) bind(c)
+     function spud_context_get_option_type(context, key, key_len, option_type) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
        integer(c_int), intent(out) :: option_type
-       integer(c_int) :: spud_get_option_type
-     end function spud_get_option_type
+       integer(c_int) :: spud_context_get_option_type
+     end function spud_context_get_option_type
 
-     function spud_get_option_rank(key, key_len, option_rank) bind(c)
+     function spud_context_get_option_rank(context, key, key_len, option_rank) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
        integer(c_int), intent(out) :: option_rank
-       integer(c_int) :: spud_get_option_rank
-     end function spud_get_option_rank
+       integer(c_int) :: spud_context_get_option_rank
+     end function spud_context_get_option_rank
 
-     function spud_get_option_shape(key, key_len, shape) bind(c)
+     function spud_context_get_option_shape(context, key, key_len, shape) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
        integer(c_int), dimension(2), intent(out) :: shape
-       integer(c_int) :: spud_get_option_shape
-     end function spud_get_option_shape
+       integer(c_int) :: spud_context_get_option_shape
+     end function spud_context_get_option_shape
 
-     function spud_add_option(key, key_len) bind(c)
+     function spud_context_add_option(context, key, key_len) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
-       integer(c_int) :: spud_add_option
-     end function spud_add_option
+       integer(c_int) :: spud_context_add_option
+     end function spud_context_add_option
 
-     function spud_set_option_attribute(key, key_len, val, val_len) bind(c)
+     function spud_context_set_option_attribute(context, key, key_len, val, val_len) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        integer(c_int), intent(in), value :: val_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
        character(len=1,kind=c_char), dimension(val_len), intent(in) :: val
-       integer(c_int) :: spud_set_option_attribute
-     end function spud_set_option_attribute
+       integer(c_int) :: spud_context_set_option_attribute
+     end function spud_context_set_option_attribute
 
-     function spud_move_option(key1, key1_len, key2, key2_len) bind(c)
+     function spud_context_move_option(context, key1, key1_len, key2, key2_len) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key1_len
        integer(c_int), intent(in), value :: key2_len
        character(len = 1,kind=c_char), dimension(key1_len), intent(in) :: key1
        character(len = 1,kind=c_char), dimension(key2_len), intent(in) :: key2
-       integer(c_int) :: spud_move_option
-     end function spud_move_option
+       integer(c_int) :: spud_context_move_option
+     end function spud_context_move_option
 
-     function spud_copy_option(key1, key1_len, key2, key2_len) bind(c)
+     function spud_context_copy_option(context, key1, key1_len, key2, key2_len) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key1_len
        integer(c_int), intent(in), value :: key2_len
        character(len = 1,kind=c_char), dimension(key1_len), intent(in) :: key1
        character(len = 1,kind=c_char), dimension(key2_len), intent(in) :: key2
-       integer(c_int) :: spud_copy_option
-     end function spud_copy_option
+       integer(c_int) :: spud_context_copy_option
+     end function spud_context_copy_option
+
+     function spud_context_delete_option(context, key, key_len) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       integer(c_int) :: spud_context_delete_option
+     end function spud_context_delete_option
+
+     function spud_context_get_generation(context) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_long) :: spud_context_get_generation
+     end function spud_context_get_generation
+
+     function spud_context_have_changed(context, key, key_len, since) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       integer(c_long), intent(in), value :: since
+       integer(c_int) :: spud_context_have_changed
+     end function spud_context_have_changed
+
+     function spud_context_get_changes(context, since, keys, key_len, max_count, count, max_key_len, changes) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_long), intent(in), value :: since
+       integer(c_int), intent(in), value :: key_len, max_count
+       character(len=1,kind=c_char), dimension(key_len * max_count), intent(inout) :: keys
+       integer(c_int), intent(out) :: count, max_key_len
+       integer(c_int), dimension(max_count), intent(inout) :: changes
+       integer(c_int) :: spud_context_get_changes
+     end function spud_context_get_changes
+
+     function spud_context_write_changes(context, filename, filename_len, since) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: filename_len
+       character(len=1,kind=c_char), dimension(filename_len), intent(in) :: filename
+       integer(c_long), intent(in), value :: since
+       integer(c_int) :: spud_context_write_changes
+     end function spud_context_write_changes
+
+     function spud_context_load_changes(context, filename, filename_len) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: filename_len
+       character(len=1,kind=c_char), dimension(filename_len), intent(in) :: filename
+       integer(c_int) :: spud_context_load_changes
+     end function spud_context_load_changes
+
+     subroutine spud_context_print_options(context) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+     end subroutine spud_context_print_options
+
+     function spud_context_get_option(context, key, key_len, val) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       ! Here intent(in) refers to the c_ptr, not the target!
+       type(c_ptr), value, intent(in) :: val
+       integer(c_int) :: spud_context_get_option
+     end function spud_context_get_option
+
+     function spud_context_get_option_handle(context, key, key_len, handle) bind(c)
+       use iso_c_binding
+       import :: option_handle
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       type(option_handle), intent(out) :: handle
+       integer(c_int) :: spud_context_get_option_handle
+     end function spud_context_get_option_handle
 
-     function spud_delete_option(key, key_len) bind(c)
+     function spud_context_get_child_handle(context, parent, key, key_len, handle) bind(c)
        use iso_c_binding
+       import :: option_handle
        implicit none
+       type(c_ptr), intent(in), value :: context
+       type(option_handle), intent(in) :: parent
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
-       integer(c_int) :: spud_delete_option
-     end function spud_delete_option
+       type(option_handle), intent(out) :: handle
+       integer(c_int) :: spud_context_get_child_handle
+     end function spud_context_get_child_handle
+
+     function spud_context_get_child_handle_by_index(context, parent, index, handle) bind(c)
+       use iso_c_binding
+       import :: option_handle
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       type(option_handle), intent(in) :: parent
+       integer(c_int), intent(in), value :: index
+       type(option_handle), intent(out) :: handle
+       integer(c_int) :: spud_context_get_child_handle_by_index
+     end function spud_context_get_child_handle_by_index
+
+     function spud_context_get_child_name_by_handle(context, parent, index, child_name, child_name_len) bind(c)
+       use iso_c_binding
+       import :: option_handle
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       type(option_handle), intent(in) :: parent
+       integer(c_int), intent(in), value :: index
+       integer(c_int), intent(in), value :: child_name_len
+       character(len=1,kind=c_char), dimension(child_name_len), intent(out) :: child_name
+       integer(c_int) :: spud_context_get_child_name_by_handle
+     end function spud_context_get_child_name_by_handle
+
+     function spud_context_get_number_of_children_by_handle(context, parent, child_count) bind(c)
+       use iso_c_binding
+       import :: option_handle
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       type(option_handle), intent(in) :: parent
+       integer(c_int), intent(out) :: child_count
+       integer(c_int) :: spud_context_get_number_of_children_by_handle
+     end function spud_context_get_number_of_children_by_handle
+
+     function spud_context_get_option_type_by_handle(context, handle, option_type) bind(c)
+       use iso_c_binding
+       import :: option_handle
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       type(option_handle), intent(in) :: handle
+       integer(c_int), intent(out) :: option_type
+       integer(c_int) :: spud_context_get_option_type_by_handle
+     end function spud_context_get_option_type_by_handle
+
+     function spud_context_get_option_rank_by_handle(context, handle, option_rank) bind(c)
+       use iso_c_binding
+       import :: option_handle
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       type(option_handle), intent(in) :: handle
+       integer(c_int), intent(out) :: option_rank
+       integer(c_int) :: spud_context_get_option_rank_by_handle
+     end function spud_context_get_option_rank_by_handle
+
+     function spud_context_get_option_shape_by_handle(context, handle, shape) bind(c)
+       use iso_c_binding
+       import :: option_handle
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       type(option_handle), intent(in) :: handle
+       integer(c_int), dimension(2), intent(out) :: shape
+       integer(c_int) :: spud_context_get_option_shape_by_handle
+     end function spud_context_get_option_shape_by_handle
 
-     subroutine spud_print_options() bind(c)
-     end subroutine spud_print_options
+     function spud_context_get_option_by_handle(context, handle, val) bind(c)
+       use iso_c_binding
+       import :: option_handle
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       type(option_handle), intent(in) :: handle
+       ! Here intent(in) refers to the c_ptr, not the target!
+       type(c_ptr), value, intent(in) :: val
+       integer(c_int) :: spud_context_get_option_by_handle
+     end function spud_context_get_option_by_handle
 
-     function spud_get_option(key, key_len, val) bind(c)
+     function spud_context_get_option_checked(context, key, key_len, type, rank, shape, val) bind(c)
        use iso_c_binding
        implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       integer(c_int), intent(in), value :: type
+       integer(c_int), intent(in), value :: rank
+       integer(c_int), dimension(2), intent(inout) :: shape
+       ! Here intent(in) refers to the c_ptr, not the target!
+       type(c_ptr), value, intent(in) :: val
+       integer(c_int) :: spud_context_get_option_checked
+     end function spud_context_get_option_checked
+
+     function spud_context_get_option_checked_by_handle(context, handle, type, rank, shape, val) bind(c)
+       use iso_c_binding
+       import :: option_handle
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       type(option_handle), intent(in) :: handle
+       integer(c_int), intent(in), value :: type
+       integer(c_int), intent(in), value :: rank
+       integer(c_int), dimension(2), intent(inout) :: shape
        ! Here intent(in) refers to the c_ptr, not the target!
        type(c_ptr), value, intent(in) :: val
-       integer(c_int) :: spud_get_option
-     end function spud_get_option
+       integer(c_int) :: spud_context_get_option_checked_by_handle
+     end function spud_context_get_option_checked_by_handle
+
+     function spud_context_get_option_view(context, key, key_len, data, size, shape) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len
+       character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
+       type(c_ptr), intent(out) :: data
+       integer(c_size_t), intent(out) :: size
+       integer(c_int), dimension(2), intent(out) :: shape
+       integer(c_int) :: spud_context_get_option_view
+     end function spud_context_get_option_view
 
-     function spud_set_option(key, key_len, val, type, rank, shape) bind(c)
+     function spud_context_get_option_view_by_handle(context, handle, data, size, shape) bind(c)
        use iso_c_binding
+       import :: option_handle
        implicit none
+       type(c_ptr), intent(in), value :: context
+       type(option_handle), intent(in) :: handle
+       type(c_ptr), intent(out) :: data
+       integer(c_size_t), intent(out) :: size
+       integer(c_int), dimension(2), intent(out) :: shape
+       integer(c_int) :: spud_context_get_option_view_by_handle
+     end function spud_context_get_option_view_by_handle
+
+     function spud_context_get_option_info(context, keys, key_len, key_count, info) bind(c)
+       use iso_c_binding
+       import :: option_info
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: key_len, key_count
+       character(len=1,kind=c_char), dimension(key_len * key_count), intent(in) :: keys
+       type(option_info), dimension(key_count), intent(out) :: info
+       integer(c_int) :: spud_context_get_option_info
+     end function spud_context_get_option_info
+
+     function spud_context_get_option_info_by_prefix(context, prefix, prefix_len, keys, key_len, max_count, &
+       & count, max_key_len, info) bind(c)
+       use iso_c_binding
+       import :: option_info
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: prefix_len, key_len, max_count
+       character(len=1,kind=c_char), dimension(prefix_len), intent(in) :: prefix
+       character(len=1,kind=c_char), dimension(key_len * max_count), intent(inout) :: keys
+       integer(c_int), intent(out) :: count, max_key_len
+       type(option_info), dimension(max_count), intent(inout) :: info
+       integer(c_int) :: spud_context_get_option_info_by_prefix
+     end function spud_context_get_option_info_by_prefix
+
+     function spud_context_find_options(context, pattern, pattern_len, keys, key_len, max_count, &
+       & count, max_key_len, handles) bind(c)
+       use iso_c_binding
+       import :: option_handle
+       implicit none
+       type(c_ptr), intent(in), value :: context
+       integer(c_int), intent(in), value :: pattern_len, key_len, max_count
+       character(len=1,kind=c_char), dimension(pattern_len), intent(in) :: pattern
+       character(len=1,kind=c_char), dimension(key_len * max_count), intent(inout) :: keys
+       integer(c_int), intent(out) :: count, max_key_len
+       type(option_handle), dimension(max_count), intent(inout) :: handles
+       integer(c_int) :: spud_context_find_options
+     end function spud_context_find_options
+
+     function spud_context_set_option(context, key, key_len, val, type, rank, shape) bind(c)
+       use iso_c_binding
+       implicit none
+       type(c_ptr), intent(in), value :: context
        integer(c_int), intent(in), value :: key_len
        character(len=1,kind=c_char), dimension(key_len), intent(in) :: key
        type(c_ptr), value, intent(in) :: val
        integer(c_int), intent(in), value :: type, rank
        integer(c_int), intent(in), dimension(2) :: shape
-       integer(c_int) :: spud_set_option
-     end function spud_set_option
+       integer(c_int) :: spud_context_set_option
+     end function spud_context_set_option
 
   end interface
 
@@ -282,17 +792,56 @@ contains
     
   end function array_string
 
-  subroutine clear_options()
-    call spud_clear_options
+  function context_ptr(context)
+    ! The C pointer to the supplied context, or a null pointer for the default
+    ! options if no context is supplied
+    type(option_context), optional, intent(in) :: context
+
+    type(c_ptr) :: context_ptr
+
+    if(present(context)) then
+      context_ptr = context%ptr
+    else
+      context_ptr = c_null_ptr
+    end if
+
+  end function context_ptr
+
+  subroutine create_context(context)
+    type(option_context), intent(out) :: context
+
+    context%ptr = spud_create_context()
+
+  end subroutine create_context
+
+  subroutine destroy_context(context)
+    type(option_context), intent(inout) :: context
+
+    if(c_associated(context%ptr)) then
+      call spud_destroy_context(context%ptr)
+    end if
+    context%ptr = c_null_ptr
+
+  end subroutine destroy_context
+
+  subroutine clear_options(context)
+    type(option_context), optional, intent(in) :: context
+
+    call spud_context_clear_options(context_ptr(context))
   end subroutine clear_options
 
-  subroutine load_options(filename, stat)
+  subroutine load_options(filename, stat, context)
     character(len = * ), intent(in) :: filename
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
 
-    lstat =  spud_load_options(string_array(filename), len_trim(filename))
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_load_options(context_ptr(context), filename, len_trim(filename))
 
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(filename, lstat, stat)
@@ -301,83 +850,114 @@ contains
 
   end subroutine load_options
 
-  subroutine write_options(filename, stat)
+  subroutine load_lazy_options(filename, stat, context)
     character(len = *), intent(in) :: filename
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
 
-    lstat = spud_write_options(string_array(filename), len_trim(filename))
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_load_lazy_options(context_ptr(context), filename, len_trim(filename))
 
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(filename, lstat, stat)
       return
     end if
 
-  end subroutine write_options
+  end subroutine load_lazy_options
 
-  subroutine get_child_name(key, index, child_name, stat)
-    character(len = *), intent(in) :: key
-    integer, intent(in) :: index
-    character(len = *), intent(out) :: child_name
+  subroutine write_options(filename, stat, context, sidecar_threshold)
+    ! Arrays of at least sidecar_threshold values are written to .npy files
+    ! alongside the options file, rather than as text
+    character(len = *), intent(in) :: filename
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+    integer, optional, intent(in) :: sidecar_threshold
 
-    character(len = 1, kind=c_char), dimension(len(child_name)) :: lchild_name
     integer :: lstat
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    lchild_name = ""
-    lstat = spud_get_child_name(string_array(key), len_trim(key), index, lchild_name, size(lchild_name))
+    if(present(sidecar_threshold)) then
+      lstat = spud_context_write_options_sidecar(context_ptr(context), filename, len_trim(filename), int(sidecar_threshold, c_size_t))
+    else
+      lstat = spud_context_write_options(context_ptr(context), filename, len_trim(filename))
+    end if
+
     if(lstat /= SPUD_NO_ERROR) then
-      call option_error(key, lstat, stat)
+      call option_error(filename, lstat, stat)
       return
     end if
 
-    child_name = trim(array_string(lchild_name))
-
-  end subroutine get_child_name
+  end subroutine write_options
 
-  subroutine get_number_of_children(key, child_count, stat)
-    character(len = *), intent(in) :: key
-    integer, intent(out) :: child_count
+  subroutine write_snapshot(filename, stat, context)
+    character(len = *), intent(in) :: filename
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
 
-    lstat = spud_get_number_of_children(string_array(key), len_trim(key), child_count)
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_write_snapshot(context_ptr(context), filename, len_trim(filename))
+
     if(lstat /= SPUD_NO_ERROR) then
-      call option_error(key, lstat, stat)
+      call option_error(filename, lstat, stat)
       return
     end if
 
-  end subroutine get_number_of_children
+  end subroutine write_snapshot
 
-  function option_count(key)
+  subroutine write_options_buffer(key, buffer, stat, context)
+    ! Serialise the options below key into buffer, for example to broadcast
+    ! them to other processes and rebuild them there with load_options_buffer
     character(len = *), intent(in) :: key
+    character(len = 1, kind = c_char), dimension(:), allocatable, intent(out) :: buffer
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
-    integer :: option_count
-
-    option_count = spud_option_count(string_array(key), len_trim(key))
-
-  end function option_count
-
-  function have_option(key)
-    character(len = *), intent(in) :: key
+    integer(c_size_t) :: lsize, written
+    integer :: lstat
 
-    logical :: have_option
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
 
-    have_option = (spud_have_option(string_array(key), len_trim(key)) /= 0)
+    ! The first call finds the size of the buffer. The options are serialised
+    ! only once, as the second call copies the buffer kept by the first. The
+    ! calls are repeated only if the options change in between.
+    lsize = 0
+    do
+      allocate(buffer(lsize))
+      lstat = spud_context_write_options_buffer(context_ptr(context), key, len_trim(key), buffer, lsize, written)
+      if(lstat /= SPUD_NO_ERROR) then
+        call option_error(key, lstat, stat)
+        return
+      else if(written == lsize) then
+        exit
+      end if
+      deallocate(buffer)
+      lsize = written
+    end do
 
-  end function have_option
+  end subroutine write_options_buffer
 
-  function option_type(key, stat)
+  subroutine load_options_buffer(key, buffer, stat, context)
+    ! Replace the options below key with those serialised in buffer by
+    ! write_options_buffer
     character(len = *), intent(in) :: key
+    character(len = 1, kind = c_char), dimension(:), intent(in) :: buffer
     integer, optional, intent(out) :: stat
-
-    integer :: option_type
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
 
@@ -385,19 +965,19 @@ contains
       stat = SPUD_NO_ERROR
     end if
 
-    lstat = spud_get_option_type(string_array(key), len_trim(key), option_type)
+    lstat = spud_context_load_options_buffer(context_ptr(context), key, len_trim(key), buffer, int(size(buffer), c_size_t))
+
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
     end if
 
-  end function option_type
+  end subroutine load_options_buffer
 
-  function option_rank(key, stat)
-    character(len = *), intent(in) :: key
+  subroutine freeze_options(filename, stat, context)
+    character(len = *), intent(in) :: filename
     integer, optional, intent(out) :: stat
-
-    integer :: option_rank
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
 
@@ -405,367 +985,1559 @@ contains
       stat = SPUD_NO_ERROR
     end if
 
-    lstat = spud_get_option_rank(string_array(key), len_trim(key), option_rank)
+    lstat = spud_context_freeze_options(context_ptr(context), filename, len_trim(filename))
+
     if(lstat /= SPUD_NO_ERROR) then
-      call option_error(key, lstat, stat)
+      call option_error(filename, lstat, stat)
       return
     end if
 
-  end function option_rank
+  end subroutine freeze_options
 
-  function option_shape(key, stat)
-    character(len = *), intent(in) :: key
+  subroutine load_frozen_options(filename, stat, context)
+    character(len = *), intent(in) :: filename
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
-    integer, dimension(2) :: option_shape
-
-    integer :: lstat, shape_store
+    integer :: lstat
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    lstat = spud_get_option_shape(string_array(key), len_trim(key), option_shape(1:2))  ! Slicing required by GCC 4.2
+    lstat = spud_context_load_frozen_options(context_ptr(context), filename, len_trim(filename))
+
     if(lstat /= SPUD_NO_ERROR) then
+      call option_error(filename, lstat, stat)
+      return
+    end if
+
+  end subroutine load_frozen_options
+
+  subroutine start_profiling(filename, context)
+    character(len = *), intent(in) :: filename
+    type(option_context), optional, intent(in) :: context
+
+    call spud_context_start_profiling(context_ptr(context), filename, len_trim(filename))
+
+  end subroutine start_profiling
+
+  subroutine stop_profiling(stat, context)
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_stop_profiling(context_ptr(context))
+
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error("(options profile)", lstat, stat)
+      return
+    end if
+
+  end subroutine stop_profiling
+
+  subroutine get_child_name(key, index, child_name, stat, context)
+    character(len = *), intent(in) :: key
+    integer, intent(in) :: index
+    character(len = *), intent(out) :: child_name
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    character(len = 1, kind=c_char), dimension(len(child_name)) :: lchild_name
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lchild_name = ""
+    lstat = spud_context_get_child_name(context_ptr(context), key, len_trim(key), index, &
+      & lchild_name, size(lchild_name))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+
+    child_name = trim(array_string(lchild_name))
+
+  end subroutine get_child_name
+
+  subroutine get_number_of_children(key, child_count, stat, context)
+    character(len = *), intent(in) :: key
+    integer, intent(out) :: child_count
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+
+    lstat = spud_context_get_number_of_children(context_ptr(context), key, len_trim(key), child_count)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+
+  end subroutine get_number_of_children
+
+  subroutine get_child_names(key, child_names, stat, context)
+    ! Names longer than len(child_names) are truncated
+    character(len = *), intent(in) :: key
+    character(len = *), dimension(:), allocatable, intent(out) :: child_names
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    character(len=1,kind=c_char), dimension(:), allocatable :: lchild_names
+    integer :: i, j, lstat
+    integer(c_int) :: count, max_count, max_name_len
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    ! Find the number of children, and then fetch their names
+    allocate(lchild_names(0))
+    lstat = spud_context_get_child_names(context_ptr(context), key, len_trim(key), &
+      & lchild_names, len(child_names), 0, count, max_name_len)
+    if(lstat /= SPUD_NO_ERROR) then
+      allocate(child_names(0))
+      call option_error(key, lstat, stat)
+      return
+    end if
+    deallocate(lchild_names)
+
+    max_count = count
+    allocate(child_names(max_count))
+    allocate(lchild_names(len(child_names) * max_count))
+    lstat = spud_context_get_child_names(context_ptr(context), key, len_trim(key), &
+      & lchild_names, len(child_names), max_count, count, max_name_len)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+
+    do i = 1, size(child_names)
+      do j = 1, len(child_names)
+        child_names(i)(j:j) = lchild_names((i - 1) * len(child_names) + j)
+      end do
+    end do
+
+  end subroutine get_child_names
+
+  function option_count(key, context)
+    character(len = *), intent(in) :: key
+    type(option_context), optional, intent(in) :: context
+
+    integer :: option_count
+
+    option_count = spud_context_option_count(context_ptr(context), key, len_trim(key))
+
+  end function option_count
+
+  function have_option(key, context)
+    character(len = *), intent(in) :: key
+    type(option_context), optional, intent(in) :: context
+
+    logical :: have_option
+
+    have_option = (spud_context_have_option(context_ptr(context), key, len_trim(key)) /= 0)
+
+  end function have_option
+
+  function option_type(key, stat, context)
+    character(len = *), intent(in) :: key
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: option_type
+
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_option_type(context_ptr(context), key, len_trim(key), option_type)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+
+  end function option_type
+
+  function option_rank(key, stat, context)
+    character(len = *), intent(in) :: key
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: option_rank
+
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_option_rank(context_ptr(context), key, len_trim(key), option_rank)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+
+  end function option_rank
+
+  function option_shape(key, stat, context)
+    character(len = *), intent(in) :: key
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer, dimension(2) :: option_shape
+
+    integer :: lstat, shape_store
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_option_shape(context_ptr(context), key, len_trim(key), &
+      & option_shape(1:2))  ! Slicing required by GCC 4.2
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+
+    if(option_rank(key, stat, context = context) == 2) then
+      shape_store = option_shape(1)
+      option_shape(1) = option_shape(2)
+      option_shape(2) = shape_store
+    end if
+
+  end function option_shape
+
+  subroutine get_option_handle(key, handle, stat, context)
+    character(len = *), intent(in) :: key
+    type(option_handle), intent(out) :: handle
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_option_handle(context_ptr(context), key, len_trim(key), handle)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+
+  end subroutine get_option_handle
+
+  subroutine get_child_handle(parent, key, handle, stat, context)
+    type(option_handle), intent(in) :: parent
+    character(len = *), intent(in) :: key
+    type(option_handle), intent(out) :: handle
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_child_handle(context_ptr(context), parent, key, len_trim(key), handle)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+
+  end subroutine get_child_handle
+
+  subroutine get_child_handle_index(parent, index, handle, stat, context)
+    type(option_handle), intent(in) :: parent
+    integer, intent(in) :: index
+    type(option_handle), intent(out) :: handle
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_child_handle_by_index(context_ptr(context), parent, index, handle)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+
+  end subroutine get_child_handle_index
+
+  subroutine get_child_name_handle(parent, index, child_name, stat, context)
+    type(option_handle), intent(in) :: parent
+    integer, intent(in) :: index
+    character(len = *), intent(out) :: child_name
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    character(len = 1, kind=c_char), dimension(len(child_name)) :: lchild_name
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lchild_name = ""
+    lstat = spud_context_get_child_name_by_handle(context_ptr(context), parent, index, lchild_name, size(lchild_name))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+
+    child_name = trim(array_string(lchild_name))
+
+  end subroutine get_child_name_handle
+
+  subroutine get_number_of_children_handle(parent, child_count, stat, context)
+    type(option_handle), intent(in) :: parent
+    integer, intent(out) :: child_count
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_number_of_children_by_handle(context_ptr(context), parent, child_count)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+
+  end subroutine get_number_of_children_handle
+
+  function option_type_handle(handle, stat, context) result(option_type)
+    type(option_handle), intent(in) :: handle
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: option_type
+
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_option_type_by_handle(context_ptr(context), handle, option_type)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+
+  end function option_type_handle
+
+  function option_rank_handle(handle, stat, context) result(option_rank)
+    type(option_handle), intent(in) :: handle
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: option_rank
+
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_option_rank_by_handle(context_ptr(context), handle, option_rank)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+
+  end function option_rank_handle
+
+  function option_shape_handle(handle, stat, context) result(option_shape)
+    type(option_handle), intent(in) :: handle
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer, dimension(2) :: option_shape
+
+    integer :: lstat, shape_store
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_option_shape_by_handle(context_ptr(context), handle, option_shape(1:2))  ! Slicing required by GCC 4.2
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+
+    if(option_rank_handle(handle, stat, context = context) == 2) then
+      shape_store = option_shape(1)
+      option_shape(1) = option_shape(2)
+      option_shape(2) = shape_store
+    end if
+
+  end function option_shape_handle
+
+  subroutine get_option_real_scalar(key, val, stat, default, context)
+    character(len = *), intent(in) :: key
+    real(D), intent(out) :: val
+    integer, optional, intent(out) :: stat
+    real(D), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
+
+    real(D), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/-1, -1/)
+    lstat = spud_context_get_option_checked(context_ptr(context), key, len_trim(key), SPUD_REAL, 0, lshape, c_loc(lval))
+    if(lstat == SPUD_KEY_ERROR .and. present(default)) then
+      val = default
+    else if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    else
+      val = lval
+    end if
+
+  end subroutine get_option_real_scalar
+
+  subroutine get_option_real_vector(key, val, stat, default, context)
+    character(len = *), intent(in) :: key
+    real(D), dimension(:), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    real(D), dimension(size(val)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
+
+    real(D), dimension(size(val)), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/size(val), -1/)
+    lstat = spud_context_get_option_checked(context_ptr(context), key, len_trim(key), SPUD_REAL, 1, lshape, c_loc(lval))
+    if(lstat == SPUD_KEY_ERROR .and. present(default)) then
+      val = default
+    else if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    else
+      val = lval
+    end if
+
+  end subroutine get_option_real_vector
+
+  subroutine get_option_real_tensor(key, val, stat, default, context)
+    character(len = *), intent(in) :: key
+    real(D), dimension(:, :), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    real(D), dimension(size(val, 1), size(val, 2)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+    ! Note the transpose
+    real(D), dimension(size(val, 2), size(val, 1)), target :: lval
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = shape(lval)
+    lstat = spud_context_get_option_checked(context_ptr(context), key, len_trim(key), SPUD_REAL, 2, lshape, c_loc(lval))
+    if(lstat == SPUD_KEY_ERROR .and. present(default)) then
+      val = default
+    else if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    else
+      val = transpose(lval)
+    end if
+
+  end subroutine get_option_real_tensor
+
+  subroutine get_option_real_scalar_sp(key, val, stat, default, context)
+    ! Single precision version of routine. Note that values stored in the
+    ! dictionary are always double precision.
+    character(len = *), intent(in) :: key
+    real, intent(out) :: val
+    integer, optional, intent(out) :: stat
+    real, optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
+
+    real(D), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/-1, -1/)
+    lstat = spud_context_get_option_checked(context_ptr(context), key, len_trim(key), SPUD_REAL, 0, lshape, c_loc(lval))
+    if(lstat == SPUD_KEY_ERROR .and. present(default)) then
+      val = default
+    else if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    else
+      val = real(lval)
+    end if
+
+  end subroutine get_option_real_scalar_sp
+
+  subroutine get_option_real_vector_sp(key, val, stat, default, context)
+    ! Single precision version of routine. Note that values stored in the
+    ! dictionary are always double precision.
+    character(len = *), intent(in) :: key
+    real, dimension(:), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    real, dimension(size(val)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+    real(D), dimension(size(val)), target :: lval
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/size(val), -1/)
+    lstat = spud_context_get_option_checked(context_ptr(context), key, len_trim(key), SPUD_REAL, 1, lshape, c_loc(lval))
+    if(lstat == SPUD_KEY_ERROR .and. present(default)) then
+      val = default
+    else if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    else
+      val = real(lval)
+    end if
+
+  end subroutine get_option_real_vector_sp
+
+  subroutine get_option_real_tensor_sp(key, val, stat, default, context)
+    ! Single precision version of routine. Note that values stored in the
+    ! dictionary are always double precision.
+    character(len = *), intent(in) :: key
+    real, dimension(:, :), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    real, dimension(size(val, 1), size(val, 2)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+    real(D), dimension(size(val, 2), size(val, 1)), target :: lval
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = shape(lval)
+    lstat = spud_context_get_option_checked(context_ptr(context), key, len_trim(key), SPUD_REAL, 2, lshape, c_loc(lval))
+    if(lstat == SPUD_KEY_ERROR .and. present(default)) then
+      val = default
+    else if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    else
+      val = real(transpose(lval))
+    end if
+
+  end subroutine get_option_real_tensor_sp
+
+  subroutine get_option_integer_scalar(key, val, stat, default, context)
+    character(len = *), intent(in) :: key
+    integer, intent(out) :: val
+    integer, optional, intent(out) :: stat
+    integer, optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+    integer(c_int), target :: lval
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/-1, -1/)
+    lstat = spud_context_get_option_checked(context_ptr(context), key, len_trim(key), SPUD_INTEGER, 0, lshape, c_loc(lval))
+    if(lstat == SPUD_KEY_ERROR .and. present(default)) then
+      val = default
+    else if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    else
+      val = lval
+    end if
+
+  end subroutine get_option_integer_scalar
+
+  subroutine get_option_integer_vector(key, val, stat, default, context)
+    character(len = *), intent(in) :: key
+    integer, dimension(:), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    integer, dimension(size(val)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
+
+    integer(c_int), dimension(size(val)), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/size(val), -1/)
+    lstat = spud_context_get_option_checked(context_ptr(context), key, len_trim(key), SPUD_INTEGER, 1, lshape, c_loc(lval))
+    if(lstat == SPUD_KEY_ERROR .and. present(default)) then
+      val = default
+    else if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
+    else
+      val = lval
+    end if
+
+  end subroutine get_option_integer_vector
+
+  subroutine get_option_integer_tensor(key, val, stat, default, context)
+    character(len = *), intent(in) :: key
+    integer, dimension(:, :), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    integer, dimension(size(val, 1), size(val, 2)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+    integer(c_int), dimension(size(val, 2), size(val, 1)), target :: lval
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = shape(lval)
+    lstat = spud_context_get_option_checked(context_ptr(context), key, len_trim(key), SPUD_INTEGER, 2, lshape, c_loc(lval))
+    if(lstat == SPUD_KEY_ERROR .and. present(default)) then
+      val = default
+    else if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    else
+      val = transpose(lval)
+    end if
+
+  end subroutine get_option_integer_tensor
+
+  subroutine get_option_character(key, val, stat, default, context)
+    character(len = *), intent(in) :: key
+    character(len = *), intent(out) :: val
+    integer, optional, intent(out) :: stat
+    character(len = *), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
+
+    character(len=1,kind=c_char), dimension(len(val)), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/len(val), -1/)
+    lval = ""
+    lstat = spud_context_get_option_checked(context_ptr(context), key, len_trim(key), SPUD_CHARACTER, 1, lshape, c_loc(lval))
+    if(lstat == SPUD_KEY_ERROR .and. present(default)) then
+      val = trim(default)
+    else if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    else
+      val = array_string(lval)
+    end if
+
+  end subroutine get_option_character
+
+  subroutine get_option_real_scalar_handle(handle, val, stat, context)
+    type(option_handle), intent(in) :: handle
+    real(D), intent(out) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    real(D), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/-1, -1/)
+    lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_REAL, 0, lshape, c_loc(lval))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    val = lval
+
+  end subroutine get_option_real_scalar_handle
+
+  subroutine get_option_real_vector_handle(handle, val, stat, context)
+    type(option_handle), intent(in) :: handle
+    real(D), dimension(:), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    real(D), dimension(size(val)), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/size(val), -1/)
+    lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_REAL, 1, lshape, c_loc(lval))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    val = lval
+
+  end subroutine get_option_real_vector_handle
+
+  subroutine get_option_real_tensor_handle(handle, val, stat, context)
+    type(option_handle), intent(in) :: handle
+    real(D), dimension(:, :), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    ! Note the transpose
+    real(D), dimension(size(val, 2), size(val, 1)), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = shape(lval)
+    lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_REAL, 2, lshape, c_loc(lval))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    val = transpose(lval)
+
+  end subroutine get_option_real_tensor_handle
+
+  subroutine get_option_real_scalar_sp_handle(handle, val, stat, context)
+    ! Single precision version of routine. Note that values stored in the
+    ! dictionary are always double precision.
+    type(option_handle), intent(in) :: handle
+    real, intent(out) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    real(D), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/-1, -1/)
+    lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_REAL, 0, lshape, c_loc(lval))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    val = real(lval)
+
+  end subroutine get_option_real_scalar_sp_handle
+
+  subroutine get_option_real_vector_sp_handle(handle, val, stat, context)
+    ! Single precision version of routine. Note that values stored in the
+    ! dictionary are always double precision.
+    type(option_handle), intent(in) :: handle
+    real, dimension(:), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    real(D), dimension(size(val)), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/size(val), -1/)
+    lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_REAL, 1, lshape, c_loc(lval))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
     end if
+    val = real(lval)
 
-    if(option_rank(key, stat) == 2) then
-      shape_store = option_shape(1)
-      option_shape(1) = option_shape(2)
-      option_shape(2) = shape_store
+  end subroutine get_option_real_vector_sp_handle
+
+  subroutine get_option_real_tensor_sp_handle(handle, val, stat, context)
+    ! Single precision version of routine. Note that values stored in the
+    ! dictionary are always double precision.
+    type(option_handle), intent(in) :: handle
+    real, dimension(:, :), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    real(D), dimension(size(val, 2), size(val, 1)), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
     end if
 
-  end function option_shape
+    lshape = shape(lval)
+    lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_REAL, 2, lshape, c_loc(lval))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    val = real(transpose(lval))
+
+  end subroutine get_option_real_tensor_sp_handle
+
+  subroutine get_option_integer_scalar_handle(handle, val, stat, context)
+    type(option_handle), intent(in) :: handle
+    integer, intent(out) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer(c_int), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/-1, -1/)
+    lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_INTEGER, 0, lshape, c_loc(lval))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    val = lval
+
+  end subroutine get_option_integer_scalar_handle
+
+  subroutine get_option_integer_vector_handle(handle, val, stat, context)
+    type(option_handle), intent(in) :: handle
+    integer, dimension(:), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer(c_int), dimension(size(val)), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/size(val), -1/)
+    lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_INTEGER, 1, lshape, c_loc(lval))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    val = lval
+
+  end subroutine get_option_integer_vector_handle
+
+  subroutine get_option_integer_tensor_handle(handle, val, stat, context)
+    type(option_handle), intent(in) :: handle
+    integer, dimension(:, :), intent(inout) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer(c_int), dimension(size(val, 2), size(val, 1)), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = shape(lval)
+    lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_INTEGER, 2, lshape, c_loc(lval))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    val = transpose(lval)
+
+  end subroutine get_option_integer_tensor_handle
+
+  subroutine get_option_character_handle(handle, val, stat, context)
+    type(option_handle), intent(in) :: handle
+    character(len = *), intent(out) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    character(len=1,kind=c_char), dimension(len(val)), target :: lval
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lshape = (/len(val), -1/)
+    lval = ""
+    lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_CHARACTER, 1, lshape, c_loc(lval))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    val = array_string(lval)
+
+  end subroutine get_option_character_handle
 
-  subroutine get_option_real_scalar(key, val, stat, default)
+  subroutine get_option_allocatable_real_vector(key, val, stat, context)
     character(len = *), intent(in) :: key
-    real(D), intent(out) :: val
+    real(D), dimension(:), allocatable, intent(out) :: val
     integer, optional, intent(out) :: stat
-    real(D), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
 
-    real(D), target :: lval
+    type(option_handle) :: handle
     integer :: lstat
+    integer, dimension(2) :: lshape
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    if(.not. have_option(key) .and. present(default)) then
-      val = default
-    else
-      call check_option(key, SPUD_REAL, 0, (/-1, -1/), lstat)
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      lstat = spud_get_option(key, len_trim(key), c_loc(lval))
+    lstat = spud_context_get_option_handle(context_ptr(context), key, len_trim(key), handle)
+    if(lstat == SPUD_NO_ERROR) then
+      lshape = -1
+      lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_REAL, 1, lshape, c_null_ptr)
+    end if
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    call get_vector(lshape)
+
+  contains
+
+    subroutine get_vector(lshape)
+      integer, dimension(2), intent(inout) :: lshape
+
+      real(D), dimension(lshape(1)), target :: lval
+
+      lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_REAL, 1, lshape, c_loc(lval))
       if(lstat /= SPUD_NO_ERROR) then
         call option_error(key, lstat, stat)
         return
       end if
-      val=lval
-    end if
+      allocate(val(lshape(1)))
+      val = lval
 
-  end subroutine get_option_real_scalar
+    end subroutine get_vector
+
+  end subroutine get_option_allocatable_real_vector
 
-  subroutine get_option_real_vector(key, val, stat, default)
+  subroutine get_option_allocatable_real_tensor(key, val, stat, context)
     character(len = *), intent(in) :: key
-    real(D), dimension(:), intent(inout) :: val
+    real(D), dimension(:, :), allocatable, intent(out) :: val
     integer, optional, intent(out) :: stat
-    real(D), dimension(size(val)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
 
-    real(D), dimension(size(val)), target :: lval
+    type(option_handle) :: handle
     integer :: lstat
+    integer, dimension(2) :: lshape
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    if(.not. have_option(key) .and. present(default)) then
-      val = default
-    else
-      call check_option(key, SPUD_REAL, 1, (/size(val), -1/), lstat)
+    lstat = spud_context_get_option_handle(context_ptr(context), key, len_trim(key), handle)
+    if(lstat == SPUD_NO_ERROR) then
+      lshape = -1
+      lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_REAL, 2, lshape, c_null_ptr)
+    end if
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    call get_tensor(lshape)
+
+  contains
+
+    subroutine get_tensor(lshape)
+      integer, dimension(2), intent(inout) :: lshape
+
+      ! Note the transpose
+      real(D), dimension(lshape(1), lshape(2)), target :: lval
+
+      lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_REAL, 2, lshape, c_loc(lval))
       if(lstat /= SPUD_NO_ERROR) then
         call option_error(key, lstat, stat)
         return
       end if
-      lstat = spud_get_option(string_array(key), len_trim(key), c_loc(lval))
+      allocate(val(lshape(2), lshape(1)))
+      val = transpose(lval)
+
+    end subroutine get_tensor
+
+  end subroutine get_option_allocatable_real_tensor
+
+  subroutine get_option_allocatable_integer_vector(key, val, stat, context)
+    character(len = *), intent(in) :: key
+    integer, dimension(:), allocatable, intent(out) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    type(option_handle) :: handle
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_option_handle(context_ptr(context), key, len_trim(key), handle)
+    if(lstat == SPUD_NO_ERROR) then
+      lshape = -1
+      lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_INTEGER, 1, lshape, c_null_ptr)
+    end if
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    call get_vector(lshape)
+
+  contains
+
+    subroutine get_vector(lshape)
+      integer, dimension(2), intent(inout) :: lshape
+
+      integer(c_int), dimension(lshape(1)), target :: lval
+
+      lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_INTEGER, 1, lshape, c_loc(lval))
       if(lstat /= SPUD_NO_ERROR) then
         call option_error(key, lstat, stat)
         return
       end if
-      val=lval
-    end if
+      allocate(val(lshape(1)))
+      val = lval
 
-  end subroutine get_option_real_vector
+    end subroutine get_vector
+
+  end subroutine get_option_allocatable_integer_vector
 
-  subroutine get_option_real_tensor(key, val, stat, default)
+  subroutine get_option_allocatable_integer_tensor(key, val, stat, context)
     character(len = *), intent(in) :: key
-    real(D), dimension(:, :), intent(inout) :: val
+    integer, dimension(:, :), allocatable, intent(out) :: val
     integer, optional, intent(out) :: stat
-    real(D), dimension(size(val, 1), size(val, 2)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
 
+    type(option_handle) :: handle
     integer :: lstat
-    ! Note the transpose
-    real(D), dimension(size(val, 2), size(val, 1)), target :: lval
+    integer, dimension(2) :: lshape
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    if(.not. have_option(key) .and. present(default)) then
-      val = default
-    else
-      call check_option(key, SPUD_REAL, 2, shape(val), lstat)
+    lstat = spud_context_get_option_handle(context_ptr(context), key, len_trim(key), handle)
+    if(lstat == SPUD_NO_ERROR) then
+      lshape = -1
+      lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_INTEGER, 2, lshape, c_null_ptr)
+    end if
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    call get_tensor(lshape)
+
+  contains
+
+    subroutine get_tensor(lshape)
+      integer, dimension(2), intent(inout) :: lshape
+
+      ! Note the transpose
+      integer(c_int), dimension(lshape(1), lshape(2)), target :: lval
+
+      lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_INTEGER, 2, lshape, c_loc(lval))
       if(lstat /= SPUD_NO_ERROR) then
         call option_error(key, lstat, stat)
         return
       end if
-      lstat = spud_get_option(string_array(key), len_trim(key), c_loc(lval))
+      allocate(val(lshape(2), lshape(1)))
+      val = transpose(lval)
+
+    end subroutine get_tensor
+
+  end subroutine get_option_allocatable_integer_tensor
+
+  subroutine get_option_allocatable_character(key, val, stat, context)
+    character(len = *), intent(in) :: key
+    character(len = :), allocatable, intent(out) :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    type(option_handle) :: handle
+    integer :: lstat
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_get_option_handle(context_ptr(context), key, len_trim(key), handle)
+    if(lstat == SPUD_NO_ERROR) then
+      lshape = -1
+      lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_CHARACTER, 1, lshape, c_null_ptr)
+    end if
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    call get_string(lshape)
+
+  contains
+
+    subroutine get_string(lshape)
+      integer, dimension(2), intent(inout) :: lshape
+
+      character(len=1,kind=c_char), dimension(lshape(1)), target :: lval
+
+      lstat = spud_context_get_option_checked_by_handle(context_ptr(context), handle, SPUD_CHARACTER, 1, lshape, c_loc(lval))
       if(lstat /= SPUD_NO_ERROR) then
         call option_error(key, lstat, stat)
         return
       end if
-      val=transpose(lval)
+      val = array_string(lval)
+
+    end subroutine get_string
+
+  end subroutine get_option_allocatable_character
+
+  subroutine get_option_view_real_vector(key, val, stat, context)
+    character(len = *), intent(in) :: key
+    real(D), dimension(:), pointer :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    type(c_ptr) :: data
+    integer(c_size_t) :: lsize
+    integer, dimension(2) :: lshape
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
     end if
 
-  end subroutine get_option_real_tensor
+    val => null()
 
-  subroutine get_option_real_scalar_sp(key, val, stat, default)
-    ! Single precision version of routine. Note that values stored in the
-    ! dictionary are always double precision.
+    call check_option(key, SPUD_REAL, 1, stat = lstat, context = context)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    lstat = spud_context_get_option_view(context_ptr(context), key, len_trim(key), data, lsize, lshape)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    call c_f_pointer(data, val, lshape(1:1))
+
+  end subroutine get_option_view_real_vector
+
+  subroutine get_option_view_real_tensor(key, val, stat, context)
     character(len = *), intent(in) :: key
-    real, intent(out) :: val
+    real(D), dimension(:, :), pointer :: val
     integer, optional, intent(out) :: stat
-    real, optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
 
-    real(D), target :: lval
+    type(c_ptr) :: data
+    integer(c_size_t) :: lsize
+    integer, dimension(2) :: lshape
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    val => null()
+
+    call check_option(key, SPUD_REAL, 2, stat = lstat, context = context)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    lstat = spud_context_get_option_view(context_ptr(context), key, len_trim(key), data, lsize, lshape)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    ! Note the transpose: val(j, i) is element (i, j) of the option as
+    ! returned by get_option
+    call c_f_pointer(data, val, lshape)
+
+  end subroutine get_option_view_real_tensor
+
+  subroutine get_option_view_integer_vector(key, val, stat, context)
+    character(len = *), intent(in) :: key
+    integer, dimension(:), pointer :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    type(c_ptr) :: data
+    integer(c_size_t) :: lsize
+    integer, dimension(2) :: lshape
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    val => null()
+
+    call check_option(key, SPUD_INTEGER, 1, stat = lstat, context = context)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    lstat = spud_context_get_option_view(context_ptr(context), key, len_trim(key), data, lsize, lshape)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    call c_f_pointer(data, val, lshape(1:1))
+
+  end subroutine get_option_view_integer_vector
+
+  subroutine get_option_view_integer_tensor(key, val, stat, context)
+    character(len = *), intent(in) :: key
+    integer, dimension(:, :), pointer :: val
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    type(c_ptr) :: data
+    integer(c_size_t) :: lsize
+    integer, dimension(2) :: lshape
     integer :: lstat
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    if(.not. have_option(key) .and. present(default)) then
-      val = default
-    else
-      call check_option(key, SPUD_REAL, 0, (/-1, -1/), lstat)
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      lstat = spud_get_option(string_array(key), len_trim(key), c_loc(lval))
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      val=real(lval)
+    val => null()
+
+    call check_option(key, SPUD_INTEGER, 2, stat = lstat, context = context)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
+    end if
+    lstat = spud_context_get_option_view(context_ptr(context), key, len_trim(key), data, lsize, lshape)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(key, lstat, stat)
+      return
     end if
+    ! Note the transpose: val(j, i) is element (i, j) of the option as
+    ! returned by get_option
+    call c_f_pointer(data, val, lshape)
 
-  end subroutine get_option_real_scalar_sp
+  end subroutine get_option_view_integer_tensor
 
-  subroutine get_option_real_vector_sp(key, val, stat, default)
-    ! Single precision version of routine. Note that values stored in the
-    ! dictionary are always double precision.
-    character(len = *), intent(in) :: key
-    real, dimension(:), intent(inout) :: val
+  subroutine get_option_view_real_vector_handle(handle, val, stat, context)
+    type(option_handle), intent(in) :: handle
+    real(D), dimension(:), pointer :: val
     integer, optional, intent(out) :: stat
-    real, dimension(size(val)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
 
+    type(c_ptr) :: data
+    integer(c_size_t) :: lsize
+    integer, dimension(2) :: lshape
     integer :: lstat
-    real(D), dimension(size(val)), target :: lval
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    if(.not. have_option(key) .and. present(default)) then
-      val = default
-    else
-      call check_option(key, SPUD_REAL, 1, (/size(val), -1/), lstat)
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      lstat = spud_get_option(string_array(key), len_trim(key), c_loc(lval))
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      val=real(lval)
+    val => null()
+
+    call check_option_handle(handle, SPUD_REAL, 1, stat = lstat, context = context)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
     end if
+    lstat = spud_context_get_option_view_by_handle(context_ptr(context), handle, data, lsize, lshape)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    call c_f_pointer(data, val, lshape(1:1))
 
-  end subroutine get_option_real_vector_sp
+  end subroutine get_option_view_real_vector_handle
 
-  subroutine get_option_real_tensor_sp(key, val, stat, default)
-    ! Single precision version of routine. Note that values stored in the
-    ! dictionary are always double precision.
-    character(len = *), intent(in) :: key
-    real, dimension(:, :), intent(inout) :: val
+  subroutine get_option_view_real_tensor_handle(handle, val, stat, context)
+    type(option_handle), intent(in) :: handle
+    real(D), dimension(:, :), pointer :: val
     integer, optional, intent(out) :: stat
-    real, dimension(size(val, 1), size(val, 2)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
 
+    type(c_ptr) :: data
+    integer(c_size_t) :: lsize
+    integer, dimension(2) :: lshape
     integer :: lstat
-    real(D), dimension(size(val, 2), size(val, 1)), target :: lval
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    if(.not. have_option(key) .and. present(default)) then
-      val = default
-    else
-      call check_option(key, SPUD_REAL, 2, shape(val), lstat)
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      lstat = spud_get_option(string_array(key), len_trim(key), c_loc(lval))
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      val=real(transpose(lval))
+    val => null()
+
+    call check_option_handle(handle, SPUD_REAL, 2, stat = lstat, context = context)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
     end if
+    lstat = spud_context_get_option_view_by_handle(context_ptr(context), handle, data, lsize, lshape)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    ! Note the transpose: val(j, i) is element (i, j) of the option as
+    ! returned by get_option
+    call c_f_pointer(data, val, lshape)
 
-  end subroutine get_option_real_tensor_sp
+  end subroutine get_option_view_real_tensor_handle
 
-  subroutine get_option_integer_scalar(key, val, stat, default)
-    character(len = *), intent(in) :: key
-    integer, intent(out) :: val
+  subroutine get_option_view_integer_vector_handle(handle, val, stat, context)
+    type(option_handle), intent(in) :: handle
+    integer, dimension(:), pointer :: val
     integer, optional, intent(out) :: stat
-    integer, optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
 
+    type(c_ptr) :: data
+    integer(c_size_t) :: lsize
+    integer, dimension(2) :: lshape
     integer :: lstat
-    integer(c_int), target :: lval
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    if(.not. have_option(key) .and. present(default)) then
-      val = default
-    else
-      call check_option(key, SPUD_INTEGER, 0, (/-1, -1/), lstat)
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      lstat = spud_get_option(string_array(key), len_trim(key), c_loc(lval))
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      val=lval
+    val => null()
+
+    call check_option_handle(handle, SPUD_INTEGER, 1, stat = lstat, context = context)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    lstat = spud_context_get_option_view_by_handle(context_ptr(context), handle, data, lsize, lshape)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
     end if
+    call c_f_pointer(data, val, lshape(1:1))
 
-  end subroutine get_option_integer_scalar
+  end subroutine get_option_view_integer_vector_handle
 
-  subroutine get_option_integer_vector(key, val, stat, default)
-    character(len = *), intent(in) :: key
-    integer, dimension(:), intent(inout) :: val
+  subroutine get_option_view_integer_tensor_handle(handle, val, stat, context)
+    type(option_handle), intent(in) :: handle
+    integer, dimension(:, :), pointer :: val
     integer, optional, intent(out) :: stat
-    integer, dimension(size(val)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
 
-    integer(c_int), dimension(size(val)), target :: lval
+    type(c_ptr) :: data
+    integer(c_size_t) :: lsize
+    integer, dimension(2) :: lshape
     integer :: lstat
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    if(.not. have_option(key) .and. present(default)) then
-      val = default
-    else
-      call check_option(key, SPUD_INTEGER, 1, (/size(val), -1/), lstat)
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      lstat = spud_get_option(string_array(key), len_trim(key), c_loc(lval))
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      val=lval
+    val => null()
+
+    call check_option_handle(handle, SPUD_INTEGER, 2, stat = lstat, context = context)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
     end if
+    lstat = spud_context_get_option_view_by_handle(context_ptr(context), handle, data, lsize, lshape)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+    ! Note the transpose: val(j, i) is element (i, j) of the option as
+    ! returned by get_option
+    call c_f_pointer(data, val, lshape)
 
-  end subroutine get_option_integer_vector
+  end subroutine get_option_view_integer_tensor_handle
 
-  subroutine get_option_integer_tensor(key, val, stat, default)
-    character(len = *), intent(in) :: key
-    integer, dimension(:, :), intent(inout) :: val
+  subroutine get_option_info_keys(keys, info, context)
+    ! Errors for individual keys are returned in info%error, and are not fatal
+    character(len = *), dimension(:), intent(in) :: keys
+    type(option_info), dimension(size(keys)), intent(out) :: info
+    type(option_context), optional, intent(in) :: context
+
+    character(len=1,kind=c_char), dimension(len(keys) * size(keys)) :: lkeys
+    integer :: i, j, lstat
+
+    do i = 1, size(keys)
+      do j = 1, len(keys)
+        lkeys((i - 1) * len(keys) + j) = keys(i)(j:j)
+      end do
+    end do
+
+    lstat = spud_context_get_option_info(context_ptr(context), lkeys, len(keys), size(keys), info)
+    call fix_option_info_shape(info)
+
+  end subroutine get_option_info_keys
+
+  subroutine get_option_info_prefix(prefix, keys, info, stat, context)
+    ! Keys longer than len(keys) are truncated
+    character(len = *), intent(in) :: prefix
+    character(len = *), dimension(:), allocatable, intent(out) :: keys
+    type(option_info), dimension(:), allocatable, intent(out) :: info
     integer, optional, intent(out) :: stat
-    integer, dimension(size(val, 1), size(val, 2)), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
 
-    integer :: lstat
-    integer(c_int), dimension(size(val, 2), size(val, 1)), target :: lval
+    character(len=1,kind=c_char), dimension(:), allocatable :: lkeys
+    integer :: i, j, lstat
+    integer(c_int) :: count, max_count, max_key_len
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    if(.not. have_option(key) .and. present(default)) then
-      val = default
-    else
-      call check_option(key, SPUD_INTEGER, 2, shape(val), lstat)
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      lstat = spud_get_option(string_array(key), len_trim(key), c_loc(lval))
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      val=transpose(lval)
+    ! Find the number of keys, and then fetch them
+    allocate(info(0), lkeys(0))
+    lstat = spud_context_get_option_info_by_prefix(context_ptr(context), prefix, len_trim(prefix), &
+      & lkeys, len(keys), 0, count, max_key_len, info)
+    if(lstat /= SPUD_NO_ERROR) then
+      allocate(keys(0))
+      call option_error(prefix, lstat, stat)
+      return
     end if
+    deallocate(info, lkeys)
 
-  end subroutine get_option_integer_tensor
+    max_count = count
+    allocate(keys(max_count), info(max_count))
+    allocate(lkeys(len(keys) * max_count))
+    lstat = spud_context_get_option_info_by_prefix(context_ptr(context), prefix, len_trim(prefix), &
+      & lkeys, len(keys), max_count, count, max_key_len, info)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(prefix, lstat, stat)
+      return
+    end if
 
-  subroutine get_option_character(key, val, stat, default)
-    character(len = *), intent(in) :: key
-    character(len = *), intent(out) :: val
+    do i = 1, size(keys)
+      do j = 1, len(keys)
+        keys(i)(j:j) = lkeys((i - 1) * len(keys) + j)
+      end do
+    end do
+    call fix_option_info_shape(info)
+
+  end subroutine get_option_info_prefix
+
+  subroutine find_options(pattern, keys, handles, stat, context)
+    ! Keys longer than len(keys) are truncated
+    character(len = *), intent(in) :: pattern
+    character(len = *), dimension(:), allocatable, intent(out) :: keys
+    type(option_handle), dimension(:), allocatable, optional, intent(out) :: handles
     integer, optional, intent(out) :: stat
-    character(len = *), optional, intent(in) :: default
+    type(option_context), optional, intent(in) :: context
 
-    character(len=1,kind=c_char), dimension(len(val)), target :: lval
-    integer :: lstat
-    integer, dimension(2) :: lshape
+    character(len=1,kind=c_char), dimension(:), allocatable :: lkeys
+    type(option_handle), dimension(:), allocatable :: lhandles
+    integer :: i, j, lstat
+    integer(c_int) :: count, max_count, max_key_len
 
     if(present(stat)) then
       stat = SPUD_NO_ERROR
     end if
 
-    if(.not. have_option(key) .and. present(default)) then
-      val = trim(default)
-    else
-      call check_option(key, SPUD_CHARACTER, 1, stat = lstat)
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
-      end if
-      lshape = option_shape(key, stat)
-      if(lshape(1) > len(val)) then
-        call option_error(key, SPUD_SHAPE_ERROR, stat)
-        return
-      end if
-      lval = ""
-      lstat = spud_get_option(string_array(key), len_trim(key), c_loc(lval))
-      if(lstat /= SPUD_NO_ERROR) then
-        call option_error(key, lstat, stat)
-        return
+    ! Find the number of matches, and then fetch them
+    allocate(lhandles(0), lkeys(0))
+    lstat = spud_context_find_options(context_ptr(context), pattern, len_trim(pattern), &
+      & lkeys, len(keys), 0, count, max_key_len, lhandles)
+    if(lstat /= SPUD_NO_ERROR) then
+      allocate(keys(0))
+      if(present(handles)) then
+        allocate(handles(0))
       end if
-      val = array_string(lval)
+      call option_error(pattern, lstat, stat)
+      return
     end if
+    deallocate(lhandles, lkeys)
 
-  end subroutine get_option_character
+    max_count = count
+    allocate(keys(max_count), lhandles(max_count))
+    allocate(lkeys(len(keys) * max_count))
+    lstat = spud_context_find_options(context_ptr(context), pattern, len_trim(pattern), &
+      & lkeys, len(keys), max_count, count, max_key_len, lhandles)
+
+    do i = 1, size(keys)
+      do j = 1, len(keys)
+        keys(i)(j:j) = lkeys((i - 1) * len(keys) + j)
+      end do
+    end do
+    if(present(handles)) then
+      call move_alloc(lhandles, handles)
+    end if
+
+  end subroutine find_options
+
+  subroutine fix_option_info_shape(info)
+    ! Swap the shape of rank 2 options, as in option_shape
+    type(option_info), dimension(:), intent(inout) :: info
+
+    integer :: i
+
+    do i = 1, size(info)
+      if(info(i)%rank == 2) then
+        info(i)%shape = info(i)%shape(2:1:-1)
+      end if
+    end do
 
-  subroutine add_option(key, stat)
+  end subroutine fix_option_info_shape
+
+  subroutine add_option(key, stat, context)
     character(len = *), intent(in) :: key
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
 
@@ -773,7 +2545,7 @@ contains
       stat = SPUD_NO_ERROR
     end if
 
-    lstat = spud_add_option(string_array(key), len_trim(key))
+    lstat = spud_context_add_option(context_ptr(context), key, len_trim(key))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -781,10 +2553,11 @@ contains
 
   end subroutine add_option
 
-  subroutine set_option_real_scalar(key, val, stat)
+  subroutine set_option_real_scalar(key, val, stat, context)
     character(len = *), intent(in) :: key
     real(D), intent(in), target :: val
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
 
@@ -792,7 +2565,7 @@ contains
       stat = SPUD_NO_ERROR
     end if
 
-    lstat = spud_set_option(string_array(key), len_trim(key), c_loc(val), SPUD_REAL, 0, (/-1, -1/))
+    lstat = spud_context_set_option(context_ptr(context), key, len_trim(key), c_loc(val), SPUD_REAL, 0, (/-1, -1/))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -800,10 +2573,11 @@ contains
 
   end subroutine set_option_real_scalar
 
-  subroutine set_option_real_vector(key, val, stat)
+  subroutine set_option_real_vector(key, val, stat, context)
     character(len = *), intent(in) :: key
     real(D), dimension(:), intent(in) :: val
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
     ! Buffer to make c_loc call legal.
@@ -815,7 +2589,8 @@ contains
 
     lval=val
 
-    lstat = spud_set_option(string_array(key), len_trim(key), c_loc(lval), SPUD_REAL, 1, (/size(val), -1/))
+    lstat = spud_context_set_option(context_ptr(context), key, len_trim(key), c_loc(lval), &
+      & SPUD_REAL, 1, (/size(val), -1/))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -823,10 +2598,11 @@ contains
 
   end subroutine set_option_real_vector
 
-  subroutine set_option_real_tensor(key, val, stat)
+  subroutine set_option_real_tensor(key, val, stat, context)
     character(len = *), intent(in) :: key
     real(D), dimension(:, :), intent(in), target :: val
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
     real(D), dimension(size(val, 2), size(val, 1)), target :: val_handle
@@ -837,7 +2613,8 @@ contains
 
     val_handle = transpose(val)
 
-    lstat = spud_set_option(string_array(key), len_trim(key), c_loc(val_handle), SPUD_REAL, 2, shape(val_handle))
+    lstat = spud_context_set_option(context_ptr(context), key, len_trim(key), &
+      & c_loc(val_handle), SPUD_REAL, 2, shape(val_handle))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -845,12 +2622,13 @@ contains
 
   end subroutine set_option_real_tensor
 
-  subroutine set_option_real_scalar_sp(key, val, stat)
+  subroutine set_option_real_scalar_sp(key, val, stat, context)
     ! Single precision version of routine. Note that values stored in the
     ! dictionary are always double precision.
     character(len = *), intent(in) :: key
     real, intent(in) :: val
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
     real(D), target :: lval
@@ -860,7 +2638,7 @@ contains
     end if
 
     lval = val
-    lstat = spud_set_option(string_array(key), len_trim(key), c_loc(lval), SPUD_REAL, 0, (/-1, -1/))
+    lstat = spud_context_set_option(context_ptr(context), key, len_trim(key), c_loc(lval), SPUD_REAL, 0, (/-1, -1/))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -868,12 +2646,13 @@ contains
 
   end subroutine set_option_real_scalar_sp
 
-  subroutine set_option_real_vector_sp(key, val, stat)
+  subroutine set_option_real_vector_sp(key, val, stat, context)
     ! Single precision version of routine. Note that values stored in the
     ! dictionary are always double precision.
     character(len = *), intent(in) :: key
     real, dimension(:), intent(in) :: val
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
     real(D), dimension(size(val)), target  :: lval
@@ -883,7 +2662,8 @@ contains
     end if
     
     lval=val
-    lstat = spud_set_option(string_array(key), len_trim(key), c_loc(lval), SPUD_REAL, 1, (/size(val), -1/))
+    lstat = spud_context_set_option(context_ptr(context), key, len_trim(key), c_loc(lval), &
+      & SPUD_REAL, 1, (/size(val), -1/))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -891,12 +2671,13 @@ contains
 
   end subroutine set_option_real_vector_sp
 
-  subroutine set_option_real_tensor_sp(key, val, stat)
+  subroutine set_option_real_tensor_sp(key, val, stat, context)
     ! Single precision version of routine. Note that values stored in the
     ! dictionary are always double precision.
     character(len = *), intent(in) :: key
     real, dimension(:, :), intent(in) :: val
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
     real(D), dimension(size(val, 2), size(val, 1)), target :: val_handle
@@ -907,7 +2688,8 @@ contains
 
     val_handle = transpose(val)
 
-    lstat = spud_set_option(string_array(key), len_trim(key), c_loc(val_handle), SPUD_REAL, 2, shape(val_handle))
+    lstat = spud_context_set_option(context_ptr(context), key, len_trim(key), &
+      & c_loc(val_handle), SPUD_REAL, 2, shape(val_handle))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -915,10 +2697,11 @@ contains
 
   end subroutine set_option_real_tensor_sp
 
-  subroutine set_option_integer_scalar(key, val, stat)
+  subroutine set_option_integer_scalar(key, val, stat, context)
     character(len = *), intent(in) :: key
     integer(c_int), intent(in), target :: val
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
 
@@ -926,7 +2709,7 @@ contains
       stat = SPUD_NO_ERROR
     end if
 
-    lstat = spud_set_option(string_array(key), len_trim(key), c_loc(val), SPUD_INTEGER, 0, (/-1, -1/))
+    lstat = spud_context_set_option(context_ptr(context), key, len_trim(key), c_loc(val), SPUD_INTEGER, 0, (/-1, -1/))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -934,10 +2717,11 @@ contains
 
   end subroutine set_option_integer_scalar
 
-  subroutine set_option_integer_vector(key, val, stat)
+  subroutine set_option_integer_vector(key, val, stat, context)
     character(len = *), intent(in) :: key
     integer, dimension(:), intent(in) :: val
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
     integer(c_int), dimension(size(val)), target :: lval
@@ -948,7 +2732,8 @@ contains
 
     lval=val
 
-    lstat = spud_set_option(string_array(key), len_trim(key), c_loc(lval), SPUD_INTEGER, 1, (/size(val), -1/))
+    lstat = spud_context_set_option(context_ptr(context), key, len_trim(key), c_loc(lval), &
+      & SPUD_INTEGER, 1, (/size(val), -1/))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -956,10 +2741,11 @@ contains
 
   end subroutine set_option_integer_vector
 
-  subroutine set_option_integer_tensor(key, val, stat)
+  subroutine set_option_integer_tensor(key, val, stat, context)
     character(len = *), intent(in) :: key
     integer, dimension(:, :), intent(in) :: val
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
     integer, dimension(size(val, 2), size(val, 1)), target :: val_handle
@@ -970,7 +2756,8 @@ contains
 
     val_handle = transpose(val)
 
-    lstat = spud_set_option(string_array(key), len_trim(key), c_loc(val_handle), SPUD_INTEGER, 2, shape(val_handle))
+    lstat = spud_context_set_option(context_ptr(context), key, len_trim(key), &
+      & c_loc(val_handle), SPUD_INTEGER, 2, shape(val_handle))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -978,10 +2765,11 @@ contains
 
   end subroutine set_option_integer_tensor
 
-  subroutine set_option_character(key, val, stat)
+  subroutine set_option_character(key, val, stat, context)
     character(len = *), intent(in) :: key
     character(len = *), intent(in) :: val
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     character(len=1,kind=c_char), dimension(len(val)), target :: lval
     integer :: lstat
@@ -992,7 +2780,8 @@ contains
 
     lval=string_array(val)
 
-    lstat = spud_set_option(string_array(key), len_trim(key), c_loc(lval), SPUD_CHARACTER, 1, (/len_trim(val), -1/))
+    lstat = spud_context_set_option(context_ptr(context), key, len_trim(key), c_loc(lval), &
+      & SPUD_CHARACTER, 1, (/len_trim(val), -1/))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -1000,10 +2789,11 @@ contains
 
   end subroutine set_option_character
 
-  subroutine set_option_attribute(key, val, stat)
+  subroutine set_option_attribute(key, val, stat, context)
     character(len = *), intent(in) :: key
     character(len = *), intent(in) :: val
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     character(len=1,kind=c_char), dimension(len(val)), target :: lval
     integer :: lstat
@@ -1014,7 +2804,7 @@ contains
 
     lval=string_array(val)
 
-    lstat = spud_set_option_attribute(string_array(key), len_trim(key), lval, len_trim(val))
+    lstat = spud_context_set_option_attribute(context_ptr(context), key, len_trim(key), lval, len_trim(val))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -1022,10 +2812,11 @@ contains
 
   end subroutine set_option_attribute
 
-  subroutine move_option(key1, key2, stat)
+  subroutine move_option(key1, key2, stat, context)
     character(len = *), intent(in) :: key1
     character(len = *), intent(in) :: key2
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
 
@@ -1033,7 +2824,7 @@ contains
       stat = SPUD_NO_ERROR
     end if
 
-    lstat = spud_move_option(string_array(key1), len_trim(key1), string_array(key2), len_trim(key2))
+    lstat = spud_context_move_option(context_ptr(context), key1, len_trim(key1), key2, len_trim(key2))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key1, lstat, stat)
       return
@@ -1041,10 +2832,11 @@ contains
 
   end subroutine move_option
 
-  subroutine copy_option(key1, key2, stat)
+  subroutine copy_option(key1, key2, stat, context)
     character(len = *), intent(in) :: key1
     character(len = *), intent(in) :: key2
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
 
@@ -1052,7 +2844,7 @@ contains
       stat = SPUD_NO_ERROR
     end if
 
-    lstat = spud_copy_option(string_array(key1), len_trim(key1), string_array(key2), len_trim(key2))
+    lstat = spud_context_copy_option(context_ptr(context), key1, len_trim(key1), key2, len_trim(key2))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key1, lstat, stat)
       return
@@ -1060,9 +2852,10 @@ contains
 
   end subroutine copy_option
 
-  subroutine delete_option(key, stat)
+  subroutine delete_option(key, stat, context)
     character(len = *), intent(in) :: key
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: lstat
 
@@ -1070,7 +2863,7 @@ contains
       stat = SPUD_NO_ERROR
     end if
 
-    lstat = spud_delete_option(string_array(key), len_trim(key))
+    lstat = spud_context_delete_option(context_ptr(context), key, len_trim(key))
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -1078,9 +2871,112 @@ contains
 
   end subroutine delete_option
 
-  subroutine print_options()
+  function get_generation(context)
+    ! The generation of the options, which increases with every change
+    type(option_context), optional, intent(in) :: context
+
+    integer(c_long) :: get_generation
+
+    get_generation = spud_context_get_generation(context_ptr(context))
+
+  end function get_generation
+
+  function have_changed(key, since, context)
+    ! Whether the option at key, or any option below it, has changed since
+    ! the supplied generation
+    character(len = *), intent(in) :: key
+    integer(c_long), intent(in) :: since
+    type(option_context), optional, intent(in) :: context
+
+    logical :: have_changed
+
+    have_changed = (spud_context_have_changed(context_ptr(context), key, len_trim(key), since) /= 0)
+
+  end function have_changed
+
+  subroutine get_changes(since, keys, changes, context)
+    ! The keys changed since the supplied generation, in the order in which
+    ! they were last changed, and the kind of each change. Keys longer than
+    ! len(keys) are truncated
+    integer(c_long), intent(in) :: since
+    character(len = *), dimension(:), allocatable, intent(out) :: keys
+    integer, dimension(:), allocatable, optional, intent(out) :: changes
+    type(option_context), optional, intent(in) :: context
+
+    character(len=1,kind=c_char), dimension(:), allocatable :: lkeys
+    integer(c_int), dimension(:), allocatable :: lchanges
+    integer :: i, j, lstat
+    integer(c_int) :: count, max_count, max_key_len
+
+    ! Find the number of changes, and then fetch them
+    allocate(lchanges(0), lkeys(0))
+    lstat = spud_context_get_changes(context_ptr(context), since, lkeys, len(keys), 0, count, max_key_len, lchanges)
+    deallocate(lchanges, lkeys)
+
+    max_count = count
+    allocate(keys(max_count), lchanges(max_count))
+    allocate(lkeys(len(keys) * max_count))
+    lstat = spud_context_get_changes(context_ptr(context), since, lkeys, len(keys), max_count, count, max_key_len, lchanges)
+
+    do i = 1, size(keys)
+      do j = 1, len(keys)
+        keys(i)(j:j) = lkeys((i - 1) * len(keys) + j)
+      end do
+    end do
+    if(present(changes)) then
+      allocate(changes(max_count))
+      changes = lchanges
+    end if
+
+  end subroutine get_changes
+
+  subroutine write_changes(filename, since, stat, context)
+    ! Write the options changed since the supplied generation to a file of
+    ! changes, which load_changes applies
+    character(len = *), intent(in) :: filename
+    integer(c_long), intent(in) :: since
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_write_changes(context_ptr(context), filename, len_trim(filename), since)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(filename, lstat, stat)
+      return
+    end if
+
+  end subroutine write_changes
+
+  subroutine load_changes(filename, stat, context)
+    ! Apply a file of changes written by write_changes
+    character(len = *), intent(in) :: filename
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: lstat
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    lstat = spud_context_load_changes(context_ptr(context), filename, len_trim(filename))
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(filename, lstat, stat)
+      return
+    end if
+
+  end subroutine load_changes
 
-    call spud_print_options()
+  subroutine print_options(context)
+    type(option_context), optional, intent(in) :: context
+
+
+    call spud_context_print_options(context_ptr(context))
 
   end subroutine print_options
 
@@ -1111,6 +3007,8 @@ contains
         write(0, *) "Option shape error. Key is: " // trim(key)
       case(SPUD_FILE_ERROR)
         write(0, *) "Option file error. Filename is: " // trim(key)        
+      case(SPUD_HANDLE_ERROR)
+        write(0, *) "Option handle error. The options tree has changed since the handle was created. Key is: " // trim(key)
       case(SPUD_NEW_KEY_WARNING)
         write(0, *) "Option warning. Key is not in the options tree: " // trim(key)
       case(SPUD_ATTR_SET_FAILED_WARNING)
@@ -1123,7 +3021,7 @@ contains
 
   end subroutine option_error
 
-  subroutine check_option(key, type, rank, shape, stat)
+  subroutine check_option(key, type, rank, shape, stat, context)
     !!< Check existence, type, rank, and optionally shape, of the option with
     !!< the supplied key
 
@@ -1132,6 +3030,7 @@ contains
     integer, intent(in) :: rank
     integer, dimension(2), optional, intent(in) :: shape
     integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
 
     integer :: i, lrank, lstat, ltype
     integer, dimension(2) :: lshape
@@ -1140,18 +3039,18 @@ contains
       stat = SPUD_NO_ERROR
     end if
 
-    if(.not. have_option(key)) then
+    if(.not. have_option(key, context = context)) then
       call option_error(key, SPUD_KEY_ERROR, stat)
       return
     end if
 
-    ltype = option_type(key, lstat)
+    ltype = option_type(key, lstat, context = context)
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
     end if
 
-    lrank = option_rank(key, lstat)
+    lrank = option_rank(key, lstat, context = context)
     if(lstat /= SPUD_NO_ERROR) then
       call option_error(key, lstat, stat)
       return
@@ -1164,7 +3063,7 @@ contains
       call option_error(key, SPUD_RANK_ERROR, stat)
       return
     else if(present(shape)) then
-      lshape = option_shape(key, stat)
+      lshape = option_shape(key, stat, context = context)
       if(lstat /= SPUD_NO_ERROR) then
         call option_error(key, lstat, stat)
         return
@@ -1180,4 +3079,57 @@ contains
 
   end subroutine check_option
 
+  subroutine check_option_handle(handle, type, rank, shape, stat, context)
+    !!< Check the type, rank, and optionally shape, of the option with the
+    !!< supplied handle
+
+    type(option_handle), intent(in) :: handle
+    integer, intent(in) :: type
+    integer, intent(in) :: rank
+    integer, dimension(2), optional, intent(in) :: shape
+    integer, optional, intent(out) :: stat
+    type(option_context), optional, intent(in) :: context
+
+    integer :: i, lrank, lstat, ltype
+    integer, dimension(2) :: lshape
+
+    if(present(stat)) then
+      stat = SPUD_NO_ERROR
+    end if
+
+    ltype = option_type_handle(handle, lstat, context = context)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+
+    lrank = option_rank_handle(handle, lstat, context = context)
+    if(lstat /= SPUD_NO_ERROR) then
+      call option_error(handle_key, lstat, stat)
+      return
+    end if
+
+    if(type /= ltype) then
+      call option_error(handle_key, SPUD_TYPE_ERROR, stat)
+      return
+    else if(rank /= lrank) then
+      call option_error(handle_key, SPUD_RANK_ERROR, stat)
+      return
+    else if(present(shape)) then
+      lshape = option_shape_handle(handle, lstat, context = context)
+      if(lstat /= SPUD_NO_ERROR) then
+        call option_error(handle_key, lstat, stat)
+        return
+      end if
+
+      do i = 1, rank
+        if(shape(i) /= lshape(i)) then
+          call option_error(handle_key, SPUD_SHAPE_ERROR, stat)
+          return
+        end if
+      end do
+    end if
+
+  end subroutine check_option_handle
+
 end module spud
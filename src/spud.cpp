@@ -27,1847 +27,7980 @@
 
 #include "spud"
 
+#include <cmath>
+
+#include <errno.h>
+#include <fcntl.h>
+#include <pthread.h>
+#include <stdint.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#ifdef HAVE_LIBZ
+#include <zlib.h>
+#endif
+
+#ifdef HAVE_LIBBZ2
+#include <bzlib.h>
+#endif
+
+#ifdef HAVE_LIBZSTD
+#include <zstd.h>
+#endif
+
+#ifdef __has_include
+#if __has_include(<charconv>) and __cplusplus >= 201703L
+#include <charconv>
+#endif
+#endif
+
 using namespace std;
 
 namespace Spud{
 
-  // OptionManager CLASS METHODS
+  // Options locking
+
+  namespace{
+
+    // The options of the context passed to the routine being called on this
+    // thread, or NULL for the default options
+#if __cplusplus >= 201103L
+    thread_local OptionManager* current_manager = NULL;
+#else
+    __thread OptionManager* current_manager = NULL;
+#endif
+
+    // A lock held by this thread on the options of a context. Public methods
+    // call one another, so only the outermost call on each thread takes the
+    // lock of each options. The locks held form a list through the ReadLock
+    // and WriteLock objects on the stack, innermost first. A write-locked
+    // method may call a read-locked one, never the reverse.
+    struct HeldLock{
+      const OptionManager* options;
+      const HeldLock* previous;
+    };
 
-  // PRIVATE VARIABLES
+#if __cplusplus >= 201103L
+    thread_local const HeldLock* held_locks = NULL;
+#else
+    __thread const HeldLock* held_locks = NULL;
+#endif
 
-  bool OptionManager::deallocated = false;
+    logical_t holds_lock(const OptionManager* options){
+      for(const HeldLock* held = held_locks;held != NULL;held = held->previous){
+        if(held->options == options){
+          return true;
+        }
+      }
 
-  // PUBLIC METHODS
+      return false;
+    }
 
-  void OptionManager::clear_options() {
-    manager.reset();
-    
-    return;
-  }
+    // The last generation given to any options, shared by all contexts
+    long last_generation = 0;
 
-  void* OptionManager::get_manager() {
-    return (void*) manager.options;
-  }
+    long next_generation(){
+      return __sync_add_and_fetch(&last_generation, 1);
+    }
 
-  void OptionManager::set_manager(void* m) {
-    delete manager.options;
-    manager.options = (Spud::OptionManager::Option*) m;
-    return;
   }
 
-  OptionError OptionManager::load_options(const string& filename){
-    return manager.options->load_options(filename);
+  OptionManager& OptionManager::current(){
+    return current_manager == NULL ? manager : *current_manager;
   }
 
-  OptionError OptionManager::write_options(const string& filename){
-    return manager.options->write_options(filename);
-  }
+  // Queries share the lock and changes (including thawing a frozen image) take
+  // it exclusively, so lookups from many threads never wait on each other.
+  // Queries still take the read lock rather than being lock free, as options
+  // may be changed while they are read and the tree has no lock free
+  // representation.
+  class OptionManager::ReadLock{
+
+    public:
+
+      ReadLock() : options(current()){
+        locked = !holds_lock(&options);
+        if(locked){
+          pthread_rwlock_rdlock(&options.lock);
+          held.options = &options;
+          held.previous = held_locks;
+          held_locks = &held;
+        }
+      }
 
-  OptionError OptionManager::get_child_name(const string& key, const unsigned& index, string& child_name){
-    deque<string> kids;
-    manager.options->list_children(key, kids);
-    if(kids.size() < index){
-      return SPUD_KEY_ERROR;
-    }
+      ~ReadLock(){
+        if(locked){
+          held_locks = held.previous;
+          pthread_rwlock_unlock(&options.lock);
+        }
+      }
 
-    child_name = kids[index];
+    private:
 
-    return SPUD_NO_ERROR;
-  }
-  
-  OptionError OptionManager::get_number_of_children(const string& key, int& child_count){
-    deque<string> kids;
+      OptionManager& options;
+      logical_t locked;
+      HeldLock held;
 
-    manager.options->list_children(key, kids);
-    
-    child_count = kids.size();
+  };
 
-    return check_key(key);
-  }
+  class OptionManager::WriteLock{
 
-  int OptionManager::option_count(const string& key){
-    return manager.options->option_count(key);
-  }
+    public:
 
-  logical_t OptionManager::have_option(const string& key){
-    return manager.options->have_option(key);
-  }
+      WriteLock() : options(current()){
+        locked = !holds_lock(&options);
+        if(locked){
+          pthread_rwlock_wrlock(&options.lock);
+          held.options = &options;
+          held.previous = held_locks;
+          held_locks = &held;
+        }
+      }
 
-  OptionError OptionManager::get_option_type(const string& key, OptionType& type){
-    Option* child = manager.options->get_child(key);
-    if(child == NULL){
-      return SPUD_KEY_ERROR;
-    }
+      ~WriteLock(){
+        if(locked){
+          held_locks = held.previous;
+          pthread_rwlock_unlock(&options.lock);
+        }
+      }
 
-    type = child->get_option_type();
+    private:
 
-    return SPUD_NO_ERROR;
-  }
+      OptionManager& options;
+      logical_t locked;
+      HeldLock held;
 
-  OptionError OptionManager::get_option_rank(const string& key, int& rank){
-    Option* child = manager.options->get_child(key);
-    if(child == NULL){
-      return SPUD_KEY_ERROR;
-    }
+  };
 
-    rank = child->get_option_rank();
+  // End options locking
 
-    return SPUD_NO_ERROR;
-  }
+  // Options profiling
 
-  OptionError OptionManager::get_option_shape(const string& key, vector<int>& shape){
-    Option* child = manager.options->get_child(key);
-    if(child == NULL){
-      return SPUD_KEY_ERROR;
-    }
+  namespace{
 
-    shape = child->get_option_shape();
+    // The number of profiling probes active on this thread
+#if __cplusplus >= 201103L
+    thread_local int probe_depth = 0;
+#else
+    __thread int probe_depth = 0;
+#endif
 
-    return SPUD_NO_ERROR;
-  }
+    // Wall clock time in seconds, as CPU time is shared by all threads
+    double wall_time(){
+      timespec now;
+      clock_gettime(CLOCK_MONOTONIC, &now);
 
-  OptionError OptionManager::get_option(const string& key, double& val){
-    OptionError check_err = check_option(key, SPUD_DOUBLE, 0);
-    if(check_err != SPUD_NO_ERROR){
-      return check_err;
+      return now.tv_sec + now.tv_nsec * 1.0e-9;
     }
 
-    vector<double> val_handle;
-    OptionError get_err = manager.options->get_option(key, val_handle);
-    if(get_err != SPUD_NO_ERROR){
-      return get_err;
-    }else if(val_handle.size() != 1){
-      return SPUD_RANK_ERROR;
-    }
+    string csv_quote(const string& key){
+      string quoted = "\"";
+      for(size_t i = 0;i < key.size();i++){
+        if(key[i] == '"'){
+          quoted += '"';
+        }
+        quoted += key[i];
+      }
 
-    val = val_handle[0];
+      return quoted + "\"";
+    }
 
-    return SPUD_NO_ERROR;
-  }
+    string json_quote(const string& key){
+      string quoted = "\"";
+      for(size_t i = 0;i < key.size();i++){
+        if(key[i] == '"' or key[i] == '\\'){
+          quoted += '\\';
+          quoted += key[i];
+        }else if((unsigned char)key[i] < 0x20){
+          char escaped[7];
+          snprintf(escaped, sizeof(escaped), "\\u%04x", (unsigned char)key[i]);
+          quoted += escaped;
+        }else{
+          quoted += key[i];
+        }
+      }
 
-  OptionError OptionManager::get_option(const string& key, double& val, const double& default_val){
-    if(!have_option(key)){
-      val = default_val;
-      return SPUD_NO_ERROR;
+      return quoted + "\"";
     }
 
-    return get_option(key, val);
   }
 
-  OptionError OptionManager::get_option(const string& key, vector<double>& val){
-    OptionError check_err = check_option(key, SPUD_DOUBLE, 1);
-    if(check_err != SPUD_NO_ERROR){
-      return check_err;
-    }
+  class OptionManager::Profile{
 
-    vector<double> val_handle;
-    OptionError get_err = manager.options->get_option(key, val_handle);
-    if(get_err != SPUD_NO_ERROR){
-      return get_err;
-    }
+    public:
 
-    val = val_handle;
+      Profile(const string& filename) : filename(filename){
+        pthread_mutex_init(&mutex, NULL);
+      }
 
-    return SPUD_NO_ERROR;
-  }
+      ~Profile(){
+        pthread_mutex_destroy(&mutex);
+      }
 
-  OptionError OptionManager::get_option(const string& key, vector<double>& val, const vector<double>& default_val){
-    if(!have_option(key)){
-      val = default_val;
-      return SPUD_NO_ERROR;
-    }
+      // Lookups are recorded under the read lock, so from many threads at once
+      void record(const string& key, const logical_t& found, const logical_t& mutation, const double& lookup_time){
+        pthread_mutex_lock(&mutex);
+        KeyProfile& key_profile = keys[key];
+        if(mutation){
+          key_profile.mutations++;
+        }else{
+          if(found){
+            key_profile.hits++;
+          }else{
+            key_profile.misses++;
+          }
+          key_profile.lookup_time += lookup_time;
+        }
+        pthread_mutex_unlock(&mutex);
 
-    return get_option(key, val);
-  }
+        return;
+      }
 
-  OptionError OptionManager::get_option(const string& key, vector< vector<double> >& val){
-    OptionError check_err = check_option(key, SPUD_DOUBLE, 2);
-    if(check_err != SPUD_NO_ERROR){
-      return check_err;
-    }
+      // Write the report, with the keys taking the most lookup time first
+      OptionError write(){
+        pthread_mutex_lock(&mutex);
+        vector< pair<double, string> > order;
+        order.reserve(keys.size());
+        for(map<string, KeyProfile>::const_iterator iter = keys.begin();iter != keys.end();iter++){
+          order.push_back(pair<double, string>(-iter->second.lookup_time, iter->first));
+        }
+        sort(order.begin(), order.end());
 
-    vector<int> shape;
-    OptionError shape_err = get_option_shape(key, shape);
-    if(shape_err != SPUD_NO_ERROR){
-      return shape_err;
-    }
+        FILE* file = fopen(filename.c_str(), "w");
+        if(file == NULL){
+          pthread_mutex_unlock(&mutex);
+          return SPUD_FILE_ERROR;
+        }
 
-    vector<double> val_handle;
-    OptionError get_err = manager.options->get_option(key, val_handle);
-    if(get_err != SPUD_NO_ERROR){
-      return get_err;
-    }
+        bool json = filename.size() >= 5 and filename.compare(filename.size() - 5, 5, ".json") == 0;
+        if(json){
+          fprintf(file, "[\n");
+        }else{
+          fprintf(file, "key,hits,misses,mutations,lookup_time\n");
+        }
+        for(size_t i = 0;i < order.size();i++){
+          const KeyProfile& key_profile = keys[order[i].second];
+          if(json){
+            fprintf(file, "  {\"key\": %s, \"hits\": %ld, \"misses\": %ld, \"mutations\": %ld, \"lookup_time\": %.9f}%s\n",
+              json_quote(order[i].second).c_str(), key_profile.hits, key_profile.misses, key_profile.mutations, key_profile.lookup_time,
+              i + 1 < order.size() ? "," : "");
+          }else{
+            fprintf(file, "%s,%ld,%ld,%ld,%.9f\n",
+              csv_quote(order[i].second).c_str(), key_profile.hits, key_profile.misses, key_profile.mutations, key_profile.lookup_time);
+          }
+        }
+        if(json){
+          fprintf(file, "]\n");
+        }
+        pthread_mutex_unlock(&mutex);
 
-    val.clear();
-    for(int i = 0;i < shape[0];i++){
-      val.push_back(vector<double>(shape[1]));
-      for(int j = 0;j < shape[1];j++){
-        val[i][j] = val_handle[(i * shape[1]) + j];
+        return fclose(file) == 0 ? SPUD_NO_ERROR : SPUD_FILE_ERROR;
       }
-    }
 
-    return SPUD_NO_ERROR;
-  }
+    private:
 
-  OptionError OptionManager::get_option(const string& key, vector< vector<double> >& val, const vector< vector<double> >& default_val){
-    if(!have_option(key)){
-      val = default_val;
-      return SPUD_NO_ERROR;
-    }
+      Profile(const Profile& profile);
 
-    return get_option(key, val);
-  }
+      Profile& operator=(const Profile& profile);
 
-  OptionError OptionManager::get_option(const string& key, int& val){
-    OptionError check_err = check_option(key, SPUD_INT, 0);
-    if(check_err != SPUD_NO_ERROR){
-      return check_err;
-    }
+      struct KeyProfile{
+        KeyProfile() : hits(0), misses(0), mutations(0), lookup_time(0.0){}
 
-    vector<int> val_handle;
-    OptionError get_err = manager.options->get_option(key, val_handle);
-    if(get_err != SPUD_NO_ERROR){
-      return get_err;
-    }else if(val_handle.size() != 1){
-      return SPUD_RANK_ERROR;
-    }
+        long hits, misses, mutations;
+        double lookup_time;
+      };
 
-    val = val_handle[0];
+      string filename;
+      map<string, KeyProfile> keys;
+      pthread_mutex_t mutex;
 
-    return SPUD_NO_ERROR;
-  }
+  };
 
-  OptionError OptionManager::get_option(const string& key, int& val, const int& default_val){
-    if(!have_option(key)){
-      val = default_val;
-      return SPUD_NO_ERROR;
-    }
+  class OptionManager::Probe{
 
-    return get_option(key, val);
-  }
+    public:
 
-  OptionError OptionManager::get_option(const string& key, vector<int>& val){
-    OptionError check_err = check_option(key, SPUD_INT, 1);
-    if(check_err != SPUD_NO_ERROR){
-      return check_err;
-    }
+      Probe(const string& key, const logical_t& mutation = false) : key(key), profile(NULL), found(true), mutation(mutation), start(0.0){
+        if(probe_depth++ == 0 and current().profile != NULL){
+          profile = current().profile;
+          start = wall_time();
+        }
+      }
 
-    vector<int> val_handle;
-    OptionError get_err = manager.options->get_option(key, val_handle);
-    if(get_err != SPUD_NO_ERROR){
-      return get_err;
-    }
+      ~Probe(){
+        if(profile != NULL){
+          profile->record(key, found, mutation, wall_time() - start);
+        }
+        probe_depth--;
+      }
 
-    val = val_handle;
+      void miss(){
+        found = false;
+      }
 
-    return SPUD_NO_ERROR;
-  }
+    private:
 
-  OptionError OptionManager::get_option(const string& key, vector<int>& val, const vector<int>& default_val){
-    if(!have_option(key)){
-      val = default_val;
-      return SPUD_NO_ERROR;
-    }
+      const string& key;
+      Profile* profile;
+      logical_t found, mutation;
+      double start;
 
-    return get_option(key, val);
-  }
+  };
 
-  OptionError OptionManager::get_option(const string& key, vector< vector<int> >& val){
-    OptionError check_err = check_option(key, SPUD_INT, 2);
-    if(check_err != SPUD_NO_ERROR){
-      return check_err;
-    }
+  // End options profiling
 
-    vector<int> shape;
-    OptionError shape_err = get_option_shape(key, shape);
-    if(shape_err != SPUD_NO_ERROR){
-      return shape_err;
-    }
+  // Options arena
 
-    vector<int> val_handle;
-    OptionError get_err = manager.options->get_option(key, val_handle);
-    if(get_err != SPUD_NO_ERROR){
-      return get_err;
-    }
+  // Memory is taken from the system in chunks aligned to their size, so that
+  // the arena owning any allocation is found from the header of the chunk
+  // containing it. Small allocations are carved from shared chunks, and are
+  // kept on a free list for their size when freed. Larger allocations each
+  // take a chunk of their own, which is returned to the system when freed.
+  class OptionManager::Arena{
 
-    val.clear();
-    for(int i = 0;i < shape[0];i++){
-      val.push_back(vector<int>(shape[1]));
-      for(int j = 0;j < shape[1];j++){
-        val[i][j] = val_handle[(i * shape[1]) + j];
+    public:
+
+      Arena(ArenaStatistics& statistics) : statistics(statistics), chunks(NULL), next(NULL), end(NULL), bytes_in_use(0){
+        for(size_t i = 0;i < free_list_count;i++){
+          free_lists[i] = NULL;
+        }
       }
-    }
 
-    return SPUD_NO_ERROR;
-  }
+      ~Arena(){
+        release();
+      }
 
-  OptionError OptionManager::get_option(const string& key, vector< vector<int> >& val, const vector< vector<int> >& default_val){
-    if(!have_option(key)){
-      val = default_val;
-      return SPUD_NO_ERROR;
-    }
+      void* allocate(const size_t& size){
+        size_t block_size = round_size(size);
+        statistics.allocations++;
+        statistics.bytes_in_use += block_size;
+        bytes_in_use += block_size;
 
-    return get_option(key, val);
-  }
+        if(block_size > max_small_size){
+          return (char*)new_chunk(header_size + block_size) + header_size;
+        }
 
-  OptionError OptionManager::get_option(const string& key, string& val){
-    OptionError check_err = check_option(key, SPUD_STRING, 1);
-    if(check_err != SPUD_NO_ERROR){
-      return check_err;
-    }
+        void*& free_list = free_lists[block_size / granularity - 1];
+        if(free_list != NULL){
+          void* block = free_list;
+          free_list = *(void**)block;
+          return block;
+        }
 
-    string val_handle;
-    OptionError get_err = manager.options->get_option(key, val_handle);
-    if(get_err != SPUD_NO_ERROR){
-      return get_err;
-    }
+        if(next == NULL or block_size > size_t(end - next)){
+          char* chunk = (char*)new_chunk(chunk_size);
+          next = chunk + header_size;
+          end = chunk + chunk_size;
+        }
+        void* block = next;
+        next += block_size;
 
-    val = val_handle;
+        return block;
+      }
 
-    return SPUD_NO_ERROR;
-  }
+      // Return an allocation to the arena it was taken from, which need not
+      // be the arena of the current options
+      static void deallocate(void* ptr, const size_t& size){
+        if(ptr == NULL){
+          return;
+        }
 
-  OptionError OptionManager::get_option(const string& key, string& val, const string& default_val){
-    if(!have_option(key)){
-      val = default_val;
-      return SPUD_NO_ERROR;
-    }
+        Chunk* chunk = (Chunk*)((uintptr_t)ptr & ~uintptr_t(chunk_size - 1));
+        chunk->arena->free_block(chunk, ptr, round_size(size));
 
-    return get_option(key, val);
-  }
+        return;
+      }
 
-  OptionError OptionManager::add_option(const string& key){
-    logical_t new_key = !have_option(key);
+      // Free every allocation at once
+      void release(){
+        while(chunks != NULL){
+          Chunk* chunk = chunks;
+          chunks = chunk->next;
+          statistics.bytes_reserved -= chunk->size;
+          free(chunk);
+        }
+        for(size_t i = 0;i < free_list_count;i++){
+          free_lists[i] = NULL;
+        }
+        next = NULL;
+        end = NULL;
+        statistics.bytes_in_use -= bytes_in_use;
+        bytes_in_use = 0;
 
-    OptionError add_err = manager.options->add_option(key);
-    if(add_err != SPUD_NO_ERROR){
-      return add_err;
-    }else if(new_key){
-      return SPUD_NEW_KEY_WARNING;
-    }
+        return;
+      }
 
-    return SPUD_NO_ERROR;
-  }
+    private:
 
-  OptionError OptionManager::set_option(const string& key, const double& val){
-    logical_t new_key = !have_option(key);
+      Arena(const Arena& arena);
 
-    vector<double> val_handle;
-    val_handle.push_back(val);
-    vector<int> shape(2);
-    shape[0] = -1;  shape[1] = -1;
-    OptionError set_err = manager.options->set_option(key + "/__value", val_handle, 0, shape);
-    if(set_err != SPUD_NO_ERROR){
-      return set_err;
-    }else if(new_key){
-      return SPUD_NEW_KEY_WARNING;
-    }
+      Arena& operator=(const Arena& arena);
 
-    return SPUD_NO_ERROR;
-  }
+      struct Chunk{
+        Arena* arena;
+        Chunk* previous;
+        Chunk* next;
+        size_t size;
+      };
 
-  OptionError OptionManager::set_option(const string& key, const vector<double>& val){
-    logical_t new_key = !have_option(key);
+      static const size_t granularity = 16;
+      static const size_t chunk_size = 65536;
+      static const size_t max_small_size = 4096;
+      static const size_t free_list_count = max_small_size / granularity;
+      // Keeps allocations following the header aligned for any data
+      static const size_t header_size = (sizeof(Chunk) + granularity - 1) / granularity * granularity;
 
-    vector<double> val_handle = val;
-    vector<int> shape(2);
-    shape[0] = val.size();  shape[1] = -1;
-    OptionError set_err = manager.options->set_option(key + "/__value", val_handle, 1, shape);
-    if(set_err != SPUD_NO_ERROR){
-      return set_err;
-    }else if(new_key){
-      return SPUD_NEW_KEY_WARNING;
-    }
+      static size_t round_size(const size_t& size){
+        return size == 0 ? granularity : (size + granularity - 1) / granularity * granularity;
+      }
 
-    return SPUD_NO_ERROR;
-  }
+      void* new_chunk(const size_t& size){
+        void* block;
+        if(posix_memalign(&block, chunk_size, size) != 0){
+          throw bad_alloc();
+        }
+        statistics.system_allocations++;
+        statistics.bytes_reserved += size;
+
+        Chunk* chunk = (Chunk*)block;
+        chunk->arena = this;
+        chunk->previous = NULL;
+        chunk->next = chunks;
+        chunk->size = size;
+        if(chunks != NULL){
+          chunks->previous = chunk;
+        }
+        chunks = chunk;
 
-  OptionError OptionManager::set_option(const string& key, const vector< vector<double> >& val){
-    logical_t new_key = !have_option(key);
-
-    vector<double> val_handle;
-    for(size_t i = 0;i < val.size();i++){
-      if(i > 0 and val[i].size() != val[0].size()){
-        return SPUD_SHAPE_ERROR;
+        return block;
       }
-      for(size_t j = 0;j < val[i].size();j++){
-        val_handle.push_back(val[i][j]);
+
+      void free_block(Chunk* chunk, void* ptr, const size_t& block_size){
+        statistics.deallocations++;
+        statistics.bytes_in_use -= block_size;
+        bytes_in_use -= block_size;
+
+        if(block_size > max_small_size){
+          if(chunk->previous == NULL){
+            chunks = chunk->next;
+          }else{
+            chunk->previous->next = chunk->next;
+          }
+          if(chunk->next != NULL){
+            chunk->next->previous = chunk->previous;
+          }
+          statistics.bytes_reserved -= chunk->size;
+          free(chunk);
+        }else{
+          void*& free_list = free_lists[block_size / granularity - 1];
+          *(void**)ptr = free_list;
+          free_list = ptr;
+        }
+
+        return;
       }
-    }
-    vector<int> shape(2);
-    shape[0] = val.size();
-    if(val.size() == 0){
-      shape[1] = 0;
-    }else{
-      shape[1] = val[0].size();
-    }
-    OptionError set_err = manager.options->set_option(key + "/__value", val_handle, 2, shape);
-    if(set_err != SPUD_NO_ERROR){
-      return set_err;
-    }else if(new_key){
-      return SPUD_NEW_KEY_WARNING;
-    }
 
-    return SPUD_NO_ERROR;
+      ArenaStatistics& statistics;
+      // All chunks, including those of large allocations
+      Chunk* chunks;
+      // The unused part of the chunk small allocations are being carved from
+      char* next;
+      char* end;
+      size_t bytes_in_use;
+      void* free_lists[free_list_count];
+
+  };
+
+  const size_t OptionManager::Arena::granularity;
+  const size_t OptionManager::Arena::chunk_size;
+  const size_t OptionManager::Arena::max_small_size;
+  const size_t OptionManager::Arena::free_list_count;
+  const size_t OptionManager::Arena::header_size;
+
+  void* OptionManager::arena_allocate(const size_t& size){
+    return current().arena->allocate(size);
   }
 
-  OptionError OptionManager::set_option(const string& key, const int& val){
-    logical_t new_key = !have_option(key);
-
-    vector<int> val_handle;
-    val_handle.push_back(val);
-    vector<int> shape(2);
-    shape[0] = -1;  shape[1] = -1;
-    OptionError set_err = manager.options->set_option(key + "/__value", val_handle, 0, shape);
-    if(set_err != SPUD_NO_ERROR){
-      return set_err;
-    }else if(new_key){
-      return SPUD_NEW_KEY_WARNING;
-    }
+  void OptionManager::arena_deallocate(void* ptr, const size_t& size){
+    Arena::deallocate(ptr, size);
 
-    return SPUD_NO_ERROR;
+    return;
   }
 
-  OptionError OptionManager::set_option(const string& key, const vector<int>& val){
-    logical_t new_key = !have_option(key);
+  // End options arena
 
-    vector<int> val_handle = val;
-    vector<int> shape(2);
-    shape[0] = val.size();  shape[1] = -1;
-    OptionError set_err = manager.options->set_option(key + "/__value", val_handle, 1, shape);
-    if(set_err != SPUD_NO_ERROR){
-      return set_err;
-    }else if(new_key){
-      return SPUD_NEW_KEY_WARNING;
-    }
+  // OptionManager CLASS METHODS
 
-    return SPUD_NO_ERROR;
-  }
+  // PRIVATE VARIABLES
 
-  OptionError OptionManager::set_option(const string& key, const vector< vector<int> >& val){
-    logical_t new_key = !have_option(key);
+  bool OptionManager::deallocated = false;
 
-    vector<int> val_handle;
-    for(size_t i = 0;i < val.size();i++){
-      if(i > 0 and val[i].size() != val[0].size()){
-        return SPUD_SHAPE_ERROR;
-      }
-      for(size_t j = 0;j < val[i].size();j++){
-        val_handle.push_back(val[i][j]);
-      }
-    }
-    vector<int> shape(2);
-    shape[0] = val.size();
-    if(val.size() == 0){
-      shape[1] = 0;
-    }else{
-      shape[1] = val[0].size();
-    }
-    OptionError set_err = manager.options->set_option(key + "/__value", val_handle, 2, shape);
-    if(set_err != SPUD_NO_ERROR){
-      return set_err;
-    }else if(new_key){
-      return SPUD_NEW_KEY_WARNING;
+  // PUBLIC METHODS
+
+  void OptionManager::clear_options() {
+    WriteLock lock;
+    if(current().profile != NULL and current().profile->write() != SPUD_NO_ERROR){
+      cerr << "SPUD WARNING: Failed to write options profile" << endl;
     }
+    current().reset();
+    
+    return;
+  }
 
-    return SPUD_NO_ERROR;
+  void* OptionManager::get_manager() {
+    WriteLock lock;
+    current().shared_tree = true;
+    return (void*) tree();
   }
 
-  OptionError OptionManager::set_option(const string& key, const string& val){
-    logical_t new_key = !have_option(key);
+  void OptionManager::set_manager(void* m) {
+    WriteLock lock;
+    current().generation = next_generation();
+    delete current().image;
+    current().image = NULL;
+    current().release_tree();
+    current().options = (Spud::OptionManager::Option*) m;
+    current().shared_tree = true;
+    current().reset_journal();
+    return;
+  }
 
-    OptionError set_err = manager.options->set_option(key + "/__value", val);
-    if(set_err != SPUD_NO_ERROR){
-      return set_err;
-    }else if(new_key){
-      return SPUD_NEW_KEY_WARNING;
-    }
+  OptionError OptionManager::load_options(const string& filename){
+    return read_options(filename, false);
+  }
 
-    return SPUD_NO_ERROR;
+  OptionError OptionManager::load_lazy_options(const string& filename){
+    return read_options(filename, true);
   }
 
-  OptionError OptionManager::set_option_attr(const string& key, const string& val){
-    logical_t new_key = !have_option(key);
+  OptionError OptionManager::read_options(const string& filename, const logical_t& lazy){
+    WriteLock lock;
+    current().generation = next_generation();
 
-    OptionError set_err = manager.options->set_option(key, val);
-    if(set_err != SPUD_NO_ERROR){
-      return set_err;
-    }else if(new_key){
-      return SPUD_NEW_KEY_WARNING;
+    clock_t start = clock();
+    OptionError load_err;
+    if(current().shared_tree){
+      load_err = tree()->load_options(filename, current().load_peak_buffer_size, lazy);
+    }else{
+      // Load into a new arena, so that whichever of the old and new trees is
+      // not kept is released in one step
+      Arena* old_arena = current().arena;
+      Option* old_options = current().options;
+      current().arena = new Arena(current().arena_statistics);
+      current().options = new Option();
+      load_err = current().options->load_options(filename, current().load_peak_buffer_size, lazy);
+      if(load_err == SPUD_NO_ERROR){
+        delete old_arena;
+        delete current().image;
+        current().image = NULL;
+      }else{
+        delete current().arena;
+        current().arena = old_arena;
+        current().options = old_options;
+      }
     }
+    if(load_err == SPUD_NO_ERROR){
+      current().reset_journal();
+    }
+    current().load_time = double(clock() - start) / CLOCKS_PER_SEC;
 
-    return SPUD_NO_ERROR;
+    return load_err;
   }
 
-  OptionError OptionManager::set_option_attribute(const string& key, const string& val){
-    OptionError set_err = set_option_attr(key, val);
-    if(set_err != SPUD_NO_ERROR and set_err != SPUD_NEW_KEY_WARNING){
-      return set_err;
-    }
+  OptionError OptionManager::write_options(const string& filename, const size_t& sidecar_threshold){
+    WriteLock lock;
+    return tree()->write_options(filename, sidecar_threshold);
+  }
 
-    Option* child = manager.options->get_child(key);
-    if(child == NULL){
-      return SPUD_KEY_ERROR;
-    }
-    logical_t is_attribute = child->set_is_attribute(true);
-    if(set_err != SPUD_NO_ERROR){
-      return set_err;
-    }
-    else if(!is_attribute){
-      return SPUD_ATTR_SET_FAILED_WARNING;
-    }
+  OptionError OptionManager::write_snapshot(const string& filename){
+    WriteLock lock;
+    return tree()->write_snapshot(filename);
+  }
 
-    return SPUD_NO_ERROR;
+  OptionError OptionManager::write_options_buffer(const string& key, string& buffer){
+    WriteLock lock;
+    Probe probe(key, false);
+    return tree()->write_buffer(key, buffer);
   }
 
-  OptionError OptionManager::move_option(const string& key1, const string& key2){
-    OptionError move_err = manager.options->move_option(key1, key2);
-    if(move_err != SPUD_NO_ERROR){
-      return move_err;
+  OptionError OptionManager::load_options_buffer(const string& key, const string& buffer){
+    WriteLock lock;
+    Probe probe(key, true);
+    current().generation = next_generation();
+    logical_t new_key = !tree()->have_option(key);
+    OptionError load_err = current().options->load_buffer(key, buffer);
+    if(load_err != SPUD_NO_ERROR){
+      return load_err;
+    }
+    if(key == "/" or key.empty()){
+      current().reset_journal();
+    }else{
+      record_change(canonical_key(key), new_key ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
     }
-    
+
     return SPUD_NO_ERROR;
   }
 
-  OptionError OptionManager::copy_option(const string& key1, const string& key2){
-    OptionError copy_err = manager.options->copy_option(key1, key2);
-    if(copy_err != SPUD_NO_ERROR){
-      return copy_err;
-    }
-    
-    return SPUD_NO_ERROR;
+  OptionError OptionManager::freeze_options(const string& filename){
+    WriteLock lock;
+    return tree()->write_image(filename);
   }
 
-  OptionError OptionManager::delete_option(const string& key){
-    OptionError del_err = manager.options->delete_option(key);
-    if(del_err != SPUD_NO_ERROR){
-      return del_err;
-    }
+  OptionError OptionManager::load_frozen_options(const string& filename){
+    WriteLock lock;
+    clock_t start = clock();
+    FrozenOptions* image = new FrozenOptions();
+    OptionError load_err = image->load(filename);
+    if(load_err != SPUD_NO_ERROR){
+      delete image;
+      return load_err;
+    }
+
+    current().generation = next_generation();
+    delete current().image;
+    current().image = image;
+    current().release_tree();
+    current().options = new Option();
+    current().reset_journal();
+    current().load_time = double(clock() - start) / CLOCKS_PER_SEC;
+    current().load_peak_buffer_size = 0;
 
     return SPUD_NO_ERROR;
   }
 
-  void OptionManager::print_options(){
-    manager.options->print();
+  void OptionManager::get_load_statistics(double& load_time, size_t& peak_buffer_size){
+    ReadLock lock;
+    load_time = current().load_time;
+    peak_buffer_size = current().load_peak_buffer_size;
 
     return;
   }
 
-  // PRIVATE METHODS
-
-  OptionManager::OptionManager(){
-    options = new Option();
-    deallocated = false;
+  void OptionManager::get_lazy_statistics(vector<string>& keys, vector<size_t>& sizes, vector<logical_t>& converted){
+    ReadLock lock;
+    keys.clear();
+    sizes.clear();
+    converted.clear();
+    if(current().image == NULL){
+      current().options->list_lazy_data("", keys, sizes, converted);
+    }
 
     return;
   }
 
-  OptionManager::OptionManager(const OptionManager& manager){
-    cerr << "SPUD ERROR: OptionManager copy constructor cannot be called" << endl;
-    exit(-1);
+  void OptionManager::get_allocation_statistics(size_t& allocations, size_t& deallocations, size_t& system_allocations, size_t& bytes_in_use, size_t& bytes_reserved){
+    ReadLock lock;
+    const ArenaStatistics& statistics = current().arena_statistics;
+    allocations = statistics.allocations;
+    deallocations = statistics.deallocations;
+    system_allocations = statistics.system_allocations;
+    bytes_in_use = statistics.bytes_in_use;
+    bytes_reserved = statistics.bytes_reserved;
+
+    return;
   }
 
-  OptionManager::~OptionManager(){
-    if (!deallocated)
-    {
-      delete options;
-      deallocated = true;
-    }
+  void OptionManager::start_profiling(const string& filename){
+    WriteLock lock;
+    delete current().profile;
+    current().profile = new Profile(filename);
 
     return;
   }
 
-  OptionManager& OptionManager::operator=(const OptionManager& manager){
-    cerr << "SPUD ERROR: OptionManager assignment operator cannot be called" << endl;
-    exit(-1);
+  OptionError OptionManager::stop_profiling(){
+    WriteLock lock;
+    if(current().profile == NULL){
+      return SPUD_NO_ERROR;
+    }
+
+    OptionError write_err = current().profile->write();
+    delete current().profile;
+    current().profile = NULL;
+
+    return write_err;
   }
 
-  OptionError OptionManager::check_key(const string& key){
-    if(!have_option(key)){
-      return SPUD_KEY_ERROR;
+  OptionError OptionManager::get_child_name(const string& key, const unsigned& index, string& child_name){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
 
-    return SPUD_NO_ERROR;
+    return get_child_name(handle, index, child_name);
   }
-
-  OptionError OptionManager::check_rank(const string& key, const int& rank){
-    int rank_handle;
-    OptionError rank_err = get_option_rank(key, rank_handle);
-    if(rank_err != SPUD_NO_ERROR){
-      return rank_err;
-    }else if(rank_handle != rank){
-      return SPUD_RANK_ERROR;
+  
+  OptionError OptionManager::get_number_of_children(const string& key, int& child_count){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      child_count = 0;
+      return handle_err;
     }
 
-    return SPUD_NO_ERROR;
+    return get_number_of_children(handle, child_count);
   }
 
-  OptionError OptionManager::check_type(const string& key, const OptionType& type){
-    OptionType type_handle;
-    OptionError type_err = get_option_type(key, type_handle);
-    if(type_err != SPUD_NO_ERROR){
-      return type_err;
-    }else if(type_handle != type){
-      return SPUD_TYPE_ERROR;
+  OptionError OptionManager::get_child_names(const string& key, vector<string>& child_names){
+    ReadLock lock;
+    child_names.clear();
+
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
+    }
+
+    int child_count;
+    get_number_of_children(handle, child_count);
+    child_names.resize(child_count);
+    for(int i = 0;i < child_count;i++){
+      get_child_name(handle, i, child_names[i]);
     }
 
     return SPUD_NO_ERROR;
   }
 
-  OptionError OptionManager::check_option(const string& key, const OptionType& type, const int& rank){
-    OptionError check_err;
-    check_err = check_key(key);
-    if(check_err != SPUD_NO_ERROR){
-      return check_err;
-    }
-    check_err = check_type(key, type);
-    if(check_err != SPUD_NO_ERROR){
-      return check_err;
+  int OptionManager::option_count(const string& key){
+    ReadLock lock;
+    Probe probe(key);
+    int count;
+    if(current().image != NULL){
+      count = current().image->option_count(current().image->get_root(), key);
+    }else{
+      count = current().options->option_count(key);
     }
-    check_err = check_rank(key, rank);
-    if(check_err != SPUD_NO_ERROR){
-      return check_err;
+    if(count == 0){
+      probe.miss();
     }
 
-    return SPUD_NO_ERROR;
-  }
-  
-  void OptionManager::reset(){
-    delete options;
-    options = new Option;
-    
-    return;
+    return count;
   }
 
-  // End OptionManager CLASS METHODS
-
-  // OptionManager::Option CLASS METHODS
+  logical_t OptionManager::have_option(const string& key){
+    ReadLock lock;
+    Probe probe(key);
+    logical_t found;
+    if(current().image != NULL){
+      found = current().image->get_child(current().image->get_root(), key) != NULL;
+    }else{
+      found = current().options->have_option(key);
+    }
+    if(!found){
+      probe.miss();
+    }
 
-  // PUBLIC METHODS
+    return found;
+  }
 
-  OptionManager::Option::Option(){
-    verbose_off();
-    OptionError set_err = set_rank_and_shape(-1, vector<int>());
-    if(set_err != SPUD_NO_ERROR){
-      cerr << "SPUD ERROR: Failed to set rank and shape" << endl;
-      exit(-1);
+  OptionError OptionManager::get_option_type(const string& key, OptionType& type){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
-    is_attribute = false;
 
-    return;
+    return get_option_type(handle, type);
   }
 
-  OptionManager::Option::Option(const OptionManager::Option& inOption){
-    *this = inOption;
+  OptionError OptionManager::get_option_rank(const string& key, int& rank){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
+    }
 
-    return;
+    return get_option_rank(handle, rank);
   }
 
-  OptionManager::Option::Option(string name){
-    verbose_off();
-    node_name = name;
-    OptionError set_err = set_rank_and_shape(-1, vector<int>());
-    if(set_err != SPUD_NO_ERROR){
-      cerr << "SPUD ERROR: Failed to set rank and shape" << endl;
-      exit(-1);
+  OptionError OptionManager::get_option_shape(const string& key, vector<int>& shape){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
-    is_attribute = false;
 
-    return;
+    return get_option_shape(handle, shape);
   }
 
-  OptionManager::Option::~Option(){
-    for(deque< pair<string, Option*> >::iterator it=children.begin();it!=children.end();++it){
-      if(it->second) delete it->second;
+  OptionError OptionManager::get_option(const string& key, double& val){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
 
-    return;
+    return get_option(handle, val);
   }
 
-  const OptionManager::Option& OptionManager::Option::operator=(const OptionManager::Option& inOption){
-    verbose = inOption.verbose;
-    if(verbose)
-      cout << "const OptionManager::Option& OptionManager::Option::operator=(const OptionManager::Option& inOption)\n";
+  OptionError OptionManager::get_option(const string& key, double& val, const double& default_val){
+    ReadLock lock;
+    OptionHandle handle;
+    if(get_option_handle(key, handle) != SPUD_NO_ERROR){
+      val = default_val;
+      return SPUD_NO_ERROR;
+    }
 
-    node_name = inOption.node_name;
-    children = inOption.children;
+    return get_option(handle, val);
+  }
 
-    data_double = inOption.data_double;
-    data_int = inOption.data_int;
-    data_string = inOption.data_string;
-    vector<int> shape(2);
-    shape[0] = inOption.shape[0];  shape[1] = inOption.shape[1];
-    OptionError set_err = set_rank_and_shape(inOption.rank, shape);
-    if(set_err != SPUD_NO_ERROR){
-      cerr << "SPUD ERROR: Failed to set rank and shape" << endl;
-      exit(-1);
+  OptionError OptionManager::get_option(const string& key, vector<double>& val){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
 
-    is_attribute = inOption.is_attribute;
-
-    return *this;
+    return get_option(handle, val);
   }
 
-  OptionError OptionManager::Option::load_options(const string& filename){
-    if(verbose)
-      cout << "void OptionManager::Option::load_options(const string& filename = " << filename << ")\n";
-
-    delete_option("/");
-
-    TiXmlDocument doc(filename);
-    doc.SetCondenseWhiteSpace(false);
-    if(!doc.LoadFile()){
-      //cerr << "SPUD WARNING: Failed to load options file " << filename << endl;
-      return SPUD_FILE_ERROR;
-    }
-
-    TiXmlNode* header = doc.FirstChild();
-    while(header != NULL and header->Type() != TiXmlNode::DECLARATION){
-      header = header->NextSibling();
-    }
-    TiXmlNode* fluidity_options = doc.FirstChildElement();
-    if(fluidity_options == NULL){
-      //cerr << "SPUD WARNING: Failed to find root node when loading options file" << endl;
-      return SPUD_FILE_ERROR;
+  OptionError OptionManager::get_option(const string& key, vector<double>& val, const vector<double>& default_val){
+    ReadLock lock;
+    OptionHandle handle;
+    if(get_option_handle(key, handle) != SPUD_NO_ERROR){
+      val = default_val;
+      return SPUD_NO_ERROR;
     }
 
-    // Set the name of this element
-    node_name = fluidity_options->ValueStr();
+    return get_option(handle, val);
+  }
 
-    // Decend down through all the fluidity options
-    TiXmlNode* option_node;
-    for(option_node = fluidity_options->FirstChildElement();option_node;option_node = option_node->NextSiblingElement()){
-      if(option_node->ToElement()){
-        parse_node("", option_node);
-      }
+  OptionError OptionManager::get_option(const string& key, vector< vector<double> >& val){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
 
-    return SPUD_NO_ERROR;
+    return get_option(handle, val);
   }
 
-  OptionError OptionManager::Option::write_options(const string& filename) const{
-    if(verbose)
-      cout << "void OptionManager::Option::write_options(const string& filename = " << filename << ") const\n";
+  OptionError OptionManager::get_option(const string& key, vector< vector<double> >& val, const vector< vector<double> >& default_val){
+    ReadLock lock;
+    OptionHandle handle;
+    if(get_option_handle(key, handle) != SPUD_NO_ERROR){
+      val = default_val;
+      return SPUD_NO_ERROR;
+    }
 
-    TiXmlDocument doc;
+    return get_option(handle, val);
+  }
 
-    // XML header
-    TiXmlDeclaration* header = new TiXmlDeclaration("1.0", "utf-8", "");
-    doc.LinkEndChild(header);
+  OptionError OptionManager::get_option(const string& key, int& val){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
+    }
 
-    // Root node
-    TiXmlNode* root_node = to_element();
-    doc.LinkEndChild(root_node);
+    return get_option(handle, val);
+  }
 
-    if(!doc.SaveFile(filename)){
-      return SPUD_FILE_ERROR;
-      //cerr << "SPUD WARNING: Failed to write options file" << endl;
+  OptionError OptionManager::get_option(const string& key, int& val, const int& default_val){
+    ReadLock lock;
+    OptionHandle handle;
+    if(get_option_handle(key, handle) != SPUD_NO_ERROR){
+      val = default_val;
+      return SPUD_NO_ERROR;
     }
 
-    return SPUD_NO_ERROR;
+    return get_option(handle, val);
   }
 
-  string OptionManager::Option::get_name() const{
-    if(verbose)
-      cout << "void OptionManager::Option::get_name(void) const\n";
-    return node_name;
-  }
+  OptionError OptionManager::get_option(const string& key, vector<int>& val){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
+    }
 
-  logical_t OptionManager::Option::get_is_attribute() const{
-    if(verbose)
-      cout << "logical_t OptionManager::Option::get_is_attribute(void) const\n";
-    return is_attribute;
+    return get_option(handle, val);
   }
 
-  void OptionManager::Option::list_children(const string& name, deque<string>& kids) const{
-    if(verbose)
-      cout << "void OptionManager::Option::list_children(const string& name = " << name << ", deque<string>& kids) const\n";
+  OptionError OptionManager::get_option(const string& key, vector<int>& val, const vector<int>& default_val){
+    ReadLock lock;
+    OptionHandle handle;
+    if(get_option_handle(key, handle) != SPUD_NO_ERROR){
+      val = default_val;
+      return SPUD_NO_ERROR;
+    }
 
-    kids.clear();
+    return get_option(handle, val);
+  }
 
-    const Option* descendant = get_child(name);
-    if(descendant != NULL){
-      for(deque< pair<string, Option*> >::const_iterator it = descendant->children.begin();it != descendant->children.end();it++){
-        kids.push_back(it->first);
-      }
+  OptionError OptionManager::get_option(const string& key, vector< vector<int> >& val){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
 
-    return;
+    return get_option(handle, val);
   }
 
-  size_t OptionManager::Option::count(const string& key) const{
-    size_t cnt=0;
-    for(deque< pair<string, Option*> >::const_iterator it=children.begin();it!=children.end();++it){
-      if(it->first == key)
-        cnt++;
+  OptionError OptionManager::get_option(const string& key, vector< vector<int> >& val, const vector< vector<int> >& default_val){
+    ReadLock lock;
+    OptionHandle handle;
+    if(get_option_handle(key, handle) != SPUD_NO_ERROR){
+      val = default_val;
+      return SPUD_NO_ERROR;
     }
-    return cnt;
+
+    return get_option(handle, val);
   }
 
-  deque< pair<string, OptionManager::Option*> >::iterator OptionManager::Option::find(const string& key){
-    for(deque< pair<string, Option*> >::iterator it=children.begin();it!=children.end();++it){
-      if(it->first == key)
-        return it;
+  OptionError OptionManager::get_option(const string& key, string& val){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
-    return children.end();
+
+    return get_option(handle, val);
   }
 
-  deque< pair<string, OptionManager::Option*> >::const_iterator OptionManager::Option::find(const string& key) const{
-    for(deque< pair<string, Option*> >::const_iterator it=children.begin();it!=children.end();++it){
-      if(it->first == key)
-        return it;
+  OptionError OptionManager::get_option(const string& key, string& val, const string& default_val){
+    ReadLock lock;
+    OptionHandle handle;
+    if(get_option_handle(key, handle) != SPUD_NO_ERROR){
+      val = default_val;
+      return SPUD_NO_ERROR;
     }
-    return children.end();
+
+    return get_option(handle, val);
   }
 
-  deque< pair<string, OptionManager::Option*> >::iterator OptionManager::Option::find_next(deque< pair<string, OptionManager::Option*> >::iterator current, const string& key){
-    deque< pair<string, OptionManager::Option*> >::iterator it = current;
-    it++;
-    for(;it!=children.end();++it){
-      if(it->first == key)
-        return it;
+  OptionError OptionManager::get_option_view(const string& key, const double*& data, size_t& size, vector<int>& shape){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
-    return children.end();
+
+    return get_option_view(handle, data, size, shape);
   }
 
-  deque< pair<string, OptionManager::Option*> >::const_iterator OptionManager::Option::find_next(deque< pair<string, OptionManager::Option*> >::const_iterator current, const string& key) const{
-    deque< pair<string, Option*> >::const_iterator it = current;
-    it++;
-    for(;it!=children.end();++it){
-      if(it->first == key)
-        return it;
+  OptionError OptionManager::get_option_view(const string& key, const int*& data, size_t& size, vector<int>& shape){
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
-    return children.end();
+
+    return get_option_view(handle, data, size, shape);
   }
 
-  const OptionManager::Option* OptionManager::Option::get_child(const string& key) const{
-    if(verbose)
-      cout << "const OptionManager::Option* OptionManager::Option::get_child(const string& key = " << key << ") const\n";
+  OptionError OptionManager::get_option_handle(const string& key, OptionHandle& handle){
+    ReadLock lock;
+    Probe probe(key);
+    if(current().image != NULL){
+      const FrozenOptions::Node* node = current().image->get_child(current().image->get_root(), key);
+      if(node == NULL){
+        probe.miss();
+        return SPUD_KEY_ERROR;
+      }
 
-    if(key == "/" or key.empty())
-      return this;
+      handle = make_handle(node);
 
-    string name, branch;
-    int index;
-    OptionError key_err = split_name(key, name, index, branch);
-    if(key_err != SPUD_NO_ERROR){
-      return NULL;
+      return SPUD_NO_ERROR;
     }
 
-    if(name.empty()){
-      return NULL;
+    const Option* child = ((const Option*)current().options)->get_child(key);
+    if(child == NULL){
+      probe.miss();
+      return SPUD_KEY_ERROR;
     }
 
-    deque< pair<string, Option*> >::const_iterator it;
-    if(count(name) == 0){
-      name += "::";
-      int i = 0;
-      for(it = children.begin();it != children.end();it++){
-        if(it->first.compare(0, name.size(), name) == 0){
-          if(index < 0 or i == index){
-            break;
-          }else{
-            i++;
-          }
-        }
-      }
-    }else{
-      if(index < 0){
-        it = find(name);
-      }else{
-        it = find(name);
-        for(size_t i = 0;it!=children.end();i++){
-          if((int)i == index){
-            break;
-          }
-          it = find_next(it, name);
-        }
-      }
-    }
+    handle = make_handle(child);
 
-    if(it == children.end()){
-      return NULL;
-    }else if(branch.empty()){
-      return it->second;
-    }else{
-      return it->second->get_child(branch);
-    }
+    return SPUD_NO_ERROR;
   }
 
-  OptionManager::Option* OptionManager::Option::get_child(const string& key){
-    if(verbose)
-      cout << "OptionManager::Option* OptionManager::Option::get_child(const string& key = " << key <<")\n";
+  OptionError OptionManager::get_child_handle(const OptionHandle& parent, const string& key, OptionHandle& handle){
+    ReadLock lock;
+    if(current().image != NULL){
+      const FrozenOptions::Node* node;
+      OptionError handle_err = check_handle(parent, node);
+      if(handle_err != SPUD_NO_ERROR){
+        return handle_err;
+      }
 
-    if(!have_option(key)){
-      return NULL;
-    }else{
-      return create_child(key);
-    }
-  }
+      const FrozenOptions::Node* child = current().image->get_child(node, key);
+      if(child == NULL){
+        return SPUD_KEY_ERROR;
+      }
 
-  int OptionManager::Option::option_count(const string& key) const{
-    if(verbose)
-      cout << "int OptionManager::Option::option_count(const string& key = " << key << ") const\n";
+      handle = make_handle(child);
 
-    string name, branch;
-    int index;
-    OptionError key_err = split_name(key, name, index, branch);
-    if(key_err != SPUD_NO_ERROR){
-      return 0;
+      return SPUD_NO_ERROR;
     }
 
-    if(name.empty()){
-      return 0;
+    const Option* option;
+    OptionError handle_err = check_handle(parent, option);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
 
-    logical_t match_whole = true;
-    if(!count(name)){
-      // Apparently there is no such child but lets check for "name::*"
-      name += "::";
-      match_whole = false;
+    const Option* child = option->get_child(key);
+    if(child == NULL){
+      return SPUD_KEY_ERROR;
     }
 
-    int count = 0, i = 0;
-    for(deque< pair<string, Option*> >::const_iterator it = children.begin();it != children.end();it++){
-      if(it->first.compare(0, name.size(), name) == 0 and (not match_whole or it->first.size() == name.size())){
-        if(index < 0){
-          if(branch.empty()){
-            count++;
-          }else{
-            count += it->second->option_count(branch);
-          }
-        }else{
-          if(i == index){
-            if(branch.empty()){
-              count++;
-            }else{
-              count += it->second->option_count(branch);
-            }
-            break;
-          }
-          i++;
-        }
-      }
-    }
+    handle = make_handle(child);
 
-    return count;
+    return SPUD_NO_ERROR;
   }
 
-  logical_t OptionManager::Option::have_option(const string& key) const{
-    if(verbose)
-      cout << "logical_t OptionManager::Option::have_option(const string& key = " << key << ") const\n";
+  OptionError OptionManager::get_child_handle(const OptionHandle& parent, const unsigned& index, OptionHandle& handle){
+    ReadLock lock;
+    if(current().image != NULL){
+      const FrozenOptions::Node* node;
+      OptionError handle_err = check_handle(parent, node);
+      if(handle_err != SPUD_NO_ERROR){
+        return handle_err;
+      }
 
-    if(key == "/"){
-      return true;
-    }else{
-      return (get_child(key) != NULL);
-    }
-  }
+      const FrozenOptions::Node* child = current().image->get_child_at(node, index);
+      if(child == NULL){
+        return SPUD_KEY_ERROR;
+      }
 
-  OptionType OptionManager::Option::get_option_type() const{
-    if(verbose)
-      cout << "OptionType OptionManager::Option::get_option_type(void) const\n";
+      handle = make_handle(child);
 
-    if(have_option("__value")){
-      return find("__value")->second->get_option_type();
+      return SPUD_NO_ERROR;
     }
 
-    if(!data_double.empty()){
-      return SPUD_DOUBLE;
-    }else if(!data_int.empty()){
-      return SPUD_INT;
-    }else if(!data_string.empty()){
-      return SPUD_STRING;
-    }else{
-      return SPUD_NONE;
+    const Option* option;
+    OptionError handle_err = check_handle(parent, option);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
-  }
-
-  size_t OptionManager::Option::get_option_rank() const{
-    if(verbose)
-      cout << "size_t OptionManager::Option::get_option_rank(void) const\n";
 
-    if(have_option("__value")){
-      return find("__value")->second->get_option_rank();
-    }else{
-      return rank;
+    const Option* child = option->get_child_at(index);
+    if(child == NULL){
+      return SPUD_KEY_ERROR;
     }
+
+    handle = make_handle(child);
+
+    return SPUD_NO_ERROR;
   }
 
-  vector<int> OptionManager::Option::get_option_shape() const{
-    if(verbose)
-      cout << "vector<int> OptionManager::Option::get_option_shape(void) const\n";
+  OptionError OptionManager::get_child_name(const OptionHandle& parent, const unsigned& index, string& child_name){
+    ReadLock lock;
+    if(current().image != NULL){
+      const FrozenOptions::Node* node;
+      OptionError handle_err = check_handle(parent, node);
+      if(handle_err != SPUD_NO_ERROR){
+        return handle_err;
+      }
 
-    if(have_option("__value")){
-      return find("__value")->second->get_option_shape();
-    }else{
-      vector<int> shape(2);
-      shape[0] = this->shape[0];
-      shape[1] = this->shape[1];
-      return shape;
+      return current().image->get_child_name(node, index, child_name);
+    }
+
+    const Option* option;
+    OptionError handle_err = check_handle(parent, option);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
+
+    return option->get_child_name(index, child_name);
   }
 
-  OptionError OptionManager::Option::get_option(vector<double>& val) const{
-    if(verbose)
-      cout << "OptionError OptionManager::Option::get_option(vector<double>& val) const\n";
+  OptionError OptionManager::get_number_of_children(const OptionHandle& parent, int& child_count){
+    ReadLock lock;
+    if(current().image != NULL){
+      const FrozenOptions::Node* node;
+      OptionError handle_err = check_handle(parent, node);
+      if(handle_err != SPUD_NO_ERROR){
+        return handle_err;
+      }
+
+      child_count = current().image->get_number_of_children(node);
 
-    if(have_option("__value")){
-      return get_option("__value", val);
-    }else if(get_option_type() != SPUD_DOUBLE){
-      return SPUD_TYPE_ERROR;
-    }else{
-      val = data_double;
       return SPUD_NO_ERROR;
     }
+
+    const Option* option;
+    OptionError handle_err = check_handle(parent, option);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
+    }
+
+    child_count = option->get_number_of_children();
+
+    return SPUD_NO_ERROR;
   }
 
-  OptionError OptionManager::Option::get_option(vector<int>& val) const{
-    if(verbose)
-      cout << "OptionError OptionManager::Option::get_option(vector<int>& val) const\n";
+  OptionError OptionManager::get_option_type(const OptionHandle& handle, OptionType& type){
+    ReadLock lock;
+    if(current().image != NULL){
+      const FrozenOptions::Node* node;
+      OptionError handle_err = check_handle(handle, node);
+      if(handle_err != SPUD_NO_ERROR){
+        return handle_err;
+      }
+
+      type = current().image->get_option_type(node);
 
-    if(have_option("__value")){
-      return get_option("__value", val);
-    }else if(get_option_type() != SPUD_INT){
-      return SPUD_TYPE_ERROR;
-    }else{
-      val = data_int;
       return SPUD_NO_ERROR;
     }
+
+    const Option* option;
+    OptionError handle_err = check_handle(handle, option);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
+    }
+
+    type = option->get_option_type();
+
+    return SPUD_NO_ERROR;
   }
 
-  OptionError OptionManager::Option::get_option(string& val) const{
-    if(verbose)
-      cout << "OptionError OptionManager::Option::get_option(string& val = " << val << ") const\n";
+  OptionError OptionManager::get_option_rank(const OptionHandle& handle, int& rank){
+    ReadLock lock;
+    if(current().image != NULL){
+      const FrozenOptions::Node* node;
+      OptionError handle_err = check_handle(handle, node);
+      if(handle_err != SPUD_NO_ERROR){
+        return handle_err;
+      }
+
+      rank = current().image->get_option_rank(node);
 
-    if(have_option("__value")){
-      return get_option("__value", val);
-    }else if(get_option_type() != SPUD_STRING){
-      return SPUD_TYPE_ERROR;
-    }else{
-      val = data_string;
       return SPUD_NO_ERROR;
     }
-  }
-
-  OptionError OptionManager::Option::get_option(const string& key, vector<double>& val) const{
-    if(verbose)
-      cout << "OptionError OptionManager::Option::get_option(const string& key = " << key << ", vector<double>& val)\n";
 
-    const Option* child = get_child(key);
-    if(child == NULL){
-      return SPUD_KEY_ERROR;
-    }else{
-      return child->get_option(val);
+    const Option* option;
+    OptionError handle_err = check_handle(handle, option);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
     }
-  }
 
-  OptionError OptionManager::Option::get_option(const string& key, vector<int>& val) const{
-    if(verbose)
-      cout << "OptionError OptionManager::Option::get_option(const string& key = " << key << ", vector<int>& val)\n";
+    rank = option->get_option_rank();
 
-    const Option* child = get_child(key);
-    if(child == NULL){
-      return SPUD_KEY_ERROR;
-    }else{
-      return child->get_option(val);
-    }
+    return SPUD_NO_ERROR;
   }
 
-  OptionError OptionManager::Option::get_option(const string& key, string& val) const{
-    if(verbose)
-      cout << "OptionError OptionManager::Option::get_option(const string& key = " << key << ", string& val = " << val << ")\n";
+  OptionError OptionManager::get_option_shape(const OptionHandle& handle, vector<int>& shape){
+    ReadLock lock;
+    if(current().image != NULL){
+      const FrozenOptions::Node* node;
+      OptionError handle_err = check_handle(handle, node);
+      if(handle_err != SPUD_NO_ERROR){
+        return handle_err;
+      }
 
-    const Option* child = get_child(key);
-    if(child == NULL){
-      return SPUD_KEY_ERROR;
-    }else{
-      return child->get_option(val);
+      shape = current().image->get_option_shape(node);
+
+      return SPUD_NO_ERROR;
     }
-  }
 
-  OptionError OptionManager::Option::add_option(const string& key){
-    if(verbose)
-      cout << "OptionError OptionManager::Option::add_option(const string& key = " << key << ")\n";
+    const Option* option;
+    OptionError handle_err = check_handle(handle, option);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
+    }
 
-    return create_child(key) == NULL ? SPUD_KEY_ERROR : SPUD_NO_ERROR;
+    shape = option->get_option_shape();
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::get_option(const OptionHandle& handle, double& val){
+    ReadLock lock;
+    OptionError check_err = check_option(handle, SPUD_DOUBLE, 0);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }
+
+    const double* data;
+    size_t size;
+    vector<int> shape;
+    OptionError get_err = get_option_view(handle, data, size, shape);
+    if(get_err != SPUD_NO_ERROR){
+      return get_err;
+    }else if(size != 1){
+      return SPUD_RANK_ERROR;
+    }
+
+    val = data[0];
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::get_option(const OptionHandle& handle, vector<double>& val){
+    ReadLock lock;
+    OptionError check_err = check_option(handle, SPUD_DOUBLE, 1);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }
+
+    const double* data;
+    size_t size;
+    vector<int> shape;
+    OptionError get_err = get_option_view(handle, data, size, shape);
+    if(get_err != SPUD_NO_ERROR){
+      return get_err;
+    }
+
+    val.assign(data, data + size);
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::get_option(const OptionHandle& handle, vector< vector<double> >& val){
+    ReadLock lock;
+    OptionError check_err = check_option(handle, SPUD_DOUBLE, 2);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }
+
+    const double* data;
+    size_t size;
+    vector<int> shape;
+    OptionError get_err = get_option_view(handle, data, size, shape);
+    if(get_err != SPUD_NO_ERROR){
+      return get_err;
+    }
+
+    val.clear();
+    for(int i = 0;i < shape[0];i++){
+      val.push_back(vector<double>(data + i * shape[1], data + (i + 1) * shape[1]));
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::get_option(const OptionHandle& handle, int& val){
+    ReadLock lock;
+    OptionError check_err = check_option(handle, SPUD_INT, 0);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }
+
+    const int* data;
+    size_t size;
+    vector<int> shape;
+    OptionError get_err = get_option_view(handle, data, size, shape);
+    if(get_err != SPUD_NO_ERROR){
+      return get_err;
+    }else if(size != 1){
+      return SPUD_RANK_ERROR;
+    }
+
+    val = data[0];
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::get_option(const OptionHandle& handle, vector<int>& val){
+    ReadLock lock;
+    OptionError check_err = check_option(handle, SPUD_INT, 1);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }
+
+    const int* data;
+    size_t size;
+    vector<int> shape;
+    OptionError get_err = get_option_view(handle, data, size, shape);
+    if(get_err != SPUD_NO_ERROR){
+      return get_err;
+    }
+
+    val.assign(data, data + size);
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::get_option(const OptionHandle& handle, vector< vector<int> >& val){
+    ReadLock lock;
+    OptionError check_err = check_option(handle, SPUD_INT, 2);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }
+
+    const int* data;
+    size_t size;
+    vector<int> shape;
+    OptionError get_err = get_option_view(handle, data, size, shape);
+    if(get_err != SPUD_NO_ERROR){
+      return get_err;
+    }
+
+    val.clear();
+    for(int i = 0;i < shape[0];i++){
+      val.push_back(vector<int>(data + i * shape[1], data + (i + 1) * shape[1]));
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::get_option(const OptionHandle& handle, string& val){
+    ReadLock lock;
+    OptionError check_err = check_option(handle, SPUD_STRING, 1);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }
+
+    const char* data;
+    size_t size;
+    OptionError get_err = get_option_view(handle, data, size);
+    if(get_err != SPUD_NO_ERROR){
+      return get_err;
+    }
+
+    val.assign(data, size);
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::get_option_view(const OptionHandle& handle, const double*& data, size_t& size, vector<int>& shape){
+    ReadLock lock;
+    if(current().image != NULL){
+      const FrozenOptions::Node* node;
+      OptionError check_err = check_handle(handle, node);
+      if(check_err != SPUD_NO_ERROR){
+        return check_err;
+      }
+
+      OptionError get_err = current().image->get_option_view(node, data, size);
+      if(get_err != SPUD_NO_ERROR){
+        return get_err;
+      }
+
+      shape = current().image->get_option_shape(node);
+
+      return SPUD_NO_ERROR;
+    }
+
+    const Option* option;
+    OptionError check_err = check_handle(handle, option);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }
+
+    OptionError get_err = option->get_option_view(data, size);
+    if(get_err != SPUD_NO_ERROR){
+      return get_err;
+    }
+
+    shape = option->get_option_shape();
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::get_option_view(const OptionHandle& handle, const int*& data, size_t& size, vector<int>& shape){
+    ReadLock lock;
+    if(current().image != NULL){
+      const FrozenOptions::Node* node;
+      OptionError check_err = check_handle(handle, node);
+      if(check_err != SPUD_NO_ERROR){
+        return check_err;
+      }
+
+      OptionError get_err = current().image->get_option_view(node, data, size);
+      if(get_err != SPUD_NO_ERROR){
+        return get_err;
+      }
+
+      shape = current().image->get_option_shape(node);
+
+      return SPUD_NO_ERROR;
+    }
+
+    const Option* option;
+    OptionError check_err = check_handle(handle, option);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }
+
+    OptionError get_err = option->get_option_view(data, size);
+    if(get_err != SPUD_NO_ERROR){
+      return get_err;
+    }
+
+    shape = option->get_option_shape();
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::get_option_checked(const string& key, const OptionType& type, const int& rank, int* shape, void* val){
+    // The handle remains valid while the lock is held
+    ReadLock lock;
+    OptionHandle handle;
+    OptionError handle_err = get_option_handle(key, handle);
+    if(handle_err != SPUD_NO_ERROR){
+      return handle_err;
+    }
+
+    return get_option_checked(handle, type, rank, shape, val);
+  }
+
+  OptionError OptionManager::get_option_checked(const OptionHandle& handle, const OptionType& type, const int& rank, int* shape, void* val){
+    // The option cannot change between the checks and the copy, so val is
+    // never written beyond the shape checked
+    ReadLock lock;
+    const FrozenOptions::Node* node = NULL;
+    const Option* option = NULL;
+    OptionError check_err = current().image != NULL ? check_handle(handle, node) : check_handle(handle, option);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }
+
+    if((node != NULL ? current().image->get_option_type(node) : option->get_option_type()) != type){
+      return SPUD_TYPE_ERROR;
+    }else if((node != NULL ? current().image->get_option_rank(node) : (int)option->get_option_rank()) != rank){
+      return SPUD_RANK_ERROR;
+    }
+
+    // shape holds the shape of val, or the length of val for strings, on
+    // entry, and the shape of the option on return
+    const int val_shape[2] = {shape[0], shape[1]};
+    vector<int> option_shape = node != NULL ? current().image->get_option_shape(node) : option->get_option_shape();
+    shape[0] = -1;  shape[1] = -1;
+    for(size_t i = 0;i < option_shape.size() and i < 2;i++){
+      shape[i] = option_shape[i];
+    }
+    if(val == NULL){
+      return SPUD_NO_ERROR;
+    }else if(type == SPUD_STRING){
+      if(shape[0] > val_shape[0]){
+        return SPUD_SHAPE_ERROR;
+      }
+    }else{
+      for(int i = 0;i < rank;i++){
+        if(shape[i] != val_shape[i]){
+          return SPUD_SHAPE_ERROR;
+        }
+      }
+    }
+
+    size_t size;
+    OptionError get_err;
+    if(type == SPUD_DOUBLE){
+      const double* data;
+      get_err = node != NULL ? current().image->get_option_view(node, data, size) : option->get_option_view(data, size);
+      if(get_err == SPUD_NO_ERROR and rank == 0 and size != 1){
+        return SPUD_RANK_ERROR;
+      }else if(get_err == SPUD_NO_ERROR and size > 0){
+        memcpy(val, data, size * sizeof(double));
+      }
+    }else if(type == SPUD_INT){
+      const int* data;
+      get_err = node != NULL ? current().image->get_option_view(node, data, size) : option->get_option_view(data, size);
+      if(get_err == SPUD_NO_ERROR and rank == 0 and size != 1){
+        return SPUD_RANK_ERROR;
+      }else if(get_err == SPUD_NO_ERROR and size > 0){
+        memcpy(val, data, size * sizeof(int));
+      }
+    }else if(type == SPUD_STRING){
+      const char* data;
+      get_err = node != NULL ? current().image->get_option_view(node, data, size) : option->get_option_view(data, size);
+      if(get_err == SPUD_NO_ERROR and size > 0){
+        memcpy(val, data, size);
+      }
+    }else{
+      return SPUD_TYPE_ERROR;
+    }
+
+    return get_err;
+  }
+
+  void OptionManager::get_option_info(const vector<string>& keys, vector<OptionInfo>& info){
+    ReadLock lock;
+    info.resize(keys.size());
+    if(current().image != NULL){
+      // Keys are looked up directly in the image, so no cache is needed
+      for(size_t i = 0;i < keys.size();i++){
+        OptionHandle handle;
+        if(get_option_handle(keys[i], handle) != SPUD_NO_ERROR){
+          handle.option = NULL;
+        }
+        info[i] = make_option_info(handle);
+      }
+      return;
+    }
+
+    key_cache cache;
+    for(size_t i = 0;i < keys.size();i++){
+      Probe probe(keys[i]);
+      const Option* option = resolve_key(keys[i], cache, false);
+      if(option == NULL){
+        probe.miss();
+      }
+      info[i] = make_option_info(option == NULL ? OptionHandle() : make_handle(option));
+    }
+
+    return;
+  }
+
+  OptionError OptionManager::get_option_info(const string& prefix, vector<string>& keys, vector<OptionInfo>& info){
+    ReadLock lock;
+    Probe probe(prefix);
+    keys.clear();
+    info.clear();
+
+    string root = prefix.substr(0, prefix.find(' '));
+    while(!root.empty() and root[root.size() - 1] == '/'){
+      root.erase(root.size() - 1);
+    }
+
+    if(current().image != NULL){
+      const FrozenOptions::Node* node = current().image->get_child(current().image->get_root(), root);
+      if(node == NULL){
+        probe.miss();
+        return SPUD_KEY_ERROR;
+      }
+
+      vector<const FrozenOptions::Node*> descendants;
+      current().image->list_descendants(node, root, keys, descendants);
+
+      info.reserve(descendants.size());
+      for(size_t i = 0;i < descendants.size();i++){
+        info.push_back(make_option_info(make_handle(descendants[i])));
+      }
+
+      return SPUD_NO_ERROR;
+    }
+
+    key_cache cache;
+    const Option* option = resolve_key(prefix, cache, false);
+    if(option == NULL){
+      probe.miss();
+      return SPUD_KEY_ERROR;
+    }
+
+    vector<const Option*> descendants;
+    option->list_descendants(root, keys, descendants);
+
+    info.reserve(descendants.size());
+    for(size_t i = 0;i < descendants.size();i++){
+      info.push_back(make_option_info(make_handle(descendants[i])));
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::find_options(const string& pattern, vector<string>& keys, vector<OptionHandle>& handles){
+    ReadLock lock;
+    Probe probe(pattern);
+    keys.clear();
+    handles.clear();
+
+    vector<PatternSegment> segments;
+    OptionError pattern_err = split_pattern(pattern, segments);
+    if(pattern_err != SPUD_NO_ERROR){
+      probe.miss();
+      return pattern_err;
+    }
+
+    if(current().image != NULL){
+      const FrozenOptions::Node* root = current().image->get_root();
+      vector<const FrozenOptions::Node*> matches;
+      if(segments.empty()){
+        keys.push_back("/");
+        matches.push_back(root);
+      }else{
+        current().image->find_matches(root, "", segments, 0, keys, matches);
+      }
+
+      handles.reserve(matches.size());
+      for(size_t i = 0;i < matches.size();i++){
+        handles.push_back(make_handle(matches[i]));
+      }
+    }else{
+      vector<const Option*> matches;
+      if(segments.empty()){
+        keys.push_back("/");
+        matches.push_back(current().options);
+      }else{
+        current().options->find_matches("", segments, 0, keys, matches);
+      }
+
+      handles.reserve(matches.size());
+      for(size_t i = 0;i < matches.size();i++){
+        handles.push_back(make_handle(matches[i]));
+      }
+    }
+
+    if(keys.empty()){
+      probe.miss();
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  void OptionManager::set_options(const vector<string>& keys, const vector<OptionInfo>& values, vector<OptionError>& errors){
+    WriteLock lock;
+    current().generation = next_generation();
+
+    key_cache cache;
+
+    errors.assign(keys.size(), SPUD_KEY_ERROR);
+    for(size_t i = 0;i < keys.size() and i < values.size();i++){
+      errors[i] = set_option_info(keys[i], values[i], cache);
+      if(errors[i] == SPUD_NO_ERROR or errors[i] == SPUD_NEW_KEY_WARNING){
+        record_change(canonical_key(keys[i]), errors[i] == SPUD_NEW_KEY_WARNING ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
+      }
+    }
+
+    return;
+  }
+
+  OptionError OptionManager::add_option(const string& key){
+    WriteLock lock;
+    Probe probe(key, true);
+    current().generation = next_generation();
+    logical_t new_key = !have_option(key);
+
+    OptionError add_err = tree()->add_option(key);
+    if(add_err != SPUD_NO_ERROR){
+      return add_err;
+    }
+    record_change(canonical_key(key), new_key ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
+    if(new_key){
+      return SPUD_NEW_KEY_WARNING;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::set_option(const string& key, const double& val){
+    WriteLock lock;
+    Probe probe(key, true);
+    current().generation = next_generation();
+    logical_t new_key = !have_option(key);
+
+    vector<double> val_handle;
+    val_handle.push_back(val);
+    vector<int> shape(2);
+    shape[0] = -1;  shape[1] = -1;
+    OptionError set_err = tree()->set_option(key + "/__value", val_handle, 0, shape);
+    if(set_err != SPUD_NO_ERROR){
+      return set_err;
+    }
+    record_change(canonical_key(key), new_key ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
+    if(new_key){
+      return SPUD_NEW_KEY_WARNING;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::set_option(const string& key, const vector<double>& val){
+    WriteLock lock;
+    Probe probe(key, true);
+    current().generation = next_generation();
+    logical_t new_key = !have_option(key);
+
+    vector<double> val_handle = val;
+    vector<int> shape(2);
+    shape[0] = val.size();  shape[1] = -1;
+    OptionError set_err = tree()->set_option(key + "/__value", val_handle, 1, shape);
+    if(set_err != SPUD_NO_ERROR){
+      return set_err;
+    }
+    record_change(canonical_key(key), new_key ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
+    if(new_key){
+      return SPUD_NEW_KEY_WARNING;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::set_option(const string& key, const vector< vector<double> >& val){
+    WriteLock lock;
+    Probe probe(key, true);
+    current().generation = next_generation();
+    logical_t new_key = !have_option(key);
+
+    vector<double> val_handle;
+    for(size_t i = 0;i < val.size();i++){
+      if(i > 0 and val[i].size() != val[0].size()){
+        return SPUD_SHAPE_ERROR;
+      }
+      for(size_t j = 0;j < val[i].size();j++){
+        val_handle.push_back(val[i][j]);
+      }
+    }
+    vector<int> shape(2);
+    shape[0] = val.size();
+    if(val.size() == 0){
+      shape[1] = 0;
+    }else{
+      shape[1] = val[0].size();
+    }
+    OptionError set_err = tree()->set_option(key + "/__value", val_handle, 2, shape);
+    if(set_err != SPUD_NO_ERROR){
+      return set_err;
+    }
+    record_change(canonical_key(key), new_key ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
+    if(new_key){
+      return SPUD_NEW_KEY_WARNING;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::set_option(const string& key, const int& val){
+    WriteLock lock;
+    Probe probe(key, true);
+    current().generation = next_generation();
+    logical_t new_key = !have_option(key);
+
+    vector<int> val_handle;
+    val_handle.push_back(val);
+    vector<int> shape(2);
+    shape[0] = -1;  shape[1] = -1;
+    OptionError set_err = tree()->set_option(key + "/__value", val_handle, 0, shape);
+    if(set_err != SPUD_NO_ERROR){
+      return set_err;
+    }
+    record_change(canonical_key(key), new_key ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
+    if(new_key){
+      return SPUD_NEW_KEY_WARNING;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::set_option(const string& key, const vector<int>& val){
+    WriteLock lock;
+    Probe probe(key, true);
+    current().generation = next_generation();
+    logical_t new_key = !have_option(key);
+
+    vector<int> val_handle = val;
+    vector<int> shape(2);
+    shape[0] = val.size();  shape[1] = -1;
+    OptionError set_err = tree()->set_option(key + "/__value", val_handle, 1, shape);
+    if(set_err != SPUD_NO_ERROR){
+      return set_err;
+    }
+    record_change(canonical_key(key), new_key ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
+    if(new_key){
+      return SPUD_NEW_KEY_WARNING;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::set_option(const string& key, const vector< vector<int> >& val){
+    WriteLock lock;
+    Probe probe(key, true);
+    current().generation = next_generation();
+    logical_t new_key = !have_option(key);
+
+    vector<int> val_handle;
+    for(size_t i = 0;i < val.size();i++){
+      if(i > 0 and val[i].size() != val[0].size()){
+        return SPUD_SHAPE_ERROR;
+      }
+      for(size_t j = 0;j < val[i].size();j++){
+        val_handle.push_back(val[i][j]);
+      }
+    }
+    vector<int> shape(2);
+    shape[0] = val.size();
+    if(val.size() == 0){
+      shape[1] = 0;
+    }else{
+      shape[1] = val[0].size();
+    }
+    OptionError set_err = tree()->set_option(key + "/__value", val_handle, 2, shape);
+    if(set_err != SPUD_NO_ERROR){
+      return set_err;
+    }
+    record_change(canonical_key(key), new_key ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
+    if(new_key){
+      return SPUD_NEW_KEY_WARNING;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::set_option(const string& key, const string& val){
+    WriteLock lock;
+    Probe probe(key, true);
+    current().generation = next_generation();
+    logical_t new_key = !have_option(key);
+
+    OptionError set_err = tree()->set_option(key + "/__value", val);
+    if(set_err != SPUD_NO_ERROR){
+      return set_err;
+    }
+    record_change(canonical_key(key), new_key ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
+    if(new_key){
+      return SPUD_NEW_KEY_WARNING;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::set_option_attr(const string& key, const string& val){
+    WriteLock lock;
+    Probe probe(key, true);
+    current().generation = next_generation();
+    logical_t new_key = !have_option(key);
+
+    OptionError set_err = tree()->set_option(key, val);
+    if(set_err != SPUD_NO_ERROR){
+      return set_err;
+    }
+    record_change(canonical_key(key), new_key ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
+    if(new_key){
+      return SPUD_NEW_KEY_WARNING;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::set_option_attribute(const string& key, const string& val){
+    WriteLock lock;
+    Probe probe(key, true);
+    OptionError set_err = set_option_attr(key, val);
+    if(set_err != SPUD_NO_ERROR and set_err != SPUD_NEW_KEY_WARNING){
+      return set_err;
+    }
+
+    Option* child = tree()->get_child(key);
+    if(child == NULL){
+      return SPUD_KEY_ERROR;
+    }
+    logical_t is_attribute = child->set_is_attribute(true);
+    if(set_err != SPUD_NO_ERROR){
+      return set_err;
+    }
+    else if(!is_attribute){
+      return SPUD_ATTR_SET_FAILED_WARNING;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::move_option(const string& key1, const string& key2){
+    WriteLock lock;
+    Probe probe(key2, true);
+    current().generation = next_generation();
+    string moved_key = canonical_key(key1);
+    OptionError move_err = tree()->move_option(key1, key2);
+    if(move_err != SPUD_NO_ERROR){
+      return move_err;
+    }
+    record_change(moved_key, SPUD_CHANGE_DELETE);
+    record_change(canonical_key(key2), SPUD_CHANGE_MOVE);
+    
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::copy_option(const string& key1, const string& key2){
+    WriteLock lock;
+    Probe probe(key2, true);
+    current().generation = next_generation();
+    OptionError copy_err = tree()->copy_option(key1, key2);
+    if(copy_err != SPUD_NO_ERROR){
+      return copy_err;
+    }
+    record_change(canonical_key(key2), SPUD_CHANGE_ADD);
+    
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::delete_option(const string& key){
+    WriteLock lock;
+    Probe probe(key, true);
+    current().generation = next_generation();
+    string deleted_key = canonical_key(key);
+    OptionError del_err = tree()->delete_option(key);
+    if(del_err != SPUD_NO_ERROR){
+      return del_err;
+    }
+    record_change(deleted_key, SPUD_CHANGE_DELETE);
+
+    return SPUD_NO_ERROR;
+  }
+
+  long OptionManager::get_generation(){
+    ReadLock lock;
+    return current().generation;
+  }
+
+  logical_t OptionManager::have_changed(const string& key, const long& since){
+    ReadLock lock;
+    const OptionManager& manager = current();
+    string changed_key = canonical_key(key);
+
+    generation_index::const_iterator changed = manager.changed_generation.find(changed_key);
+    if(changed != manager.changed_generation.end() and changed->second > since){
+      return true;
+    }
+
+    // Deleting or moving an option changes everything below it
+    string::size_type end = changed_key.size();
+    while(true){
+      generation_index::const_iterator removed = manager.removed_generation.find(changed_key.substr(0, max(end, (string::size_type)1)));
+      if(removed != manager.removed_generation.end() and removed->second > since){
+        return true;
+      }
+      if(end <= 1){
+        break;
+      }
+      end = changed_key.rfind('/', end - 1);
+    }
+
+    return false;
+  }
+
+  void OptionManager::get_changes(const long& since, vector<string>& keys, vector<OptionChange>& changes){
+    ReadLock lock;
+    keys.clear();
+    changes.clear();
+
+    const OptionManager& manager = current();
+    for(change_list::const_iterator iter = manager.changes.upper_bound(since);iter != manager.changes.end();iter++){
+      keys.push_back(iter->second);
+      changes.push_back(manager.journal.find(iter->second)->second.change);
+    }
+
+    return;
+  }
+
+  OptionError OptionManager::write_changes(const string& filename, const long& since){
+    WriteLock lock;
+    const Option* root = tree();
+
+    // An element is written whole if anything below it changed. Elements
+    // which share a name are identified by their position, which changes
+    // as they are added and deleted, so are written with their parent, as
+    // are attributes.
+    set<string> changed_keys;
+    const change_list& changes = current().changes;
+    for(change_list::const_iterator iter = changes.upper_bound(since);iter != changes.end();iter++){
+      string key = iter->second;
+      string::size_type index = key.find('[');
+      if(index != string::npos){
+        key.erase(key.rfind('/', index));
+      }
+      const Option* option = root->get_child(key);
+      if(option != NULL and option->get_is_attribute()){
+        key.erase(key.rfind('/'));
+      }
+      changed_keys.insert(key.empty() ? "/" : key);
+    }
+
+    // Skip elements written with a changed parent
+    vector<string> keys;
+    for(set<string>::const_iterator iter = changed_keys.begin();iter != changed_keys.end();iter++){
+      logical_t parent_changed = false;
+      string::size_type end = iter->size();
+      while(end > 1 and !parent_changed){
+        end = iter->rfind('/', end - 1);
+        parent_changed = changed_keys.count(iter->substr(0, max(end, (string::size_type)1))) > 0;
+      }
+      if(!parent_changed){
+        keys.push_back(*iter);
+      }
+    }
+
+    return root->write_changes(filename, keys, since, current().generation);
+  }
+
+  OptionError OptionManager::load_changes(const string& filename){
+    WriteLock lock;
+    Option* root = tree();
+    current().generation = next_generation();
+
+    // The changes are read into elements allocated from the arena of these
+    // options, so that replacement elements can be moved into the options
+    Option* changes = new Option();
+    size_t peak_buffer_size;
+    OptionError load_err = changes->load_options(filename, peak_buffer_size);
+    if(load_err != SPUD_NO_ERROR){
+      delete changes;
+      return load_err;
+    }
+
+    vector<string> keys;
+    vector<OptionChange> applied;
+    OptionError apply_err = root->apply_changes(*changes, keys, applied);
+    delete changes;
+    for(size_t i = 0;i < keys.size();i++){
+      record_change(canonical_key(keys[i]), applied[i]);
+    }
+
+    return apply_err;
+  }
+
+  void OptionManager::print_options(){
+    WriteLock lock;
+    tree()->print();
+
+    return;
+  }
+
+  // PRIVATE METHODS
+
+  OptionManager::OptionManager(){
+    arena_statistics.allocations = 0;
+    arena_statistics.deallocations = 0;
+    arena_statistics.system_allocations = 0;
+    arena_statistics.bytes_in_use = 0;
+    arena_statistics.bytes_reserved = 0;
+    arena = new Arena(arena_statistics);
+    shared_tree = false;
+    // The root is allocated from the arena of these options, which are not
+    // yet the current options of any routine
+    OptionManager* caller_manager = current_manager;
+    current_manager = this;
+    options = new Option();
+    current_manager = caller_manager;
+    image = NULL;
+    generation = next_generation();
+    load_time = 0.0;
+    load_peak_buffer_size = 0;
+    pthread_rwlock_init(&lock, NULL);
+    profile = NULL;
+    if(this == &manager){
+      deallocated = false;
+      const char* profile_filename = getenv("SPUD_PROFILE");
+      if(profile_filename != NULL and profile_filename[0] != '\0'){
+        profile = new Profile(profile_filename);
+      }
+    }
+
+    return;
+  }
+
+  OptionManager::OptionManager(const OptionManager& manager){
+    cerr << "SPUD ERROR: OptionManager copy constructor cannot be called" << endl;
+    exit(-1);
+  }
+
+  OptionManager::~OptionManager(){
+    // Only the default options may be destroyed more than once
+    if (this != &manager or !deallocated)
+    {
+      if(profile != NULL and profile->write() != SPUD_NO_ERROR){
+        cerr << "SPUD WARNING: Failed to write options profile" << endl;
+      }
+      delete profile;
+      // Elements of a shared tree may be in use by another copy of the
+      // library, so neither the tree nor its arena is freed
+      if(!shared_tree){
+        delete arena;
+      }
+      delete image;
+      pthread_rwlock_destroy(&lock);
+      if(this == &manager){
+        deallocated = true;
+      }
+    }
+
+    return;
+  }
+
+  OptionManager& OptionManager::operator=(const OptionManager& manager){
+    cerr << "SPUD ERROR: OptionManager assignment operator cannot be called" << endl;
+    exit(-1);
+  }
+
+  OptionManager::Option* OptionManager::tree(){
+    if(current().image != NULL){
+      // Handles to the image are invalidated when it is unmapped
+      current().generation = next_generation();
+      current().options->load_image(*current().image);
+      delete current().image;
+      current().image = NULL;
+    }
+
+    return current().options;
+  }
+
+  OptionError OptionManager::check_key(const string& key){
+    if(!have_option(key)){
+      return SPUD_KEY_ERROR;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::check_handle(const OptionHandle& handle, const Option*& option){
+    if(handle.option == NULL or handle.generation != current().generation){
+      return SPUD_HANDLE_ERROR;
+    }
+
+    option = (const Option*)handle.option;
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::check_handle(const OptionHandle& handle, const FrozenOptions::Node*& node){
+    if(current().image == NULL or handle.option == NULL or handle.generation != current().generation){
+      return SPUD_HANDLE_ERROR;
+    }
+
+    node = (const FrozenOptions::Node*)handle.option;
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::check_option(const OptionHandle& handle, const OptionType& type, const int& rank){
+    OptionType option_type;
+    OptionError check_err = get_option_type(handle, option_type);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }else if(option_type != type){
+      return SPUD_TYPE_ERROR;
+    }
+
+    int option_rank;
+    get_option_rank(handle, option_rank);
+    if(option_rank != rank){
+      return SPUD_RANK_ERROR;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionHandle OptionManager::make_handle(const Option* option){
+    OptionHandle handle;
+    handle.option = (void*)option;
+    handle.generation = current().generation;
+
+    return handle;
+  }
+
+  OptionHandle OptionManager::make_handle(const FrozenOptions::Node* node){
+    OptionHandle handle;
+    handle.option = (void*)node;
+    handle.generation = current().generation;
+
+    return handle;
+  }
+
+  OptionError OptionManager::get_option_view(const OptionHandle& handle, const char*& data, size_t& size){
+    if(current().image != NULL){
+      const FrozenOptions::Node* node;
+      OptionError check_err = check_handle(handle, node);
+      if(check_err != SPUD_NO_ERROR){
+        return check_err;
+      }
+
+      return current().image->get_option_view(node, data, size);
+    }
+
+    const Option* option;
+    OptionError check_err = check_handle(handle, option);
+    if(check_err != SPUD_NO_ERROR){
+      return check_err;
+    }
+
+    return option->get_option_view(data, size);
+  }
+  
+  OptionManager::Option* OptionManager::resolve_key(const string& key, key_cache& cache, const logical_t& create){
+    string lkey = key.substr(0, key.find(' '));
+    while(!lkey.empty() and lkey[lkey.size() - 1] == '/'){
+      lkey.erase(lkey.size() - 1);
+    }
+    if(lkey.empty()){
+      return tree();
+    }
+
+    key_cache::const_iterator it = cache.find(lkey);
+    if(it != cache.end() and (it->second != NULL or !create)){
+      return it->second;
+    }
+
+    // Resolve the parent through the cache, and then only the last component
+    size_t split = lkey.rfind('/');
+    Option* parent;
+    string name;
+    if(split == string::npos){
+      parent = tree();
+      name = lkey;
+    }else{
+      parent = resolve_key(lkey.substr(0, split), cache, create);
+      name = lkey.substr(split + 1);
+    }
+
+    Option* option = NULL;
+    if(parent != NULL and (!create or parent->add_option(name) == SPUD_NO_ERROR)){
+      option = parent->get_child(name);
+    }
+    cache[lkey] = option;
+
+    return option;
+  }
+
+  OptionError OptionManager::split_pattern(const string& pattern, vector<PatternSegment>& segments){
+    segments.clear();
+
+    // As for keys, anything following a space is ignored
+    string path = pattern.substr(0, pattern.find(' '));
+    string::size_type pos = 0;
+    while(pos < path.size()){
+      string::size_type end = path.find('/', pos);
+      if(end == string::npos){
+        end = path.size();
+      }
+      if(end > pos){
+        PatternSegment segment;
+        segment.name = path.substr(pos, end - pos);
+        segment.index = -1;
+
+        // Extract the index from the name if present
+        string::size_type open = segment.name.find('[');
+        if(open != string::npos){
+          string::size_type close = segment.name.find(']', open);
+          if(close != segment.name.size() - 1){
+            return SPUD_KEY_ERROR;
+          }
+          istringstream index(segment.name.substr(open + 1, close - open - 1));
+          if(!(index >> segment.index) or !index.eof() or segment.index < 0){
+            return SPUD_KEY_ERROR;
+          }
+          segment.name.erase(open);
+        }
+        if(segment.name.empty()){
+          return SPUD_KEY_ERROR;
+        }
+
+        segments.push_back(segment);
+      }
+      pos = end + 1;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionInfo OptionManager::make_option_info(const OptionHandle& handle){
+    OptionInfo info;
+    info.data = NULL;
+    info.size = 0;
+
+    if(handle.option == NULL){
+      info.handle.option = NULL;
+      info.handle.generation = current().generation;
+      info.error = SPUD_KEY_ERROR;
+      info.type = SPUD_NONE;
+      info.rank = -1;
+      info.shape[0] = -1;
+      info.shape[1] = -1;
+      return info;
+    }
+
+    info.handle = handle;
+    OptionType type;
+    get_option_type(handle, type);
+    info.type = type;
+    get_option_rank(handle, info.rank);
+    vector<int> shape;
+    get_option_shape(handle, shape);
+    info.shape[0] = shape[0];
+    info.shape[1] = shape[1];
+
+    OptionError view_err = SPUD_NO_ERROR;
+    switch(info.type){
+      case(SPUD_DOUBLE):{
+        const double* data;
+        view_err = get_option_view(handle, data, info.size, shape);
+        info.data = data;
+        break;
+      }
+      case(SPUD_INT):{
+        const int* data;
+        view_err = get_option_view(handle, data, info.size, shape);
+        info.data = data;
+        break;
+      }
+      case(SPUD_STRING):{
+        const char* data;
+        view_err = get_option_view(handle, data, info.size);
+        info.data = data;
+        break;
+      }
+      default:
+        break;
+    }
+    info.error = view_err;
+
+    return info;
+  }
+
+  OptionError OptionManager::set_option_info(const string& key, const OptionInfo& value, key_cache& cache){
+    Probe probe(key, true);
+    vector<int> shape(2);
+    shape[0] = -1;  shape[1] = -1;
+    size_t size = 0;
+    if(value.type == SPUD_STRING){
+      size = value.size;
+    }else if(value.type != SPUD_NONE){
+      switch(value.rank){
+        case(0):
+          size = 1;
+          break;
+        case(1):
+          shape[0] = value.shape[0];
+          break;
+        case(2):
+          shape[0] = value.shape[0];  shape[1] = value.shape[1];
+          break;
+        default:
+          return SPUD_RANK_ERROR;
+      }
+      if(value.rank > 0){
+        if(shape[0] < 0 or (value.rank == 2 and shape[1] < 0)){
+          return SPUD_SHAPE_ERROR;
+        }
+        size = value.rank == 1 ? (size_t)shape[0] : (size_t)shape[0] * shape[1];
+      }
+      if(value.size != size){
+        return SPUD_SHAPE_ERROR;
+      }
+    }
+    if(size > 0 and value.data == NULL){
+      return SPUD_SHAPE_ERROR;
+    }
+
+    Option* option = resolve_key(key, cache, false);
+    logical_t new_key = (option == NULL);
+    if(new_key){
+      option = resolve_key(key, cache, true);
+      if(option == NULL){
+        return SPUD_KEY_ERROR;
+      }
+    }
+
+    OptionError set_err;
+    switch(value.type){
+      case(SPUD_DOUBLE):{
+        const double* data = (const double*)value.data;
+        set_err = option->set_option("__value", vector<double>(data, data + size), value.rank, shape);
+        break;
+      }
+      case(SPUD_INT):{
+        const int* data = (const int*)value.data;
+        set_err = option->set_option("__value", vector<int>(data, data + size), value.rank, shape);
+        break;
+      }
+      case(SPUD_STRING):{
+        const char* data = (const char*)value.data;
+        set_err = option->set_option("__value", string(data, data + size));
+        break;
+      }
+      case(SPUD_NONE):
+        set_err = SPUD_NO_ERROR;
+        break;
+      default:
+        set_err = SPUD_TYPE_ERROR;
+    }
+
+    if(set_err != SPUD_NO_ERROR){
+      return set_err;
+    }else if(new_key){
+      return SPUD_NEW_KEY_WARNING;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  string OptionManager::canonical_key(const string& key){
+    vector<PatternSegment> segments;
+    OptionError key_err = split_pattern(key, segments);
+    if(key_err == SPUD_NO_ERROR and segments.empty()){
+      return "/";
+    }else if(key_err == SPUD_NO_ERROR and current().image == NULL){
+      vector<string> keys;
+      vector<const Option*> matches;
+      current().options->find_matches("", segments, 0, keys, matches);
+      if(!keys.empty()){
+        return keys[0];
+      }
+    }
+
+    string path = key.substr(0, key.find(' '));
+    string canonical;
+    string::size_type pos = 0;
+    while(pos < path.size()){
+      string::size_type end = path.find('/', pos);
+      if(end == string::npos){
+        end = path.size();
+      }
+      if(end > pos){
+        canonical += "/" + path.substr(pos, end - pos);
+      }
+      pos = end + 1;
+    }
+
+    return canonical.empty() ? "/" : canonical;
+  }
+
+  void OptionManager::record_change(const string& key, const OptionChange& change){
+    OptionManager& manager = current();
+    map<string, JournalEntry>::iterator entry = manager.journal.find(key);
+    if(entry == manager.journal.end()){
+      entry = manager.journal.insert(make_pair(key, JournalEntry())).first;
+      entry->second.position = manager.changes.insert(make_pair(manager.generation, key));
+    }else if(entry->second.position->first != manager.generation){
+      manager.changes.erase(entry->second.position);
+      entry->second.position = manager.changes.insert(make_pair(manager.generation, key));
+    }
+    entry->second.change = change;
+    if(change == SPUD_CHANGE_DELETE){
+      manager.removed_generation[key] = manager.generation;
+    }
+
+    // The option and every option above it have changed. Options above one
+    // already stamped with this generation have been stamped too.
+    string prefix;
+    string::size_type end = key.size();
+    while(true){
+      prefix.assign(key, 0, max(end, (string::size_type)1));
+      long& changed = manager.changed_generation[prefix];
+      if(changed == manager.generation){
+        break;
+      }
+      changed = manager.generation;
+      if(end <= 1){
+        break;
+      }
+      end = key.rfind('/', end - 1);
+    }
+
+    return;
+  }
+
+  void OptionManager::reset(){
+    generation = next_generation();
+    delete image;
+    image = NULL;
+    release_tree();
+    options = new Option;
+    reset_journal();
+    
+    return;
+  }
+
+  void OptionManager::reset_journal(){
+    journal.clear();
+    changes.clear();
+    changed_generation.clear();
+    removed_generation.clear();
+
+    JournalEntry entry = {SPUD_CHANGE_SET, changes.insert(make_pair(generation, string("/")))};
+    journal["/"] = entry;
+    changed_generation["/"] = generation;
+    removed_generation["/"] = generation;
+
+    return;
+  }
+
+  void OptionManager::release_tree(){
+    if(shared_tree){
+      delete options;
+    }else{
+      arena->release();
+    }
+    options = NULL;
+
+    return;
+  }
+
+  // End OptionManager CLASS METHODS
+
+  // OptionContext CLASS METHODS
+
+  // PUBLIC METHODS
+
+  OptionContext::OptionContext(){
+    manager = new OptionManager();
+
+    return;
+  }
+
+  OptionContext::~OptionContext(){
+    if(manager != &OptionManager::manager){
+      delete manager;
+    }
+
+    return;
+  }
+
+  OptionContext& OptionContext::get_default(){
+    static OptionContext default_context(&OptionManager::manager);
+
+    return default_context;
+  }
+
+  OptionContext::Scope::Scope(OptionContext& context){
+    previous_manager = current_manager;
+    current_manager = context.manager;
+
+    return;
+  }
+
+  OptionContext::Scope::~Scope(){
+    current_manager = previous_manager;
+
+    return;
+  }
+
+  // PRIVATE METHODS
+
+  OptionContext::OptionContext(OptionManager* manager){
+    this->manager = manager;
+
+    return;
+  }
+
+  OptionContext::OptionContext(const OptionContext& context){
+    cerr << "SPUD ERROR: OptionContext copy constructor cannot be called" << endl;
+    exit(-1);
+  }
+
+  OptionContext& OptionContext::operator=(const OptionContext& context){
+    cerr << "SPUD ERROR: OptionContext assignment operator cannot be called" << endl;
+    exit(-1);
+  }
+
+  // End OptionContext CLASS METHODS
+
+  // Compressed file helpers
+
+  namespace{
+
+    // Options files may be gzip, bzip2 or zstd compressed. Files are read
+    // through a decompressor whatever their name if their first bytes are
+    // the magic of a compressed format, and written compressed if their name
+    // ends in ".gz", ".bz2" or ".zst". Each format needs its library at
+    // build time.
+    enum Compression{
+      NO_COMPRESSION,
+      GZIP_COMPRESSION,
+      BZIP2_COMPRESSION,
+      ZSTD_COMPRESSION
+    };
+
+    logical_t ends_with(const string& text, const string& suffix){
+      return text.size() > suffix.size() and text.compare(text.size() - suffix.size(), suffix.size(), suffix) == 0;
+    }
+
+    /**
+      * The compression of a file written with the supplied filename.
+      */
+    Compression filename_compression(const string& filename){
+      if(ends_with(filename, ".gz")){
+        return GZIP_COMPRESSION;
+      }else if(ends_with(filename, ".bz2")){
+        return BZIP2_COMPRESSION;
+      }else if(ends_with(filename, ".zst")){
+        return ZSTD_COMPRESSION;
+      }
+
+      return NO_COMPRESSION;
+    }
+
+    /**
+      * The compression of a file starting with the supplied size bytes.
+      */
+    Compression magic_compression(const char* data, const size_t& size){
+      const unsigned char* magic = (const unsigned char*)data;
+      if(size >= 2 and magic[0] == 0x1f and magic[1] == 0x8b){
+        return GZIP_COMPRESSION;
+      }else if(size >= 3 and magic[0] == 'B' and magic[1] == 'Z' and magic[2] == 'h'){
+        return BZIP2_COMPRESSION;
+      }else if(size >= 4 and magic[0] == 0x28 and magic[1] == 0xb5 and magic[2] == 0x2f and magic[3] == 0xfd){
+        return ZSTD_COMPRESSION;
+      }
+
+      return NO_COMPRESSION;
+    }
+
+    /**
+      * A file opened for reading, decompressed as it is read if it is
+      * compressed. Only one block of compressed input is held at a time, so
+      * the file is never decompressed in full in memory or on disk.
+      * Concatenated compressed streams, as written by parallel compressors,
+      * are read one after another.
+      */
+    class InputFile{
+
+      public:
+
+        InputFile() : file(NULL), compression(NO_COMPRESSION), input(block_size), input_pos(0), input_size(0), input_end(false), stream_end(true), error(false){
+#ifdef HAVE_LIBZSTD
+          zstd_stream = NULL;
+#endif
+        }
+
+        ~InputFile(){
+          close();
+        }
+
+        /**
+          * Open the file with the supplied filename. Returns false if the file
+          * cannot be opened, or is compressed in a format spud was built
+          * without.
+          */
+        logical_t open(const string& filename){
+          file = fopen(filename.c_str(), "rb");
+          if(file == NULL){
+            return false;
+          }
+          input_size = fread(&input[0], 1, input.size(), file);
+          input_end = input_size == 0;
+          compression = magic_compression(&input[0], input_size);
+
+          logical_t open_ok = false;
+          switch(compression){
+            case(NO_COMPRESSION):
+              open_ok = true;
+              break;
+            case(GZIP_COMPRESSION):
+#ifdef HAVE_LIBZ
+              memset(&gz_stream, 0, sizeof(gz_stream));
+              // Accept a gzip header only
+              open_ok = inflateInit2(&gz_stream, 15 + 16) == Z_OK;
+#endif
+              break;
+            case(BZIP2_COMPRESSION):
+#ifdef HAVE_LIBBZ2
+              memset(&bz2_stream, 0, sizeof(bz2_stream));
+              open_ok = BZ2_bzDecompressInit(&bz2_stream, 0, 0) == BZ_OK;
+#endif
+              break;
+            case(ZSTD_COMPRESSION):
+#ifdef HAVE_LIBZSTD
+              zstd_stream = ZSTD_createDStream();
+              open_ok = zstd_stream != NULL and !ZSTD_isError(ZSTD_initDStream(zstd_stream));
+#endif
+              break;
+          }
+          if(!open_ok){
+            close();
+            return false;
+          }
+          stream_end = compression == NO_COMPRESSION;
+
+          return true;
+        }
+
+        /**
+          * Read up to size bytes of the file, decompressed, into data, and
+          * return the number of bytes read, which is zero only at the end of
+          * the file or on error.
+          */
+        size_t read(char* data, const size_t& size){
+          while(!error and file != NULL){
+            if(input_pos == input_size and !input_end){
+              input_size = fread(&input[0], 1, input.size(), file);
+              input_pos = 0;
+              input_end = input_size == 0;
+              error = input_end and ferror(file);
+            }
+
+            const size_t start_pos = input_pos;
+            size_t count = decompress(data, size);
+            if(count > 0){
+              return count;
+            }else if(input_pos == input_size and input_end){
+              // A compressed file must end with a complete stream
+              error = error or !stream_end;
+              return 0;
+            }else if(input_pos == start_pos and input_pos < input_size){
+              // The decompressor is making no progress
+              error = true;
+            }
+          }
+
+          return 0;
+        }
+
+        /**
+          * Test if reading or decompressing the file has failed.
+          */
+        logical_t failed() const{
+          return error;
+        }
+
+        void close(){
+          if(file == NULL){
+            return;
+          }
+          switch(compression){
+            case(GZIP_COMPRESSION):
+#ifdef HAVE_LIBZ
+              inflateEnd(&gz_stream);
+#endif
+              break;
+            case(BZIP2_COMPRESSION):
+#ifdef HAVE_LIBBZ2
+              BZ2_bzDecompressEnd(&bz2_stream);
+#endif
+              break;
+            case(ZSTD_COMPRESSION):
+#ifdef HAVE_LIBZSTD
+              ZSTD_freeDStream(zstd_stream);
+              zstd_stream = NULL;
+#endif
+              break;
+            default:
+              break;
+          }
+          fclose(file);
+          file = NULL;
+        }
+
+      private:
+
+        static const size_t block_size = 65536;
+
+        /**
+          * Decompress the buffered input into up to size bytes of data, and
+          * return the number of bytes written.
+          */
+        size_t decompress(char* data, const size_t& size){
+          const size_t available = input_size - input_pos;
+          if(available == 0 and stream_end){
+            // Decompressors reject further calls after the end of a stream
+            return 0;
+          }
+          switch(compression){
+            case(NO_COMPRESSION):{
+              size_t count = min(size, available);
+              memcpy(data, &input[0] + input_pos, count);
+              input_pos += count;
+              return count;
+            }
+#ifdef HAVE_LIBZ
+            case(GZIP_COMPRESSION):{
+              if(stream_end and available > 0){
+                inflateReset(&gz_stream);
+              }
+              gz_stream.next_in = (Bytef*)&input[0] + input_pos;
+              gz_stream.avail_in = (uInt)available;
+              gz_stream.next_out = (Bytef*)data;
+              gz_stream.avail_out = (uInt)size;
+              int inflate_err = inflate(&gz_stream, Z_NO_FLUSH);
+              input_pos = input_size - gz_stream.avail_in;
+              stream_end = inflate_err == Z_STREAM_END;
+              error = inflate_err != Z_OK and inflate_err != Z_STREAM_END and inflate_err != Z_BUF_ERROR;
+              return size - gz_stream.avail_out;
+            }
+#endif
+#ifdef HAVE_LIBBZ2
+            case(BZIP2_COMPRESSION):{
+              if(stream_end and available > 0){
+                BZ2_bzDecompressEnd(&bz2_stream);
+                memset(&bz2_stream, 0, sizeof(bz2_stream));
+                error = BZ2_bzDecompressInit(&bz2_stream, 0, 0) != BZ_OK;
+              }
+              bz2_stream.next_in = &input[0] + input_pos;
+              bz2_stream.avail_in = (unsigned int)available;
+              bz2_stream.next_out = data;
+              bz2_stream.avail_out = (unsigned int)size;
+              int decompress_err = error ? BZ_CONFIG_ERROR : BZ2_bzDecompress(&bz2_stream);
+              input_pos = input_size - bz2_stream.avail_in;
+              stream_end = decompress_err == BZ_STREAM_END;
+              error = decompress_err != BZ_OK and decompress_err != BZ_STREAM_END;
+              return size - bz2_stream.avail_out;
+            }
+#endif
+#ifdef HAVE_LIBZSTD
+            case(ZSTD_COMPRESSION):{
+              ZSTD_inBuffer in = {&input[0] + input_pos, available, 0};
+              ZSTD_outBuffer out = {data, size, 0};
+              size_t decompress_err = ZSTD_decompressStream(zstd_stream, &out, &in);
+              input_pos += in.pos;
+              // Zero once a frame is complete
+              stream_end = decompress_err == 0;
+              error = ZSTD_isError(decompress_err);
+              return out.pos;
+            }
+#endif
+            default:
+              error = true;
+              return 0;
+          }
+        }
+
+        FILE* file;
+        Compression compression;
+        // The compressed input, of which the bytes from input_pos to
+        // input_size are yet to be decompressed
+        vector<char> input;
+        size_t input_pos, input_size;
+        // input_end is true once the whole file has been read, and
+        // stream_end while the decompressor is between compressed streams
+        logical_t input_end, stream_end, error;
+#ifdef HAVE_LIBZ
+        z_stream gz_stream;
+#endif
+#ifdef HAVE_LIBBZ2
+        bz_stream bz2_stream;
+#endif
+#ifdef HAVE_LIBZSTD
+        ZSTD_DStream* zstd_stream;
+#endif
+    };
+
+    const size_t InputFile::block_size;
+
+  }
+
+  // End compressed file helpers
+
+  // XmlStreamReader CLASS
+
+  namespace{
+
+    /**
+      * A pull parser for XML files. The file is read in blocks, and only the
+      * markup or text currently being parsed is held in memory. The parsing
+      * rules are those of TinyXML with white space condensing disabled, so
+      * that an options tree built from these events matches one built from a
+      * TiXmlDocument.
+      */
+    class XmlStreamReader{
+
+      public:
+
+        enum Event{
+          START_ELEMENT,
+          END_ELEMENT,
+          TEXT,
+          OTHER,
+          END_DOCUMENT,
+          PARSE_ERROR
+        };
+
+        XmlStreamReader(InputFile& file);
+
+        /**
+          * Read the next node from the file. For START_ELEMENT and
+          * END_ELEMENT events name is the element name and, for
+          * START_ELEMENT, attributes are its attributes. For all nodes value
+          * is the value TinyXML would give the corresponding TiXmlNode.
+          * Comments, declarations and unknown markup are returned as OTHER.
+          */
+        Event next();
+
+        /**
+          * Get the largest amount of memory held in the parse buffers so far.
+          */
+        size_t get_peak_buffer_size() const;
+
+        string name;
+        string value;
+        vector< pair<string, string> > attributes;
+
+      private:
+
+        static const size_t block_size = 65536;
+
+        void fill();
+        int peek(const size_t& offset = 0);
+        void skip(const size_t& count);
+        logical_t starts_with(const char* tag, const logical_t& ignore_case = false);
+        void skip_white_space();
+
+        logical_t read_name(string& name);
+        logical_t read_text(const char& end_char, string& text);
+        logical_t read_entity(string& text);
+        logical_t read_until(const char* end_tag, string& text);
+        logical_t read_attribute(string& name, string& value);
+
+        Event read_node(const logical_t& in_element);
+        Event read_declaration(const logical_t& in_element);
+        Event read_element();
+
+        void update_peak_buffer_size();
+
+        static logical_t is_white_space(const int& c);
+        static logical_t is_name_start(const int& c);
+        static logical_t is_name_char(const int& c);
+        static logical_t is_blank(const string& text);
+
+        InputFile& file;
+        vector<char> block;
+        string buffer;
+        size_t pos;
+        logical_t eof, carriage_return, utf8, encoding_known, finished, empty_element;
+        vector<string> open_elements;
+        size_t peak_buffer_size;
+    };
+
+    const size_t XmlStreamReader::block_size;
+
+    XmlStreamReader::XmlStreamReader(InputFile& file) : file(file), block(block_size), pos(0), eof(false), carriage_return(false), utf8(false), encoding_known(false), finished(false), empty_element(false), peak_buffer_size(0){
+      // A byte order mark selects UTF-8
+      if(peek() == 0xef and peek(1) == 0xbb and peek(2) == 0xbf){
+        utf8 = true;
+        encoding_known = true;
+      }
+
+      return;
+    }
+
+    XmlStreamReader::Event XmlStreamReader::next(){
+      if(empty_element){
+        // Close an element of the form <name/>
+        empty_element = false;
+        name = open_elements.back();
+        value = name;
+        open_elements.pop_back();
+        return END_ELEMENT;
+      }else if(finished){
+        return END_DOCUMENT;
+      }
+
+      Event event;
+      if(open_elements.empty()){
+        // Document level - anything other than markup ends the document
+        skip_white_space();
+        if(peek() != '<'){
+          finished = true;
+          return END_DOCUMENT;
+        }
+        event = read_node(false);
+      }else{
+        // Element content. Text consisting only of white space is discarded.
+        if(peek() != '<'){
+          if(!read_text('<', value)){
+            finished = true;
+            return PARSE_ERROR;
+          }
+          update_peak_buffer_size();
+          if(!is_blank(value)){
+            return TEXT;
+          }
+        }
+
+        if(peek(1) == '/'){
+          // The end tag must exactly match the open element
+          const string end_tag = "</" + open_elements.back() + ">";
+          if(!starts_with(end_tag.c_str())){
+            finished = true;
+            return PARSE_ERROR;
+          }
+          skip(end_tag.size());
+          name = open_elements.back();
+          value = name;
+          open_elements.pop_back();
+          return END_ELEMENT;
+        }
+        event = read_node(true);
+      }
+
+      if(event == PARSE_ERROR or event == END_DOCUMENT){
+        finished = true;
+      }
+      update_peak_buffer_size();
+
+      return event;
+    }
+
+    size_t XmlStreamReader::get_peak_buffer_size() const{
+      return peak_buffer_size;
+    }
+
+    void XmlStreamReader::fill(){
+      if(eof){
+        return;
+      }
+
+      // Discard consumed input
+      if(pos > 0){
+        buffer.erase(0, pos);
+        pos = 0;
+      }
+
+      size_t block_len = file.read(&block[0], block_size);
+      if(block_len == 0){
+        eof = true;
+        return;
+      }
+
+      // Input ends at an embedded null character
+      const char* null_char = (const char*)memchr(&block[0], '\0', block_len);
+      if(null_char != NULL){
+        block_len = null_char - &block[0];
+        eof = true;
+      }
+
+      // Normalise line endings to \n, as TiXmlDocument::LoadFile does
+      size_t start = carriage_return and block_len > 0 and block[0] == '\n' ? 1 : 0;
+      carriage_return = false;
+      while(start < block_len){
+        const char* cr = (const char*)memchr(&block[start], '\r', block_len - start);
+        if(cr == NULL){
+          buffer.append(&block[start], block_len - start);
+          break;
+        }
+        size_t i = cr - &block[0];
+        buffer.append(&block[start], i - start);
+        buffer += '\n';
+        if(i + 1 == block_len){
+          carriage_return = true;
+        }
+        start = i + 1 < block_len and block[i + 1] == '\n' ? i + 2 : i + 1;
+      }
+      update_peak_buffer_size();
+
+      return;
+    }
+
+    int XmlStreamReader::peek(const size_t& offset){
+      while(pos + offset >= buffer.size() and !eof){
+        fill();
+      }
+
+      return pos + offset < buffer.size() ? (unsigned char)buffer[pos + offset] : EOF;
+    }
+
+    void XmlStreamReader::skip(const size_t& count){
+      peek(count);
+      pos = min(pos + count, buffer.size());
+
+      return;
+    }
+
+    logical_t XmlStreamReader::starts_with(const char* tag, const logical_t& ignore_case){
+      for(size_t i = 0;tag[i] != '\0';i++){
+        int c = peek(i);
+        if(c == EOF){
+          return false;
+        }else if(ignore_case ? tolower(c) != tolower((unsigned char)tag[i]) : c != (unsigned char)tag[i]){
+          return false;
+        }
+      }
+
+      return true;
+    }
+
+    void XmlStreamReader::skip_white_space(){
+      while(true){
+        // TinyXML treats byte order marks as white space in UTF-8 documents
+        if(utf8 and peek() == 0xef){
+          int c1 = peek(1), c2 = peek(2);
+          if((c1 == 0xbb and c2 == 0xbf) or (c1 == 0xbf and (c2 == 0xbe or c2 == 0xbf))){
+            skip(3);
+            continue;
+          }
+        }
+        if(!is_white_space(peek())){
+          return;
+        }
+        pos++;
+      }
+    }
+
+    logical_t XmlStreamReader::read_name(string& name){
+      name.clear();
+      if(!is_name_start(peek())){
+        return false;
+      }
+      while(is_name_char(peek())){
+        name += buffer[pos++];
+      }
+
+      return true;
+    }
+
+    logical_t XmlStreamReader::read_text(const char& end_char, string& text){
+      text.clear();
+
+      while(true){
+        if(pos >= buffer.size()){
+          if(peek() == EOF){
+            return false;
+          }
+        }
+
+        size_t end = pos;
+        while(end < buffer.size() and buffer[end] != end_char and buffer[end] != '&'){
+          end++;
+        }
+        if(end == buffer.size()){
+          text.append(buffer, pos, string::npos);
+          pos = buffer.size();
+        }else{
+          text.append(buffer, pos, end - pos);
+          pos = end;
+          if(buffer[pos] == end_char){
+            return true;
+          }else if(!read_entity(text)){
+            return false;
+          }
+        }
+      }
+    }
+
+    logical_t XmlStreamReader::read_entity(string& text){
+      if(peek(1) == '#' and peek(2) != EOF){
+        // Character reference
+        const logical_t hex = peek(2) == 'x';
+        size_t i = hex ? 3 : 2;
+        unsigned long ucs = 0;
+        for(int c = peek(i);c != ';';c = peek(++i)){
+          if(c == EOF){
+            return false;
+          }else if(c >= '0' and c <= '9'){
+            ucs = ucs * (hex ? 16 : 10) + (c - '0');
+          }else if(hex and c >= 'a' and c <= 'f'){
+            ucs = ucs * 16 + (c - 'a' + 10);
+          }else if(hex and c >= 'A' and c <= 'F'){
+            ucs = ucs * 16 + (c - 'A' + 10);
+          }else{
+            return false;
+          }
+        }
+        skip(i + 1);
+
+        if(!utf8){
+          text += (char)ucs;
+        }else if(ucs < 0x80){
+          text += (char)ucs;
+        }else if(ucs < 0x800){
+          text += (char)(0xc0 | (ucs >> 6));
+          text += (char)(0x80 | (ucs & 0x3f));
+        }else if(ucs < 0x10000){
+          text += (char)(0xe0 | (ucs >> 12));
+          text += (char)(0x80 | ((ucs >> 6) & 0x3f));
+          text += (char)(0x80 | (ucs & 0x3f));
+        }else if(ucs < 0x200000){
+          text += (char)(0xf0 | (ucs >> 18));
+          text += (char)(0x80 | ((ucs >> 12) & 0x3f));
+          text += (char)(0x80 | ((ucs >> 6) & 0x3f));
+          text += (char)(0x80 | (ucs & 0x3f));
+        }
+
+        return true;
+      }
+
+      static const char* entities[] = {"&amp;", "&lt;", "&gt;", "&quot;", "&apos;"};
+      static const char entity_chars[] = {'&', '<', '>', '"', '\''};
+      for(size_t i = 0;i < 5;i++){
+        if(starts_with(entities[i])){
+          text += entity_chars[i];
+          skip(strlen(entities[i]));
+          return true;
+        }
+      }
+
+      // TinyXML drops the ampersand of an unrecognised entity
+      skip(1);
+
+      return true;
+    }
+
+    logical_t XmlStreamReader::read_until(const char* end_tag, string& text){
+      text.clear();
+
+      const size_t end_len = strlen(end_tag);
+      while(!starts_with(end_tag)){
+        int c = peek();
+        if(c == EOF){
+          return false;
+        }
+        text += (char)c;
+        pos++;
+      }
+      skip(end_len);
+
+      return true;
+    }
+
+    logical_t XmlStreamReader::read_attribute(string& name, string& value){
+      if(!read_name(name)){
+        return false;
+      }
+      skip_white_space();
+      if(peek() != '='){
+        return false;
+      }
+      pos++;
+      skip_white_space();
+
+      int c = peek();
+      if(c == EOF){
+        return false;
+      }else if(c == '\'' or c == '"'){
+        pos++;
+        if(!read_text(c, value)){
+          return false;
+        }
+        pos++;
+      }else{
+        // Unquoted value
+        value.clear();
+        while((c = peek()) != EOF and !is_white_space(c) and c != '/' and c != '>'){
+          if(c == '\'' or c == '"'){
+            return false;
+          }
+          value += (char)c;
+          pos++;
+        }
+      }
+
+      return true;
+    }
+
+    XmlStreamReader::Event XmlStreamReader::read_node(const logical_t& in_element){
+      if(starts_with("<?xml", true)){
+        return read_declaration(in_element);
+      }else if(starts_with("<!--")){
+        skip(4);
+        return read_until("-->", value) ? OTHER : PARSE_ERROR;
+      }else if(starts_with("<![CDATA[")){
+        skip(9);
+        return read_until("]]>", value) ? TEXT : PARSE_ERROR;
+      }else if(is_name_start(peek(1))){
+        return read_element();
+      }
+
+      // Unknown markup, e.g. <!DOCTYPE ...>
+      pos++;
+      value.clear();
+      int c;
+      while((c = peek()) != EOF and c != '>'){
+        value += (char)c;
+        pos++;
+      }
+      if(c == '>'){
+        pos++;
+      }
+
+      return OTHER;
+    }
+
+    XmlStreamReader::Event XmlStreamReader::read_declaration(const logical_t& in_element){
+      skip(5);
+      value.clear();
+
+      // A declaration TinyXML fails to parse silently ends the document
+      const Event error = in_element ? PARSE_ERROR : END_DOCUMENT;
+      string encoding;
+      while(true){
+        int c = peek();
+        if(c == EOF){
+          return error;
+        }else if(c == '>'){
+          pos++;
+          break;
+        }
+
+        skip_white_space();
+        if(starts_with("version", true) or starts_with("standalone", true)){
+          string att_name, att_value;
+          if(!read_attribute(att_name, att_value)){
+            return error;
+          }
+        }else if(starts_with("encoding", true)){
+          string att_name;
+          if(!read_attribute(att_name, encoding)){
+            return error;
+          }
+        }else{
+          while((c = peek()) != EOF and c != '>' and !is_white_space(c)){
+            pos++;
+          }
+        }
+      }
+
+      // The first document level declaration sets the encoding
+      if(!in_element and !encoding_known){
+        const string utf8_names[] = {"utf-8", "utf8"};
+        utf8 = encoding.empty();
+        for(size_t i = 0;i < 2;i++){
+          string prefix = encoding.substr(0, utf8_names[i].size());
+          transform(prefix.begin(), prefix.end(), prefix.begin(), ::tolower);
+          utf8 = utf8 or prefix == utf8_names[i];
+        }
+        encoding_known = true;
+      }
+
+      return OTHER;
+    }
+
+    XmlStreamReader::Event XmlStreamReader::read_element(){
+      pos++;
+      skip_white_space();
+      if(!read_name(name)){
+        return PARSE_ERROR;
+      }
+      value = name;
+
+      attributes.clear();
+      while(true){
+        skip_white_space();
+        int c = peek();
+        if(c == EOF){
+          return PARSE_ERROR;
+        }else if(c == '/'){
+          pos++;
+          if(peek() != '>'){
+            return PARSE_ERROR;
+          }
+          pos++;
+          open_elements.push_back(name);
+          empty_element = true;
+          return START_ELEMENT;
+        }else if(c == '>'){
+          pos++;
+          open_elements.push_back(name);
+          return START_ELEMENT;
+        }
+
+        pair<string, string> attribute;
+        if(!read_attribute(attribute.first, attribute.second) or peek() == EOF){
+          return PARSE_ERROR;
+        }
+        // TinyXML rejects repeated attributes
+        for(vector< pair<string, string> >::const_iterator iter = attributes.begin();iter != attributes.end();iter++){
+          if(iter->first == attribute.first){
+            return PARSE_ERROR;
+          }
+        }
+        attributes.push_back(attribute);
+      }
+    }
+
+    void XmlStreamReader::update_peak_buffer_size(){
+      size_t buffer_size = block.capacity() + buffer.capacity() + name.capacity() + value.capacity();
+      for(vector< pair<string, string> >::const_iterator iter = attributes.begin();iter != attributes.end();iter++){
+        buffer_size += iter->first.capacity() + iter->second.capacity();
+      }
+      for(vector<string>::const_iterator iter = open_elements.begin();iter != open_elements.end();iter++){
+        buffer_size += iter->capacity();
+      }
+      peak_buffer_size = max(peak_buffer_size, buffer_size);
+
+      return;
+    }
+
+    logical_t XmlStreamReader::is_white_space(const int& c){
+      return c != EOF and (isspace(c) or c == '\n' or c == '\r');
+    }
+
+    logical_t XmlStreamReader::is_name_start(const int& c){
+      // As in TinyXML, any non-ASCII byte is treated as a letter
+      return c != EOF and (c >= 127 or isalpha(c) or c == '_');
+    }
+
+    logical_t XmlStreamReader::is_name_char(const int& c){
+      return c != EOF and (c >= 127 or isalnum(c) or c == '_' or c == '-' or c == '.' or c == ':');
+    }
+
+    logical_t XmlStreamReader::is_blank(const string& text){
+      for(string::const_iterator iter = text.begin();iter != text.end();iter++){
+        if(!is_white_space((unsigned char)*iter)){
+          return false;
+        }
+      }
+
+      return true;
+    }
+
+  }
+
+  // End XmlStreamReader CLASS
+
+  // Binary sidecar helpers
+
+  namespace{
+
+    // Large arrays may be stored in a binary file alongside the options file,
+    // named by the file attribute of their data element rather than held as
+    // text. The file is either in the numpy .npy format, with the values in
+    // C order, or holds only the raw values, in native byte order.
+    const char npy_magic[6] = {'\x93', 'N', 'U', 'M', 'P', 'Y'};
+
+    /**
+      * The layout of the values in a sidecar file. kind is the numpy type
+      * character of the values ('f' or 'i'), and dims the shape from the .npy
+      * header, which is empty for a raw file.
+      */
+    struct SidecarLayout{
+      logical_t npy;
+      size_t offset;
+      char kind;
+      size_t value_size;
+      size_t count;
+      vector<size_t> dims;
+    };
+
+    logical_t little_endian(){
+      const uint16_t value = 1;
+      char first;
+      memcpy(&first, &value, 1);
+
+      return first == 1;
+    }
+
+    /**
+      * Find the value of the supplied key in the header dictionary of a .npy
+      * file, without any enclosing quotes or parentheses. Returns false if
+      * the key is not found.
+      */
+    logical_t npy_header_value(const string& header, const string& key, string& value){
+      size_t pos = header.find("'" + key + "'");
+      if(pos == string::npos){
+        return false;
+      }
+      pos = header.find(':', pos + key.size() + 2);
+      if(pos == string::npos){
+        return false;
+      }
+      pos = header.find_first_not_of(" ", pos + 1);
+      if(pos == string::npos){
+        return false;
+      }
+
+      size_t end;
+      if(header[pos] == '\'' or header[pos] == '"'){
+        end = header.find(header[pos], pos + 1);
+        pos++;
+      }else if(header[pos] == '('){
+        end = header.find(')', pos);
+        pos++;
+      }else{
+        end = header.find_first_of(",}", pos);
+      }
+      if(end == string::npos){
+        return false;
+      }
+      value = header.substr(pos, end - pos);
+
+      return true;
+    }
+
+    /**
+      * Read the layout of the sidecar file with the supplied filename, which
+      * holds values to be read as the supplied type. Returns false if the file
+      * cannot be read, or its values cannot be converted to that type.
+      */
+    logical_t read_sidecar_layout(const string& filename, const OptionType& type, SidecarLayout& layout){
+      int file = ::open(filename.c_str(), O_RDONLY);
+      if(file < 0){
+        return false;
+      }
+      struct stat file_stat;
+      memset(&file_stat, 0, sizeof(file_stat));
+      char prefix[12];
+      ssize_t prefix_size = -1;
+      if(fstat(file, &file_stat) == 0){
+        prefix_size = pread(file, prefix, sizeof(prefix), 0);
+      }
+      const size_t file_size = file_stat.st_size;
+
+      layout.npy = prefix_size >= 10 and memcmp(prefix, npy_magic, sizeof(npy_magic)) == 0;
+      layout.kind = type == SPUD_DOUBLE ? 'f' : 'i';
+      layout.value_size = type == SPUD_DOUBLE ? sizeof(double) : sizeof(int);
+      layout.dims.clear();
+      if(!layout.npy){
+        ::close(file);
+        layout.offset = 0;
+        layout.count = file_size / layout.value_size;
+        return prefix_size >= 0 and file_size % layout.value_size == 0;
+      }
+
+      // The header is a Python dictionary literal, following its little
+      // endian length
+      size_t header_size;
+      if(prefix[6] == 1){
+        header_size = (unsigned char)prefix[8] | (size_t)(unsigned char)prefix[9] << 8;
+        layout.offset = 10;
+      }else if((prefix[6] == 2 or prefix[6] == 3) and prefix_size == 12){
+        header_size = 0;
+        for(int i = 11;i >= 8;i--){
+          header_size = header_size << 8 | (unsigned char)prefix[i];
+        }
+        layout.offset = 12;
+      }else{
+        ::close(file);
+        return false;
+      }
+      string header(header_size, '\0');
+      logical_t read_ok = header_size > 0 and layout.offset + header_size <= file_size
+        and pread(file, &header[0], header_size, layout.offset) == (ssize_t)header_size;
+      ::close(file);
+      layout.offset += header_size;
+
+      string descr, fortran_order, shape;
+      if(!read_ok
+        or !npy_header_value(header, "descr", descr)
+        or !npy_header_value(header, "fortran_order", fortran_order)
+        or !npy_header_value(header, "shape", shape)
+        or fortran_order != "False"
+        or descr.size() < 3){
+        return false;
+      }
+
+      // Reals may be read from 4 or 8 byte floats, and integers from 4 or 8
+      // byte integers, in native byte order
+      const char byte_order = descr[0];
+      if(!(byte_order == '=' or byte_order == '|' or byte_order == (little_endian() ? '<' : '>'))){
+        return false;
+      }
+      layout.kind = descr[1];
+      layout.value_size = atoi(descr.c_str() + 2);
+      if(layout.kind != (type == SPUD_DOUBLE ? 'f' : 'i') or (layout.value_size != 4 and layout.value_size != 8)){
+        return false;
+      }
+
+      istringstream shape_stream(shape);
+      layout.count = 1;
+      size_t dim;
+      while(shape_stream >> dim){
+        layout.dims.push_back(dim);
+        layout.count *= dim;
+        char separator;
+        shape_stream >> separator;
+      }
+
+      return layout.offset + layout.count * layout.value_size <= file_size;
+    }
+
+    /**
+      * Read count values of the supplied type from the sidecar file with the
+      * supplied filename into data. The file is mapped rather than read, and
+      * the values copied from the mapping. Returns false if the file cannot be
+      * read, does not hold count values, or holds integers too large for an
+      * int.
+      */
+    logical_t read_sidecar(const string& filename, const OptionType& type, const size_t& count, void* data){
+      SidecarLayout layout;
+      if(!read_sidecar_layout(filename, type, layout) or layout.count != count){
+        return false;
+      }
+
+      int file = ::open(filename.c_str(), O_RDONLY);
+      if(file < 0){
+        return false;
+      }
+      const size_t map_size = layout.offset + count * layout.value_size;
+      void* mapped = mmap(NULL, map_size, PROT_READ, MAP_PRIVATE, file, 0);
+      ::close(file);
+      if(mapped == MAP_FAILED){
+        return false;
+      }
+
+      const char* values = (const char*)mapped + layout.offset;
+      logical_t read_ok = true;
+      if(type == SPUD_DOUBLE and layout.value_size == sizeof(float)){
+        for(size_t i = 0;i < count;i++){
+          float value;
+          memcpy(&value, values + i * sizeof(float), sizeof(float));
+          ((double*)data)[i] = value;
+        }
+      }else if(type == SPUD_INT and layout.value_size == sizeof(int64_t)){
+        for(size_t i = 0;i < count and read_ok;i++){
+          int64_t value;
+          memcpy(&value, values + i * sizeof(int64_t), sizeof(int64_t));
+          read_ok = value >= numeric_limits<int>::min() and value <= numeric_limits<int>::max();
+          ((int*)data)[i] = (int)value;
+        }
+      }else{
+        memcpy(data, values, count * layout.value_size);
+      }
+      munmap(mapped, map_size);
+
+      return read_ok;
+    }
+
+    /**
+      * The header of a version 1.0 .npy file holding values of the supplied
+      * numpy type, of the supplied rank and shape, padded so that the values
+      * are aligned.
+      */
+    string npy_header(const char* descr, const int& rank, const int* shape){
+      ostringstream dictionary;
+      dictionary << "{'descr': '" << (little_endian() ? '<' : '>') << descr << "', 'fortran_order': False, 'shape': (";
+      for(int i = 0;i < rank;i++){
+        dictionary << shape[i] << (rank == 1 ? "," : (i + 1 < rank ? ", " : ""));
+      }
+      dictionary << "), }";
+
+      string header(npy_magic, sizeof(npy_magic));
+      header += '\x01';
+      header += '\x00';
+      string text = dictionary.str();
+      const size_t header_size = text.size() + 1 + (64 - (10 + text.size() + 1) % 64) % 64;
+      text.resize(header_size - 1, ' ');
+      text += '\n';
+      header += (char)(header_size & 0xff);
+      header += (char)(header_size >> 8);
+
+      return header + text;
+    }
+
+  }
+
+  // End binary sidecar helpers
+
+  // XmlWriter CLASS
+
+  // Options are streamed to the file through a fixed size buffer as the tree
+  // is walked, escaped and laid out as TinyXML prints a document, so writing
+  // the options holds no more than the buffer and the text of one attribute
+  class OptionManager::XmlWriter{
+
+    public:
+
+      XmlWriter() : buffer(buffer_size), used(0), fd(-1), compression(NO_COMPRESSION), failed(false), sidecar_threshold(0), sidecar_count(0){
+#ifdef HAVE_LIBZ
+        gz_file = NULL;
+#endif
+#ifdef HAVE_LIBZSTD
+        zstd_stream = NULL;
+#endif
+        decimal_point = localeconv()->decimal_point;
+      }
+
+      ~XmlWriter(){
+        close();
+      }
+
+      /**
+        * Open the file with the supplied filename for writing, compressed
+        * according to its name. Returns false if the file cannot be opened,
+        * or if spud was built without the library for the compression.
+        */
+      logical_t open(const string& filename){
+        compression = filename_compression(filename);
+        logical_t have_library = true;
+        switch(compression){
+          case(GZIP_COMPRESSION):
+#ifndef HAVE_LIBZ
+            have_library = false;
+#endif
+            break;
+          case(BZIP2_COMPRESSION):
+#ifndef HAVE_LIBBZ2
+            have_library = false;
+#endif
+            break;
+          case(ZSTD_COMPRESSION):
+#ifndef HAVE_LIBZSTD
+            have_library = false;
+#endif
+            break;
+          default:
+            break;
+        }
+        if(!have_library){
+          compression = NO_COMPRESSION;
+          return false;
+        }
+
+        fd = ::open(filename.c_str(), O_WRONLY | O_CREAT | O_TRUNC, 0666);
+        if(fd < 0){
+          compression = NO_COMPRESSION;
+          return false;
+        }
+        logical_t open_ok = true;
+        switch(compression){
+#ifdef HAVE_LIBZ
+          case(GZIP_COMPRESSION):
+            // The fastest compression level, as for the other formats
+            gz_file = gzdopen(fd, "wb1");
+            open_ok = gz_file != NULL;
+            break;
+#endif
+#ifdef HAVE_LIBBZ2
+          case(BZIP2_COMPRESSION):
+            memset(&bz2_stream, 0, sizeof(bz2_stream));
+            open_ok = BZ2_bzCompressInit(&bz2_stream, 9, 0, 0) == BZ_OK;
+            break;
+#endif
+#ifdef HAVE_LIBZSTD
+          case(ZSTD_COMPRESSION):
+            zstd_stream = ZSTD_createCStream();
+            open_ok = zstd_stream != NULL and !ZSTD_isError(ZSTD_initCStream(zstd_stream, 1));
+            break;
+#endif
+          default:
+            break;
+        }
+        if(!open_ok){
+#ifdef HAVE_LIBZSTD
+          ZSTD_freeCStream(zstd_stream);
+          zstd_stream = NULL;
+#endif
+          ::close(fd);
+          fd = -1;
+          compression = NO_COMPRESSION;
+          return false;
+        }
+        if(compression == BZIP2_COMPRESSION or compression == ZSTD_COMPRESSION){
+          compressed.resize(buffer_size);
+        }
+
+        return true;
+      }
+
+      /**
+        * Flush the buffer and close the file. Returns false if any write
+        * failed.
+        */
+      logical_t close(){
+        if(fd < 0){
+          return not failed;
+        }
+        flush();
+        finish();
+#ifdef HAVE_LIBZ
+        if(gz_file != NULL){
+          if(gzclose(gz_file) != Z_OK){
+            failed = true;
+          }
+          gz_file = NULL;
+          fd = -1;
+        }
+#endif
+        if(fd >= 0){
+          if(::close(fd) != 0){
+            failed = true;
+          }
+          fd = -1;
+        }
+
+        return not failed;
+      }
+
+      /**
+        * Write arrays of at least threshold values to binary sidecar files
+        * alongside the file with the supplied filename, rather than as text.
+        * A threshold of zero writes all arrays as text.
+        */
+      void set_sidecars(const string& filename, const size_t& threshold){
+        sidecar_filename = filename;
+        sidecar_threshold = threshold;
+      }
+
+      /**
+        * Write the size values of the supplied type at data, of the supplied
+        * rank and shape, to a new .npy sidecar file if there are at least the
+        * threshold number of them. Returns the name of the file relative to
+        * the file being written, or an empty string if the values are to be
+        * written as text.
+        */
+      string write_sidecar(const OptionType& type, const void* data, const size_t& size, const int& rank, const int* shape){
+        if(sidecar_threshold == 0 or size < sidecar_threshold or rank < 1 or failed){
+          return "";
+        }
+
+        ostringstream name;
+        name << sidecar_filename << "." << sidecar_count++ << ".npy";
+        const string filename = name.str();
+        const string header = npy_header(type == SPUD_DOUBLE ? "f8" : "i4", rank, shape);
+        const size_t data_size = size * (type == SPUD_DOUBLE ? sizeof(double) : sizeof(int));
+        FILE* file = fopen(filename.c_str(), "wb");
+        if(file == NULL){
+          failed = true;
+          return "";
+        }
+        logical_t write_ok = fwrite(header.data(), 1, header.size(), file) == header.size()
+          and fwrite(data, 1, data_size, file) == data_size;
+        if(fclose(file) != 0 or !write_ok){
+          failed = true;
+        }
+
+        const size_t directory_end = filename.find_last_of('/');
+        return directory_end == string::npos ? filename : filename.substr(directory_end + 1);
+      }
+
+      void write(const char* data, size_t size){
+        while(size > 0){
+          if(used == buffer_size){
+            flush();
+          }
+          size_t count = min(size, buffer_size - used);
+          memcpy(&buffer[used], data, count);
+          used += count;
+          data += count;
+          size -= count;
+        }
+      }
+
+      void write(const char* data){
+        write(data, strlen(data));
+      }
+
+      void write(const string& data){
+        write(data.data(), data.size());
+      }
+
+      void write_indent(const unsigned int& depth){
+        for(unsigned int i = 0;i < depth;i++){
+          write("    ", 4);
+        }
+      }
+
+      /**
+        * Write data escaped as TiXmlBase::EncodeString does. Runs of
+        * characters needing no escape are copied in one step.
+        */
+      void write_encoded(const char* data, const size_t& size){
+        size_t start = 0, i = 0;
+        while(i < size){
+          unsigned char c = data[i];
+          const char* entity = NULL;
+          char reference[8];
+          if(c == '&' and i + 2 < size and data[i + 1] == '#' and data[i + 2] == 'x'){
+            // Hexadecimal character references pass through unchanged, up to
+            // the closing ';' or the last character
+            i++;
+            while(i < size - 1 and data[i] != ';'){
+              i++;
+            }
+            continue;
+          }else if(c == '&'){
+            entity = "&amp;";
+          }else if(c == '<'){
+            entity = "&lt;";
+          }else if(c == '>'){
+            entity = "&gt;";
+          }else if(c == '"'){
+            entity = "&quot;";
+          }else if(c == '\''){
+            entity = "&apos;";
+          }else if(c < 32){
+            snprintf(reference, sizeof(reference), "&#x%02X;", (unsigned)c);
+            entity = reference;
+          }
+          if(entity != NULL){
+            write(data + start, i - start);
+            write(entity);
+            start = i + 1;
+          }
+          i++;
+        }
+        write(data + start, size - start);
+      }
+
+      void write_encoded(const string& data){
+        write_encoded(data.data(), data.size());
+      }
+
+      /**
+        * Write a real value with the fewest significant digits, from the
+        * precision of a stream (15) up to 17, that read back exactly. Values
+        * written exactly by a stream are therefore written identically. The
+        * decimal point is always ".", whatever the locale.
+        */
+      void write_value(const double& value){
+        char text[32];
+        if(value != value or value - value != 0.0){
+          // nan and inf, formatted as a stream does
+          write(text, snprintf(text, sizeof(text), "%g", value));
+          return;
+        }
+
+        char digits[max_digits];
+        logical_t negative;
+        int exponent;
+#ifdef __cpp_lib_to_chars
+        if(value == 0.0 or fabs(value) >= numeric_limits< double >::min()){
+          // The shortest digits that read back exactly, padded to the
+          // precision of a stream, as rounding a normal value to that
+          // precision gives the same digits
+          char shortest[32];
+          *to_chars(shortest, shortest + sizeof(shortest) - 1, value, chars_format::scientific).ptr = '\0';
+          int count = split_scientific(shortest, negative, digits, exponent);
+          int precision = max(count, numeric_limits< double >::digits10);
+          memset(digits + count, '0', precision - count);
+          write(text, layout_general(negative, digits, precision, exponent, text));
+          return;
+        }
+#endif
+
+        // The value to 17 significant digits, which always read back exactly,
+        // from which the shorter forms are rounded. This saves formatting the
+        // value at each precision in turn.
+        char exact[32];
+        snprintf(exact, sizeof(exact), "%.16e", value);
+        split_scientific(exact, negative, digits, exponent);
+
+        for(int precision = numeric_limits< double >::digits10;precision < max_digits;precision++){
+          char rounded[max_digits];
+          int rounded_exponent = exponent;
+          if(!round_digits(digits, precision, rounded, rounded_exponent)){
+            // The 17 digit form lies on a rounding boundary, so the shorter
+            // form cannot be rounded from it
+            snprintf(text, sizeof(text), "%.*g", precision, value);
+            if(strtod(text, NULL) == value){
+              write(text, replace_decimal_point(text));
+              return;
+            }
+            continue;
+          }
+
+          // Check the rounded digits read back exactly, written without a
+          // decimal point so that the check does not depend on the locale
+          char candidate[40];
+          char* end = candidate;
+          if(negative){
+            *end++ = '-';
+          }
+          memcpy(end, rounded, precision);
+          end += precision;
+          *end++ = 'e';
+          end += snprintf(end, candidate + sizeof(candidate) - end, "%d", rounded_exponent - precision + 1);
+          if(strtod(candidate, NULL) == value){
+            write(text, layout_general(negative, rounded, precision, rounded_exponent, text));
+            return;
+          }
+        }
+        write(text, layout_general(negative, digits, max_digits, exponent, text));
+      }
+
+      void write_value(const int& value){
+        char text[16];
+        write(text, snprintf(text, sizeof(text), "%d", value));
+      }
+
+    private:
+
+      static const size_t buffer_size = 65536;
+
+      // The significant digits needed for any double to read back exactly
+      static const int max_digits = 17;
+
+      /**
+        * Replace the decimal point of the locale in a value formatted by
+        * printf with ".", and return the length of the text.
+        */
+      size_t replace_decimal_point(char* text) const{
+        if(strcmp(decimal_point, ".") != 0){
+          char* point = strstr(text, decimal_point);
+          if(point != NULL){
+            *point = '.';
+            memmove(point + 1, point + strlen(decimal_point), strlen(point + strlen(decimal_point)) + 1);
+          }
+        }
+
+        return strlen(text);
+      }
+
+      /**
+        * Split a value written in scientific notation into its sign, its
+        * significant digits and its decimal exponent, and return the number
+        * of digits.
+        */
+      static int split_scientific(const char* text, logical_t& negative, char* digits, int& exponent){
+        negative = text[0] == '-';
+        int count = 0;
+        const char* pos = text;
+        for(;*pos != 'e' and *pos != '\0';pos++){
+          if(isdigit((unsigned char)*pos) and count < max_digits){
+            digits[count++] = *pos;
+          }
+        }
+        exponent = *pos == 'e' ? atoi(pos + 1) : 0;
+
+        return count;
+      }
+
+      /**
+        * Round the max_digits significant digits of a value to precision
+        * digits, adjusting exponent if the rounding carries into a new
+        * digit. Returns false if the digits dropped are exactly half a unit in
+        * the last place kept, as the digits given are themselves rounded and
+        * the direction of rounding is then unknown.
+        */
+      static logical_t round_digits(const char* digits, const int& precision, char* rounded, int& exponent){
+        memcpy(rounded, digits, precision);
+        int compare = digits[precision] - '5';
+        for(int i = precision + 1;compare == 0 and i < max_digits;i++){
+          compare = digits[i] - '0';
+        }
+        if(compare == 0){
+          return false;
+        }else if(compare > 0){
+          int i = precision - 1;
+          while(i >= 0 and rounded[i] == '9'){
+            rounded[i--] = '0';
+          }
+          if(i >= 0){
+            rounded[i]++;
+          }else{
+            rounded[0] = '1';
+            exponent++;
+          }
+        }
+
+        return true;
+      }
+
+      /**
+        * Lay out the precision significant digits of a value with the
+        * supplied decimal exponent as printf does with "%.<precision>g", and
+        * return the length of the text.
+        */
+      static size_t layout_general(const logical_t& negative, const char* digits, const int& precision, const int& exponent, char* text){
+        // Trailing zeros are dropped
+        int count = precision;
+        while(count > 1 and digits[count - 1] == '0'){
+          count--;
+        }
+
+        char* pos = text;
+        if(negative){
+          *pos++ = '-';
+        }
+        if(exponent < -4 or exponent >= precision){
+          *pos++ = digits[0];
+          if(count > 1){
+            *pos++ = '.';
+            memcpy(pos, digits + 1, count - 1);
+            pos += count - 1;
+          }
+          pos += sprintf(pos, "e%c%02d", exponent < 0 ? '-' : '+', abs(exponent));
+        }else if(exponent >= 0){
+          for(int i = 0;i <= exponent;i++){
+            *pos++ = i < count ? digits[i] : '0';
+          }
+          if(count > exponent + 1){
+            *pos++ = '.';
+            memcpy(pos, digits + exponent + 1, count - exponent - 1);
+            pos += count - exponent - 1;
+          }
+        }else{
+          *pos++ = '0';
+          *pos++ = '.';
+          for(int i = 0;i < -exponent - 1;i++){
+            *pos++ = '0';
+          }
+          memcpy(pos, digits, count);
+          pos += count;
+        }
+        *pos = '\0';
+
+        return pos - text;
+      }
+
+      void flush(){
+        const char* pos = &buffer[0];
+        size_t remaining = used;
+        used = 0;
+        if(failed){
+          return;
+        }
+        switch(compression){
+#ifdef HAVE_LIBZ
+          case(GZIP_COMPRESSION):
+            if(remaining > 0 and gzwrite(gz_file, pos, (unsigned)remaining) != (int)remaining){
+              failed = true;
+            }
+            break;
+#endif
+#ifdef HAVE_LIBBZ2
+          case(BZIP2_COMPRESSION):
+            bz2_stream.next_in = (char*)pos;
+            bz2_stream.avail_in = (unsigned int)remaining;
+            while(bz2_stream.avail_in > 0 and !failed){
+              bz2_stream.next_out = &compressed[0];
+              bz2_stream.avail_out = (unsigned int)compressed.size();
+              failed = BZ2_bzCompress(&bz2_stream, BZ_RUN) != BZ_RUN_OK;
+              write_file(&compressed[0], compressed.size() - bz2_stream.avail_out);
+            }
+            break;
+#endif
+#ifdef HAVE_LIBZSTD
+          case(ZSTD_COMPRESSION):{
+            ZSTD_inBuffer in = {pos, remaining, 0};
+            while(in.pos < in.size and !failed){
+              ZSTD_outBuffer out = {&compressed[0], compressed.size(), 0};
+              failed = ZSTD_isError(ZSTD_compressStream(zstd_stream, &out, &in));
+              write_file(&compressed[0], out.pos);
+            }
+            break;
+          }
+#endif
+          default:
+            write_file(pos, remaining);
+            break;
+        }
+      }
+
+      /**
+        * Write the end of a bzip2 or zstd compressed stream, and free the
+        * compressor. gzip streams are ended by gzclose.
+        */
+      void finish(){
+        switch(compression){
+#ifdef HAVE_LIBBZ2
+          case(BZIP2_COMPRESSION):{
+            int compress_err = BZ_FINISH_OK;
+            bz2_stream.avail_in = 0;
+            while(compress_err == BZ_FINISH_OK and !failed){
+              bz2_stream.next_out = &compressed[0];
+              bz2_stream.avail_out = (unsigned int)compressed.size();
+              compress_err = BZ2_bzCompress(&bz2_stream, BZ_FINISH);
+              failed = compress_err != BZ_FINISH_OK and compress_err != BZ_STREAM_END;
+              write_file(&compressed[0], compressed.size() - bz2_stream.avail_out);
+            }
+            BZ2_bzCompressEnd(&bz2_stream);
+            compression = NO_COMPRESSION;
+            break;
+          }
+#endif
+#ifdef HAVE_LIBZSTD
+          case(ZSTD_COMPRESSION):{
+            // The number of bytes still to be written, or an error code
+            size_t pending = 1;
+            while(pending > 0 and !failed){
+              ZSTD_outBuffer out = {&compressed[0], compressed.size(), 0};
+              pending = ZSTD_endStream(zstd_stream, &out);
+              failed = ZSTD_isError(pending);
+              write_file(&compressed[0], out.pos);
+            }
+            ZSTD_freeCStream(zstd_stream);
+            zstd_stream = NULL;
+            compression = NO_COMPRESSION;
+            break;
+          }
+#endif
+          default:
+            break;
+        }
+      }
+
+      /**
+        * Write size bytes of data directly to the file.
+        */
+      void write_file(const char* pos, size_t remaining){
+        if(failed){
+          return;
+        }
+        while(remaining > 0){
+          ssize_t count = ::write(fd, pos, remaining);
+          if(count < 0){
+            if(errno == EINTR){
+              continue;
+            }
+            failed = true;
+            return;
+          }
+          pos += count;
+          remaining -= count;
+        }
+      }
+
+      vector<char> buffer;
+      size_t used;
+      int fd;
+      Compression compression;
+#ifdef HAVE_LIBZ
+      gzFile gz_file;
+#endif
+#ifdef HAVE_LIBBZ2
+      bz_stream bz2_stream;
+#endif
+#ifdef HAVE_LIBZSTD
+      ZSTD_CStream* zstd_stream;
+#endif
+      // Output of the bzip2 and zstd compressors
+      vector<char> compressed;
+      logical_t failed;
+      const char* decimal_point;
+      string sidecar_filename;
+      size_t sidecar_threshold, sidecar_count;
+
+  };
+
+  const size_t OptionManager::XmlWriter::buffer_size;
+  const int OptionManager::XmlWriter::max_digits;
+
+  // End XmlWriter CLASS
+
+  // Numeric parsing helpers
+
+  namespace{
+
+    /**
+      * Parse a decimal integer starting at pos, as strtol(pos, NULL, 10) does
+      * for input with no leading white space, clamping the result to the range
+      * of an int. Returns the end of the parsed characters.
+      */
+    const char* parse_int(const char* pos, const char* end, int& value){
+      logical_t negative = false;
+      if(pos < end and (*pos == '-' or *pos == '+')){
+        negative = *pos == '-';
+        pos++;
+      }
+
+      const long long limit = negative ? -(long long)numeric_limits<int>::min() : numeric_limits<int>::max();
+      long long magnitude = 0;
+      for(;pos < end and *pos >= '0' and *pos <= '9';pos++){
+        magnitude = min(magnitude * 10 + (*pos - '0'), limit);
+      }
+      value = (int)(negative ? -magnitude : magnitude);
+
+      return pos;
+    }
+
+    /**
+      * Parse a decimal number starting at pos, and ending at white space or at
+      * end, without calling strtod. Only numbers that can be converted exactly
+      * with a single multiplication or division (a mantissa of at most 2^53
+      * and a power of ten of at most 10^22) are handled, so that the result is
+      * correctly rounded. Returns false if the number is not handled, in which
+      * case value is undefined.
+      */
+    logical_t parse_double(const char* pos, const char* end, double& value){
+      static const double powers_of_ten[] = {1e0, 1e1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11,
+                                             1e12, 1e13, 1e14, 1e15, 1e16, 1e17, 1e18, 1e19, 1e20, 1e21, 1e22};
+
+      logical_t negative = false;
+      if(pos < end and (*pos == '-' or *pos == '+')){
+        negative = *pos == '-';
+        pos++;
+      }
+
+      unsigned long long mantissa = 0;
+      int significant_digits = 0, exponent = 0;
+      logical_t have_digits = false;
+      for(logical_t fraction = false;pos < end;pos++){
+        if(*pos >= '0' and *pos <= '9'){
+          if(mantissa > 0 or *pos != '0'){
+            if(++significant_digits > 19){
+              return false;
+            }
+            mantissa = mantissa * 10 + (*pos - '0');
+          }
+          if(fraction){
+            exponent--;
+          }
+          have_digits = true;
+        }else if(*pos == '.' and !fraction){
+          fraction = true;
+        }else{
+          break;
+        }
+      }
+      if(!have_digits){
+        return false;
+      }
+
+      if(pos < end and (*pos == 'e' or *pos == 'E')){
+        pos++;
+        logical_t negative_exponent = false;
+        if(pos < end and (*pos == '-' or *pos == '+')){
+          negative_exponent = *pos == '-';
+          pos++;
+        }
+        if(pos == end or *pos < '0' or *pos > '9'){
+          return false;
+        }
+        int exponent_value = 0;
+        for(;pos < end and *pos >= '0' and *pos <= '9';pos++){
+          exponent_value = min(exponent_value * 10 + (*pos - '0'), 10000);
+        }
+        exponent += negative_exponent ? -exponent_value : exponent_value;
+      }
+
+      if(pos < end and !isspace((unsigned char)*pos)){
+        return false;
+      }
+
+      if(mantissa == 0){
+        value = negative ? -0.0 : 0.0;
+        return true;
+      }else if(mantissa > (1ULL << 53) or exponent < -22 or exponent > 22){
+        return false;
+      }
+
+      value = exponent < 0 ? mantissa / powers_of_ten[-exponent] : mantissa * powers_of_ten[exponent];
+      if(negative){
+        value = -value;
+      }
+
+      return true;
+    }
+
+    /**
+      * Convert a token which parse_double does not handle, as the string
+      * streams used before did. Only "nan", "inf" and "-inf", in any case, are
+      * special values. Otherwise the longest prefix made of a sign, decimal
+      * digits, a decimal point and an exponent is converted, so hexadecimal
+      * numbers and the other extensions of strtod are not read, and a prefix
+      * which is not a complete number is read as 0. Values too large for a
+      * double are clamped to the largest double.
+      */
+    double parse_double_token(const char* pos, const char* end, const logical_t& c_locale){
+      string token(pos, end);
+      string lower(token);
+      transform(lower.begin(), lower.end(), lower.begin(), ::tolower);
+      if(lower == "nan"){
+        return numeric_limits<double>::quiet_NaN();
+      }else if(lower == "inf"){
+        return numeric_limits<double>::infinity();
+      }else if(lower == "-inf"){
+        return -numeric_limits<double>::infinity();
+      }
+
+      size_t i = 0, digits = 0;
+      if(i < token.size() and (token[i] == '-' or token[i] == '+')){
+        i++;
+      }
+      for(;i < token.size() and token[i] >= '0' and token[i] <= '9';i++){
+        digits++;
+      }
+      if(i < token.size() and token[i] == '.'){
+        for(i++;i < token.size() and token[i] >= '0' and token[i] <= '9';i++){
+          digits++;
+        }
+      }
+      if(digits == 0){
+        return 0.0;
+      }
+      if(i < token.size() and (token[i] == 'e' or token[i] == 'E')){
+        i++;
+        if(i < token.size() and (token[i] == '-' or token[i] == '+')){
+          i++;
+        }
+        size_t exponent_digits = 0;
+        for(;i < token.size() and token[i] >= '0' and token[i] <= '9';i++){
+          exponent_digits++;
+        }
+        if(exponent_digits == 0){
+          return 0.0;
+        }
+      }
+      token.resize(i);
+
+      // strtod is locale dependent, so a stream in the classic locale is used
+      // if the decimal point is not "."
+      double value;
+      if(c_locale){
+        value = strtod(token.c_str(), NULL);
+      }else{
+        istringstream stream(token);
+        stream.imbue(locale::classic());
+        stream >> value;
+      }
+      if(value == numeric_limits<double>::infinity()){
+        value = numeric_limits<double>::max();
+      }else if(value == -numeric_limits<double>::infinity()){
+        value = -numeric_limits<double>::max();
+      }
+
+      return value;
+    }
+
+  }
+
+  // End numeric parsing helpers
+
+  // Binary snapshot helpers
+
+  namespace{
+
+    // A snapshot consists of a header, followed by a table of the distinct
+    // element names and child keys, followed by the elements in document
+    // order. Each element stores the index of its name, its attribute flag,
+    // its rank and shape, its data and its children's keys and elements. All
+    // values are stored in the byte order of the machine which wrote the
+    // snapshot, and the byte order marker rejects snapshots from other
+    // machines.
+    const char snapshot_magic[8] = {'S', 'P', 'U', 'D', 'S', 'N', 'A', 'P'};
+    // A buffer written by write_options_buffer has the same layout, with its
+    // own magic and no source file
+    const char buffer_magic[8] = {'S', 'P', 'U', 'D', 'B', 'U', 'F', 'F'};
+    const uint32_t snapshot_version = 1;
+    const uint32_t snapshot_byte_order = 0x01020304;
+
+    struct SnapshotHeader{
+      char magic[8];
+      uint32_t version;
+      uint32_t byte_order;
+      // Checksum and size of the XML file the snapshot was written from
+      uint64_t source_checksum;
+      uint64_t source_size;
+      // Checksum of everything following the header
+      uint64_t body_checksum;
+    };
+
+    /**
+      * The name of the binary snapshot of the XML file with the supplied
+      * filename.
+      */
+    string snapshot_filename(const string& filename){
+      return filename + ".snapshot";
+    }
+
+    /**
+      * Continue a 64-bit FNV-1a hash over size bytes of data. The data is
+      * hashed eight bytes at a time, with any remaining bytes hashed one at a
+      * time.
+      */
+    uint64_t checksum(uint64_t hash, const char* data, size_t size){
+      const uint64_t prime = 1099511628211ULL;
+      size_t i = 0;
+      for(;i + sizeof(uint64_t) <= size;i += sizeof(uint64_t)){
+        uint64_t word;
+        memcpy(&word, data + i, sizeof(uint64_t));
+        hash = (hash ^ word) * prime;
+      }
+      for(;i < size;i++){
+        hash = (hash ^ (unsigned char)data[i]) * prime;
+      }
+
+      return hash;
+    }
+
+    const uint64_t checksum_basis = 14695981039346656037ULL;
+
+    /**
+      * Compute the checksum and size of the file with the supplied filename.
+      * Returns false if the file cannot be read.
+      */
+    logical_t file_checksum(const string& filename, uint64_t& hash, uint64_t& size){
+      FILE* file = fopen(filename.c_str(), "rb");
+      if(file == NULL){
+        return false;
+      }
+
+      // The block size is a multiple of eight, so that the hash of the file
+      // does not depend on how it is divided into blocks
+      vector<char> block(1 << 16);
+      hash = checksum_basis;
+      size = 0;
+      size_t read_size;
+      while((read_size = fread(&block[0], 1, block.size(), file)) > 0){
+        hash = checksum(hash, &block[0], read_size);
+        size += read_size;
+      }
+      logical_t read_err = ferror(file);
+      fclose(file);
+
+      return !read_err;
+    }
+
+    /**
+      * Replace the file with the supplied filename with the supplied
+      * contents. The contents are written to a temporary file which is then
+      * renamed, so that a partially written file is never read. Returns false
+      * if the file cannot be written.
+      */
+    logical_t replace_file(const string& filename, const string& contents){
+      string temporary = filename + ".tmp";
+      FILE* file = fopen(temporary.c_str(), "wb");
+      if(file == NULL){
+        return false;
+      }
+      logical_t write_ok = fwrite(contents.data(), 1, contents.size(), file) == contents.size();
+      write_ok = (fclose(file) == 0) and write_ok;
+      if(!write_ok or rename(temporary.c_str(), filename.c_str()) != 0){
+        remove(temporary.c_str());
+        return false;
+      }
+
+      return true;
+    }
+
+    template<class T>
+    void put_value(string& buffer, const T& value){
+      buffer.append((const char*)&value, sizeof(T));
+    }
+
+    template<class T>
+    logical_t get_value(const char*& pos, const char* end, T& value){
+      if(size_t(end - pos) < sizeof(T)){
+        return false;
+      }
+      memcpy(&value, pos, sizeof(T));
+      pos += sizeof(T);
+
+      return true;
+    }
+
+    /**
+      * Read an array of values of type T, preceded by its size. The data is
+      * copied, as it may not be aligned within the snapshot.
+      */
+    template<class T>
+    logical_t get_array(const char*& pos, const char* end, vector<T>& data){
+      uint64_t size;
+      if(!get_value(pos, end, size) or size > uint64_t(end - pos) / sizeof(T)){
+        return false;
+      }
+      data.resize(size);
+      if(size > 0){
+        memcpy(&data[0], pos, size * sizeof(T));
+      }
+      pos += size * sizeof(T);
+
+      return true;
+    }
+
+    logical_t get_array(const char*& pos, const char* end, string& data){
+      uint64_t size;
+      if(!get_value(pos, end, size) or size > uint64_t(end - pos)){
+        return false;
+      }
+      data.assign(pos, size);
+      pos += size;
+
+      return true;
+    }
+
+    /**
+      * Read the index of a name in the names table, and return the name.
+      */
+    logical_t get_name_index(const char*& pos, const char* end, const vector<const string*>& names, const string*& name){
+      uint32_t index;
+      if(!get_value(pos, end, index) or index >= names.size()){
+        return false;
+      }
+      name = names[index];
+
+      return true;
+    }
+
+  }
+
+  // End binary snapshot helpers
+
+  // Options image helpers
+
+  namespace{
+
+    // An options image consists of a header, followed by the elements, their
+    // data and the strings they refer to, followed by a perfect hash of the
+    // keys through which the elements can be found. All records start on an
+    // eight byte boundary, so that data can be read in place, and all offsets
+    // are from the start of the image. As for snapshots, values are stored in
+    // the byte order of the machine which wrote the image.
+    const char image_magic[8] = {'S', 'P', 'U', 'D', 'I', 'M', 'A', 'G'};
+    const uint32_t image_version = 1;
+
+    struct ImageHeader{
+      char magic[8];
+      uint32_t version;
+      uint32_t byte_order;
+      uint64_t size;
+      uint64_t root;
+      // The perfect hash. Each key is hashed into a bucket, and the seed for
+      // that bucket places the key in a slot with no other key.
+      uint64_t seeds;
+      uint64_t seed_count;
+      uint64_t slots;
+      uint64_t slot_count;
+    };
+
+    // A reference from a key to an element. Used both for the children of
+    // an element and for the slots of the perfect hash, where an empty slot
+    // has a node offset of zero.
+    struct ImageRef{
+      uint64_t key;
+      uint64_t node;
+    };
+
+    /**
+      * Mix the bits of a hash, using the MurmurHash3 finaliser.
+      */
+    uint64_t mix_hash(uint64_t hash){
+      hash ^= hash >> 33;
+      hash *= 0xff51afd7ed558ccdULL;
+      hash ^= hash >> 33;
+      hash *= 0xc4ceb9fe1a85ec53ULL;
+      hash ^= hash >> 33;
+
+      return hash;
+    }
+
+    /**
+      * Hash a key with 64-bit FNV-1a, and mix the result so that all of its
+      * bits depend on the key.
+      */
+    uint64_t key_hash(const char* key, const size_t& size){
+      uint64_t hash = checksum_basis;
+      for(size_t i = 0;i < size;i++){
+        hash = (hash ^ (unsigned char)key[i]) * 1099511628211ULL;
+      }
+
+      return mix_hash(hash);
+    }
+
+    /**
+      * The slot for a key hash with the supplied bucket seed.
+      */
+    uint64_t slot_hash(const uint64_t& hash, const uint32_t& seed){
+      return mix_hash(hash ^ (seed * 0x9e3779b97f4a7c15ULL));
+    }
+
+    /**
+      * Pad the image with zeros to an eight byte boundary, and return its
+      * size.
+      */
+    size_t align_image(string& image){
+      image.append((8 - image.size() % 8) % 8, '\0');
+
+      return image.size();
+    }
+
+    /**
+      * Append a string to the image, as its length followed by its
+      * characters and a terminating NUL, unless it is already in the image.
+      * Returns the offset of the string.
+      */
+    size_t put_image_string(string& image, map<string, size_t>& strings, const string& value){
+      map<string, size_t>::const_iterator it = strings.find(value);
+      if(it != strings.end()){
+        return it->second;
+      }
+
+      size_t offset = align_image(image);
+      put_value(image, uint64_t(value.size()));
+      image.append(value.c_str(), value.size() + 1);
+      strings[value] = offset;
+
+      return offset;
+    }
+
+    /**
+      * Build a perfect hash of the supplied keys, by hashing each key into a
+      * bucket and then searching for a seed for each bucket, largest first,
+      * which places all of its keys in empty slots. Returns the seed for each
+      * bucket and the index of the key in each slot, or keys.size() for an
+      * empty slot. Only the first of any repeated keys is placed.
+      */
+    void build_perfect_hash(const vector<string>& keys, vector<uint32_t>& seeds, vector<size_t>& slots){
+      vector<uint64_t> hashes(keys.size());
+      for(size_t i = 0;i < keys.size();i++){
+        hashes[i] = key_hash(keys[i].data(), keys[i].size());
+      }
+
+      // Leave a fifth of the slots empty, so that the last buckets are
+      // quickly placed
+      size_t bucket_count = keys.size() / 4 + 1;
+      size_t slot_count = keys.size() + keys.size() / 4 + 1;
+      const uint32_t max_seed = 1 << 16;
+      while(true){
+        vector< vector<size_t> > buckets(bucket_count);
+        map<string, size_t> placed_keys;
+        for(size_t i = 0;i < keys.size();i++){
+          if(placed_keys.insert(pair<string, size_t>(keys[i], i)).second){
+            buckets[hashes[i] % bucket_count].push_back(i);
+          }
+        }
+        vector< pair<size_t, size_t> > order;
+        for(size_t i = 0;i < bucket_count;i++){
+          if(!buckets[i].empty()){
+            order.push_back(pair<size_t, size_t>(buckets[i].size(), i));
+          }
+        }
+        sort(order.rbegin(), order.rend());
+
+        seeds.assign(bucket_count, 0);
+        slots.assign(slot_count, keys.size());
+        logical_t placed_all = true;
+        for(size_t i = 0;i < order.size() and placed_all;i++){
+          const vector<size_t>& bucket = buckets[order[i].second];
+          vector<size_t> positions(bucket.size());
+          uint32_t seed;
+          for(seed = 1;seed < max_seed;seed++){
+            size_t j;
+            for(j = 0;j < bucket.size();j++){
+              positions[j] = slot_hash(hashes[bucket[j]], seed) % slot_count;
+              if(slots[positions[j]] != keys.size() or std::find(positions.begin(), positions.begin() + j, positions[j]) != positions.begin() + j){
+                break;
+              }
+            }
+            if(j == bucket.size()){
+              break;
+            }
+          }
+          if(seed == max_seed){
+            placed_all = false;
+            break;
+          }
+          seeds[order[i].second] = seed;
+          for(size_t j = 0;j < bucket.size();j++){
+            slots[positions[j]] = bucket[j];
+          }
+        }
+        if(placed_all){
+          return;
+        }
+
+        // Retry with more empty slots
+        slot_count += slot_count / 4 + 1;
+      }
+    }
+
+    /**
+      * Split the supplied key into the highest child name (excluding its
+      * index), the index of that child, and the key from that child, exactly
+      * as Option::split_name does.
+      */
+    OptionError split_image_key(const string& in, string& name, int& index, string& branch){
+      name = "";
+      branch = "";
+      index = -1;
+
+      string fullname = in.substr(0, min(in.size(), in.find_first_of(" ")));
+
+      string::size_type lastPos = fullname.find_first_not_of("/", 0);
+      if(lastPos == string::npos){
+        return SPUD_NO_ERROR;
+      }
+
+      string::size_type pos = fullname.find_first_of("/", lastPos);
+      if(pos == string::npos){
+        name = fullname.substr(lastPos, fullname.size() - lastPos);
+      }else{
+        name = fullname.substr(lastPos, pos - lastPos);
+        branch = fullname.substr(pos, fullname.size()-pos);
+      }
+
+      pos = name.find_first_of("[", 0);
+      lastPos = name.find_first_of("]", 0);
+      if(lastPos < name.size() - 1){
+        return SPUD_KEY_ERROR;
+      }
+      if((lastPos-pos) > 0){
+        istringstream(name.substr(pos + 1, lastPos - 1))>>index;
+        name = name.substr(0, pos);
+      }
+
+      return SPUD_NO_ERROR;
+    }
+
+  }
+
+  struct OptionManager::FrozenOptions::Node{
+    // Offsets of the element name and of the key from the root through
+    // which the element is found in the perfect hash
+    uint64_t name;
+    uint64_t key;
+    // Offset of the child ImageRefs
+    uint64_t children;
+    // Offset of the element holding the data returned for this element,
+    // which is this element unless it has a __value child
+    uint64_t value;
+    // Offset and number of values of this element's own data
+    uint64_t data;
+    uint64_t size;
+    uint32_t child_count;
+    int32_t type;
+    int32_t rank;
+    int32_t shape[2];
+    int32_t is_attribute;
+  };
+
+  // End options image helpers
+
+  // Pattern matching helpers
+
+  namespace{
+
+    /**
+      * Whether name matches pattern, in which "*" matches any run of
+      * characters.
+      */
+    logical_t match_wildcards(const string& pattern, const string& name){
+      string::size_type p = 0, n = 0, star = string::npos, resume = 0;
+      while(n < name.size()){
+        if(p < pattern.size() and pattern[p] == '*'){
+          star = p++;
+          resume = n;
+        }else if(p < pattern.size() and pattern[p] == name[n]){
+          p++;
+          n++;
+        }else if(star != string::npos){
+          p = star + 1;
+          n = ++resume;
+        }else{
+          return false;
+        }
+      }
+      while(p < pattern.size() and pattern[p] == '*'){
+        p++;
+      }
+
+      return p == pattern.size();
+    }
+
+    /**
+      * If pattern is of the form "name::*" with no other wildcards, set
+      * prefix to name and return true.
+      */
+    logical_t named_wildcard(const string& pattern, string& prefix){
+      string::size_type star = pattern.find('*');
+      if(star < 2 or star != pattern.size() - 1 or pattern.compare(star - 2, 2, "::") != 0){
+        return false;
+      }
+      prefix = pattern.substr(0, star - 2);
+
+      return true;
+    }
+
+  }
+
+  // End pattern matching helpers
+
+  // OptionManager::Option CLASS METHODS
+
+  namespace{
+
+    // Names interned by Option::intern, shared by all options trees and
+    // never freed
+    pthread_mutex_t interned_names_mutex = PTHREAD_MUTEX_INITIALIZER;
+
+    set<string>& interned_names(){
+      static set<string> names;
+
+      return names;
+    }
+
+    // Held while converting data read lazily, which may be first read by
+    // many threads at once
+    pthread_mutex_t convert_data_mutex = PTHREAD_MUTEX_INITIALIZER;
+
+  }
+
+  // PUBLIC METHODS
+
+  const string* OptionManager::Option::intern(const string& name){
+    // Options trees in different contexts may be built at the same time
+    pthread_mutex_lock(&interned_names_mutex);
+    const string* interned = &*interned_names().insert(name).first;
+    pthread_mutex_unlock(&interned_names_mutex);
+
+    return interned;
+  }
+
+  void* OptionManager::Option::operator new(size_t size){
+    return arena_allocate(size);
+  }
+
+  void OptionManager::Option::operator delete(void* ptr, size_t size){
+    arena_deallocate(ptr, size);
+
+    return;
+  }
+
+  OptionManager::Option::Option(){
+    verbose_off();
+    node_name = intern("");
+    indices = NULL;
+    data_type = SPUD_NONE;
+    references = 1;
+    data_size = 0;
+    data = NULL;
+    lazy_data = false;
+    unconverted = false;
+    external = false;
+    OptionError set_err = set_rank_and_shape(-1, vector<int>());
+    if(set_err != SPUD_NO_ERROR){
+      cerr << "SPUD ERROR: Failed to set rank and shape" << endl;
+      exit(-1);
+    }
+    is_attribute = false;
+
+    return;
+  }
+
+  OptionManager::Option::Option(const OptionManager::Option& inOption){
+    indices = NULL;
+    data_type = SPUD_NONE;
+    references = 1;
+    data_size = 0;
+    data = NULL;
+    lazy_data = false;
+    unconverted = false;
+    external = false;
+    *this = inOption;
+
+    return;
+  }
+
+  OptionManager::Option::Option(string name){
+    verbose_off();
+    node_name = intern(name);
+    indices = NULL;
+    data_type = SPUD_NONE;
+    references = 1;
+    data_size = 0;
+    data = NULL;
+    lazy_data = false;
+    unconverted = false;
+    external = false;
+    OptionError set_err = set_rank_and_shape(-1, vector<int>());
+    if(set_err != SPUD_NO_ERROR){
+      cerr << "SPUD ERROR: Failed to set rank and shape" << endl;
+      exit(-1);
+    }
+    is_attribute = false;
+
+    return;
+  }
+
+  OptionManager::Option::~Option(){
+    clear_children();
+    clear_data();
+
+    return;
+  }
+
+  const OptionManager::Option& OptionManager::Option::operator=(const OptionManager::Option& inOption){
+    if(this == &inOption){
+      return *this;
+    }
+
+    verbose = inOption.verbose;
+    if(verbose)
+      cout << "const OptionManager::Option& OptionManager::Option::operator=(const OptionManager::Option& inOption)\n";
+
+    node_name = inOption.node_name;
+
+    // Share the children, which are only copied if they are later changed
+    clear_children();
+    for(child_list::const_iterator it = inOption.children.begin();it != inOption.children.end();++it){
+      (*it)->references++;
+      append_child(*it);
+    }
+
+    // Data not yet converted is copied as it was loaded
+    switch(inOption.unconverted ? SPUD_NONE : inOption.data_type){
+      case(SPUD_DOUBLE):
+        assign_data(inOption.data_double, inOption.data_size);
+        break;
+      case(SPUD_INT):
+        assign_data(inOption.data_int, inOption.data_size);
+        break;
+      case(SPUD_STRING):
+        assign_data(inOption.data_string, inOption.data_size);
+        break;
+      default:
+        if(inOption.unconverted){
+          defer_data(inOption.data_type, inOption.data_string, inOption.data_size, inOption.external);
+        }else{
+          clear_data();
+        }
+        break;
+    }
+    vector<int> shape(2);
+    shape[0] = inOption.shape[0];  shape[1] = inOption.shape[1];
+    OptionError set_err = set_rank_and_shape(inOption.rank, shape);
+    if(set_err != SPUD_NO_ERROR){
+      cerr << "SPUD ERROR: Failed to set rank and shape" << endl;
+      exit(-1);
+    }
+
+    is_attribute = inOption.is_attribute;
+
+    return *this;
+  }
+
+  // An element currently being read by load_options. The element's option is
+  // at path below base. path is empty unless the element (or one of its
+  // ancestors) has a name attribute which cannot be used as a single key
+  // component, in which case keys are built from path exactly as they would
+  // be from the root.
+  struct OptionManager::Option::LoadFrame{
+    enum Type{
+      ROOT_FRAME,
+      ELEMENT_FRAME,
+      VALUE_FRAME,
+      SKIP_FRAME
+    };
+
+    Type type;
+    Option* base;
+    string path;
+    string name;
+    vector< pair<string, string> > attributes;
+    logical_t have_data;
+    string data;
+  };
+
+  OptionError OptionManager::Option::load_options(const string& filename, size_t& peak_buffer_size, const logical_t& lazy){
+    if(verbose)
+      cout << "void OptionManager::Option::load_options(const string& filename = " << filename << ", size_t& peak_buffer_size, const logical_t& lazy = " << lazy << ")\n";
+
+    delete_option("/");
+    peak_buffer_size = 0;
+
+    if(load_snapshot(filename) == SPUD_NO_ERROR){
+      return SPUD_NO_ERROR;
+    }
+
+    // The file may be compressed, and is then decompressed as it is parsed
+    InputFile file;
+    if(!file.open(filename)){
+      //cerr << "SPUD WARNING: Failed to load options file " << filename << endl;
+      return SPUD_FILE_ERROR;
+    }
+
+    const string* previous_name = node_name;
+
+    vector<LoadFrame> frames;
+
+    // Binary files named by data elements are found relative to the options
+    // file
+    const size_t directory_end = filename.find_last_of('/');
+    const string directory = directory_end == string::npos ? "" : filename.substr(0, directory_end + 1);
+
+    XmlStreamReader reader(file);
+    logical_t have_root = false;
+    OptionError load_err = SPUD_NO_ERROR;
+    XmlStreamReader::Event event;
+    while((event = reader.next()) != XmlStreamReader::END_DOCUMENT){
+      if(event == XmlStreamReader::PARSE_ERROR){
+        load_err = SPUD_FILE_ERROR;
+        break;
+      }else if(frames.empty()){
+        // Document level. Only the first element is read.
+        if(event == XmlStreamReader::START_ELEMENT){
+          LoadFrame frame;
+          frame.type = have_root ? LoadFrame::SKIP_FRAME : LoadFrame::ROOT_FRAME;
+          frame.base = this;
+          if(!have_root){
+            // Set the name of this element
+            node_name = intern(reader.name);
+            have_root = true;
+          }
+          frames.push_back(frame);
+        }
+        continue;
+      }
+
+      const LoadFrame& parent = frames.back();
+      switch(event){
+        case(XmlStreamReader::START_ELEMENT):{
+          LoadFrame frame;
+          frame.base = parent.base;
+          frame.have_data = false;
+          if(parent.type == LoadFrame::VALUE_FRAME or parent.type == LoadFrame::SKIP_FRAME){
+            if(parent.type == LoadFrame::VALUE_FRAME and !parent.have_data){
+              frames.back().data = reader.value;
+              frames.back().have_data = true;
+            }
+            frame.type = LoadFrame::SKIP_FRAME;
+          }else if(parent.type == LoadFrame::ELEMENT_FRAME and (reader.name == "integer_value" or reader.name == "real_value" or reader.name == "string_value")){
+            // Data elements are stored once their first child has been read
+            frame.type = LoadFrame::VALUE_FRAME;
+            frame.path = parent.path;
+            frame.name = reader.name;
+            frame.attributes = reader.attributes;
+          }else{
+            frame.type = LoadFrame::ELEMENT_FRAME;
+            string key = reader.name;
+            for(vector< pair<string, string> >::const_iterator iter = reader.attributes.begin();iter != reader.attributes.end();iter++){
+              if(iter->first == "name"){
+                key = key + "::" + iter->second;
+                break;
+              }
+            }
+            if(parent.path.empty() and key.find_first_of(" /[]") == string::npos){
+              frame.base = parent.base->parse_element(key, reader.attributes);
+            }else{
+              frame.path = parent.path + "/" + key;
+              parent.base->parse_element(frame.path, reader.attributes);
+            }
+          }
+          frames.push_back(frame);
+          break;
+        }
+        case(XmlStreamReader::TEXT):
+        case(XmlStreamReader::OTHER):
+          if(parent.type == LoadFrame::VALUE_FRAME and !parent.have_data){
+            frames.back().data.swap(reader.value);
+            frames.back().have_data = true;
+          }else if(parent.type == LoadFrame::ELEMENT_FRAME and event == XmlStreamReader::TEXT){
+            // Store node data
+            parent.base->set_option(parent.path, reader.value);
+          }
+          break;
+        case(XmlStreamReader::END_ELEMENT):
+          if(parent.type == LoadFrame::VALUE_FRAME){
+            // Data held in a binary file leaves the data element empty
+            logical_t have_file = false;
+            for(vector< pair<string, string> >::const_iterator iter = parent.attributes.begin();iter != parent.attributes.end();iter++){
+              have_file = have_file or (iter->first == "file" and parent.name != "string_value");
+            }
+            if(parent.have_data or have_file){
+              OptionError parse_err = parent.base->parse_value(parent.path, parent.name, parent.data, parent.attributes, directory, lazy);
+              if(parse_err == SPUD_FILE_ERROR){
+                cerr << "SPUD WARNING: Failed to read binary file for " << parent.name << " element when loading options file" << endl;
+                load_err = SPUD_FILE_ERROR;
+                break;
+              }else if(parse_err != SPUD_NO_ERROR){
+                cerr << "SPUD WARNING: Invalid rank or shape for " << parent.name << " element when loading options file" << endl;
+                load_err = SPUD_FILE_ERROR;
+                break;
+              }
+            }else{
+              // Special case when the data element is empty
+              string key = parent.path + "/" + parent.name;
+              for(vector< pair<string, string> >::const_iterator iter = parent.attributes.begin();iter != parent.attributes.end();iter++){
+                if(iter->first == "name"){
+                  key = key + "::" + iter->second;
+                  break;
+                }
+              }
+              parent.base->parse_element(key, parent.attributes);
+            }
+          }
+          frames.pop_back();
+          break;
+        default:
+          break;
+      }
+      if(load_err != SPUD_NO_ERROR){
+        break;
+      }
+    }
+    if(file.failed()){
+      // The file could not be read or decompressed in full
+      load_err = SPUD_FILE_ERROR;
+    }
+    file.close();
+    peak_buffer_size = reader.get_peak_buffer_size();
+
+    if(load_err == SPUD_NO_ERROR and !have_root){
+      //cerr << "SPUD WARNING: Failed to find root node when loading options file" << endl;
+      load_err = SPUD_FILE_ERROR;
+    }
+    if(load_err != SPUD_NO_ERROR){
+      // The options read so far are discarded, as the options were cleared
+      // before the file was read
+      clear_children();
+      node_name = previous_name;
+    }
+
+    return load_err;
+  }
+
+  OptionError OptionManager::Option::write_options(const string& filename, const size_t& sidecar_threshold) const{
+    if(verbose)
+      cout << "void OptionManager::Option::write_options(const string& filename = " << filename << ", const size_t& sidecar_threshold = " << sidecar_threshold << ") const\n";
+
+    // Read any deferred data before the file is replaced
+    OptionError convert_err = convert_all_data();
+    if(convert_err != SPUD_NO_ERROR){
+      return convert_err;
+    }
+
+    XmlWriter writer;
+    if(!writer.open(filename)){
+      return SPUD_FILE_ERROR;
+    }
+    writer.set_sidecars(filename, sidecar_threshold);
+
+    // XML header
+    writer.write("<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n");
+
+    // Root node
+    write_element(writer, 0);
+    writer.write("\n");
+
+    if(!writer.close()){
+      return SPUD_FILE_ERROR;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::Option::write_changes(const string& filename, const vector<string>& keys, const long& since, const long& generation) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::write_changes(const string& filename = " << filename << ", const vector<string>& keys, const long& since = " << since << ", const long& generation = " << generation << ") const\n";
+
+    for(size_t i = 0;i < keys.size();i++){
+      const Option* option = get_child(keys[i]);
+      OptionError convert_err = option == NULL ? SPUD_NO_ERROR : option->convert_all_data();
+      if(convert_err != SPUD_NO_ERROR){
+        return convert_err;
+      }
+    }
+
+    XmlWriter writer;
+    if(!writer.open(filename)){
+      return SPUD_FILE_ERROR;
+    }
+
+    ostringstream root;
+    root << "<spud_changes since=\"" << since << "\" generation=\"" << generation << "\">";
+    writer.write("<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n");
+    writer.write(root.str());
+    // Changes are named by their position, as elements of the same name are
+    // otherwise merged when read
+    for(size_t i = 0;i < keys.size();i++){
+      ostringstream name;
+      name << " name=\"" << i << "\" key=\"";
+      writer.write("\n");
+      writer.write_indent(1);
+      const Option* option = get_child(keys[i]);
+      if(option == NULL){
+        writer.write("<delete");
+        writer.write(name.str());
+        writer.write_encoded(keys[i]);
+        writer.write("\" />");
+      }else{
+        writer.write("<replace");
+        writer.write(name.str());
+        writer.write_encoded(keys[i]);
+        writer.write("\">\n");
+        option->write_element(writer, 2);
+        writer.write("\n");
+        writer.write_indent(1);
+        writer.write("</replace>");
+      }
+    }
+    if(!keys.empty()){
+      writer.write("\n");
+    }
+    writer.write("</spud_changes>\n");
+
+    if(!writer.close()){
+      return SPUD_FILE_ERROR;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::Option::write_snapshot(const string& filename) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::write_snapshot(const string& filename = " << filename << ") const\n";
+
+    SnapshotHeader header;
+    memcpy(header.magic, snapshot_magic, sizeof(header.magic));
+    header.version = snapshot_version;
+    header.byte_order = snapshot_byte_order;
+    if(!file_checksum(filename, header.source_checksum, header.source_size)){
+      return SPUD_FILE_ERROR;
+    }
+
+    OptionError convert_err = convert_all_data();
+    if(convert_err != SPUD_NO_ERROR){
+      return convert_err;
+    }
+
+    string body;
+    write_snapshot_body(body);
+    header.body_checksum = checksum(checksum_basis, body.data(), body.size());
+
+    body.insert(0, (const char*)&header, sizeof(header));
+    if(!replace_file(snapshot_filename(filename), body)){
+      return SPUD_FILE_ERROR;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::Option::load_snapshot(const string& filename){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::load_snapshot(const string& filename = " << filename << ")\n";
+
+    FILE* file = fopen(snapshot_filename(filename).c_str(), "rb");
+    if(file == NULL){
+      return SPUD_FILE_ERROR;
+    }
+    string buffer;
+    vector<char> block(1 << 16);
+    size_t read_size;
+    while((read_size = fread(&block[0], 1, block.size(), file)) > 0){
+      buffer.append(&block[0], read_size);
+    }
+    logical_t read_err = ferror(file);
+    fclose(file);
+    if(read_err){
+      return SPUD_FILE_ERROR;
+    }
+
+    const char* pos = buffer.data();
+    const char* end = pos + buffer.size();
+    SnapshotHeader header;
+    if(!get_value(pos, end, header)
+      or memcmp(header.magic, snapshot_magic, sizeof(header.magic)) != 0
+      or header.version != snapshot_version
+      or header.byte_order != snapshot_byte_order){
+      return SPUD_FILE_ERROR;
+    }
+
+    // The snapshot is only used if the XML file is unchanged since it was
+    // written
+    uint64_t source_checksum, source_size;
+    if(!file_checksum(filename, source_checksum, source_size)
+      or source_checksum != header.source_checksum
+      or source_size != header.source_size
+      or checksum(checksum_basis, pos, end - pos) != header.body_checksum
+      or !read_snapshot_body(pos, end)){
+      return SPUD_FILE_ERROR;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::Option::write_buffer(const string& key, string& buffer) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::write_buffer(const string& key = " << key << ", string& buffer) const\n";
+
+    const Option* option = get_child(key);
+    if(option == NULL){
+      return SPUD_KEY_ERROR;
+    }
+    OptionError convert_err = option->convert_all_data();
+    if(convert_err != SPUD_NO_ERROR){
+      return convert_err;
+    }
+
+    SnapshotHeader header;
+    memcpy(header.magic, buffer_magic, sizeof(header.magic));
+    header.version = snapshot_version;
+    header.byte_order = snapshot_byte_order;
+    header.source_checksum = 0;
+    header.source_size = 0;
+
+    buffer.assign(sizeof(header), '\0');
+    option->write_snapshot_body(buffer);
+    header.body_checksum = checksum(checksum_basis, buffer.data() + sizeof(header), buffer.size() - sizeof(header));
+    buffer.replace(0, sizeof(header), (const char*)&header, sizeof(header));
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::Option::load_buffer(const string& key, const string& buffer){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::load_buffer(const string& key = " << key << ", const string& buffer)\n";
+
+    const char* pos = buffer.data();
+    const char* end = pos + buffer.size();
+    SnapshotHeader header;
+    if(!get_value(pos, end, header)
+      or memcmp(header.magic, buffer_magic, sizeof(header.magic)) != 0
+      or header.version != snapshot_version
+      or header.byte_order != snapshot_byte_order
+      or checksum(checksum_basis, pos, end - pos) != header.body_checksum){
+      return SPUD_FILE_ERROR;
+    }
+
+    Option loaded;
+    if(!loaded.read_snapshot_body(pos, end)){
+      return SPUD_FILE_ERROR;
+    }
+
+    Option* option = this;
+    if(key != "/" and !key.empty()){
+      if(create_child(key) == NULL){
+        return SPUD_KEY_ERROR;
+      }
+      option = get_child(key);
+      loaded.node_name = option->node_name;
+    }
+
+    // The previous element is deleted with loaded
+    option->swap(loaded);
+    if(option != this){
+      string new_node_name, name_attr;
+      option->split_node_name(new_node_name, name_attr);
+      if(name_attr.size() > 0){
+        option->set_attribute("name", name_attr);
+      }
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::Option::write_image(const string& filename) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::write_image(const string& filename = " << filename << ") const\n";
+
+    OptionError convert_err = convert_all_data();
+    if(convert_err != SPUD_NO_ERROR){
+      return convert_err;
+    }
+
+    string image(sizeof(ImageHeader), '\0');
+    map<string, size_t> strings;
+    vector<string> hash_keys;
+    vector<size_t> hash_nodes;
+    ImageHeader header;
+    header.root = write_image_node(image, "", strings, hash_keys, hash_nodes);
+
+    vector<uint32_t> seeds;
+    vector<size_t> slots;
+    build_perfect_hash(hash_keys, seeds, slots);
+
+    header.seeds = align_image(image);
+    header.seed_count = seeds.size();
+    image.append((const char*)&seeds[0], seeds.size() * sizeof(uint32_t));
+
+    // Strings for all keys are written before the slots which refer to them
+    vector<ImageRef> refs(slots.size());
+    for(size_t i = 0;i < slots.size();i++){
+      if(slots[i] == hash_keys.size()){
+        refs[i].key = 0;
+        refs[i].node = 0;
+      }else{
+        refs[i].key = put_image_string(image, strings, hash_keys[slots[i]]);
+        refs[i].node = hash_nodes[slots[i]];
+      }
+    }
+    header.slots = align_image(image);
+    header.slot_count = refs.size();
+    image.append((const char*)&refs[0], refs.size() * sizeof(ImageRef));
+
+    memcpy(header.magic, image_magic, sizeof(header.magic));
+    header.version = image_version;
+    header.byte_order = snapshot_byte_order;
+    header.size = image.size();
+    memcpy(&image[0], &header, sizeof(header));
+
+    // Processes which have mapped the old image keep it until they unmap it
+    if(!replace_file(filename, image)){
+      return SPUD_FILE_ERROR;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  void OptionManager::Option::load_image(const FrozenOptions& image){
+    if(verbose)
+      cout << "void OptionManager::Option::load_image(const FrozenOptions& image)\n";
+
+    clear_children();
+
+    read_image_node(image, image.get_root());
+
+    return;
+  }
+
+  string OptionManager::Option::get_name() const{
+    if(verbose)
+      cout << "void OptionManager::Option::get_name(void) const\n";
+    return *node_name;
+  }
+
+  logical_t OptionManager::Option::get_is_attribute() const{
+    if(verbose)
+      cout << "logical_t OptionManager::Option::get_is_attribute(void) const\n";
+    return is_attribute;
+  }
+
+  void OptionManager::Option::list_children(const string& name, deque<string>& kids) const{
+    if(verbose)
+      cout << "void OptionManager::Option::list_children(const string& name = " << name << ", deque<string>& kids) const\n";
+
+    kids.clear();
+
+    const Option* descendant = get_child(name);
+    if(descendant != NULL){
+      for(child_list::const_iterator it = descendant->children.begin();it != descendant->children.end();it++){
+        kids.push_back(*(*it)->node_name);
+      }
+    }
+
+    return;
+  }
+
+  size_t OptionManager::Option::get_number_of_children() const{
+    if(verbose)
+      cout << "size_t OptionManager::Option::get_number_of_children(void) const\n";
+
+    return children.size();
+  }
+
+  OptionError OptionManager::Option::get_child_name(const unsigned& index, string& child_name) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::get_child_name(const unsigned& index = " << index << ", string& child_name) const\n";
+
+    if(index >= children.size()){
+      return SPUD_KEY_ERROR;
+    }
+
+    child_name = *children[index]->node_name;
+
+    return SPUD_NO_ERROR;
+  }
+
+  const OptionManager::Option* OptionManager::Option::get_child_at(const unsigned& index) const{
+    if(verbose)
+      cout << "const OptionManager::Option* OptionManager::Option::get_child_at(const unsigned& index = " << index << ") const\n";
+
+    if(index >= children.size()){
+      return NULL;
+    }
+
+    return children[index];
+  }
+
+  void OptionManager::Option::list_descendants(const string& key, vector<string>& keys, vector<const Option*>& descendants) const{
+    if(verbose)
+      cout << "void OptionManager::Option::list_descendants(const string& key = " << key << ", vector<string>& keys, vector<const Option*>& descendants) const\n";
+
+    map<string, int> positions;
+    for(child_list::const_iterator it = children.begin();it != children.end();it++){
+      const string& child_name = *(*it)->node_name;
+      if(child_name == "__value"){
+        continue;
+      }
+
+      string child_key = key + "/" + child_name;
+      if(count(child_name) > 1){
+        ostringstream index;
+        index << "[" << positions[child_name]++ << "]";
+        child_key += index.str();
+      }
+
+      keys.push_back(child_key);
+      descendants.push_back(*it);
+      (*it)->list_descendants(child_key, keys, descendants);
+    }
+
+    return;
+  }
+
+  void OptionManager::Option::list_lazy_data(const string& key, vector<string>& keys, vector<size_t>& sizes, vector<logical_t>& converted) const{
+    if(verbose)
+      cout << "void OptionManager::Option::list_lazy_data(const string& key = " << key << ", vector<string>& keys, vector<size_t>& sizes, vector<logical_t>& converted) const\n";
+
+    vector<string> descendant_keys;
+    vector<const Option*> descendants;
+    list_descendants(key, descendant_keys, descendants);
+    for(size_t i = 0;i < descendants.size();i++){
+      const Option* value = descendants[i]->value_child();
+      if(value != NULL and value->lazy_data){
+        keys.push_back(descendant_keys[i]);
+        sizes.push_back(value->data_size);
+        converted.push_back(!__atomic_load_n(&value->unconverted, __ATOMIC_ACQUIRE));
+      }
+    }
+
+    return;
+  }
+
+  void OptionManager::Option::find_matches(const string& key, const vector<PatternSegment>& segments, const size_t& first, vector<string>& keys, vector<const Option*>& matches) const{
+    if(verbose)
+      cout << "void OptionManager::Option::find_matches(const string& key = " << key << ", const vector<PatternSegment>& segments, const size_t& first = " << first << ", vector<string>& keys, vector<const Option*>& matches) const\n";
+
+    if(indices == NULL){
+      return;
+    }
+
+    // The children matching this segment, in document order. Only a
+    // general wildcard needs every child to be examined.
+    const PatternSegment& segment = segments[first];
+    string prefix;
+    child_list none;
+    const child_list* candidates = &none;
+    if(segment.name.find('*') == string::npos){
+      const child_index& lookup = count(segment.name) ? indices->by_key : indices->by_prefix;
+      child_index::const_iterator match = lookup.find(&segment.name);
+      if(match != lookup.end()){
+        candidates = &match->second;
+      }
+    }else if(named_wildcard(segment.name, prefix)){
+      child_index::const_iterator match = indices->by_prefix.find(&prefix);
+      if(match != indices->by_prefix.end()){
+        candidates = &match->second;
+      }
+    }else{
+      candidates = &children;
+    }
+
+    int position = 0;
+    for(child_list::const_iterator it = candidates->begin();it != candidates->end();it++){
+      const string& child_name = *(*it)->node_name;
+      if(child_name == "__value" or (candidates == &children and !match_wildcards(segment.name, child_name))){
+        continue;
+      }
+      if(segment.index >= 0 and position++ != segment.index){
+        continue;
+      }
+
+      string child_key = key + "/" + child_name;
+      size_t same_name = count(child_name);
+      if(same_name > 1){
+        const child_list& siblings = indices->by_key.find(&child_name)->second;
+        ostringstream index;
+        index << "[" << std::find(siblings.begin(), siblings.end(), *it) - siblings.begin() << "]";
+        child_key += index.str();
+      }
+
+      if(first + 1 == segments.size()){
+        keys.push_back(child_key);
+        matches.push_back(*it);
+      }else{
+        (*it)->find_matches(child_key, segments, first + 1, keys, matches);
+      }
+    }
+
+    return;
+  }
+
+  size_t OptionManager::Option::count(const string& key) const{
+    if(indices == NULL){
+      return 0;
+    }
+
+    child_index::const_iterator it = indices->by_key.find(&key);
+    if(it == indices->by_key.end()){
+      return 0;
+    }
+
+    return it->second.size();
+  }
+
+  const OptionManager::Option* OptionManager::Option::find(const string& key, const int& index) const{
+    return indices == NULL ? NULL : lookup_child(indices->by_key, key, index);
+  }
+
+  const OptionManager::Option* OptionManager::Option::find_named(const string& key, const int& index) const{
+    return indices == NULL ? NULL : lookup_child(indices->by_prefix, key, index);
+  }
+
+  const OptionManager::Option* OptionManager::Option::get_child(const string& key) const{
+    if(verbose)
+      cout << "const OptionManager::Option* OptionManager::Option::get_child(const string& key = " << key << ") const\n";
+
+    if(key == "/" or key.empty())
+      return this;
+
+    string name, branch;
+    int index;
+    OptionError key_err = split_name(key, name, index, branch);
+    if(key_err != SPUD_NO_ERROR){
+      return NULL;
+    }
+
+    if(name.empty()){
+      return NULL;
+    }
+
+    // If there is no child called name, look for a child called name::*
+    const Option* child;
+    if(count(name) == 0){
+      child = find_named(name, index);
+    }else{
+      child = find(name, index);
+    }
+
+    if(child == NULL){
+      return NULL;
+    }else if(branch.empty()){
+      return child;
+    }else{
+      return child->get_child(branch);
+    }
+  }
+
+  OptionManager::Option* OptionManager::Option::get_child(const string& key){
+    if(verbose)
+      cout << "OptionManager::Option* OptionManager::Option::get_child(const string& key = " << key <<")\n";
+
+    if(key == "/" or key.empty())
+      return this;
+
+    string name, branch;
+    int index;
+    OptionError key_err = split_name(key, name, index, branch);
+    if(key_err != SPUD_NO_ERROR){
+      return NULL;
+    }
+
+    if(name.empty()){
+      return NULL;
+    }
+
+    // If there is no child called name, look for a child called name::*
+    Option* child;
+    if(count(name) == 0){
+      child = find_named_unique(name, index);
+    }else{
+      child = find_unique(name, index);
+    }
+
+    if(child == NULL){
+      return NULL;
+    }else if(branch.empty()){
+      return child;
+    }else{
+      return child->get_child(branch);
+    }
+  }
+
+  int OptionManager::Option::option_count(const string& key) const{
+    if(verbose)
+      cout << "int OptionManager::Option::option_count(const string& key = " << key << ") const\n";
+
+    string name, branch;
+    int index;
+    OptionError key_err = split_name(key, name, index, branch);
+    if(key_err != SPUD_NO_ERROR){
+      return 0;
+    }
+
+    if(name.empty() or indices == NULL){
+      return 0;
+    }
+
+    // Apparently there is no such child but lets check for "name::*"
+    const child_index& matches = count(name) ? indices->by_key : indices->by_prefix;
+    child_index::const_iterator match = matches.find(&name);
+    if(match == matches.end()){
+      return 0;
+    }
+
+    const child_list& kids = match->second;
+    int count = 0;
+    for(size_t i = 0;i < kids.size();i++){
+      if(index >= 0 and (int)i != index){
+        continue;
+      }
+      if(branch.empty()){
+        count++;
+      }else{
+        count += kids[i]->option_count(branch);
+      }
+    }
+
+    return count;
+  }
+
+  logical_t OptionManager::Option::have_option(const string& key) const{
+    if(verbose)
+      cout << "logical_t OptionManager::Option::have_option(const string& key = " << key << ") const\n";
+
+    if(key == "/"){
+      return true;
+    }else{
+      return (get_child(key) != NULL);
+    }
+  }
+
+  OptionType OptionManager::Option::get_option_type() const{
+    if(verbose)
+      cout << "OptionType OptionManager::Option::get_option_type(void) const\n";
+
+    const Option* value = value_child();
+    if(value != NULL){
+      return value->get_option_type();
+    }
+
+    return data_type;
+  }
+
+  size_t OptionManager::Option::get_option_rank() const{
+    if(verbose)
+      cout << "size_t OptionManager::Option::get_option_rank(void) const\n";
+
+    const Option* value = value_child();
+    if(value != NULL){
+      return value->get_option_rank();
+    }else{
+      return rank;
+    }
+  }
+
+  vector<int> OptionManager::Option::get_option_shape() const{
+    if(verbose)
+      cout << "vector<int> OptionManager::Option::get_option_shape(void) const\n";
+
+    const Option* value = value_child();
+    if(value != NULL){
+      return value->get_option_shape();
+    }else{
+      vector<int> shape(2);
+      shape[0] = this->shape[0];
+      shape[1] = this->shape[1];
+      return shape;
+    }
+  }
+
+  OptionError OptionManager::Option::get_option(vector<double>& val) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::get_option(vector<double>& val) const\n";
+
+    const Option* value = value_child();
+    if(value != NULL){
+      return value->get_option(val);
+    }else if(get_option_type() != SPUD_DOUBLE){
+      return SPUD_TYPE_ERROR;
+    }else{
+      OptionError convert_err = convert_data();
+      if(convert_err != SPUD_NO_ERROR){
+        return convert_err;
+      }
+      val.assign(data_double, data_double + data_size);
+      return SPUD_NO_ERROR;
+    }
+  }
+
+  OptionError OptionManager::Option::get_option(vector<int>& val) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::get_option(vector<int>& val) const\n";
+
+    const Option* value = value_child();
+    if(value != NULL){
+      return value->get_option(val);
+    }else if(get_option_type() != SPUD_INT){
+      return SPUD_TYPE_ERROR;
+    }else{
+      OptionError convert_err = convert_data();
+      if(convert_err != SPUD_NO_ERROR){
+        return convert_err;
+      }
+      val.assign(data_int, data_int + data_size);
+      return SPUD_NO_ERROR;
+    }
+  }
+
+  OptionError OptionManager::Option::get_option(string& val) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::get_option(string& val = " << val << ") const\n";
+
+    const Option* value = value_child();
+    if(value != NULL){
+      return value->get_option(val);
+    }else if(get_option_type() != SPUD_STRING){
+      return SPUD_TYPE_ERROR;
+    }else{
+      val.assign(data_string, data_size);
+      return SPUD_NO_ERROR;
+    }
+  }
+
+  OptionError OptionManager::Option::get_option_view(const double*& data, size_t& size) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::get_option_view(const double*& data, size_t& size) const\n";
+
+    const Option* value = value_child();
+    if(value != NULL){
+      return value->get_option_view(data, size);
+    }else if(get_option_type() != SPUD_DOUBLE){
+      return SPUD_TYPE_ERROR;
+    }else{
+      OptionError convert_err = convert_data();
+      if(convert_err != SPUD_NO_ERROR){
+        return convert_err;
+      }
+      data = data_double;
+      size = data_size;
+      return SPUD_NO_ERROR;
+    }
+  }
+
+  OptionError OptionManager::Option::get_option_view(const int*& data, size_t& size) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::get_option_view(const int*& data, size_t& size) const\n";
+
+    const Option* value = value_child();
+    if(value != NULL){
+      return value->get_option_view(data, size);
+    }else if(get_option_type() != SPUD_INT){
+      return SPUD_TYPE_ERROR;
+    }else{
+      OptionError convert_err = convert_data();
+      if(convert_err != SPUD_NO_ERROR){
+        return convert_err;
+      }
+      data = data_int;
+      size = data_size;
+      return SPUD_NO_ERROR;
+    }
+  }
+
+  OptionError OptionManager::Option::get_option_view(const char*& data, size_t& size) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::get_option_view(const char*& data, size_t& size) const\n";
+
+    const Option* value = value_child();
+    if(value != NULL){
+      return value->get_option_view(data, size);
+    }else if(get_option_type() != SPUD_STRING){
+      return SPUD_TYPE_ERROR;
+    }else{
+      data = data_string;
+      size = data_size;
+      return SPUD_NO_ERROR;
+    }
+  }
+
+  OptionError OptionManager::Option::get_option(const string& key, vector<double>& val) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::get_option(const string& key = " << key << ", vector<double>& val)\n";
+
+    const Option* child = get_child(key);
+    if(child == NULL){
+      return SPUD_KEY_ERROR;
+    }else{
+      return child->get_option(val);
+    }
+  }
+
+  OptionError OptionManager::Option::get_option(const string& key, vector<int>& val) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::get_option(const string& key = " << key << ", vector<int>& val)\n";
+
+    const Option* child = get_child(key);
+    if(child == NULL){
+      return SPUD_KEY_ERROR;
+    }else{
+      return child->get_option(val);
+    }
+  }
+
+  OptionError OptionManager::Option::get_option(const string& key, string& val) const{
+    if(verbose)
+      cout << "OptionError OptionManager::Option::get_option(const string& key = " << key << ", string& val = " << val << ")\n";
+
+    const Option* child = get_child(key);
+    if(child == NULL){
+      return SPUD_KEY_ERROR;
+    }else{
+      return child->get_option(val);
+    }
+  }
+
+  OptionError OptionManager::Option::add_option(const string& key){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::add_option(const string& key = " << key << ")\n";
+
+    return create_child(key) == NULL ? SPUD_KEY_ERROR : SPUD_NO_ERROR;
   }
 
   OptionError OptionManager::Option::set_option(const vector<double>& val, const int& rank, const vector<int>& shape){
     if(verbose)
-      cout << "OptionError OptionManager::Option::set_option(const vector<double>& val, const int& rank = " << rank << ", const vector<int>& shape)\n";
+      cout << "OptionError OptionManager::Option::set_option(const vector<double>& val, const int& rank = " << rank << ", const vector<int>& shape)\n";
+
+    Option* value = unique_value_child();
+    if(value != NULL){
+      return value->set_option(val, rank, shape);
+    }else{
+      assign_data(val);
+      OptionError set_err = set_option_type(SPUD_DOUBLE);
+      if(set_err != SPUD_NO_ERROR){
+        return set_err;
+      }
+      set_err = set_rank_and_shape(rank, shape);
+      if(set_err != SPUD_NO_ERROR){
+        return set_err;
+      }
+      return SPUD_NO_ERROR;
+    }
+  }
+
+  OptionError OptionManager::Option::set_option(const vector<int>& val, const int& rank, const vector<int>& shape){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::set_option(const vector<int>& val, const int& rank = " << rank << ", const vector<int>& shape)\n";
+
+    Option* value = unique_value_child();
+    if(value != NULL){
+      return value->set_option(val, rank, shape);
+    }else{
+      assign_data(val);
+      OptionError set_err = set_option_type(SPUD_INT);
+      if(set_err != SPUD_NO_ERROR){
+        return set_err;
+      }
+      set_err = set_rank_and_shape(rank, shape);
+      if(set_err != SPUD_NO_ERROR){
+        return set_err;
+      }
+      return SPUD_NO_ERROR;
+    }
+  }
+
+  OptionError OptionManager::Option::set_option(const string& val){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::set_option(const string& val = " << val << ")\n";
+
+    Option* value = unique_value_child();
+    if(value != NULL){
+      return value->set_option(val);
+    }else{
+      assign_data(val);
+      vector<int> shape(2);
+      shape[0] = val.size();  shape[1] = -1;
+      OptionError set_err = set_option_type(SPUD_STRING);
+      if(set_err != SPUD_NO_ERROR){
+        return set_err;
+      }
+      set_err = set_rank_and_shape(1, shape);
+      if(set_err != SPUD_NO_ERROR){
+        return set_err;
+      }
+      return SPUD_NO_ERROR;
+    };
+  }
+
+  OptionError OptionManager::Option::set_option(const string& key, const vector<double>& val, const int& rank, const vector<int>& shape){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::set_option(const string& key = " << key << ", const vector<double>& val, const int& rank = " << rank << ", const vector<int>& shape)\n";
+
+    Option* opt = create_child(key);
+    if(opt == NULL){
+      return SPUD_KEY_ERROR;
+    }else{
+      return opt->set_option(val, rank, shape);
+    }
+  }
+
+  OptionError OptionManager::Option::set_option(const string& key, const vector<int>& val, const int& rank, const vector<int>& shape){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::set_option(const string& key = " << key << ", const vector<int>& val, const int& rank = " << rank << ", const vector<int>& shape)\n";
+
+    Option* opt = create_child(key);
+    if(opt == NULL){
+      return SPUD_KEY_ERROR;
+    }else{
+      return opt->set_option(val, rank, shape);
+    }
+  }
+
+  OptionError OptionManager::Option::set_option(const string& key, const string& val){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::set_option(const string& key = " << key << ", const string& val = " << val <<")\n";
+
+    Option* opt = create_child(key);
+    if(opt == NULL){
+      return SPUD_KEY_ERROR;
+    }else{
+      return opt->set_option(val);
+    }
+  }
+
+  logical_t OptionManager::Option::set_is_attribute(const logical_t& is_attribute){
+    if(verbose)
+      cout << "logical_t OptionManager::Option::set_is_attribute(const logical_t& is_attribute = " << is_attribute << ")\n";
+    if(children.size() == 0 and get_option_type() == SPUD_STRING){
+      this->is_attribute = is_attribute;
+    }
+
+    return this->is_attribute;
+  }
+
+  OptionError OptionManager::Option::set_attribute(const string& key, const string& val){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::set_attribute(const string& key = " << key << ", const string& val = " << val << ")\n";
+
+    Option* opt = create_child(key);
+    if(opt == NULL){
+      return SPUD_KEY_ERROR;
+    }else{
+      OptionError set_err = opt->set_option(val);
+      if(set_err != SPUD_NO_ERROR){
+        return set_err;
+      }
+      opt->set_is_attribute(true);
+      return SPUD_NO_ERROR;
+    }
+  }
+  
+  OptionError OptionManager::Option::copy_option(const string& key1, const string& key2){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::copy_option(const string& key1 = " << key1 << ", const string& key2 = " << key2 << ")\n";
+
+    const Option* option1 = static_cast<const Option*>(this)->get_child(key1);
+    if(option1 == NULL){
+      return SPUD_KEY_ERROR;
+    }
+    
+    const Option* option2 = static_cast<const Option*>(this)->get_child(key2);
+    if(option2 != NULL){
+      return SPUD_KEY_ERROR;
+    }
+    
+    string::size_type lastPos = key2.find_last_not_of("/");
+    lastPos = key2.find_last_of("/", lastPos);
+    string key2_parent = key2.substr(0, lastPos);
+    string key2_name = key2.substr(lastPos + 1);
+
+    // The copy shares the children of option1, and is taken before the parent
+    // is created so that a copy into option1 does not contain itself
+    Option* new_option1 = new Option(*option1);
+    Option* option2_parent = create_child(key2_parent);
+    if(option2_parent == NULL){
+      delete new_option1;
+      return SPUD_KEY_ERROR;
+    }
+
+    new_option1->node_name = intern(key2_name);
+    string new_node_name, name_attr;
+    new_option1->split_node_name(new_node_name, name_attr);
+    if(name_attr.size() > 0){
+      new_option1->set_attribute("name", name_attr);
+    }
+    option2_parent->append_child(new_option1);
+         
+    return SPUD_NO_ERROR;
+  }  
+  
+  OptionError OptionManager::Option::move_option(const string& key1, const string& key2){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::move_option(const string& key1 = " << key1 << ", const string& key2 = " << key2 << ")\n";
+
+    const Option* option1 = static_cast<const Option*>(this)->get_child(key1);
+    if(option1 == NULL){
+      return SPUD_KEY_ERROR;
+    }else if(option1 == this){
+      // The root cannot be detached, so is copied
+      return copy_option(key1, key2);
+    }
+    
+    const Option* option2 = static_cast<const Option*>(this)->get_child(key2);
+    if(option2 != NULL){
+      return SPUD_KEY_ERROR;
+    }
+
+    string::size_type lastPos = key1.find_last_not_of("/");
+    lastPos = key1.find_last_of("/", lastPos);
+    Option* option1_parent = lastPos == string::npos ? this : get_child(key1.substr(0, lastPos));
+    Option* moved = option1_parent == NULL ? NULL : option1_parent->get_child(key1.substr(lastPos + 1));
+    if(moved == NULL){
+      return SPUD_KEY_ERROR;
+    }
+    
+    lastPos = key2.find_last_not_of("/");
+    lastPos = key2.find_last_of("/", lastPos);
+    string key2_parent = key2.substr(0, lastPos);
+    string key2_name = key2.substr(lastPos + 1);
+
+    // Follow the existing part of the new parent key as create_child will, and
+    // refuse a move into the subtree itself
+    const Option* ancestor = this;
+    string branch = key2_parent;
+    while(ancestor != NULL and ancestor != moved){
+      string name, next_branch;
+      if(split_name(branch, name, next_branch) != SPUD_NO_ERROR or name.empty()){
+        break;
+      }
+      ancestor = ancestor->get_child(name);
+      branch = next_branch;
+    }
+    if(ancestor == moved){
+      return SPUD_KEY_ERROR;
+    }
+
+    // Resolve the new parent before detaching the subtree, so that indexed and
+    // named keys are matched against the siblings as they were
+    Option* option2_parent = create_child(key2_parent);
+    if(option2_parent == NULL){
+      return SPUD_KEY_ERROR;
+    }
+    option1_parent->remove_child(moved);
+
+    moved->node_name = intern(key2_name);
+    string new_node_name, name_attr;
+    moved->split_node_name(new_node_name, name_attr);
+    if(name_attr.size() > 0){
+      moved->set_attribute("name", name_attr);
+    }
+    option2_parent->append_child(moved);
+    
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::Option::delete_option(const string& key){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::delete_option(const string& key = " << key << ")\n";
+
+    string branch, name;
+    OptionError key_err = split_name(key, name, branch);
+    if(key_err != SPUD_NO_ERROR){
+      return key_err;
+    }
+
+    Option* opt = get_child(name);
+    if(opt == NULL){
+      return SPUD_KEY_ERROR;
+    }else if(branch.empty()){
+      if(!remove_child(opt)){
+        return SPUD_KEY_ERROR;
+      }
+      release(opt);
+      return SPUD_NO_ERROR;
+    }else{
+      return opt->delete_option(branch);
+    }
+  }
+
+  OptionError OptionManager::Option::apply_changes(Option& changes, vector<string>& keys, vector<OptionChange>& applied){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::apply_changes(Option& changes, vector<string>& keys, vector<OptionChange>& applied)\n";
+
+    if(*changes.node_name != "spud_changes"){
+      return SPUD_FILE_ERROR;
+    }
+
+    // Check every change before applying any. A replacement element must
+    // have the name given by its key, so that it can take the place of the
+    // element at that key.
+    vector<string> change_keys;
+    vector<Option*> replacements;
+    for(child_list::iterator iter = changes.children.begin();iter != changes.children.end();iter++){
+      if((*iter)->is_attribute){
+        continue;
+      }
+      string change, position, key;
+      (*iter)->split_node_name(change, position);
+      if((*iter)->get_option("key", key) != SPUD_NO_ERROR){
+        return SPUD_FILE_ERROR;
+      }
+
+      Option* replacement = NULL;
+      if(change == "replace"){
+        for(child_list::iterator child = (*iter)->children.begin();child != (*iter)->children.end();child++){
+          if((*child)->is_attribute){
+            continue;
+          }else if(replacement != NULL){
+            return SPUD_FILE_ERROR;
+          }
+          replacement = *child;
+        }
+        if(replacement == NULL){
+          return SPUD_FILE_ERROR;
+        }
+
+        string::size_type last = key.find_last_not_of("/");
+        if(last != string::npos){
+          string name = key.substr(0, last + 1);
+          name.erase(0, name.rfind('/') + 1);
+          name.erase(min(name.find('['), name.size()));
+          if(name != *replacement->node_name){
+            return SPUD_FILE_ERROR;
+          }
+        }
+      }else if(change != "delete"){
+        return SPUD_FILE_ERROR;
+      }
+
+      change_keys.push_back(key);
+      replacements.push_back(replacement);
+    }
+
+    for(size_t i = 0;i < change_keys.size();i++){
+      if(replacements[i] == NULL){
+        if(delete_option(change_keys[i]) == SPUD_NO_ERROR){
+          keys.push_back(change_keys[i]);
+          applied.push_back(SPUD_CHANGE_DELETE);
+        }
+        continue;
+      }
+
+      logical_t new_key = !have_option(change_keys[i]);
+      if(new_key and add_option(change_keys[i]) != SPUD_NO_ERROR){
+        continue;
+      }
+      Option* option = get_child(change_keys[i]);
+      if(option == NULL){
+        continue;
+      }
+      // The replaced element is left in changes, to be deleted with it
+      option->swap(*replacements[i]);
+      keys.push_back(change_keys[i]);
+      applied.push_back(new_key ? SPUD_CHANGE_ADD : SPUD_CHANGE_SET);
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  void OptionManager::Option::print(const string& prefix) const{
+    // Data which can no longer be read is printed as missing
+    const OptionType type = convert_data() == SPUD_NO_ERROR ? data_type : SPUD_NONE;
+    cout << prefix << *node_name;
+    string lprefix = prefix + " ";
+
+    if(children.empty()){
+      cout << ": ";
+      if(type == SPUD_DOUBLE){
+        for(size_t i = 0;i < data_size;i++){
+          cout << data_double[i] << " ";
+        }
+      }else if(type == SPUD_INT){
+        for(size_t i = 0;i < data_size;i++){
+          cout << data_int[i] << " ";
+        }
+      }else if(type == SPUD_STRING){
+        cout << string(data_string, data_size);
+      }else{
+        cout << "NULL";
+      }
+      cout << endl;
+    }else{
+      cout << "/" << endl;
+
+      if(type == SPUD_DOUBLE){
+        cout << lprefix << "<value>: ";
+        for(size_t i = 0;i < data_size;i++){
+          cout << data_double[i] << " ";
+        }
+        cout << endl;
+      }else if(type == SPUD_INT){
+        cout << lprefix << "<value>: ";
+        for(size_t i = 0;i < data_size;i++){
+          cout << data_int[i] << " ";
+        }
+        cout << endl;
+      }else if(type == SPUD_STRING){
+        cout << lprefix << "<value>: " << string(data_string, data_size);
+        cout << endl;
+      }
+      for(child_list::const_iterator i = children.begin();i!=children.end();++i){
+        (*i)->print(lprefix + " ");
+      }
+    }
+
+    return;
+  }
+
+  void OptionManager::Option::verbose_on(){
+    cout << "void OptionManager::Option::verbose_on(void)\n";
+
+    verbose = true;
+  }
+
+  void OptionManager::Option::verbose_off(){
+    verbose = false;
+  }
+
+  // PRIVATE METHODS
+
+  OptionManager::Option* OptionManager::Option::create_child(const string& key){
+    if(verbose)
+      cout << "OptionManager::Option* OptionManager::Option::create_child(const string& key = " << key << ")\n";
+
+    if(key == "/" or key.empty())
+      return this;
+
+    string branch, name;
+    int index;
+    OptionError key_err = split_name(key, name, index, branch);
+    if(key_err != SPUD_NO_ERROR){
+      return NULL;
+    }
+
+    if(name.empty()){
+      return NULL;
+    }
+
+    Option* child;
+    if(count(name) == 0){
+      child = find_named_unique(name, index);
+      if(child == NULL){
+        if(name == "__value" and get_option_type() != SPUD_NONE){
+          cerr << "SPUD WARNING: Creating __value child for non null element - deleting parent data" << endl;
+          set_option_type(SPUD_NONE);
+        }
+        child = new Option(name);
+        append_child(child);
+        string new_node_name, name_attr;
+        child->split_node_name(new_node_name, name_attr);
+        if(name_attr.size() > 0){
+          child->set_attribute("name", name_attr);
+        }
+        is_attribute = false;
+      }
+    }else{
+      child = find_unique(name, index);
+      if(child == NULL and index == (int)count(name)){
+        child = new Option(name);
+        append_child(child);
+        is_attribute = false;
+      }
+    }
+
+    if(child == NULL){
+      return NULL;
+    }else if(branch.empty()){
+      return child;
+    }else{
+      return child->create_child(branch);
+    }
+  }
+
+  OptionError OptionManager::Option::set_rank_and_shape(const int& rank, const vector<int>& shape){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::set_rank_and_shape(const int& rank = " << rank << ", const vector<int>& shape)\n";
+
+    if((int)shape.size() != 2 and rank != -1 and (int)shape.size() != rank){
+      return SPUD_SHAPE_ERROR;
+    }
+
+    OptionType type = get_option_type();
+    logical_t set_attrs = (type == SPUD_DOUBLE or type == SPUD_INT);
+    switch(rank){
+      case(-1):
+        this->rank = -1;
+        this->shape[0] = -1;
+        this->shape[1] = -1;
+        break;
+      case(0):
+        this->rank = 0;
+        this->shape[0] = -1;
+        this->shape[1] = -1;
+        if(set_attrs){
+          ostringstream rank_as_string;
+          rank_as_string << this->rank;
+          set_attribute("rank", rank_as_string.str());
+        }
+        break;
+      case(1):
+        this->rank = 1;
+        this->shape[0] = shape[0];
+        this->shape[1] = -1;
+        if(set_attrs){
+          ostringstream rank_as_string;
+          rank_as_string << this->rank;
+          set_attribute("rank", rank_as_string.str());
+          ostringstream shape_as_string;
+          shape_as_string << shape[0];
+          set_attribute("shape", shape_as_string.str());
+        }
+        break;
+      case(2):
+        this->rank = 2;
+        this->shape[0] = shape[0];
+        this->shape[1] = shape[1];
+        if(set_attrs){
+          ostringstream rank_as_string;
+          rank_as_string << this->rank;
+          set_attribute("rank", rank_as_string.str());
+          ostringstream shape_as_string;
+          shape_as_string << shape[0] << " " << shape[1];
+          set_attribute("shape", shape_as_string.str());
+        }
+        break;
+      default:
+        return SPUD_RANK_ERROR;
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionError OptionManager::Option::set_option_type(const OptionType& option_type){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::set_option_type(const OptionType& option_type)\n";
+
+    switch(option_type){
+      case(SPUD_DOUBLE):
+      case(SPUD_INT):
+      case(SPUD_NONE):
+        is_attribute = false;
+        break;
+      case(SPUD_STRING):
+        break;
+      default:
+        return SPUD_TYPE_ERROR;
+    }
+    if(data_type != option_type){
+      clear_data();
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  OptionManager::Option* OptionManager::Option::parse_element(const string& key, const vector< pair<string, string> >& attributes){
+    if(verbose)
+      cout << "OptionManager::Option* OptionManager::Option::parse_element(const string& key = " << key << ", const vector< pair<string, string> >& attributes)\n";
+
+    // Ensure this path has been added
+    Option* child = create_child(key);
+    if(child == NULL){
+      cerr << "SPUD ERROR: Unexpected failure when creating child element" << endl;
+      exit(-1);
+    }
+
+    // Store node attributes
+    for(vector< pair<string, string> >::const_iterator iter = attributes.begin();iter != attributes.end();iter++){
+      set_attribute(key + "/" + iter->first, iter->second);
+    }
+
+    return child;
+  }
+
+  OptionError OptionManager::Option::parse_value(const string& key, const string& name, const string& data, const vector< pair<string, string> >& attributes, const string& directory, const logical_t& lazy){
+    if(verbose)
+      cout << "OptionError OptionManager::Option::parse_value(const string& key = " << key << ", const string& name = " << name << ", const string& data, const vector< pair<string, string> >& attributes, const string& directory = " << directory << ", const logical_t& lazy = " << lazy << ")\n";
+
+    if(name == "string_value"){
+      set_option(key + "/__value", data);
+    }else{
+      // Find shape and rank
+      string rank_attr, shape_attr, file_attr;
+      logical_t have_shape = false;
+      for(vector< pair<string, string> >::const_iterator iter = attributes.begin();iter != attributes.end();iter++){
+        if(iter->first == "rank"){
+          rank_attr = iter->second;
+        }else if(iter->first == "shape"){
+          shape_attr = iter->second;
+          have_shape = true;
+        }else if(iter->first == "file"){
+          file_attr = iter->second;
+        }
+      }
+
+      int rank;
+      vector<int> shape(2, -1);
+      if((istringstream(rank_attr) >> rank).fail() or rank < 0 or rank > 2){
+        return SPUD_RANK_ERROR;
+      }
+      if(rank == 1 and have_shape){
+        have_shape = !(istringstream(shape_attr) >> shape[0]).fail() and shape[0] >= 0;
+      }else if(rank == 2){
+        have_shape = !(istringstream(shape_attr) >> shape[0] >> shape[1]).fail() and shape[0] >= 0 and shape[1] >= 0;
+        if(!have_shape){
+          return SPUD_SHAPE_ERROR;
+        }
+      }
+
+      // The number of values expected, or 0 if unknown
+      size_t size = 0;
+      if(rank == 0){
+        size = 1;
+      }else if(rank == 1 and have_shape){
+        size = shape[0];
+      }else if(rank == 2){
+        size = (size_t)shape[0] * (size_t)shape[1];
+      }
+
+      size_t count;
+      if(!file_attr.empty()){
+        // The values are read from the binary file when first read
+        const OptionType type = name == "integer_value" ? SPUD_INT : SPUD_DOUBLE;
+        const string filename = file_attr[0] == '/' ? file_attr : directory + file_attr;
+        SidecarLayout layout;
+        if(!read_sidecar_layout(filename, type, layout) or layout.count == 0){
+          return SPUD_FILE_ERROR;
+        }
+        count = layout.count;
+        if(layout.npy){
+          if(layout.dims.size() != (size_t)rank){
+            return SPUD_RANK_ERROR;
+          }
+          for(int i = 0;i < rank;i++){
+            if(shape[i] >= 0 and layout.dims[i] != (size_t)shape[i]){
+              return SPUD_SHAPE_ERROR;
+            }
+          }
+        }
+        if(rank == 1){
+          shape[0] = count;  shape[1] = -1;
+        }
+        if(size != 0 and count != size){
+          return SPUD_SHAPE_ERROR;
+        }
+        Option* value = create_child(key + "/__value");
+        if(value == NULL){
+          return SPUD_KEY_ERROR;
+        }
+        value->defer_data(type, filename, count, true);
+        OptionError set_err = value->set_rank_and_shape(rank, shape);
+        if(set_err != SPUD_NO_ERROR){
+          return set_err;
+        }
+      }else if(lazy and (count = count_values(data)) > 0){
+        // Keep the text, which is converted when the data is first read
+        if(rank == 1){
+          shape[0] = count;  shape[1] = -1;
+        }
+        if(size != 0 and count != size){
+          return SPUD_SHAPE_ERROR;
+        }
+        Option* value = create_child(key + "/__value");
+        if(value == NULL){
+          return SPUD_KEY_ERROR;
+        }
+        value->defer_data(name == "integer_value" ? SPUD_INT : SPUD_DOUBLE, data, count);
+        OptionError set_err = value->set_rank_and_shape(rank, shape);
+        if(set_err != SPUD_NO_ERROR){
+          return set_err;
+        }
+      }else if(name == "integer_value"){
+        vector<int> val;
+        // Every value needs at least two characters, so do not trust an
+        // oversized shape
+        val.reserve(min(size, data.size() / 2 + 1));
+        count = scan_values(data, val);
+        if(rank == 1){
+          shape[0] = count;  shape[1] = -1;
+        }
+        if(size != 0 and count != size){
+          return SPUD_SHAPE_ERROR;
+        }
+        set_option(key + "/__value", val, rank, shape);
+      }else{
+        vector<double> val;
+        val.reserve(min(size, data.size() / 2 + 1));
+        count = scan_values(data, val);
+        if(rank == 1){
+          shape[0] = count;  shape[1] = -1;
+        }
+        if(size != 0 and count != size){
+          return SPUD_SHAPE_ERROR;
+        }
+        set_option(key + "/__value", val, rank, shape);
+      }
+    }
+
+    for(vector< pair<string, string> >::const_iterator iter = attributes.begin();iter != attributes.end();iter++){
+      // The file holding the data is chosen afresh whenever the options are
+      // written
+      if(iter->first != "file" or name == "string_value"){
+        set_attribute(key + "/__value/" + iter->first, iter->second);
+      }
+    }
 
-    if(have_option("__value")){
-      return set_option("__value", val, rank, shape);
-    }else{
-      data_double = val;
-      OptionError set_err = set_option_type(SPUD_DOUBLE);
-      if(set_err != SPUD_NO_ERROR){
-        return set_err;
+    return SPUD_NO_ERROR;
+  }
+
+  size_t OptionManager::Option::scan_values(const string& data, vector<double>& val){
+    // strtod may only be used if the decimal point of the locale is "."
+    const logical_t c_locale = string(localeconv()->decimal_point) == ".";
+
+    size_t count = 0;
+    const char* pos = data.c_str();
+    const char* end = pos + data.size();
+    while(true){
+      // Skip white space
+      while(pos < end and isspace((unsigned char)*pos)){
+        pos++;
       }
-      set_err = set_rank_and_shape(rank, shape);
-      if(set_err != SPUD_NO_ERROR){
-        return set_err;
+      if(pos == end){
+        break;
       }
-      return SPUD_NO_ERROR;
+
+      double value;
+      if(parse_double(pos, end, value)){
+        val.push_back(value);
+        count++;
+
+        while(pos < end and !isspace((unsigned char)*pos)){
+          pos++;
+        }
+        continue;
+      }
+
+      // Find the end of the token. Any trailing characters which are not part
+      // of the number are ignored.
+      const char* token_end = pos;
+      while(token_end < end and !isspace((unsigned char)*token_end)){
+        token_end++;
+      }
+
+      value = parse_double_token(pos, token_end, c_locale);
+      val.push_back(value);
+      count++;
+
+      pos = token_end;
     }
+
+    return count;
   }
 
-  OptionError OptionManager::Option::set_option(const vector<int>& val, const int& rank, const vector<int>& shape){
-    if(verbose)
-      cout << "OptionError OptionManager::Option::set_option(const vector<int>& val, const int& rank = " << rank << ", const vector<int>& shape)\n";
+  size_t OptionManager::Option::scan_values(const string& data, vector<int>& val){
+    size_t count = 0;
+    const char* pos = data.c_str();
+    const char* end = pos + data.size();
+    while(true){
+      // Skip white space
+      while(pos < end and isspace((unsigned char)*pos)){
+        pos++;
+      }
+      if(pos == end){
+        break;
+      }
 
-    if(have_option("__value")){
-      return set_option("__value", val, rank, shape);
-    }else{
-      data_int = val;
-      OptionError set_err = set_option_type(SPUD_INT);
-      if(set_err != SPUD_NO_ERROR){
-        return set_err;
+      int value;
+      pos = parse_int(pos, end, value);
+      val.push_back(value);
+      count++;
+
+      // Any trailing characters which are not part of the number are ignored
+      while(pos < end and !isspace((unsigned char)*pos)){
+        pos++;
       }
-      set_err = set_rank_and_shape(rank, shape);
-      if(set_err != SPUD_NO_ERROR){
-        return set_err;
+    }
+
+    return count;
+  }
+
+  size_t OptionManager::Option::count_values(const string& data){
+    // Every white space separated token is read as one value by scan_values
+    size_t count = 0;
+    const char* pos = data.c_str();
+    const char* end = pos + data.size();
+    while(true){
+      while(pos < end and isspace((unsigned char)*pos)){
+        pos++;
+      }
+      if(pos == end){
+        break;
+      }
+      count++;
+      while(pos < end and !isspace((unsigned char)*pos)){
+        pos++;
       }
-      return SPUD_NO_ERROR;
     }
+
+    return count;
   }
 
-  OptionError OptionManager::Option::set_option(const string& val){
+  void OptionManager::Option::write_element(XmlWriter& writer, const unsigned int& depth) const{
     if(verbose)
-      cout << "OptionError OptionManager::Option::set_option(const string& val = " << val << ")\n";
+      cout << "void OptionManager::Option::write_element(XmlWriter& writer, const unsigned int& depth = " << depth << ") const\n";
 
-    if(have_option("__value")){
-      return set_option("__value", val);
-    }else{
-      data_string = val;
-      vector<int> shape(2);
-      shape[0] = val.size();  shape[1] = -1;
-      OptionError set_err = set_option_type(SPUD_STRING);
-      if(set_err != SPUD_NO_ERROR){
-        return set_err;
+    convert_data();
+    if(is_attribute){
+      cerr << "SPUD WARNING: Converting an attribute to an element" << endl;
+    }
+
+    // Element name and name attribute if composite name
+    string element_name, name_attr;
+    split_node_name(element_name, name_attr);
+    if(*node_name == "__value"){
+      // Data sub-element
+      switch(get_option_type()){
+        case(SPUD_DOUBLE):
+          element_name = "real_value";
+          break;
+        case(SPUD_INT):
+          element_name = "integer_value";
+          break;
+        case(SPUD_NONE):
+          break;
+        case(SPUD_STRING):
+          element_name = "string_value";
+          break;
+        default:
+          cerr << "SPUD ERROR: Invalid option type" << endl;
+          exit(-1);
       }
-      set_err = set_rank_and_shape(1, shape);
-      if(set_err != SPUD_NO_ERROR){
-        return set_err;
+    }
+
+    // Attributes, in the order they were first set, a later attribute of the
+    // same name replacing the value of an earlier one
+    vector< pair<string, string> > attributes;
+    if(name_attr.size() > 0){
+      attributes.push_back(make_pair(string("name"), name_attr));
+    }
+    logical_t has_elements = false;
+    for(child_list::const_iterator iter = children.begin();iter != children.end();iter++){
+      if(!(*iter)->is_attribute){
+        has_elements = true;
+        continue;
       }
-      return SPUD_NO_ERROR;
-    };
+      vector< pair<string, string> >::iterator attribute = attributes.begin();
+      while(attribute != attributes.end() and attribute->first != *(*iter)->node_name){
+        attribute++;
+      }
+      if(attribute == attributes.end()){
+        attributes.push_back(make_pair(*(*iter)->node_name, (*iter)->data_as_string()));
+      }else{
+        attribute->second = (*iter)->data_as_string();
+      }
+    }
+
+    // Large arrays may be written to a binary file rather than as text
+    string sidecar;
+    if(*node_name == "__value" and (data_type == SPUD_DOUBLE or data_type == SPUD_INT)){
+      sidecar = writer.write_sidecar(data_type, data, data_size, rank, shape);
+      if(!sidecar.empty()){
+        attributes.push_back(make_pair(string("file"), sidecar));
+      }
+    }
+
+    writer.write_indent(depth);
+    writer.write("<");
+    writer.write(element_name);
+    for(vector< pair<string, string> >::const_iterator iter = attributes.begin();iter != attributes.end();iter++){
+      writer.write(" ");
+      writer.write_encoded(iter->first);
+      const char* quote = iter->second.find('"') == string::npos ? "\"" : "'";
+      writer.write("=");
+      writer.write(quote);
+      writer.write_encoded(iter->second);
+      writer.write(quote);
+    }
+    writer.write(">");
+
+    // Data
+    switch(sidecar.empty() ? data_type : SPUD_NONE){
+      case(SPUD_DOUBLE):
+        for(size_t i = 0;i < data_size;i++){
+          if(i > 0){
+            writer.write(" ", 1);
+          }
+          writer.write_value(data_double[i]);
+        }
+        break;
+      case(SPUD_INT):
+        for(size_t i = 0;i < data_size;i++){
+          if(i > 0){
+            writer.write(" ", 1);
+          }
+          writer.write_value(data_int[i]);
+        }
+        break;
+      case(SPUD_NONE):
+        break;
+      case(SPUD_STRING):
+        writer.write_encoded(data_string, data_size);
+        break;
+      default:
+        cerr << "SPUD ERROR: Invalid option type" << endl;
+        exit(-1);
+    }
+
+    // Child elements, one to a line
+    if(has_elements){
+      for(child_list::const_iterator iter = children.begin();iter != children.end();iter++){
+        if(!(*iter)->is_attribute){
+          writer.write("\n");
+          (*iter)->write_element(writer, depth + 1);
+        }
+      }
+      writer.write("\n");
+      writer.write_indent(depth);
+    }
+
+    writer.write("</");
+    writer.write(element_name);
+    writer.write(">");
+
+    return;
   }
 
-  OptionError OptionManager::Option::set_option(const string& key, const vector<double>& val, const int& rank, const vector<int>& shape){
+  void OptionManager::Option::write_snapshot_node(string& nodes, map<string, unsigned>& name_index, vector<string>& names) const{
     if(verbose)
-      cout << "OptionError OptionManager::Option::set_option(const string& key = " << key << ", const vector<double>& val, const int& rank = " << rank << ", const vector<int>& shape)\n";
-
-    Option* opt = create_child(key);
-    if(opt == NULL){
-      return SPUD_KEY_ERROR;
+      cout << "void OptionManager::Option::write_snapshot_node(string& nodes, map<string, unsigned>& name_index, vector<string>& names) const\n";
+
+    convert_data();
+    map<string, unsigned>::iterator name = name_index.insert(pair<string, unsigned>(*node_name, names.size())).first;
+    if(name->second == names.size()){
+      names.push_back(*node_name);
+    }
+    put_value(nodes, uint32_t(name->second));
+    put_value(nodes, uint8_t(is_attribute ? 1 : 0));
+    put_value(nodes, int32_t(rank));
+    put_value(nodes, int32_t(shape[0]));
+    put_value(nodes, int32_t(shape[1]));
+    // Data of each type is written, all but one of them empty
+    if(data_type == SPUD_DOUBLE){
+      put_value(nodes, uint64_t(data_size));
+      nodes.append((const char*)data_double, data_size * sizeof(double));
     }else{
-      return opt->set_option(val, rank, shape);
+      put_value(nodes, uint64_t(0));
+    }
+    if(data_type == SPUD_INT){
+      put_value(nodes, uint64_t(data_size));
+      nodes.append((const char*)data_int, data_size * sizeof(int));
+    }else{
+      put_value(nodes, uint64_t(0));
+    }
+    if(data_type == SPUD_STRING){
+      put_value(nodes, uint64_t(data_size));
+      nodes.append(data_string, data_size);
+    }else{
+      put_value(nodes, uint64_t(0));
+    }
+
+    put_value(nodes, uint32_t(children.size()));
+    for(child_list::const_iterator it = children.begin();it != children.end();++it){
+      const string& child_name = *(*it)->node_name;
+      name = name_index.insert(pair<string, unsigned>(child_name, names.size())).first;
+      if(name->second == names.size()){
+        names.push_back(child_name);
+      }
+      put_value(nodes, uint32_t(name->second));
+      (*it)->write_snapshot_node(nodes, name_index, names);
     }
+
+    return;
   }
 
-  OptionError OptionManager::Option::set_option(const string& key, const vector<int>& val, const int& rank, const vector<int>& shape){
+  logical_t OptionManager::Option::read_snapshot_node(const char*& pos, const char* end, const vector<const string*>& names){
     if(verbose)
-      cout << "OptionError OptionManager::Option::set_option(const string& key = " << key << ", const vector<int>& val, const int& rank = " << rank << ", const vector<int>& shape)\n";
+      cout << "logical_t OptionManager::Option::read_snapshot_node(const char*& pos, const char* end, const vector<const string*>& names)\n";
 
-    Option* opt = create_child(key);
-    if(opt == NULL){
-      return SPUD_KEY_ERROR;
+    const string* name;
+    uint8_t attribute;
+    int32_t node_rank, shape0, shape1;
+    if(!get_name_index(pos, end, names, name) or !get_value(pos, end, attribute)
+      or !get_value(pos, end, node_rank) or !get_value(pos, end, shape0) or !get_value(pos, end, shape1)
+      or node_rank < -1 or node_rank > 2){
+      return false;
+    }
+    node_name = name;
+    is_attribute = attribute != 0;
+    rank = node_rank;
+    shape[0] = shape0;  shape[1] = shape1;
+
+    vector<double> node_double;
+    vector<int> node_int;
+    string node_string;
+    if(!get_array(pos, end, node_double) or !get_array(pos, end, node_int) or !get_array(pos, end, node_string)){
+      return false;
+    }
+    if(!node_double.empty()){
+      assign_data(node_double);
+    }else if(!node_int.empty()){
+      assign_data(node_int);
     }else{
-      return opt->set_option(val, rank, shape);
+      assign_data(node_string);
+    }
+
+    uint32_t child_count;
+    if(!get_value(pos, end, child_count)){
+      return false;
+    }
+    for(uint32_t i = 0;i < child_count;i++){
+      // Children are found by their own names, so the key written with each
+      // child is not needed
+      const string* key;
+      if(!get_name_index(pos, end, names, key)){
+        return false;
+      }
+      Option* child = new Option();
+      if(!child->read_snapshot_node(pos, end, names)){
+        delete child;
+        return false;
+      }
+      append_child(child);
     }
+
+    return true;
   }
 
-  OptionError OptionManager::Option::set_option(const string& key, const string& val){
+  void OptionManager::Option::write_snapshot_body(string& body) const{
     if(verbose)
-      cout << "OptionError OptionManager::Option::set_option(const string& key = " << key << ", const string& val = " << val <<")\n";
+      cout << "void OptionManager::Option::write_snapshot_body(string& body) const\n";
 
-    Option* opt = create_child(key);
-    if(opt == NULL){
-      return SPUD_KEY_ERROR;
-    }else{
-      return opt->set_option(val);
+    string nodes;
+    map<string, unsigned> name_index;
+    vector<string> names;
+    write_snapshot_node(nodes, name_index, names);
+
+    put_value(body, uint32_t(names.size()));
+    for(vector<string>::const_iterator it = names.begin();it != names.end();++it){
+      put_value(body, uint32_t(it->size()));
+      body.append(*it);
     }
+    body.append(nodes);
+
+    return;
   }
 
-  logical_t OptionManager::Option::set_is_attribute(const logical_t& is_attribute){
+  logical_t OptionManager::Option::read_snapshot_body(const char* pos, const char* end){
     if(verbose)
-      cout << "logical_t OptionManager::Option::set_is_attribute(const logical_t& is_attribute = " << is_attribute << ")\n";
-    if(children.size() == 0 and get_option_type() == SPUD_STRING){
-      this->is_attribute = is_attribute;
+      cout << "logical_t OptionManager::Option::read_snapshot_body(const char* pos, const char* end)\n";
+
+    uint32_t name_count;
+    if(!get_value(pos, end, name_count)){
+      return false;
+    }
+    vector<const string*> names;
+    names.reserve(min(size_t(name_count), size_t(end - pos) / sizeof(uint32_t)));
+    for(uint32_t i = 0;i < name_count;i++){
+      uint32_t name_size;
+      if(!get_value(pos, end, name_size) or name_size > size_t(end - pos)){
+        return false;
+      }
+      names.push_back(intern(string(pos, name_size)));
+      pos += name_size;
     }
 
-    return this->is_attribute;
+    // Read into a separate element, so that this element is unchanged if the
+    // body is malformed
+    Option loaded;
+    if(!loaded.read_snapshot_node(pos, end, names) or pos != end){
+      return false;
+    }
+
+    // The previous contents of this element are deleted with loaded
+    swap(loaded);
+
+    return true;
   }
 
-  OptionError OptionManager::Option::set_attribute(const string& key, const string& val){
+  size_t OptionManager::Option::write_image_node(string& image, const string& key, map<string, size_t>& strings, vector<string>& hash_keys, vector<size_t>& hash_nodes) const{
     if(verbose)
-      cout << "OptionError OptionManager::Option::set_attribute(const string& key = " << key << ", const string& val = " << val << ")\n";
+      cout << "size_t OptionManager::Option::write_image_node(string& image, const string& key = " << key << ", map<string, size_t>& strings, vector<string>& hash_keys, vector<size_t>& hash_nodes) const\n";
+
+    convert_data();
+    FrozenOptions::Node node;
+    node.name = put_image_string(image, strings, *node_name);
+    node.key = put_image_string(image, strings, key);
+    node.rank = rank;
+    node.shape[0] = shape[0];  node.shape[1] = shape[1];
+    node.is_attribute = is_attribute ? 1 : 0;
+    node.child_count = children.size();
+
+    node.data = align_image(image);
+    node.type = data_type;
+    switch(data_type){
+      case(SPUD_DOUBLE):
+        node.size = data_size;
+        image.append((const char*)data_double, data_size * sizeof(double));
+        break;
+      case(SPUD_INT):
+        node.size = data_size;
+        image.append((const char*)data_int, data_size * sizeof(int));
+        break;
+      case(SPUD_STRING):
+        node.size = data_size;
+        image.append(data_string, data_size + 1);
+        break;
+      default:
+        node.size = 0;
+        break;
+    }
 
-    Option* opt = create_child(key);
-    if(opt == NULL){
-      return SPUD_KEY_ERROR;
-    }else{
-      OptionError set_err = opt->set_option(val);
-      if(set_err != SPUD_NO_ERROR){
-        return set_err;
+    // The element is written once the offsets of its children are known
+    size_t offset = align_image(image);
+    image.append(sizeof(FrozenOptions::Node), '\0');
+    node.children = image.size();
+    image.append(children.size() * sizeof(ImageRef), '\0');
+
+    const Option* value = value_child();
+    node.value = offset;
+    map<string, int> positions;
+    for(size_t i = 0;i < children.size();i++){
+      const string& child_name = *children[i]->node_name;
+      const Option* child = children[i];
+
+      // Children after the first with the same key are only found by index
+      string child_key = key + "/" + child_name;
+      int position = positions[child_name]++;
+      if(position > 0){
+        ostringstream index;
+        index << "[" << position << "]";
+        child_key += index.str();
+      }
+
+      ImageRef ref;
+      ref.key = put_image_string(image, strings, child_name);
+      ref.node = child->write_image_node(image, child_key, strings, hash_keys, hash_nodes);
+      memcpy(&image[node.children + i * sizeof(ImageRef)], &ref, sizeof(ref));
+
+      if(position == 0){
+        hash_keys.push_back(child_key);
+        hash_nodes.push_back(ref.node);
+      }
+      // A child called a::b::c is also found as a or as a::b, if there is
+      // no child with that key and no earlier child with that prefix
+      for(string::size_type pos = child_name.find("::");pos != string::npos;pos = child_name.find("::", pos + 1)){
+        string prefix = child_name.substr(0, pos);
+        if(count(prefix) == 0 and find_named(prefix) == child){
+          hash_keys.push_back(key + "/" + prefix);
+          hash_nodes.push_back(ref.node);
+        }
+      }
+
+      if(child == value){
+        FrozenOptions::Node value_node;
+        memcpy(&value_node, &image[ref.node], sizeof(value_node));
+        node.value = value_node.value;
       }
-      opt->set_is_attribute(true);
-      return SPUD_NO_ERROR;
     }
+    memcpy(&image[offset], &node, sizeof(node));
+
+    return offset;
   }
-  
-  OptionError OptionManager::Option::copy_option(const string& key1, const string& key2){
+
+  void OptionManager::Option::read_image_node(const FrozenOptions& image, const FrozenOptions::Node* node){
     if(verbose)
-      cout << "OptionError OptionManager::Option::copy_option(const string& key1 = " << key1 << ", const string& key2 = " << key2 << ")\n";
+      cout << "void OptionManager::Option::read_image_node(const FrozenOptions& image, const FrozenOptions::Node* node)\n";
 
-    const Option* option1 = get_child(key1);
-    if(option1 == NULL){
-      return SPUD_KEY_ERROR;
-    }
-    
-    const Option* option2 = get_child(key2);
-    if(option2 != NULL){
-      return SPUD_KEY_ERROR;
-    }
-    
-    string::size_type lastPos = key2.find_last_not_of("/");
-    lastPos = key2.find_last_of("/", lastPos);
-    string key2_parent = key2.substr(0, lastPos);
-    string key2_name = key2.substr(lastPos + 1);
-    
-    Option* option2_parent = create_child(key2_parent);
-    if(option2_parent == NULL){
-      return SPUD_KEY_ERROR;
+    node_name = intern(image.get_name(node));
+    is_attribute = node->is_attribute != 0;
+    rank = node->rank;
+    shape[0] = node->shape[0];  shape[1] = node->shape[1];
+
+    clear_data();
+    const char* node_data = image.get_data(node);
+    switch(node->type){
+      case(SPUD_DOUBLE):
+        assign_data((const double*)node_data, node->size);
+        break;
+      case(SPUD_INT):
+        assign_data((const int*)node_data, node->size);
+        break;
+      case(SPUD_STRING):
+        assign_data(node_data, node->size);
+        break;
+      default:
+        break;
     }
 
-    Option* new_option1 = new Option(*option1);
-    new_option1->node_name = key2_name;
-    string new_node_name, name_attr;
-    new_option1->split_node_name(new_node_name, name_attr);
-    if(name_attr.size() == 0){
-      option2_parent->children.push_back(pair<string, Option*>(new_node_name, new_option1));
-    }else{
-      new_option1->set_attribute("name", name_attr);
-      option2_parent->children.push_back(pair<string, Option*>(new_node_name + "::" + name_attr, new_option1));
+    for(unsigned i = 0;i < node->child_count;i++){
+      Option* child = new Option();
+      child->read_image_node(image, image.get_child_at(node, i));
+      append_child(child);
     }
-         
-    return SPUD_NO_ERROR;
-  }  
-  
-  OptionError OptionManager::Option::move_option(const string& key1, const string& key2){
+
+    return;
+  }
+
+  OptionError OptionManager::Option::split_name(const string& in, string& name, string& branch) const{
     if(verbose)
-      cout << "OptionError OptionManager::Option::move_option(const string& key1 = " << key1 << ", const string& key2 = " << key2 << ")\n";
+      cout << "OptionError OptionManager::Option::split_name(const string& in = " << in << ", string& name, string& branch) const\n";
 
-    const Option* option1 = get_child(key1);
-    if(option1 == NULL){
-      return SPUD_KEY_ERROR;
-    }
-    
-    const Option* option2 = get_child(key2);
-    if(option2 != NULL){
-      return SPUD_KEY_ERROR;
-    }
-    
-    string::size_type lastPos = key2.find_last_not_of("/");
-    lastPos = key2.find_last_of("/", lastPos);
-    string key2_parent = key2.substr(0, lastPos);
-    string key2_name = key2.substr(lastPos + 1);
-    
-    Option* option2_parent = create_child(key2_parent);
-    if(option2_parent == NULL){
-      return SPUD_KEY_ERROR;
+    name = "";
+    branch = "";
+
+    string fullname = in.substr(0, min(in.size(), in.find_first_of(" ")));
+
+    // Skip delimiters at beginning.
+    string::size_type lastPos = fullname.find_first_not_of("/", 0);
+    if(lastPos == string::npos){
+      return SPUD_NO_ERROR;
     }
 
-    Option* new_option1 = new Option(*option1);
-    new_option1->node_name = key2_name;
-    string new_node_name, name_attr;
-    new_option1->split_node_name(new_node_name, name_attr);
-    if(name_attr.size() == 0){
-      option2_parent->children.push_back(pair<string, Option*>(new_node_name, new_option1));
+    // Find next delimiter
+    string::size_type pos = fullname.find_first_of("/", lastPos);
+    if(pos == string::npos){
+      name = fullname.substr(lastPos, fullname.size() - lastPos);
     }else{
-      new_option1->set_attribute("name", name_attr);
-      option2_parent->children.push_back(pair<string, Option*>(new_node_name + "::" + name_attr, new_option1));
+      name = fullname.substr(lastPos, pos - lastPos);
+      branch = fullname.substr(pos, fullname.size()-pos);
     }
-         
-    delete_option(key1);
-    
+
     return SPUD_NO_ERROR;
   }
 
-  OptionError OptionManager::Option::delete_option(const string& key){
+  OptionError OptionManager::Option::split_name(const string& in, string& name, int& index, string& branch) const{
     if(verbose)
-      cout << "OptionError OptionManager::Option::delete_option(const string& key = " << key << ")\n";
+      cout << "OptionError OptionManager::Option::split_name(const string& in = " << in << ", string& name, int& index, string& branch) const\n";
 
-    string branch, name;
-    OptionError key_err = split_name(key, name, branch);
+    index = -1;
+    OptionError key_err = split_name(in, name, branch);
     if(key_err != SPUD_NO_ERROR){
       return key_err;
     }
 
-    Option* opt = get_child(name);
-    if(opt == NULL){
-      return SPUD_KEY_ERROR;
-    }else if(branch.empty()){
-      deque< pair<string, Option*> >::iterator iter = find(name);
-      while(iter!=children.end()){
-        if(iter->second == opt){
-          children.erase(iter);
-          return SPUD_NO_ERROR;
-        }
-        iter = find_next(iter, name);
-      }
-      for(iter = children.begin();iter != children.end();iter++){
-        if(iter->second == opt){
-          children.erase(iter);
-          return SPUD_NO_ERROR;
-        }
-      }
+    // Extract the index from the name if necessary
+    string::size_type pos = name.find_first_of("[", 0);
+    string::size_type lastPos = name.find_first_of("]", 0);
+    if(lastPos < name.size() - 1){      
       return SPUD_KEY_ERROR;
-    }else{
-      return opt->delete_option(branch);
     }
+    if((lastPos-pos) > 0){
+      istringstream(name.substr(pos + 1, lastPos - 1))>>index;
+      name = name.substr(0, pos);
+    }
+
+    return SPUD_NO_ERROR;
   }
 
-  void OptionManager::Option::print(const string& prefix) const{
-    cout << prefix << node_name;
-    string lprefix = prefix + " ";
+  void OptionManager::Option::split_node_name(string& node_name, string& name_attr) const{
+    if(verbose)
+      cout << "void OptionManager::Option::split_node_name(string& node_name, string& name_attr) const\n";
 
-    if(children.empty()){
-      cout << ": ";
-      if(!data_double.empty()){
-        for(vector<double>::const_iterator i = data_double.begin();i != data_double.end();++i){
-          cout << *i << " ";
-        }
-      }else if(!data_int.empty()){
-        for(vector<int>::const_iterator i=data_int.begin();i != data_int.end();++i){
-          cout << *i << " ";
-        }
-      }else if(!data_string.empty()){
-        cout << data_string;
-      }else{
-        cout << "NULL";
-      }
-      cout << endl;
+    const string& full_name = *this->node_name;
+    string::size_type firstPos = full_name.rfind("::");
+    if(firstPos == string::npos or firstPos == full_name.size() - 2){
+      node_name = full_name;
+      name_attr = "";
     }else{
-      cout << "/" << endl;
+      node_name = full_name.substr(0, firstPos);
+      name_attr = full_name.substr(firstPos + 2);
+    }
 
-      if(!data_double.empty()){
-        cout << lprefix << "<value>: ";
-        for(vector<double>::const_iterator i = data_double.begin();i != data_double.end();++i){
-          cout << *i<< " ";
+    return;
+  }
+
+  string OptionManager::Option::data_as_string() const{
+    if(verbose)
+      cout << "string OptionManager::Option::data_as_string(void) const\n";
+
+    convert_data();
+    ostringstream data_as_string;
+    data_as_string.precision(numeric_limits< double >::digits10);
+    switch(data_type){
+      case(SPUD_DOUBLE):
+        for(size_t i = 0;i < data_size;i++){
+          data_as_string << data_double[i];
+          if(i < data_size - 1){
+            data_as_string << " ";
+          }
         }
-        cout << endl;
-      }else if(!data_int.empty()){
-        cout << lprefix << "<value>: ";
-        for(vector<int>::const_iterator i=data_int.begin();i!=data_int.end();++i){
-          cout << *i << " ";
+        return data_as_string.str();
+      case(SPUD_INT):
+        for(size_t i = 0;i < data_size;i++){
+          data_as_string << data_int[i];
+          if(i < data_size - 1){
+            data_as_string << " ";
+          }
         }
-        cout << endl;
-      }else if(!data_string.empty()){
-        cout << lprefix << "<value>: " << data_string;
-        cout << endl;
-      }
-      for(deque< pair<string, Option*> >::const_iterator i = children.begin();i!=children.end();++i){
-        i->second->print(lprefix + " ");
-      }
+        return data_as_string.str();
+      case(SPUD_NONE):
+        return "";
+      case(SPUD_STRING):
+        return string(data_string, data_size);
+      default:
+        cerr << "SPUD ERROR: Invalid option type" << endl;
+        exit(-1);
     }
+  }
 
-    return;
+  const OptionManager::Option* OptionManager::Option::value_child() const{
+    const Option* value = find("__value");
+    if(value == NULL){
+      value = find_named("__value");
+    }
+
+    return value;
   }
 
-  void OptionManager::Option::verbose_on(){
-    cout << "void OptionManager::Option::verbose_on(void)\n";
+  OptionManager::Option* OptionManager::Option::find_unique(const string& key, const int& index){
+    Option* child = indices == NULL ? NULL : lookup_child(indices->by_key, key, index);
 
-    verbose = true;
+    return child == NULL ? NULL : unshare_child(child);
   }
 
-  void OptionManager::Option::verbose_off(){
-    verbose = false;
+  OptionManager::Option* OptionManager::Option::find_named_unique(const string& key, const int& index){
+    Option* child = indices == NULL ? NULL : lookup_child(indices->by_prefix, key, index);
+
+    return child == NULL ? NULL : unshare_child(child);
   }
 
-  // PRIVATE METHODS
+  OptionManager::Option* OptionManager::Option::unique_value_child(){
+    Option* value = find_unique("__value");
+    if(value == NULL){
+      value = find_named_unique("__value");
+    }
 
-  OptionManager::Option* OptionManager::Option::create_child(const string& key){
-    if(verbose)
-      cout << "OptionManager::Option* OptionManager::Option::create_child(const string& key = " << key << ")\n";
+    return value;
+  }
 
-    if(key == "/" or key.empty())
-      return this;
+  OptionManager::Option* OptionManager::Option::unshare_child(Option* child){
+    if(child->references == 1){
+      return child;
+    }
 
-    string branch, name;
-    int index;
-    OptionError key_err = split_name(key, name, index, branch);
-    if(key_err != SPUD_NO_ERROR){
-      return NULL;
+    Option* copy = new Option(*child);
+    *std::find(children.begin(), children.end(), child) = copy;
+    child_list& by_key = indices->by_key.find(child->node_name)->second;
+    *std::find(by_key.begin(), by_key.end(), child) = copy;
+    const string& key = *child->node_name;
+    for(string::size_type pos = key.find("::");pos != string::npos;pos = key.find("::", pos + 1)){
+      string prefix = key.substr(0, pos);
+      child_list& by_prefix = indices->by_prefix.find(&prefix)->second;
+      *std::find(by_prefix.begin(), by_prefix.end(), child) = copy;
     }
+    child->references--;
 
-    if(name.empty()){
-      return NULL;
+    return copy;
+  }
+
+  void OptionManager::Option::release(Option* option){
+    if(--option->references == 0){
+      delete option;
     }
 
-    deque< pair<string, Option*> >::iterator child;
-    if(count(name) == 0){
-      string name2 = name + "::";
-      int i = 0;
-      for(child = children.begin();child != children.end();child++){
-        if(child->first.compare(0, name2.size(), name2) == 0){
-          if(index < 0 or i == index){
-            break;
-          }else{
-            i++;
-          }
-        }
-      }
-      if(child == children.end()){
-        if(name == "__value" and get_option_type() != SPUD_NONE){
-          cerr << "SPUD WARNING: Creating __value child for non null element - deleting parent data" << endl;
-          set_option_type(SPUD_NONE);
-        }
-        children.push_back(pair<string, Option*>(name, new Option(name)));
-        string new_node_name, name_attr;
-        child = children.end(); child--;
-        child->second->split_node_name(new_node_name, name_attr);
-        if(name_attr.size() > 0){
-          child->second->set_attribute("name", name_attr);
+    return;
+  }
+
+  void OptionManager::Option::append_child(Option* child){
+    children.push_back(child);
+    index_child(child);
+
+    return;
+  }
+
+  logical_t OptionManager::Option::remove_child(const Option* child){
+    for(child_list::iterator it = children.begin();it != children.end();++it){
+      if(*it == child){
+        const string& key = *child->node_name;
+        children.erase(it);
+
+        unindex_child(indices->by_key, key, child);
+        for(string::size_type pos = key.find("::");pos != string::npos;pos = key.find("::", pos + 1)){
+          unindex_child(indices->by_prefix, key.substr(0, pos), child);
         }
-        is_attribute = false;
+
+        return true;
       }
-    }else{
-      if(index < 0){
-        child = find(name);
-      }else{
-        child = find(name);
-        size_t i;
-        for(i = 0;child != children.end();i++){
-          if((int)i == index){
-            break;
-          }
-          child = find_next(child, name);
-        }
-        if(child == children.end() and index == (int)i){
-          children.push_back(pair<string, Option*>(name, new Option(name)));
-          child = children.end(); child--;
-          is_attribute = false;
-        }
+    }
+
+    return false;
+  }
+
+  void OptionManager::Option::index_child(Option* child){
+    if(indices == NULL){
+      indices = new ChildIndices();
+    }
+
+    indices->by_key[child->node_name].push_back(child);
+    // A child called a::b::c can be found as a::* or as a::b::*
+    const string& key = *child->node_name;
+    for(string::size_type pos = key.find("::");pos != string::npos;pos = key.find("::", pos + 1)){
+      string prefix = key.substr(0, pos);
+      child_index::iterator it = indices->by_prefix.find(&prefix);
+      if(it == indices->by_prefix.end()){
+        it = indices->by_prefix.insert(child_index::value_type(intern(prefix), child_list())).first;
       }
+      it->second.push_back(child);
     }
 
-    if(child == children.end()){
+    return;
+  }
+
+  OptionManager::Option* OptionManager::Option::lookup_child(const child_index& index, const string& key, const int& position){
+    child_index::const_iterator it = index.find(&key);
+    if(it == index.end()){
       return NULL;
-    }else if(branch.empty()){
-      return child->second;
+    }else if(position < 0){
+      return it->second.front();
+    }else if(position < (int)it->second.size()){
+      return it->second[position];
     }else{
-      return child->second->create_child(branch);
+      return NULL;
     }
   }
 
-  OptionError OptionManager::Option::set_rank_and_shape(const int& rank, const vector<int>& shape){
-    if(verbose)
-      cout << "OptionError OptionManager::Option::set_rank_and_shape(const int& rank = " << rank << ", const vector<int>& shape)\n";
+  void OptionManager::Option::unindex_child(child_index& index, const string& key, const Option* child){
+    child_index::iterator it = index.find(&key);
+    if(it == index.end()){
+      return;
+    }
 
-    if((int)shape.size() != 2 and rank != -1 and (int)shape.size() != rank){
-      return SPUD_SHAPE_ERROR;
+    child_list::iterator pos = std::find(it->second.begin(), it->second.end(), child);
+    if(pos != it->second.end()){
+      it->second.erase(pos);
+    }
+    if(it->second.empty()){
+      index.erase(it);
     }
 
-    OptionType type = get_option_type();
-    logical_t set_attrs = (type == SPUD_DOUBLE or type == SPUD_INT);
-    switch(rank){
-      case(-1):
-        this->rank = -1;
-        this->shape[0] = -1;
-        this->shape[1] = -1;
+    return;
+  }
+
+  void* OptionManager::Option::ChildIndices::operator new(size_t size){
+    return arena_allocate(size);
+  }
+
+  void OptionManager::Option::ChildIndices::operator delete(void* ptr, size_t size){
+    arena_deallocate(ptr, size);
+
+    return;
+  }
+
+  void OptionManager::Option::clear_data(){
+    switch(unconverted ? SPUD_STRING : data_type){
+      case(SPUD_DOUBLE):
+        arena_deallocate(data, data_size * sizeof(double));
         break;
-      case(0):
-        this->rank = 0;
-        this->shape[0] = -1;
-        this->shape[1] = -1;
-        if(set_attrs){
-          ostringstream rank_as_string;
-          rank_as_string << this->rank;
-          set_attribute("rank", rank_as_string.str());
-        }
+      case(SPUD_INT):
+        arena_deallocate(data, data_size * sizeof(int));
         break;
-      case(1):
-        this->rank = 1;
-        this->shape[0] = shape[0];
-        this->shape[1] = -1;
-        if(set_attrs){
-          ostringstream rank_as_string;
-          rank_as_string << this->rank;
-          set_attribute("rank", rank_as_string.str());
-          ostringstream shape_as_string;
-          shape_as_string << shape[0];
-          set_attribute("shape", shape_as_string.str());
+      case(SPUD_STRING):
+        arena_deallocate(data, strlen(data_string) + 1);
+        break;
+      default:
+        break;
+    }
+    data_type = SPUD_NONE;
+    data_size = 0;
+    data = NULL;
+    lazy_data = false;
+    unconverted = false;
+    external = false;
+
+    return;
+  }
+
+  void OptionManager::Option::assign_data(const double* val, const size_t& size){
+    if(data_type == SPUD_DOUBLE and data_size == size and !unconverted){
+      memmove(data_double, val, size * sizeof(double));
+      lazy_data = false;
+      return;
+    }
+
+    double* new_data = NULL;
+    if(size > 0){
+      new_data = (double*)arena_allocate(size * sizeof(double));
+      memcpy(new_data, val, size * sizeof(double));
+    }
+    clear_data();
+    if(size > 0){
+      data_double = new_data;
+      data_size = size;
+      data_type = SPUD_DOUBLE;
+    }
+
+    return;
+  }
+
+  void OptionManager::Option::assign_data(const int* val, const size_t& size){
+    if(data_type == SPUD_INT and data_size == size and !unconverted){
+      memmove(data_int, val, size * sizeof(int));
+      lazy_data = false;
+      return;
+    }
+
+    int* new_data = NULL;
+    if(size > 0){
+      new_data = (int*)arena_allocate(size * sizeof(int));
+      memcpy(new_data, val, size * sizeof(int));
+    }
+    clear_data();
+    if(size > 0){
+      data_int = new_data;
+      data_size = size;
+      data_type = SPUD_INT;
+    }
+
+    return;
+  }
+
+  void OptionManager::Option::assign_data(const char* val, const size_t& size){
+    if(data_type == SPUD_STRING and data_size == size){
+      memmove(data_string, val, size);
+      return;
+    }
+
+    char* new_data = NULL;
+    if(size > 0){
+      new_data = (char*)arena_allocate(size + 1);
+      memcpy(new_data, val, size);
+      new_data[size] = '\0';
+    }
+    clear_data();
+    if(size > 0){
+      data_string = new_data;
+      data_size = size;
+      data_type = SPUD_STRING;
+    }
+
+    return;
+  }
+
+  void OptionManager::Option::assign_data(const vector<double>& val){
+    assign_data(val.empty() ? NULL : &val[0], val.size());
+
+    return;
+  }
+
+  void OptionManager::Option::assign_data(const vector<int>& val){
+    assign_data(val.empty() ? NULL : &val[0], val.size());
+
+    return;
+  }
+
+  void OptionManager::Option::assign_data(const string& val){
+    assign_data(val.data(), val.size());
+
+    return;
+  }
+
+  void OptionManager::Option::defer_data(const OptionType& type, const string& text, const size_t& size, const logical_t& in_file){
+    char* new_data = (char*)arena_allocate(text.size() + 1);
+    memcpy(new_data, text.c_str(), text.size() + 1);
+    clear_data();
+    data_string = new_data;
+    data_size = size;
+    data_type = type;
+    lazy_data = true;
+    unconverted = true;
+    external = in_file;
+
+    return;
+  }
+
+  OptionError OptionManager::Option::convert_data() const{
+    if(!__atomic_load_n(&unconverted, __ATOMIC_ACQUIRE)){
+      return SPUD_NO_ERROR;
+    }
+
+    pthread_mutex_lock(&convert_data_mutex);
+    OptionError convert_err = SPUD_NO_ERROR;
+    if(unconverted){
+      Option& option = const_cast<Option&>(*this);
+      const string text(data_string);
+      const size_t value_size = data_type == SPUD_DOUBLE ? sizeof(double) : sizeof(int);
+      void* new_data = arena_allocate(data_size * value_size);
+      if(external){
+        if(!read_sidecar(text, data_type, data_size, new_data)){
+          convert_err = SPUD_FILE_ERROR;
         }
-        break;
-      case(2):
-        this->rank = 2;
-        this->shape[0] = shape[0];
-        this->shape[1] = shape[1];
-        if(set_attrs){
-          ostringstream rank_as_string;
-          rank_as_string << this->rank;
-          set_attribute("rank", rank_as_string.str());
-          ostringstream shape_as_string;
-          shape_as_string << shape[0] << " " << shape[1];
-          set_attribute("shape", shape_as_string.str());
+      }else if(data_type == SPUD_DOUBLE){
+        vector<double> val;
+        val.reserve(data_size);
+        if(scan_values(text, val) != data_size){
+          convert_err = SPUD_SHAPE_ERROR;
+        }else{
+          memcpy(new_data, &val[0], data_size * sizeof(double));
         }
-        break;
-      default:
-        return SPUD_RANK_ERROR;
+      }else{
+        vector<int> val;
+        val.reserve(data_size);
+        if(scan_values(text, val) != data_size){
+          convert_err = SPUD_SHAPE_ERROR;
+        }else{
+          memcpy(new_data, &val[0], data_size * sizeof(int));
+        }
+      }
+      // The text is kept on failure, so that the data may be read later
+      if(convert_err != SPUD_NO_ERROR){
+        arena_deallocate(new_data, data_size * value_size);
+      }else{
+        arena_deallocate(data, text.size() + 1);
+        option.data = new_data;
+        option.external = false;
+        __atomic_store_n(&option.unconverted, false, __ATOMIC_RELEASE);
+      }
     }
+    pthread_mutex_unlock(&convert_data_mutex);
 
-    return SPUD_NO_ERROR;
+    return convert_err;
   }
 
-  OptionError OptionManager::Option::set_option_type(const OptionType& option_type){
-    if(verbose)
-      cout << "OptionError OptionManager::Option::set_option_type(const OptionType& option_type)\n";
+  OptionError OptionManager::Option::convert_all_data() const{
+    OptionError convert_err = convert_data();
+    for(child_list::const_iterator it = children.begin();it != children.end() and convert_err == SPUD_NO_ERROR;++it){
+      convert_err = (*it)->convert_all_data();
+    }
 
-    switch(option_type){
-      case(SPUD_DOUBLE):
-        data_int.clear();
-        data_string = "";
-        is_attribute = false;
-        break;
-      case(SPUD_INT):
-        data_double.clear();
-        data_string = "";
-        is_attribute = false;
-        break;
-      case(SPUD_NONE):
-        data_double.clear();
-        data_int.clear();
-        data_string = "";
-        is_attribute = false;
-        break;
-      case(SPUD_STRING):
-        data_double.clear();
-        data_int.clear();
-        break;
-      default:
-        return SPUD_TYPE_ERROR;
+    return convert_err;
+  }
+
+  void OptionManager::Option::clear_children(){
+    for(child_list::iterator it = children.begin();it != children.end();++it){
+      release(*it);
     }
+    children.clear();
+    delete indices;
+    indices = NULL;
 
-    return SPUD_NO_ERROR;
+    return;
   }
 
-  void OptionManager::Option::parse_node(const string& root, const TiXmlNode* node){
-    if(verbose)
-      cout << "void OptionManager::Option::parse_node(const string& root = " << root << ", const TiXmlNode* node)\n";
+  void OptionManager::Option::swap(Option& option){
+    std::swap(node_name, option.node_name);
+    children.swap(option.children);
+    std::swap(indices, option.indices);
+    std::swap(data_type, option.data_type);
+    std::swap(data_size, option.data_size);
+    std::swap(data, option.data);
+    std::swap(rank, option.rank);
+    std::swap(shape[0], option.shape[0]);
+    std::swap(shape[1], option.shape[1]);
+    std::swap(is_attribute, option.is_attribute);
+    std::swap(lazy_data, option.lazy_data);
+    std::swap(unconverted, option.unconverted);
+    std::swap(external, option.external);
 
-    // Should only deal with TiXmlNode::ELEMENT types
-    if(node->Type() != TiXmlNode::ELEMENT){
-      cerr << "SPUD WARNING - Non-element: " << root << " encountered" << endl;
-      return;
+    return;
+  }
+
+  // END OF OptionManager::Option CLASS METHODS
+
+  // OptionManager::FrozenOptions CLASS METHODS
+
+  // PUBLIC METHODS
+
+  OptionManager::FrozenOptions::FrozenOptions(){
+    image = NULL;
+    image_size = 0;
+
+    return;
+  }
+
+  OptionManager::FrozenOptions::~FrozenOptions(){
+    if(image != NULL){
+      munmap((void*)image, image_size);
     }
 
-    const TiXmlElement* element = node->ToElement();
+    return;
+  }
 
-    // Establish new base name of this node
-    string basename = root + "/" + node->ValueStr();
-    if(element->Attribute("name")){
-      basename = basename + "::" + element->Attribute("name");
+  OptionError OptionManager::FrozenOptions::load(const string& filename){
+    if(image != NULL){
+      munmap((void*)image, image_size);
+      image = NULL;
+      image_size = 0;
     }
 
-    // Ensure this path has been added
-    Option* child = create_child(basename);
-    if(child == NULL){
-      cerr << "SPUD ERROR: Unexpected failure when creating child element" << endl;
-      exit(-1);
+    int file = open(filename.c_str(), O_RDONLY);
+    if(file < 0){
+      return SPUD_FILE_ERROR;
+    }
+    struct stat file_stat;
+    if(fstat(file, &file_stat) != 0 or size_t(file_stat.st_size) < sizeof(ImageHeader)){
+      close(file);
+      return SPUD_FILE_ERROR;
+    }
+    size_t size = file_stat.st_size;
+    void* mapped = mmap(NULL, size, PROT_READ, MAP_SHARED, file, 0);
+    close(file);
+    if(mapped == MAP_FAILED){
+      return SPUD_FILE_ERROR;
     }
 
-    // Store node attributes
-    for(const TiXmlAttribute* att = element->FirstAttribute();att;att = att->Next()){
-      string att_name(basename + "/" + att->Name());
-      set_attribute(att_name, att->ValueStr());
+    // Only the header is checked, so that loading does not read the whole
+    // image
+    const ImageHeader* header = (const ImageHeader*)mapped;
+    if(memcmp(header->magic, image_magic, sizeof(header->magic)) != 0
+      or header->version != image_version
+      or header->byte_order != snapshot_byte_order
+      or header->size != size
+      or header->root % 8 != 0 or header->root > size - sizeof(Node)
+      or header->seed_count == 0 or header->seeds > size or header->seed_count > (size - header->seeds) / sizeof(uint32_t)
+      or header->slot_count == 0 or header->slots % 8 != 0 or header->slots > size or header->slot_count > (size - header->slots) / sizeof(ImageRef)){
+      munmap(mapped, size);
+      return SPUD_FILE_ERROR;
     }
 
-    // Loop through all child elements
-    for(const TiXmlNode* cnode = node->FirstChild();cnode;cnode = cnode->NextSibling()){
-      switch(cnode->Type()){
-        case(TiXmlNode::ELEMENT):
-          break;
-        case(TiXmlNode::TEXT):
-          // Store node data
-          set_option(basename, cnode->ValueStr());
-          continue;
-        default:
-          continue;
-      }
+    image = (const char*)mapped;
+    image_size = size;
 
-      // Special case when the child of cnode is empty
-      if(!cnode->FirstChild()){
-        parse_node(basename, cnode);
-        continue;
+    return SPUD_NO_ERROR;
+  }
+
+  const OptionManager::FrozenOptions::Node* OptionManager::FrozenOptions::get_root() const{
+    return get_node(((const ImageHeader*)image)->root);
+  }
+
+  const OptionManager::FrozenOptions::Node* OptionManager::FrozenOptions::get_child(const Node* node, const string& key) const{
+    if(key == "/" or key.empty()){
+      return node;
+    }
+
+    // Most keys are found with a single lookup of the whole key. Keys with
+    // indices, and keys ending in // (which do not match any option), are
+    // resolved one name at a time.
+    string path = key.substr(0, key.find(' '));
+    if(path.find_first_of("[]") == string::npos and path.find_first_not_of('/') != string::npos
+      and (path.size() < 2 or path.compare(path.size() - 2, 2, "//") != 0)){
+      size_t key_size;
+      const char* node_key = get_string(node->key, key_size);
+      string full_key(node_key, key_size);
+      string::size_type start = path.find_first_not_of('/');
+      while(start != string::npos){
+        string::size_type end = path.find('/', start);
+        full_key += "/" + path.substr(start, end == string::npos ? string::npos : end - start);
+        start = end == string::npos ? end : path.find_first_not_of('/', end);
+      }
+      const Node* child = lookup(full_key);
+      if(child != NULL){
+        return child;
       }
+    }
+
+    string name, branch;
+    int index;
+    OptionError key_err = split_image_key(key, name, index, branch);
+    if(key_err != SPUD_NO_ERROR or name.empty()){
+      return NULL;
+    }
+
+    const Node* child = find_child(node, name, index);
+    if(child == NULL){
+      return NULL;
+    }else if(branch.empty()){
+      return child;
+    }else{
+      return get_child(child, branch);
+    }
+  }
 
-      const TiXmlElement* celement = cnode->ToElement();
+  const OptionManager::FrozenOptions::Node* OptionManager::FrozenOptions::get_child_at(const Node* node, const unsigned& index) const{
+    if(index >= node->child_count){
+      return NULL;
+    }
 
-      if(cnode->ValueStr() == string("integer_value")){
-        // Tokenise the data stored and convert to ints
-        vector<string> tokens;
-        tokenize(cnode->FirstChild()->ValueStr(), tokens);
+    const ImageRef* children = (const ImageRef*)(image + node->children);
 
-        // Find shape and rank
-        int rank;
-        vector<int> shape(2);
-        istringstream(celement->Attribute("rank")) >> rank;
-        if(rank == 0){
-          shape[0] = -1;  shape[1] = -1;
-        }else if(rank == 1){
-          shape[0] = tokens.size();  shape[1] = -1;
-        }else if(rank == 2){
-          istringstream(celement->Attribute("shape")) >> shape[0] >> shape[1];
-        }
+    return get_node(children[index].node);
+  }
 
-        vector<int> val;
-        val.resize(tokens.size());
-        for(size_t i = 0;i<tokens.size();i++){
-          istringstream(tokens[i]) >> val[i];
-        }
+  OptionError OptionManager::FrozenOptions::get_child_name(const Node* node, const unsigned& index, string& child_name) const{
+    if(index >= node->child_count){
+      return SPUD_KEY_ERROR;
+    }
 
-        set_option(basename + "/__value", val, rank, shape);
-        for(const TiXmlAttribute* att = celement->FirstAttribute();att;att = att->Next()){
-          string att_name(basename + "/__value/" + att->Name());
-          set_attribute(att_name, att->ValueStr());
-        }
-      }else if(cnode->ValueStr() == string("real_value")){
-        // Tokenise the data stored and convert to doubles
-        vector<string> tokens;
-        tokenize(cnode->FirstChild()->ValueStr(), tokens);
+    const ImageRef* children = (const ImageRef*)(image + node->children);
+    size_t size;
+    const char* name = get_string(children[index].key, size);
+    child_name.assign(name, size);
 
-        // Find shape and rank
-        int rank;
-        vector<int> shape(2);
-        istringstream(celement->Attribute("rank")) >> rank;
-        if(rank == 0){
-          shape[0] = -1;  shape[1] = -1;
-        }else if(rank == 1){
-          shape[0] = tokens.size();  shape[1] = -1;
-        }else if(rank == 2){
-          istringstream(celement->Attribute("shape")) >> shape[0] >> shape[1];
-        }
+    return SPUD_NO_ERROR;
+  }
 
-        vector<double> val;
-        val.resize(tokens.size());
-        for(size_t i = 0;i<tokens.size();i++){
-          for(size_t j = 0;j < tokens[i].size();j++){
-            tokens[i][j] = tolower(tokens[i][j]);
-          }
-          if(tokens[i] == "nan"){
-            val[i] = numeric_limits<double>::quiet_NaN();
-          }else if(tokens[i] == "inf"){
-            val[i] = numeric_limits<double>::infinity();
-          }else if(tokens[i] == "-inf"){
-            val[i] = -numeric_limits<double>::infinity();
-          }else{
-            istringstream(tokens[i]) >> val[i];
-          }
-        }
+  size_t OptionManager::FrozenOptions::get_number_of_children(const Node* node) const{
+    return node->child_count;
+  }
 
-        set_option(basename + "/__value", val, rank, shape);
-        for(const TiXmlAttribute* att = celement->FirstAttribute();att;att = att->Next()){
-          string att_name(basename + "/__value/" + att->Name());
-          set_attribute(att_name, att->ValueStr());
-        }
-      }else if(cnode->ValueStr() == string("string_value")){
-        set_option(basename + "/__value", cnode->FirstChild()->ValueStr());
-        for(const TiXmlAttribute* att = celement->FirstAttribute();att;att = att->Next()){
-          string att_name(basename + "/__value/" + att->Name());
-          set_attribute(att_name, att->ValueStr());
-        }
+  int OptionManager::FrozenOptions::option_count(const Node* node, const string& key) const{
+    string name, branch;
+    int index;
+    OptionError key_err = split_image_key(key, name, index, branch);
+    if(key_err != SPUD_NO_ERROR or name.empty()){
+      return 0;
+    }
+
+    // Children called name, or if there are none, children called name::*
+    const ImageRef* children = (const ImageRef*)(image + node->children);
+    vector<const Node*> exact, named;
+    string prefix = name + "::";
+    for(uint32_t i = 0;i < node->child_count;i++){
+      size_t size;
+      const char* child_name = get_string(children[i].key, size);
+      if(name.compare(0, string::npos, child_name, size) == 0){
+        exact.push_back(get_node(children[i].node));
+      }else if(size >= prefix.size() and prefix.compare(0, string::npos, child_name, prefix.size()) == 0){
+        named.push_back(get_node(children[i].node));
+      }
+    }
+    const vector<const Node*>& kids = exact.empty() ? named : exact;
+
+    int count = 0;
+    for(size_t i = 0;i < kids.size();i++){
+      if(index >= 0 and (int)i != index){
+        continue;
+      }
+      if(branch.empty()){
+        count++;
       }else{
-        parse_node(basename, cnode);
+        count += option_count(kids[i], branch);
       }
     }
+
+    return count;
   }
 
-  TiXmlElement* OptionManager::Option::to_element() const{
-    if(verbose)
-      cout << "TiXmlElement* OptionManager::Option:to_element(void) const\n";
+  void OptionManager::FrozenOptions::list_descendants(const Node* node, const string& key, vector<string>& keys, vector<const Node*>& descendants) const{
+    vector<string> names(node->child_count);
+    map<string, int> counts;
+    for(unsigned i = 0;i < node->child_count;i++){
+      get_child_name(node, i, names[i]);
+      counts[names[i]]++;
+    }
 
-    if(is_attribute){
-      cerr << "SPUD WARNING: Converting an attribute to an element" << endl;
+    map<string, int> positions;
+    for(unsigned i = 0;i < node->child_count;i++){
+      if(names[i] == "__value"){
+        continue;
+      }
+
+      string child_key = key + "/" + names[i];
+      if(counts[names[i]] > 1){
+        ostringstream index;
+        index << "[" << positions[names[i]]++ << "]";
+        child_key += index.str();
+      }
+
+      const Node* child = get_child_at(node, i);
+      keys.push_back(child_key);
+      descendants.push_back(child);
+      list_descendants(child, child_key, keys, descendants);
     }
 
-    // Create new element
-    TiXmlElement* ele = new TiXmlElement(node_name);
+    return;
+  }
 
-    // Set element name and name attribute if composite name
-    string node_name, name_attr;
-    split_node_name(node_name, name_attr);
-    if(name_attr.size() > 0){
-      ele->SetValue(node_name);
-      ele->SetAttribute("name", name_attr);
+  void OptionManager::FrozenOptions::find_matches(const Node* node, const string& key, const vector<PatternSegment>& segments, const size_t& first, vector<string>& keys, vector<const Node*>& matches) const{
+    vector<string> names(node->child_count);
+    map<string, int> counts;
+    for(unsigned i = 0;i < node->child_count;i++){
+      get_child_name(node, i, names[i]);
+      counts[names[i]]++;
     }
 
-    // Set data
-    TiXmlText* data_ele = new TiXmlText("");
-    data_ele->SetValue(data_as_string());
-    ele->LinkEndChild(data_ele);
+    // Children called name, or if there are none, children called name::*
+    const PatternSegment& segment = segments[first];
+    string prefix;
+    logical_t wildcard = segment.name.find('*') != string::npos;
+    if(!wildcard and counts.find(segment.name) == counts.end()){
+      prefix = segment.name + "::";
+    }
 
-    for(deque< pair<string, Option*> >::const_iterator iter = children.begin();iter != children.end();iter++){
-      if(iter->second->is_attribute){
-        // Add attribute
-        ele->SetAttribute(iter->second->node_name, iter->second->data_as_string());
-      }else{
-        TiXmlElement* child_ele = iter->second->to_element();
-        if(iter->second->node_name == "__value"){
-          // Detect data sub-element
-          switch(iter->second->get_option_type()){
-            case(SPUD_DOUBLE):
-              child_ele->SetValue("real_value");
-              break;
-            case(SPUD_INT):
-              child_ele->SetValue("integer_value");
-              break;
-            case(SPUD_NONE):
-              break;
-            case(SPUD_STRING):
-              child_ele->SetValue("string_value");
-              break;
-            default:
-              cerr << "SPUD ERROR: Invalid option type" << endl;
-              exit(-1);
-           }
+    map<string, int> positions;
+    int position = 0;
+    for(unsigned i = 0;i < node->child_count;i++){
+      int same_name = positions[names[i]]++;
+      if(names[i] == "__value"){
+        continue;
+      }else if(wildcard){
+        if(!match_wildcards(segment.name, names[i])){
+          continue;
         }
-        // Add child
-        ele->LinkEndChild(child_ele);
+      }else if(prefix.empty() ? names[i] != segment.name : names[i].compare(0, prefix.size(), prefix) != 0){
+        continue;
+      }
+      if(segment.index >= 0 and position++ != segment.index){
+        continue;
+      }
+
+      string child_key = key + "/" + names[i];
+      if(counts[names[i]] > 1){
+        ostringstream index;
+        index << "[" << same_name << "]";
+        child_key += index.str();
+      }
+
+      const Node* child = get_child_at(node, i);
+      if(first + 1 == segments.size()){
+        keys.push_back(child_key);
+        matches.push_back(child);
+      }else{
+        find_matches(child, child_key, segments, first + 1, keys, matches);
       }
     }
-    return ele;
+
+    return;
   }
 
-  void OptionManager::Option::tokenize(const string& str, vector<string>& tokens, const string& delimiters) const{
-    if(verbose)
-      cout << "void OptionManager::Option::tokenize(const string& str = " << str << ", vector<string>& tokens, const string& delimiters = " << delimiters << ")\n";
+  string OptionManager::FrozenOptions::get_name(const Node* node) const{
+    size_t size;
+    const char* name = get_string(node->name, size);
 
-    tokens.clear();
+    return string(name, size);
+  }
 
-    // Skip delimiters at beginning.
-    string::size_type lastPos = str.find_first_not_of(delimiters, 0);
+  const char* OptionManager::FrozenOptions::get_data(const Node* node) const{
+    return image + node->data;
+  }
+
+  OptionType OptionManager::FrozenOptions::get_option_type(const Node* node) const{
+    return (OptionType)get_node(node->value)->type;
+  }
 
-    // Find first "non-delimiter".
-    string::size_type pos     = str.find_first_of(delimiters, lastPos);
+  int OptionManager::FrozenOptions::get_option_rank(const Node* node) const{
+    return get_node(node->value)->rank;
+  }
 
-    while (string::npos != pos || string::npos != lastPos){
-      // Found a token, add it to the vector.
-      tokens.push_back(str.substr(lastPos, pos - lastPos));
+  vector<int> OptionManager::FrozenOptions::get_option_shape(const Node* node) const{
+    const Node* value = get_node(node->value);
+    vector<int> shape(2);
+    shape[0] = value->shape[0];
+    shape[1] = value->shape[1];
 
-      // Skip delimiters.  Note the "not_of"
-      lastPos = str.find_first_not_of(delimiters, pos);
+    return shape;
+  }
 
-      // Find next "non-delimiter"
-      pos = str.find_first_of(delimiters, lastPos);
+  OptionError OptionManager::FrozenOptions::get_option_view(const Node* node, const double*& data, size_t& size) const{
+    const Node* value = get_node(node->value);
+    if(value->type != SPUD_DOUBLE){
+      return SPUD_TYPE_ERROR;
     }
 
-    return;
+    data = (const double*)get_data(value);
+    size = value->size;
+
+    return SPUD_NO_ERROR;
   }
 
-  OptionError OptionManager::Option::split_name(const string& in, string& name, string& branch) const{
-    if(verbose)
-      cout << "OptionError OptionManager::Option::split_name(const string& in = " << in << ", string& name, string& branch) const\n";
+  OptionError OptionManager::FrozenOptions::get_option_view(const Node* node, const int*& data, size_t& size) const{
+    const Node* value = get_node(node->value);
+    if(value->type != SPUD_INT){
+      return SPUD_TYPE_ERROR;
+    }
 
-    name = "";
-    branch = "";
+    data = (const int*)get_data(value);
+    size = value->size;
 
-    string fullname = in.substr(0, min(in.size(), in.find_first_of(" ")));
+    return SPUD_NO_ERROR;
+  }
 
-    // Skip delimiters at beginning.
-    string::size_type lastPos = fullname.find_first_not_of("/", 0);
-    if(lastPos == string::npos){
-      return SPUD_NO_ERROR;
+  OptionError OptionManager::FrozenOptions::get_option_view(const Node* node, const char*& data, size_t& size) const{
+    const Node* value = get_node(node->value);
+    if(value->type != SPUD_STRING){
+      return SPUD_TYPE_ERROR;
     }
 
-    // Find next delimiter
-    string::size_type pos = fullname.find_first_of("/", lastPos);
-    if(pos == string::npos){
-      name = fullname.substr(lastPos, fullname.size() - lastPos);
-    }else{
-      name = fullname.substr(lastPos, pos - lastPos);
-      branch = fullname.substr(pos, fullname.size()-pos);
-    }
+    data = get_data(value);
+    size = value->size;
 
     return SPUD_NO_ERROR;
   }
 
-  OptionError OptionManager::Option::split_name(const string& in, string& name, int& index, string& branch) const{
-    if(verbose)
-      cout << "OptionError OptionManager::Option::split_name(const string& in = " << in << ", string& name, int& index, string& branch) const\n";
+  // PRIVATE METHODS
 
-    index = -1;
-    OptionError key_err = split_name(in, name, branch);
-    if(key_err != SPUD_NO_ERROR){
-      return key_err;
+  const OptionManager::FrozenOptions::Node* OptionManager::FrozenOptions::lookup(const string& key) const{
+    const ImageHeader* header = (const ImageHeader*)image;
+    uint64_t hash = key_hash(key.data(), key.size());
+    uint32_t seed = ((const uint32_t*)(image + header->seeds))[hash % header->seed_count];
+    if(seed == 0){
+      return NULL;
     }
 
-    // Extract the index from the name if necessary
-    string::size_type pos = name.find_first_of("[", 0);
-    string::size_type lastPos = name.find_first_of("]", 0);
-    if(lastPos < name.size() - 1){      
-      return SPUD_KEY_ERROR;
+    const ImageRef& slot = ((const ImageRef*)(image + header->slots))[slot_hash(hash, seed) % header->slot_count];
+    if(slot.node == 0){
+      return NULL;
     }
-    if((lastPos-pos) > 0){
-      istringstream(name.substr(pos + 1, lastPos - 1))>>index;
-      name = name.substr(0, pos);
+    size_t size;
+    const char* slot_key = get_string(slot.key, size);
+    if(key.compare(0, string::npos, slot_key, size) != 0){
+      return NULL;
     }
 
-    return SPUD_NO_ERROR;
+    return get_node(slot.node);
   }
 
-  void OptionManager::Option::split_node_name(string& node_name, string& name_attr) const{
-    if(verbose)
-      cout << "void OptionManager::Option::split_node_name(string& node_name, string& name_attr) const\n";
-
-    string::size_type firstPos = this->node_name.rfind("::");
-    if(firstPos == string::npos or firstPos == this->node_name.size() - 2){
-      node_name = this->node_name;
-      name_attr = "";
-    }else{
-      node_name = this->node_name.substr(0, firstPos);
-      name_attr = this->node_name.substr(firstPos + 2);
+  const OptionManager::FrozenOptions::Node* OptionManager::FrozenOptions::find_child(const Node* node, const string& name, const int& index) const{
+    if(index < 0){
+      // The first child called name, or if there is none the first child
+      // called name::*, is in the perfect hash
+      size_t size;
+      const char* node_key = get_string(node->key, size);
+
+      return lookup(string(node_key, size) + "/" + name);
+    }
+
+    const ImageRef* children = (const ImageRef*)(image + node->children);
+    string prefix = name + "::";
+    int exact = 0, named = 0;
+    const Node* named_child = NULL;
+    for(uint32_t i = 0;i < node->child_count;i++){
+      size_t size;
+      const char* child_name = get_string(children[i].key, size);
+      if(name.compare(0, string::npos, child_name, size) == 0){
+        if(exact++ == index){
+          return get_node(children[i].node);
+        }
+      }else if(size >= prefix.size() and prefix.compare(0, string::npos, child_name, prefix.size()) == 0){
+        if(named++ == index){
+          named_child = get_node(children[i].node);
+        }
+      }
     }
 
-    return;
+    // Children called name::* are only used if there is no child called name
+    return exact == 0 ? named_child : NULL;
   }
 
-  string OptionManager::Option::data_as_string() const{
-    if(verbose)
-      cout << "string OptionManager::Option::data_as_string(void) const\n";
+  const OptionManager::FrozenOptions::Node* OptionManager::FrozenOptions::get_node(const size_t& offset) const{
+    return (const Node*)(image + offset);
+  }
 
-    ostringstream data_as_string;
-    data_as_string.precision(numeric_limits< double >::digits10);
-    switch(get_option_type()){
-      case(SPUD_DOUBLE):
-        for(unsigned int i = 0;i < data_double.size();i++){
-          data_as_string << data_double[i];
-          if(i < data_double.size() - 1){
-            data_as_string << " ";
-          }
-        }
-        return data_as_string.str();
-      case(SPUD_INT):
-        for(unsigned int i = 0;i < data_int.size();i++){
-          data_as_string << data_int[i];
-          if(i < data_int.size() - 1){
-            data_as_string << " ";
-          }
-        }
-        return data_as_string.str();
-      case(SPUD_NONE):
-        return "";
-      case(SPUD_STRING):
-        return data_string;
-      default:
-        cerr << "SPUD ERROR: Invalid option type" << endl;
-        exit(-1);
-    }
+  const char* OptionManager::FrozenOptions::get_string(const size_t& offset, size_t& size) const{
+    uint64_t length;
+    memcpy(&length, image + offset, sizeof(length));
+    size = length;
+
+    return image + offset + sizeof(length);
   }
 
-  // END OF OptionManager::Option CLASS METHODS
+  // END OF OptionManager::FrozenOptions CLASS METHODS
 
   // The option manager
   OptionManager OptionManager::manager;
@@ -28,38 +28,221 @@
 #include "spud.h"
 #include "spud"
 
+#include <pthread.h>
+
 using namespace std;
 
 using namespace Spud;
 
+namespace{
+
+  // The supplied context, or the default context if it is NULL
+  OptionContext& get_context(SpudContext* context){
+    return context == NULL ? OptionContext::get_default() : *context;
+  }
+
+  // The buffer serialised by the last call to
+  // spud_context_write_options_buffer, if that call was passed a buffer too
+  // small to hold it. It is kept so that the call which follows with a buffer
+  // of the size returned copies it rather than serialising the options again,
+  // and is released by the next call, for any context or key, or when its
+  // context is destroyed. Options of the same generation serialise to the
+  // same buffer, so this may be used by any thread.
+  struct PendingBuffer{
+    const OptionContext* context;
+    string key;
+    long generation;
+    string buffer;
+  };
+
+  PendingBuffer pending_buffer = {NULL, "", -1, ""};
+  pthread_mutex_t pending_buffer_mutex = PTHREAD_MUTEX_INITIALIZER;
+
+}
+
 extern "C" {
 
-  void spud_clear_options(){
+  SpudContext* spud_create_context(){
+    return new OptionContext();
+  }
+
+  void spud_destroy_context(SpudContext* context){
+    string released;
+    pthread_mutex_lock(&pending_buffer_mutex);
+    if(pending_buffer.context == context){
+      released.swap(pending_buffer.buffer);
+      pending_buffer.context = NULL;
+      pending_buffer.key.clear();
+    }
+    pthread_mutex_unlock(&pending_buffer_mutex);
+    delete context;
+
+    return;
+  }
+
+  void spud_context_clear_options(SpudContext* context){
+    OptionContext::Scope scope(get_context(context));
     clear_options();
     
     return;
   }
 
-  void* spud_get_manager(){
+  void* spud_context_get_manager(SpudContext* context){
+    OptionContext::Scope scope(get_context(context));
     return get_manager();
   }
 
-  void spud_set_manager(void* m){
+  void spud_context_set_manager(SpudContext* context, void* m){
+    OptionContext::Scope scope(get_context(context));
     set_manager(m);
     return;
   }
 
-  int spud_load_options(const char* filename, const int filename_len)
+  int spud_context_load_options(SpudContext* context, const char* filename, const int filename_len)
   {
+    OptionContext::Scope scope(get_context(context));
     return load_options(string(filename, filename_len));
   }
 
-  int spud_write_options(const char* filename, const int filename_len)
+  int spud_context_load_lazy_options(SpudContext* context, const char* filename, const int filename_len)
+  {
+    OptionContext::Scope scope(get_context(context));
+    return load_lazy_options(string(filename, filename_len));
+  }
+
+  int spud_context_write_options(SpudContext* context, const char* filename, const int filename_len)
   {
+    OptionContext::Scope scope(get_context(context));
     return write_options(string(filename, filename_len));
   }
 
-  int spud_get_child_name(const char* key, const int key_len, const int index, char* child_name, const int child_name_len){
+  int spud_context_write_options_sidecar(SpudContext* context, const char* filename, const int filename_len, const size_t sidecar_threshold)
+  {
+    OptionContext::Scope scope(get_context(context));
+    return write_options(string(filename, filename_len), sidecar_threshold);
+  }
+
+  int spud_context_write_snapshot(SpudContext* context, const char* filename, const int filename_len)
+  {
+    OptionContext::Scope scope(get_context(context));
+    return write_snapshot(string(filename, filename_len));
+  }
+
+  int spud_context_write_options_buffer(SpudContext* context, const char* key, const int key_len, char* buffer, const size_t buffer_size, size_t* size)
+  {
+    OptionContext::Scope scope(get_context(context));
+    const OptionContext* options = &get_context(context);
+    string key_handle(key, key_len);
+    // Taken before the options are serialised, so that a change while they
+    // are serialised prevents the pending buffer from being used
+    long generation = get_generation();
+    string buffer_handle;
+    pthread_mutex_lock(&pending_buffer_mutex);
+    logical_t have_buffer = pending_buffer.context == options and pending_buffer.generation == generation and pending_buffer.key == key_handle;
+    buffer_handle.swap(pending_buffer.buffer);
+    pending_buffer.context = NULL;
+    pending_buffer.key.clear();
+    pthread_mutex_unlock(&pending_buffer_mutex);
+
+    if(!have_buffer){
+      // A pending buffer for other options is released outside the lock
+      string().swap(buffer_handle);
+      OptionError write_err = write_options_buffer(key_handle, buffer_handle);
+      if(write_err != SPUD_NO_ERROR){
+        return write_err;
+      }
+    }
+
+    *size = buffer_handle.size();
+    if(buffer_size >= buffer_handle.size()){
+      memcpy(buffer, buffer_handle.data(), buffer_handle.size());
+    }else{
+      pthread_mutex_lock(&pending_buffer_mutex);
+      pending_buffer.context = options;
+      pending_buffer.key.swap(key_handle);
+      pending_buffer.generation = generation;
+      pending_buffer.buffer.swap(buffer_handle);
+      pthread_mutex_unlock(&pending_buffer_mutex);
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  int spud_context_load_options_buffer(SpudContext* context, const char* key, const int key_len, const char* buffer, const size_t size)
+  {
+    OptionContext::Scope scope(get_context(context));
+    return load_options_buffer(string(key, key_len), string(buffer, size));
+  }
+
+  int spud_context_freeze_options(SpudContext* context, const char* filename, const int filename_len)
+  {
+    OptionContext::Scope scope(get_context(context));
+    return freeze_options(string(filename, filename_len));
+  }
+
+  int spud_context_load_frozen_options(SpudContext* context, const char* filename, const int filename_len)
+  {
+    OptionContext::Scope scope(get_context(context));
+    return load_frozen_options(string(filename, filename_len));
+  }
+
+  void spud_context_get_load_statistics(SpudContext* context, double* load_time, size_t* peak_buffer_size)
+  {
+    OptionContext::Scope scope(get_context(context));
+    get_load_statistics(*load_time, *peak_buffer_size);
+
+    return;
+  }
+
+  int spud_context_get_lazy_statistics(SpudContext* context, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, size_t* sizes, int* converted)
+  {
+    OptionContext::Scope scope(get_context(context));
+    vector<string> keys_handle;
+    vector<size_t> sizes_handle;
+    vector<logical_t> converted_handle;
+    get_lazy_statistics(keys_handle, sizes_handle, converted_handle);
+
+    *count = keys_handle.size();
+    *max_key_len = 0;
+    for(size_t i = 0;i < keys_handle.size();i++){
+      *max_key_len = max(*max_key_len, (int)keys_handle[i].size());
+      if((int)i < max_count){
+        char* key = keys + i * key_len;
+        size_t len = min(keys_handle[i].size(), (size_t)key_len);
+        memcpy(key, keys_handle[i].data(), len);
+        memset(key + len, ' ', key_len - len);
+        sizes[i] = sizes_handle[i];
+        converted[i] = converted_handle[i] ? 1 : 0;
+      }
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  void spud_context_get_allocation_statistics(SpudContext* context, size_t* allocations, size_t* deallocations, size_t* system_allocations, size_t* bytes_in_use, size_t* bytes_reserved)
+  {
+    OptionContext::Scope scope(get_context(context));
+    get_allocation_statistics(*allocations, *deallocations, *system_allocations, *bytes_in_use, *bytes_reserved);
+
+    return;
+  }
+
+  void spud_context_start_profiling(SpudContext* context, const char* filename, const int filename_len)
+  {
+    OptionContext::Scope scope(get_context(context));
+    start_profiling(string(filename, filename_len));
+
+    return;
+  }
+
+  int spud_context_stop_profiling(SpudContext* context)
+  {
+    OptionContext::Scope scope(get_context(context));
+    return stop_profiling();
+  }
+
+  int spud_context_get_child_name(SpudContext* context, const char* key, const int key_len, const int index, char* child_name, const int child_name_len){
+    OptionContext::Scope scope(get_context(context));
     string child_name_handle;
     OptionError get_name_err = get_child_name(string(key, key_len), index, child_name_handle);
     if(get_name_err != SPUD_NO_ERROR){
@@ -72,19 +255,46 @@ extern "C" {
     return SPUD_NO_ERROR;
   }
 
-  int spud_get_number_of_children(const char* key, const int key_len, int* child_count){
+  int spud_context_get_number_of_children(SpudContext* context, const char* key, const int key_len, int* child_count){
+    OptionContext::Scope scope(get_context(context));
     return get_number_of_children(string(key, key_len), *child_count);
   }
 
-  int spud_option_count(const char* key, const int key_len){
+  int spud_context_get_child_names(SpudContext* context, const char* key, const int key_len, char* child_names, const int child_name_len, const int max_count, int* count, int* max_name_len){
+    OptionContext::Scope scope(get_context(context));
+    vector<string> child_names_handle;
+    OptionError get_names_err = get_child_names(string(key, key_len), child_names_handle);
+    if(get_names_err != SPUD_NO_ERROR){
+      return get_names_err;
+    }
+
+    *count = child_names_handle.size();
+    *max_name_len = 0;
+    for(size_t i = 0;i < child_names_handle.size();i++){
+      *max_name_len = max(*max_name_len, (int)child_names_handle[i].size());
+      if((int)i < max_count){
+        char* child_name = child_names + i * child_name_len;
+        size_t len = min(child_names_handle[i].size(), (size_t)child_name_len);
+        memcpy(child_name, child_names_handle[i].data(), len);
+        memset(child_name + len, ' ', child_name_len - len);
+      }
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  int spud_context_option_count(SpudContext* context, const char* key, const int key_len){
+    OptionContext::Scope scope(get_context(context));
     return option_count(string(key, key_len));
   }
 
-  int spud_have_option(const char* key, const int key_len){
+  int spud_context_have_option(SpudContext* context, const char* key, const int key_len){
+    OptionContext::Scope scope(get_context(context));
     return have_option(string(key, key_len)) ? 1 : 0;
   }
 
-  int spud_get_option_type(const char* key, const int key_len, int* type){
+  int spud_context_get_option_type(SpudContext* context, const char* key, const int key_len, int* type){
+    OptionContext::Scope scope(get_context(context));
     OptionType type_handle;
     OptionError get_type_err = get_option_type(string(key, key_len), type_handle);
     if(get_type_err != SPUD_NO_ERROR){
@@ -96,11 +306,13 @@ extern "C" {
     return SPUD_NO_ERROR;
   }
 
-  int spud_get_option_rank(const char* key, const int key_len, int* rank){
+  int spud_context_get_option_rank(SpudContext* context, const char* key, const int key_len, int* rank){
+    OptionContext::Scope scope(get_context(context));
     return get_option_rank(string(key, key_len), *rank);
   }
 
-  int spud_get_option_shape(const char* key, const int key_len, int* shape){
+  int spud_context_get_option_shape(SpudContext* context, const char* key, const int key_len, int* shape){
+    OptionContext::Scope scope(get_context(context));
     vector<int> shape_handle;
     OptionError get_shape_err = get_option_shape(string(key, key_len), shape_handle);
     if(get_shape_err != SPUD_NO_ERROR){
@@ -115,86 +327,123 @@ extern "C" {
     return SPUD_NO_ERROR;
   }
 
-  int spud_get_option(const char* key, const int key_len, void* val){
-    string key_handle(key, key_len);
+  int spud_context_get_option(SpudContext* context, const char* key, const int key_len, void* val){
+    OptionContext::Scope scope(get_context(context));
+    OptionHandle handle;
+    OptionError get_handle_err = get_option_handle(string(key, key_len), handle);
+    if(get_handle_err != SPUD_NO_ERROR){
+      return get_handle_err;
+    }
+
+    return spud_context_get_option_by_handle(context, &handle, val);
+  }
+
+  int spud_context_get_option_handle(SpudContext* context, const char* key, const int key_len, OptionHandle* handle){
+    OptionContext::Scope scope(get_context(context));
+    return get_option_handle(string(key, key_len), *handle);
+  }
+
+  int spud_context_get_child_handle(SpudContext* context, const OptionHandle* parent, const char* key, const int key_len, OptionHandle* handle){
+    OptionContext::Scope scope(get_context(context));
+    return get_child_handle(*parent, string(key, key_len), *handle);
+  }
+  int spud_context_get_child_handle_by_index(SpudContext* context, const OptionHandle* parent, const int index, OptionHandle* handle){
+    OptionContext::Scope scope(get_context(context));
+    if(index < 0){
+      return SPUD_KEY_ERROR;
+    }
+
+    return get_child_handle(*parent, (unsigned)index, *handle);
+  }
 
+  int spud_context_get_child_name_by_handle(SpudContext* context, const OptionHandle* parent, const int index, char* child_name, const int child_name_len){
+    OptionContext::Scope scope(get_context(context));
+    if(index < 0){
+      return SPUD_KEY_ERROR;
+    }
+
+    string child_name_handle;
+    OptionError get_name_err = get_child_name(*parent, (unsigned)index, child_name_handle);
+    if(get_name_err != SPUD_NO_ERROR){
+      return get_name_err;
+    }
+
+    int copy_len = (int)child_name_handle.size() > child_name_len ? child_name_len : child_name_handle.size();
+    memcpy(child_name, child_name_handle.c_str(), copy_len);
+
+    return SPUD_NO_ERROR;
+  }
+
+  int spud_context_get_number_of_children_by_handle(SpudContext* context, const OptionHandle* parent, int* child_count){
+    OptionContext::Scope scope(get_context(context));
+    return get_number_of_children(*parent, *child_count);
+  }
+
+
+  int spud_context_get_option_type_by_handle(SpudContext* context, const OptionHandle* handle, int* type){
+    OptionContext::Scope scope(get_context(context));
+    OptionType type_handle;
+    OptionError get_type_err = get_option_type(*handle, type_handle);
+    if(get_type_err != SPUD_NO_ERROR){
+      return get_type_err;
+    }
+
+    *type = type_handle;
+
+    return SPUD_NO_ERROR;
+  }
+
+  int spud_context_get_option_rank_by_handle(SpudContext* context, const OptionHandle* handle, int* rank){
+    OptionContext::Scope scope(get_context(context));
+    return get_option_rank(*handle, *rank);
+  }
+
+  int spud_context_get_option_shape_by_handle(SpudContext* context, const OptionHandle* handle, int* shape){
+    OptionContext::Scope scope(get_context(context));
+    vector<int> shape_handle;
+    OptionError get_shape_err = get_option_shape(*handle, shape_handle);
+    if(get_shape_err != SPUD_NO_ERROR){
+      return get_shape_err;
+    }
+
+    shape[0] = -1;  shape[1] = -1;
+    for(size_t i = 0;i < shape_handle.size();i++){
+      shape[i] = shape_handle[i];
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  int spud_context_get_option_by_handle(SpudContext* context, const OptionHandle* handle, void* val){
+    OptionContext::Scope scope(get_context(context));
     OptionType type;
-    OptionError get_type_err = get_option_type(key_handle, type);
+    OptionError get_type_err = get_option_type(*handle, type);
     if(get_type_err != SPUD_NO_ERROR){
       return get_type_err;
     }
 
     int rank;
-    OptionError get_rank_err = get_option_rank(key_handle, rank);
+    OptionError get_rank_err = get_option_rank(*handle, rank);
     if(get_rank_err != SPUD_NO_ERROR){
       return get_rank_err;
     }
 
-    if(type == SPUD_DOUBLE){
-      if(rank == 0){
-        double val_handle;
-        OptionError get_err = get_option(key_handle, val_handle);
-        if(get_err != SPUD_NO_ERROR){
-          return get_err;
-        }
-        *((double*)val) = val_handle;
-      }else if(rank == 1){
-        vector<double> val_handle;
-        OptionError get_err = get_option(key_handle, val_handle);
-        if(get_err != SPUD_NO_ERROR){
-          return get_err;
-        }
-        for(size_t i = 0;i < val_handle.size();i++){
-          ((double*)val)[i] = val_handle[i];
-        }
-      }else if(rank == 2){
-        vector< vector<double> > val_handle;
-        OptionError get_err = get_option(key_handle, val_handle);
-        if(get_err != SPUD_NO_ERROR){
-          return get_err;
-        }
-        for(size_t i = 0;i < val_handle.size();i++){
-          for(size_t j = 0;j < val_handle[0].size();j++){
-            ((double*)val)[i * val_handle[0].size() + j] = val_handle[i][j];
-          }
-        }
-      }else{
+    if(type == SPUD_DOUBLE or type == SPUD_INT){
+      const void* data;
+      size_t size;
+      int shape[2];
+      OptionError get_err = (OptionError)spud_context_get_option_view_by_handle(context, handle, &data, &size, shape);
+      if(get_err != SPUD_NO_ERROR){
+        return get_err;
+      }else if(rank == 0 and size != 1){
         return SPUD_RANK_ERROR;
       }
-    }else if(type == SPUD_INT){
-      if(rank == 0){
-        int val_handle;
-        OptionError get_err = get_option(key_handle, val_handle);
-        if(get_err != SPUD_NO_ERROR){
-          return get_err;
-        }
-        *((int*)val) = val_handle;
-      }else if(rank == 1){
-        vector<int> val_handle;
-        OptionError get_err = get_option(key_handle, val_handle);
-        if(get_err != SPUD_NO_ERROR){
-          return get_err;
-        }
-        for(size_t i = 0;i < val_handle.size();i++){
-          ((int*)val)[i] = val_handle[i];
-        }
-      }else if(rank == 2){
-        vector< vector<int> > val_handle;
-        OptionError get_err = get_option(key_handle, val_handle);
-        if(get_err != SPUD_NO_ERROR){
-          return get_err;
-        }
-        for(size_t i = 0;i < val_handle.size();i++){
-          for(size_t j = 0;j < val_handle[0].size();j++){
-            ((int*)val)[i * val_handle[0].size() + j] = val_handle[i][j];
-          }
-        }
-      }else{
-        return SPUD_RANK_ERROR;
+      if(size > 0){
+        memcpy(val, data, size * (type == SPUD_DOUBLE ? sizeof(double) : sizeof(int)));
       }
     }else if(type == SPUD_STRING){
       string val_handle;
-      OptionError get_err = get_option(key_handle, val_handle);
+      OptionError get_err = get_option(*handle, val_handle);
       if(get_err != SPUD_NO_ERROR){
         return get_err;
       }
@@ -206,11 +455,151 @@ extern "C" {
     return SPUD_NO_ERROR;
   }
 
-  int spud_add_option(const char* key, const int key_len){
+  int spud_context_get_option_checked(SpudContext* context, const char* key, const int key_len, const int type, const int rank, int* shape, void* val){
+    OptionContext::Scope scope(get_context(context));
+    return get_option_checked(string(key, key_len), (OptionType)type, rank, shape, val);
+  }
+
+  int spud_context_get_option_checked_by_handle(SpudContext* context, const OptionHandle* handle, const int type, const int rank, int* shape, void* val){
+    OptionContext::Scope scope(get_context(context));
+    return get_option_checked(*handle, (OptionType)type, rank, shape, val);
+  }
+
+  int spud_context_get_option_view(SpudContext* context, const char* key, const int key_len, const void** data, size_t* size, int* shape){
+    OptionContext::Scope scope(get_context(context));
+    OptionHandle handle;
+    OptionError get_handle_err = get_option_handle(string(key, key_len), handle);
+    if(get_handle_err != SPUD_NO_ERROR){
+      return get_handle_err;
+    }
+
+    return spud_context_get_option_view_by_handle(context, &handle, data, size, shape);
+  }
+
+  int spud_context_get_option_view_by_handle(SpudContext* context, const OptionHandle* handle, const void** data, size_t* size, int* shape){
+    OptionContext::Scope scope(get_context(context));
+    OptionType type;
+    OptionError get_type_err = get_option_type(*handle, type);
+    if(get_type_err != SPUD_NO_ERROR){
+      return get_type_err;
+    }
+
+    vector<int> shape_handle;
+    OptionError get_err;
+    if(type == SPUD_DOUBLE){
+      const double* data_handle;
+      get_err = get_option_view(*handle, data_handle, *size, shape_handle);
+      *data = data_handle;
+    }else if(type == SPUD_INT){
+      const int* data_handle;
+      get_err = get_option_view(*handle, data_handle, *size, shape_handle);
+      *data = data_handle;
+    }else{
+      return SPUD_TYPE_ERROR;
+    }
+    if(get_err != SPUD_NO_ERROR){
+      return get_err;
+    }
+
+    shape[0] = -1;  shape[1] = -1;
+    for(size_t i = 0;i < shape_handle.size();i++){
+      shape[i] = shape_handle[i];
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  int spud_context_get_option_info(SpudContext* context, const char* keys, const int key_len, const int key_count, OptionInfo* info){
+    OptionContext::Scope scope(get_context(context));
+    vector<string> keys_handle(key_count);
+    for(int i = 0;i < key_count;i++){
+      const char* key = keys + i * key_len;
+      keys_handle[i] = string(key, find(key, key + key_len, '\0'));
+    }
+
+    vector<OptionInfo> info_handle;
+    get_option_info(keys_handle, info_handle);
+    if(key_count > 0){
+      memcpy(info, &info_handle[0], key_count * sizeof(OptionInfo));
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  int spud_context_get_option_info_by_prefix(SpudContext* context, const char* prefix, const int prefix_len, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, OptionInfo* info){
+    OptionContext::Scope scope(get_context(context));
+    vector<string> keys_handle;
+    vector<OptionInfo> info_handle;
+    OptionError get_err = get_option_info(string(prefix, prefix_len), keys_handle, info_handle);
+    if(get_err != SPUD_NO_ERROR){
+      return get_err;
+    }
+
+    *count = keys_handle.size();
+    *max_key_len = 0;
+    for(size_t i = 0;i < keys_handle.size();i++){
+      *max_key_len = max(*max_key_len, (int)keys_handle[i].size());
+      if((int)i < max_count){
+        char* key = keys + i * key_len;
+        size_t len = min(keys_handle[i].size(), (size_t)key_len);
+        memcpy(key, keys_handle[i].data(), len);
+        memset(key + len, ' ', key_len - len);
+        info[i] = info_handle[i];
+      }
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  int spud_context_find_options(SpudContext* context, const char* pattern, const int pattern_len, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, OptionHandle* handles){
+    OptionContext::Scope scope(get_context(context));
+    vector<string> keys_handle;
+    vector<OptionHandle> handles_handle;
+    OptionError find_err = find_options(string(pattern, pattern_len), keys_handle, handles_handle);
+    if(find_err != SPUD_NO_ERROR){
+      return find_err;
+    }
+
+    *count = keys_handle.size();
+    *max_key_len = 0;
+    for(size_t i = 0;i < keys_handle.size();i++){
+      *max_key_len = max(*max_key_len, (int)keys_handle[i].size());
+      if((int)i < max_count){
+        char* key = keys + i * key_len;
+        size_t len = min(keys_handle[i].size(), (size_t)key_len);
+        memcpy(key, keys_handle[i].data(), len);
+        memset(key + len, ' ', key_len - len);
+        handles[i] = handles_handle[i];
+      }
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  int spud_context_set_options(SpudContext* context, const char* keys, const int key_len, const int key_count, const OptionInfo* values, int* errors){
+    OptionContext::Scope scope(get_context(context));
+    vector<string> keys_handle(key_count);
+    for(int i = 0;i < key_count;i++){
+      const char* key = keys + i * key_len;
+      keys_handle[i] = string(key, find(key, key + key_len, '\0'));
+    }
+
+    vector<OptionError> errors_handle;
+    set_options(keys_handle, vector<OptionInfo>(values, values + key_count), errors_handle);
+    for(int i = 0;i < key_count;i++){
+      errors[i] = errors_handle[i];
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  int spud_context_add_option(SpudContext* context, const char* key, const int key_len){
+    OptionContext::Scope scope(get_context(context));
     return add_option(string(key, key_len));
   }
 
-  int spud_set_option(const char* key, const int key_len, const void* val, const int type, const int rank, const int* shape){
+  int spud_context_set_option(SpudContext* context, const char* key, const int key_len, const void* val, const int type, const int rank, const int* shape){
+    OptionContext::Scope scope(get_context(context));
     string key_handle(key, key_len);
 
     if(type == SPUD_DOUBLE){
@@ -264,25 +653,306 @@ extern "C" {
     }
   }
 
-  int spud_set_option_attribute(const char* key, const int key_len, const char* val, const int val_len){
+  int spud_context_set_option_attribute(SpudContext* context, const char* key, const int key_len, const char* val, const int val_len){
+    OptionContext::Scope scope(get_context(context));
     return set_option_attribute(string(key, key_len), string(val, val_len));
   }
   
-  int spud_move_option(const char* key1, const int key1_len, const char* key2, const int key2_len){
+  int spud_context_move_option(SpudContext* context, const char* key1, const int key1_len, const char* key2, const int key2_len){
+    OptionContext::Scope scope(get_context(context));
     return move_option(string(key1, key1_len), string(key2, key2_len));
   }
 
-  int spud_copy_option(const char* key1, const int key1_len, const char* key2, const int key2_len){
+  int spud_context_copy_option(SpudContext* context, const char* key1, const int key1_len, const char* key2, const int key2_len){
+    OptionContext::Scope scope(get_context(context));
     return copy_option(string(key1, key1_len), string(key2, key2_len));
   }
-  int spud_delete_option(const char* key, const int key_len){
+  int spud_context_delete_option(SpudContext* context, const char* key, const int key_len){
+    OptionContext::Scope scope(get_context(context));
     return delete_option(string(key, key_len));
   }
 
-  void spud_print_options(){
+  long spud_context_get_generation(SpudContext* context){
+    OptionContext::Scope scope(get_context(context));
+    return get_generation();
+  }
+
+  int spud_context_have_changed(SpudContext* context, const char* key, const int key_len, const long since){
+    OptionContext::Scope scope(get_context(context));
+    return have_changed(string(key, key_len), since) ? 1 : 0;
+  }
+
+  int spud_context_get_changes(SpudContext* context, const long since, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, int* changes){
+    OptionContext::Scope scope(get_context(context));
+    vector<string> keys_handle;
+    vector<OptionChange> changes_handle;
+    get_changes(since, keys_handle, changes_handle);
+
+    *count = keys_handle.size();
+    *max_key_len = 0;
+    for(size_t i = 0;i < keys_handle.size();i++){
+      *max_key_len = max(*max_key_len, (int)keys_handle[i].size());
+      if((int)i < max_count){
+        char* key = keys + i * key_len;
+        size_t len = min(keys_handle[i].size(), (size_t)key_len);
+        memcpy(key, keys_handle[i].data(), len);
+        memset(key + len, ' ', key_len - len);
+        changes[i] = changes_handle[i];
+      }
+    }
+
+    return SPUD_NO_ERROR;
+  }
+
+  int spud_context_write_changes(SpudContext* context, const char* filename, const int filename_len, const long since){
+    OptionContext::Scope scope(get_context(context));
+    return write_changes(string(filename, filename_len), since);
+  }
+
+  int spud_context_load_changes(SpudContext* context, const char* filename, const int filename_len){
+    OptionContext::Scope scope(get_context(context));
+    return load_changes(string(filename, filename_len));
+  }
+
+  void spud_context_print_options(SpudContext* context){
+    OptionContext::Scope scope(get_context(context));
     print_options();
 
     return;
   }
 
+  // Routines acting on the default options
+
+  void spud_clear_options(){
+    spud_context_clear_options(NULL);
+
+    return;
+  }
+
+  void* spud_get_manager(){
+    return spud_context_get_manager(NULL);
+  }
+
+  void spud_set_manager(void* m){
+    spud_context_set_manager(NULL, m);
+
+    return;
+  }
+
+  int spud_load_options(const char* filename, const int filename_len){
+    return spud_context_load_options(NULL, filename, filename_len);
+  }
+
+  int spud_load_lazy_options(const char* filename, const int filename_len){
+    return spud_context_load_lazy_options(NULL, filename, filename_len);
+  }
+
+  int spud_write_options(const char* filename, const int filename_len){
+    return spud_context_write_options(NULL, filename, filename_len);
+  }
+
+  int spud_write_options_sidecar(const char* filename, const int filename_len, const size_t sidecar_threshold){
+    return spud_context_write_options_sidecar(NULL, filename, filename_len, sidecar_threshold);
+  }
+
+  int spud_write_snapshot(const char* filename, const int filename_len){
+    return spud_context_write_snapshot(NULL, filename, filename_len);
+  }
+
+  int spud_write_options_buffer(const char* key, const int key_len, char* buffer, const size_t buffer_size, size_t* size){
+    return spud_context_write_options_buffer(NULL, key, key_len, buffer, buffer_size, size);
+  }
+
+  int spud_load_options_buffer(const char* key, const int key_len, const char* buffer, const size_t size){
+    return spud_context_load_options_buffer(NULL, key, key_len, buffer, size);
+  }
+
+  int spud_freeze_options(const char* filename, const int filename_len){
+    return spud_context_freeze_options(NULL, filename, filename_len);
+  }
+
+  int spud_load_frozen_options(const char* filename, const int filename_len){
+    return spud_context_load_frozen_options(NULL, filename, filename_len);
+  }
+
+  void spud_get_load_statistics(double* load_time, size_t* peak_buffer_size){
+    spud_context_get_load_statistics(NULL, load_time, peak_buffer_size);
+
+    return;
+  }
+
+  int spud_get_lazy_statistics(char* keys, const int key_len, const int max_count, int* count, int* max_key_len, size_t* sizes, int* converted){
+    return spud_context_get_lazy_statistics(NULL, keys, key_len, max_count, count, max_key_len, sizes, converted);
+  }
+
+  void spud_get_allocation_statistics(size_t* allocations, size_t* deallocations, size_t* system_allocations, size_t* bytes_in_use, size_t* bytes_reserved){
+    spud_context_get_allocation_statistics(NULL, allocations, deallocations, system_allocations, bytes_in_use, bytes_reserved);
+
+    return;
+  }
+
+  void spud_start_profiling(const char* filename, const int filename_len){
+    spud_context_start_profiling(NULL, filename, filename_len);
+
+    return;
+  }
+
+  int spud_stop_profiling(){
+    return spud_context_stop_profiling(NULL);
+  }
+
+  int spud_get_child_name(const char* key, const int key_len, const int index, char* child_name, const int child_name_len){
+    return spud_context_get_child_name(NULL, key, key_len, index, child_name, child_name_len);
+  }
+
+  int spud_get_number_of_children(const char* key, const int key_len, int* child_count){
+    return spud_context_get_number_of_children(NULL, key, key_len, child_count);
+  }
+
+  int spud_get_child_names(const char* key, const int key_len, char* child_names, const int child_name_len, const int max_count, int* count, int* max_name_len){
+    return spud_context_get_child_names(NULL, key, key_len, child_names, child_name_len, max_count, count, max_name_len);
+  }
+
+  int spud_option_count(const char* key, const int key_len){
+    return spud_context_option_count(NULL, key, key_len);
+  }
+
+  int spud_have_option(const char* key, const int key_len){
+    return spud_context_have_option(NULL, key, key_len);
+  }
+
+  int spud_get_option_type(const char* key, const int key_len, int* type){
+    return spud_context_get_option_type(NULL, key, key_len, type);
+  }
+
+  int spud_get_option_rank(const char* key, const int key_len, int* rank){
+    return spud_context_get_option_rank(NULL, key, key_len, rank);
+  }
+
+  int spud_get_option_shape(const char* key, const int key_len, int* shape){
+    return spud_context_get_option_shape(NULL, key, key_len, shape);
+  }
+
+  int spud_get_option(const char* key, const int key_len, void* val){
+    return spud_context_get_option(NULL, key, key_len, val);
+  }
+
+  int spud_get_option_handle(const char* key, const int key_len, OptionHandle* handle){
+    return spud_context_get_option_handle(NULL, key, key_len, handle);
+  }
+
+  int spud_get_child_handle(const OptionHandle* parent, const char* key, const int key_len, OptionHandle* handle){
+    return spud_context_get_child_handle(NULL, parent, key, key_len, handle);
+  }
+
+  int spud_get_child_handle_by_index(const OptionHandle* parent, const int index, OptionHandle* handle){
+    return spud_context_get_child_handle_by_index(NULL, parent, index, handle);
+  }
+
+  int spud_get_child_name_by_handle(const OptionHandle* parent, const int index, char* child_name, const int child_name_len){
+    return spud_context_get_child_name_by_handle(NULL, parent, index, child_name, child_name_len);
+  }
+
+  int spud_get_number_of_children_by_handle(const OptionHandle* parent, int* child_count){
+    return spud_context_get_number_of_children_by_handle(NULL, parent, child_count);
+  }
+
+  int spud_get_option_type_by_handle(const OptionHandle* handle, int* type){
+    return spud_context_get_option_type_by_handle(NULL, handle, type);
+  }
+
+  int spud_get_option_rank_by_handle(const OptionHandle* handle, int* rank){
+    return spud_context_get_option_rank_by_handle(NULL, handle, rank);
+  }
+
+  int spud_get_option_shape_by_handle(const OptionHandle* handle, int* shape){
+    return spud_context_get_option_shape_by_handle(NULL, handle, shape);
+  }
+
+  int spud_get_option_by_handle(const OptionHandle* handle, void* val){
+    return spud_context_get_option_by_handle(NULL, handle, val);
+  }
+
+  int spud_get_option_checked(const char* key, const int key_len, const int type, const int rank, int* shape, void* val){
+    return spud_context_get_option_checked(NULL, key, key_len, type, rank, shape, val);
+  }
+
+  int spud_get_option_checked_by_handle(const OptionHandle* handle, const int type, const int rank, int* shape, void* val){
+    return spud_context_get_option_checked_by_handle(NULL, handle, type, rank, shape, val);
+  }
+
+  int spud_get_option_view(const char* key, const int key_len, const void** data, size_t* size, int* shape){
+    return spud_context_get_option_view(NULL, key, key_len, data, size, shape);
+  }
+
+  int spud_get_option_view_by_handle(const OptionHandle* handle, const void** data, size_t* size, int* shape){
+    return spud_context_get_option_view_by_handle(NULL, handle, data, size, shape);
+  }
+
+  int spud_get_option_info(const char* keys, const int key_len, const int key_count, OptionInfo* info){
+    return spud_context_get_option_info(NULL, keys, key_len, key_count, info);
+  }
+
+  int spud_get_option_info_by_prefix(const char* prefix, const int prefix_len, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, OptionInfo* info){
+    return spud_context_get_option_info_by_prefix(NULL, prefix, prefix_len, keys, key_len, max_count, count, max_key_len, info);
+  }
+
+  int spud_find_options(const char* pattern, const int pattern_len, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, OptionHandle* handles){
+    return spud_context_find_options(NULL, pattern, pattern_len, keys, key_len, max_count, count, max_key_len, handles);
+  }
+
+  int spud_set_options(const char* keys, const int key_len, const int key_count, const OptionInfo* values, int* errors){
+    return spud_context_set_options(NULL, keys, key_len, key_count, values, errors);
+  }
+
+  int spud_add_option(const char* key, const int key_len){
+    return spud_context_add_option(NULL, key, key_len);
+  }
+
+  int spud_set_option(const char* key, const int key_len, const void* val, const int type, const int rank, const int* shape){
+    return spud_context_set_option(NULL, key, key_len, val, type, rank, shape);
+  }
+
+  int spud_set_option_attribute(const char* key, const int key_len, const char* val, const int val_len){
+    return spud_context_set_option_attribute(NULL, key, key_len, val, val_len);
+  }
+
+  int spud_move_option(const char* key1, const int key1_len, const char* key2, const int key2_len){
+    return spud_context_move_option(NULL, key1, key1_len, key2, key2_len);
+  }
+
+  int spud_copy_option(const char* key1, const int key1_len, const char* key2, const int key2_len){
+    return spud_context_copy_option(NULL, key1, key1_len, key2, key2_len);
+  }
+
+  int spud_delete_option(const char* key, const int key_len){
+    return spud_context_delete_option(NULL, key, key_len);
+  }
+
+  long spud_get_generation(){
+    return spud_context_get_generation(NULL);
+  }
+
+  int spud_have_changed(const char* key, const int key_len, const long since){
+    return spud_context_have_changed(NULL, key, key_len, since);
+  }
+
+  int spud_get_changes(const long since, char* keys, const int key_len, const int max_count, int* count, int* max_key_len, int* changes){
+    return spud_context_get_changes(NULL, since, keys, key_len, max_count, count, max_key_len, changes);
+  }
+
+  int spud_write_changes(const char* filename, const int filename_len, const long since){
+    return spud_context_write_changes(NULL, filename, filename_len, since);
+  }
+
+  int spud_load_changes(const char* filename, const int filename_len){
+    return spud_context_load_changes(NULL, filename, filename_len);
+  }
+
+  void spud_print_options(){
+    spud_context_print_options(NULL);
+
+    return;
+  }
+
 }
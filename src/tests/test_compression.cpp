@@ -0,0 +1,179 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+
+// Round trips options through each compressed format spud was built with,
+// and checks that the formats it was built without are refused. Built with
+// the same HAVE_LIB* flags as the library.
+
+#include <algorithm>
+#include <cstdio>
+#include <fstream>
+#include <iostream>
+#include <iterator>
+#include <string>
+#include <vector>
+
+#ifdef HAVE_LIBZSTD
+#include <zstd.h>
+#endif
+
+#include "spud"
+
+using namespace std;
+
+const int value_count = 100000;
+
+const char* filename = "test_compression.xml";
+
+void report_test(const string& title, const bool& fail, const string& msg){
+  if(fail){
+    cout << "Fail: " << title << "; error: " << msg << endl;
+  }else{
+    cout << "Pass: " << title << endl;
+  }
+}
+
+string read_file(const string& name){
+  ifstream file(name.c_str(), ios::binary);
+  return string(istreambuf_iterator<char>(file), istreambuf_iterator<char>());
+}
+
+void write_file(const string& name, const string& data){
+  ofstream file(name.c_str(), ios::binary);
+  file.write(data.data(), data.size());
+}
+
+// Load the options from the supplied file and test that they are those set
+// by set_values
+bool check_values(const string& name){
+  Spud::clear_options();
+  if(Spud::load_options(name) != Spud::SPUD_NO_ERROR){
+    return false;
+  }
+  vector<double> values;
+  if(Spud::get_option("/real_vector", values) != Spud::SPUD_NO_ERROR or values.size() != (size_t)value_count){
+    return false;
+  }
+  for(int i = 0;i < value_count;i++){
+    if(values[i] != i){
+      return false;
+    }
+  }
+
+  return true;
+}
+
+void set_values(){
+  write_file(filename, "<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n<options/>\n");
+  Spud::load_options(filename);
+  vector<double> values;
+  for(int i = 0;i < value_count;i++){
+    values.push_back(i);
+  }
+  Spud::set_option("/real_vector", values);
+}
+
+// Write the options compressed according to suffix, and test that they are
+// read back from the compressed file, from the same data without the suffix,
+// and that the data cut short is refused
+void test_round_trip(const string& suffix, const string& magic){
+  const string compressed_filename = filename + suffix;
+  set_values();
+  report_test("[Wrote " + suffix + " options]", Spud::write_options(compressed_filename) != Spud::SPUD_NO_ERROR, "Returned error code when writing options");
+  string data = read_file(compressed_filename);
+  report_test("[Wrote " + suffix + " magic]", data.compare(0, magic.size(), magic) != 0, "Options file not compressed");
+  report_test("[Loaded " + suffix + " options]", !check_values(compressed_filename), "Retrieved incorrect option data");
+  remove(compressed_filename.c_str());
+
+  write_file(filename, data);
+  report_test("[Detected " + suffix + " options]", !check_values(filename), "Retrieved incorrect option data");
+
+  write_file(filename, data.substr(0, data.size() / 2));
+  report_test("[File error for truncated " + suffix + " options]", Spud::load_options(filename) != Spud::SPUD_FILE_ERROR, "Returned incorrect error code when loading options");
+  remove(filename);
+}
+
+// Test that writing options compressed according to suffix is refused
+void test_unavailable(const string& suffix){
+  const string compressed_filename = filename + suffix;
+  set_values();
+  report_test("[File error for unavailable " + suffix + " compression]", Spud::write_options(compressed_filename) != Spud::SPUD_FILE_ERROR, "Returned incorrect error code when writing options");
+  remove(compressed_filename.c_str());
+  remove(filename);
+}
+
+#ifdef HAVE_LIBZSTD
+// Test that a file of several zstd frames, as written by parallel
+// compressors, is read as one
+void test_zstd_frames(){
+  set_values();
+  Spud::write_options(filename);
+  string data = read_file(filename);
+  string compressed;
+  const size_t frame_size = data.size() / 3 + 1;
+  for(size_t start = 0;start < data.size();start += frame_size){
+    const size_t size = min(frame_size, data.size() - start);
+    vector<char> frame(ZSTD_compressBound(size));
+    size_t frame_err = ZSTD_compress(&frame[0], frame.size(), data.data() + start, size, 1);
+    if(ZSTD_isError(frame_err)){
+      report_test("[Compressed zstd frames]", true, "Failed to compress test data");
+      return;
+    }
+    compressed.append(&frame[0], frame_err);
+  }
+  write_file(filename, compressed);
+  report_test("[Loaded concatenated zstd frames]", !check_values(filename), "Retrieved incorrect option data");
+  remove(filename);
+}
+#endif
+
+int main(){
+  cout << "*** Testing compressed options files ***" << endl;
+
+#ifdef HAVE_LIBZ
+  test_round_trip(".gz", "\x1f\x8b");
+#else
+  test_unavailable(".gz");
+#endif
+
+#ifdef HAVE_LIBBZ2
+  test_round_trip(".bz2", "BZh");
+#else
+  test_unavailable(".bz2");
+#endif
+
+#ifdef HAVE_LIBZSTD
+  test_round_trip(".zst", "\x28\xb5\x2f\xfd");
+  test_zstd_frames();
+#else
+  test_unavailable(".zst");
+#endif
+
+  Spud::clear_options();
+
+  return 0;
+}
@@ -26,6 +26,7 @@
 
 subroutine test_fspud
 
+  use iso_c_binding
   use spud
   use unittest_tools
 
@@ -69,12 +70,39 @@ subroutine test_fspud
   
   print *, "*** Testing set_option for integer scalar, with option index ***"
   call test_indexed_key("/integer_scalar", 42)
+
+  print *, "*** Testing delete_option for integer scalar, with option index ***"
+  call test_delete_indexed_key("/integer_scalar", 42)
   
   print *, "*** Testing move_option ***"
   call test_move_option("/type_none", "/type_none_2")
       
   print *, "*** Testing copy_option ***"
   call test_copy_option("/type_none", "/type_none_2")
+
+  print *, "*** Testing option handles ***"
+  call test_option_handle("/parent", "real_tensor")
+
+  print *, "*** Testing option views ***"
+  call test_option_view("/parent")
+
+  print *, "*** Testing allocatable options ***"
+  call test_option_allocatable("/parent")
+
+  print *, "*** Testing option info ***"
+  call test_option_info("/parent")
+
+  print *, "*** Testing child enumeration ***"
+  call test_child_enumeration("/parent")
+
+  print *, "*** Testing pattern queries ***"
+  call test_find_options("/parent")
+
+  print *, "*** Testing option contexts ***"
+  call test_option_contexts("/integer_scalar")
+
+  print *, "*** Testing profiling ***"
+  call test_profiling("/integer_scalar", "test_fspud_profile.csv")
   
 contains
   
@@ -868,6 +896,38 @@ contains
     call test_delete_option(trim(key) // "[0]")
     
   end subroutine test_indexed_key
+
+  subroutine test_delete_indexed_key(key, test_integer)
+    character(len = *), intent(in) :: key
+    integer, intent(in) :: test_integer
+
+    integer :: i, integer_val, stat
+
+    do i = 0, 4
+      call set_option(trim(key) // "[" // int2str(i) // "]", test_integer + i, stat)
+      call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+    end do
+    call report_test("[Option count]", option_count(key) /= 5, .false., "Returned incorrect option count")
+
+    call delete_option(trim(key) // "[2]", stat)
+    call report_test("[Deleted option]", stat /= SPUD_NO_ERROR, .false., "Returned error code when deleting option")
+    call report_test("[Option count]", option_count(key) /= 4, .false., "Returned incorrect option count")
+
+    call get_option(trim(key) // "[1]", integer_val, stat)
+    call report_test("[Extracted option data]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving option data")
+    call report_test("[Extracted correct option data]", integer_val /= test_integer + 1, .false., "Retrieved incorrect option data")
+    call get_option(trim(key) // "[2]", integer_val, stat)
+    call report_test("[Extracted option data]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving option data")
+    call report_test("[Extracted correct option data]", integer_val /= test_integer + 3, .false., "Retrieved incorrect option data")
+    call get_option(trim(key) // "[4]", integer_val, stat)
+    call report_test("[Key error when extracting option data]", stat /= SPUD_KEY_ERROR, .false., "Returned incorrect error code when retrieving option data")
+
+    do i = 3, 0, -1
+      call test_delete_option(trim(key) // "[" // int2str(i) // "]")
+    end do
+    call test_key_errors(key)
+
+  end subroutine test_delete_indexed_key
   
   subroutine test_move_option(key1, key2)
     character(len = *), intent(in) :: key1
@@ -911,6 +971,33 @@ contains
     
     call test_delete_option(key1)
     call test_delete_option(key2)
+
+    ! Indexed and named destinations refer to the options before the move
+    call set_option(trim(key1) // "[0]/c::y", (/42.0_D, 43.0_D/), stat)
+    call set_option(trim(key1) // "[1]", 0.5_D, stat)
+    call move_option(trim(key1) // "[0]", trim(key1) // "[1]/c::y/e::z", stat)
+    call report_test("[Moved option to indexed key]", stat /= SPUD_NO_ERROR, .false., "Returned error code when moving option")
+    call report_test("[Moved option under existing option]", option_count(trim(key1)) /= 1, .false., "Created new option for indexed key")
+    call test_key_present(trim(key1) // "/c::y/e::z/c::y")
+
+    call test_delete_option(key1)
+
+    call add_option(trim(key2) // "::y", stat)
+    call add_option(trim(key2) // "::x", stat)
+    call move_option(trim(key2) // "::y", trim(key2) // "[1]/b", stat)
+    call report_test("[Moved option to key after it]", stat /= SPUD_NO_ERROR, .false., "Returned error code when moving option")
+    call report_test("[Moved option under existing option]", option_count(trim(key2)) /= 1, .false., "Created new option for indexed key")
+    call test_key_present(trim(key2) // "::x/b")
+
+    call test_delete_option(key2)
+
+    call add_option(trim(key1), stat)
+    call move_option(trim(key1), trim(key1) // "/y/z", stat)
+    call report_test("[Key error when moving option into itself]", stat /= SPUD_KEY_ERROR, .false., "Returned incorrect error code when moving option")
+    call test_key_present(key1)
+    call test_key_errors(trim(key1) // "/y")
+
+    call test_delete_option(key1)
   
   end subroutine test_move_option
 
@@ -918,7 +1005,7 @@ contains
     character(len = *), intent(in) :: key1
     character(len = *), intent(in) :: key2
   
-    integer :: stat
+    integer :: integer_val, stat
   
     call add_option(trim(key1), stat)
     call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
@@ -958,7 +1045,435 @@ contains
     
     call test_delete_option(key1)
     call test_delete_option(key2)
-  
+
+    call set_option(trim(key1) // "/integer", 42, stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+
+    call copy_option(trim(key1), trim(key2))
+    call set_option(trim(key2) // "/integer", 43, stat)
+    call report_test("[Set existing option]", stat /= SPUD_NO_ERROR, .false., "Returned error code when setting option")
+    call get_option(trim(key1) // "/integer", integer_val, stat)
+    call report_test("[Copy is independent of original]", integer_val /= 42, .false., "Setting copied option changed the original")
+
+    call test_delete_option(key1)
+    call test_delete_option(key2)
+
+    ! Copies share their subtrees until either side is changed
+    call set_option(trim(key1) // "/deep/inner/integer", 42, stat)
+    call set_option(trim(key1) // "/deep/other", 1, stat)
+    call copy_option(trim(key1), trim(key2))
+    call set_option(trim(key2) // "/deep/inner/integer", 43, stat)
+    call get_option(trim(key1) // "/deep/inner/integer", integer_val, stat)
+    call report_test("[Deep copy is independent of original]", integer_val /= 42, .false., "Setting copied option changed the original")
+    call set_option(trim(key1) // "/deep/other", 2, stat)
+    call get_option(trim(key2) // "/deep/other", integer_val, stat)
+    call report_test("[Original is independent of deep copy]", integer_val /= 1, .false., "Setting original option changed the copy")
+    call delete_option(trim(key2) // "/deep/inner", stat)
+    call test_key_present(trim(key1) // "/deep/inner/integer")
+
+    call copy_option(trim(key1), trim(key1) // "/deep/copy")
+    call test_key_present(trim(key1) // "/deep/copy/deep/inner/integer")
+    call test_key_errors(trim(key1) // "/deep/copy/deep/copy")
+
+    call move_option(trim(key2), trim(key2) // "_moved")
+    call set_option(trim(key2) // "_moved/deep/other", 3, stat)
+    call get_option(trim(key1) // "/deep/other", integer_val, stat)
+    call report_test("[Moved copy is independent of original]", integer_val /= 2, .false., "Setting moved option changed the original")
+
+    call test_delete_option(key1)
+    call test_delete_option(trim(key2) // "_moved")
+
   end subroutine test_copy_option
+
+  subroutine test_option_handle(key, child_key)
+    character(len = *), intent(in) :: key
+    character(len = *), intent(in) :: child_key
+
+    character(len = 255) :: test_char
+    integer :: stat, test_integer_scalar
+    integer, dimension(2) :: shape
+    real(D), dimension(2, 3) :: real_tensor_val, test_real_tensor
+    type(option_handle) :: handle, child_handle
+
+    real_tensor_val = reshape((/42.0_D, 43.0_D, 44.0_D, 45.0_D, 46.0_D, 47.0_D/), (/2, 3/))
+
+    call set_option(trim(key) // "/" // trim(child_key), real_tensor_val, stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+    call set_option(trim(key) // "/integer_scalar", 42, stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+
+    call get_option_handle(trim(key) // "/integer_scalar", handle, stat)
+    call report_test("[Resolved option handle]", stat /= SPUD_NO_ERROR, .false., "Returned error code when resolving option handle")
+    call report_test("[Correct option type]", option_type(handle) /= SPUD_INTEGER, .false., "Incorrect option type returned")
+    call report_test("[Correct option rank]", option_rank(handle) /= 0, .false., "Incorrect option rank returned")
+    call get_option(handle, test_integer_scalar, stat)
+    call report_test("[Extracted option data]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving option data")
+    call report_test("[Extracted correct option data]", test_integer_scalar /= 42, .false., "Retrieved incorrect option data")
+    call get_option(handle, test_char, stat)
+    call report_test("[Type error when extracting option data]", stat /= SPUD_TYPE_ERROR, .false., "Returned incorrect error code when retrieving option data")
+
+    call get_option_handle(key, handle, stat)
+    call report_test("[Resolved option handle]", stat /= SPUD_NO_ERROR, .false., "Returned error code when resolving option handle")
+    call get_child_handle(handle, child_key, child_handle, stat)
+    call report_test("[Resolved child handle]", stat /= SPUD_NO_ERROR, .false., "Returned error code when resolving child handle")
+    shape = option_shape(child_handle, stat)
+    call report_test("[Correct option shape]", count(shape /= (/2, 3/)) /= 0, .false., "Incorrect option shape returned")
+    call get_option(child_handle, test_real_tensor, stat)
+    call report_test("[Extracted option data]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving option data")
+    call report_test("[Extracted correct option data]", maxval(abs(test_real_tensor - real_tensor_val)) > tol, .false., "Retrieved incorrect option data")
+    call get_child_handle(handle, "missing", child_handle, stat)
+    call report_test("[Key error when resolving child handle]", stat /= SPUD_KEY_ERROR, .false., "Returned incorrect error code when resolving child handle")
+
+    call get_child_handle(handle, child_key, child_handle, stat)
+    call set_option(trim(key) // "/integer_scalar", 43, stat)
+    call report_test("[Set existing option]", stat /= SPUD_NO_ERROR, .false., "Returned error code when setting option")
+    call get_option(child_handle, test_real_tensor, stat)
+    call report_test("[Handle error after setting option]", stat /= SPUD_HANDLE_ERROR, .false., "Returned incorrect error code when retrieving option data")
+
+    call get_child_handle(handle, child_key, child_handle, stat)
+    call report_test("[Handle error when resolving child handle]", stat /= SPUD_HANDLE_ERROR, .false., "Returned incorrect error code when resolving child handle")
+
+    call get_option_handle(trim(key) // "/" // trim(child_key), child_handle, stat)
+    call test_delete_option(key)
+    call get_option(child_handle, test_real_tensor, stat)
+    call report_test("[Handle error after deleting option]", stat /= SPUD_HANDLE_ERROR, .false., "Returned incorrect error code when retrieving option data")
+
+  end subroutine test_option_handle
+
+  subroutine test_option_view(key)
+    character(len = *), intent(in) :: key
+
+    integer :: stat
+    integer, dimension(:), pointer :: integer_vector_view
+    real(D), dimension(2, 3) :: real_tensor_val
+    real(D), dimension(:), pointer :: real_vector_view
+    real(D), dimension(:, :), pointer :: real_tensor_view
+    type(option_handle) :: handle
+
+    real_tensor_val = reshape((/42.0_D, 43.0_D, 44.0_D, 45.0_D, 46.0_D, 47.0_D/), (/2, 3/))
+
+    call set_option(trim(key) // "/real_tensor", real_tensor_val, stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+    call set_option(trim(key) // "/integer_vector", (/42, 43, 44/), stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+
+    call get_option_view(trim(key) // "/real_tensor", real_tensor_view, stat)
+    call report_test("[Extracted option view]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving option view")
+    call report_test("[Correct option view shape]", count(shape(real_tensor_view) /= (/3, 2/)) /= 0, .false., "Incorrect option view shape returned")
+    call report_test("[Extracted correct option view]", maxval(abs(transpose(real_tensor_view) - real_tensor_val)) > tol, .false., "Retrieved incorrect option view")
+    call get_option_view(trim(key) // "/real_tensor", real_vector_view, stat)
+    call report_test("[Rank error when extracting option view]", stat /= SPUD_RANK_ERROR, .false., "Returned incorrect error code when retrieving option view")
+    call report_test("[Null option view after error]", associated(real_vector_view), .false., "Option view associated after error")
+
+    call get_option_handle(trim(key) // "/integer_vector", handle, stat)
+    call get_option_view(handle, integer_vector_view, stat)
+    call report_test("[Extracted option view]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving option view")
+    call report_test("[Extracted correct option view]", count(integer_vector_view /= (/42, 43, 44/)) > 0, .false., "Retrieved incorrect option view")
+    call get_option_view(handle, real_vector_view, stat)
+    call report_test("[Type error when extracting option view]", stat /= SPUD_TYPE_ERROR, .false., "Returned incorrect error code when retrieving option view")
+
+    call get_option_view(trim(key) // "/missing", real_vector_view, stat)
+    call report_test("[Key error when extracting option view]", stat /= SPUD_KEY_ERROR, .false., "Returned incorrect error code when retrieving option view")
+
+    call test_delete_option(key)
+
+  end subroutine test_option_view
+
+  subroutine test_option_allocatable(key)
+    character(len = *), intent(in) :: key
+
+    integer :: stat
+    character(len = :), allocatable :: character_val
+    integer, dimension(:), allocatable :: integer_vector_val
+    integer, dimension(:, :), allocatable :: integer_tensor_val
+    real(D), dimension(:), allocatable :: real_vector_val
+    real(D), dimension(2, 3) :: real_tensor_set
+    real(D), dimension(:, :), allocatable :: real_tensor_val
+
+    real_tensor_set = reshape((/42.0_D, 43.0_D, 44.0_D, 45.0_D, 46.0_D, 47.0_D/), (/2, 3/))
+
+    call set_option(trim(key) // "/real_tensor", real_tensor_set, stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+    call set_option(trim(key) // "/real_vector", (/42.0_D, 43.0_D, 44.0_D/), stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+    call set_option(trim(key) // "/integer_tensor", reshape((/42, 43, 44, 45, 46, 47/), (/3, 2/)), stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+    call set_option(trim(key) // "/integer_vector", (/42, 43/), stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+    call set_option(trim(key) // "/character", "Forty Two", stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+
+    call get_option_allocatable(trim(key) // "/real_tensor", real_tensor_val, stat)
+    call report_test("[Extracted allocatable option]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving allocatable option")
+    call report_test("[Correct allocatable option shape]", count(shape(real_tensor_val) /= (/2, 3/)) /= 0, .false., "Incorrect allocatable option shape returned")
+    call report_test("[Extracted correct allocatable option]", maxval(abs(real_tensor_val - real_tensor_set)) > tol, .false., "Retrieved incorrect allocatable option")
+    call get_option_allocatable(trim(key) // "/real_vector", real_vector_val, stat)
+    call report_test("[Extracted allocatable option]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving allocatable option")
+    call report_test("[Extracted correct allocatable option]", maxval(abs(real_vector_val - (/42.0_D, 43.0_D, 44.0_D/))) > tol, .false., "Retrieved incorrect allocatable option")
+    call get_option_allocatable(trim(key) // "/integer_tensor", integer_tensor_val, stat)
+    call report_test("[Extracted allocatable option]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving allocatable option")
+    call report_test("[Extracted correct allocatable option]", any(shape(integer_tensor_val) /= (/3, 2/)) .or. any(integer_tensor_val /= reshape((/42, 43, 44, 45, 46, 47/), (/3, 2/))), .false., "Retrieved incorrect allocatable option")
+    call get_option_allocatable(trim(key) // "/integer_vector", integer_vector_val, stat)
+    call report_test("[Extracted allocatable option]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving allocatable option")
+    call report_test("[Extracted correct allocatable option]", any(integer_vector_val /= (/42, 43/)), .false., "Retrieved incorrect allocatable option")
+    call get_option_allocatable(trim(key) // "/character", character_val, stat)
+    call report_test("[Extracted allocatable option]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving allocatable option")
+    call report_test("[Extracted correct allocatable option]", character_val /= "Forty Two" .or. len(character_val) /= 9, .false., "Retrieved incorrect allocatable option")
+
+    call set_option(trim(key) // "/integer_vector", (/42, 43, 44, 45/), stat)
+    call get_option_allocatable(trim(key) // "/integer_vector", integer_vector_val, stat)
+    call report_test("[Reallocated allocatable option]", size(integer_vector_val) /= 4, .false., "Allocatable option not reallocated to the option shape")
+
+    call get_option_allocatable(trim(key) // "/real_tensor", real_vector_val, stat)
+    call report_test("[Rank error when extracting allocatable option]", stat /= SPUD_RANK_ERROR, .false., "Returned incorrect error code when retrieving allocatable option")
+    call report_test("[Unallocated after error]", allocated(real_vector_val), .false., "Allocatable option allocated after error")
+    call get_option_allocatable(trim(key) // "/integer_vector", real_vector_val, stat)
+    call report_test("[Type error when extracting allocatable option]", stat /= SPUD_TYPE_ERROR, .false., "Returned incorrect error code when retrieving allocatable option")
+    call get_option_allocatable(trim(key) // "/missing", character_val, stat)
+    call report_test("[Key error when extracting allocatable option]", stat /= SPUD_KEY_ERROR, .false., "Returned incorrect error code when retrieving allocatable option")
+
+    call test_delete_option(key)
+
+  end subroutine test_option_allocatable
+
+  subroutine test_option_info(key)
+    character(len = *), intent(in) :: key
+
+    character(len = 255), dimension(3) :: keys
+    character(len = 255), dimension(:), allocatable :: prefix_keys
+    integer :: stat
+    integer, dimension(:), pointer :: integer_vector_view
+    real(D), dimension(2, 3) :: real_tensor_val
+    type(option_info), dimension(3) :: info
+    type(option_info), dimension(:), allocatable :: prefix_info
+
+    real_tensor_val = reshape((/42.0_D, 43.0_D, 44.0_D, 45.0_D, 46.0_D, 47.0_D/), (/2, 3/))
+
+    call set_option(trim(key) // "/real_tensor", real_tensor_val, stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+    call set_option(trim(key) // "/integer_vector", (/42, 43, 44/), stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+
+    keys(1) = trim(key) // "/real_tensor"
+    keys(2) = trim(key) // "/integer_vector"
+    keys(3) = trim(key) // "/missing"
+    call get_option_info(keys, info)
+    call report_test("[Extracted option info]", any(info(:2)%error /= SPUD_NO_ERROR), .false., "Returned error code when retrieving option info")
+    call report_test("[Key error when extracting option info]", info(3)%error /= SPUD_KEY_ERROR, .false., "Returned incorrect error code when retrieving option info")
+    call report_test("[Correct option info type]", info(1)%type /= SPUD_REAL .or. info(2)%type /= SPUD_INTEGER, .false., "Incorrect option type returned")
+    call report_test("[Correct option info rank]", info(1)%rank /= 2 .or. info(2)%rank /= 1, .false., "Incorrect option rank returned")
+    call report_test("[Correct option info shape]", count(info(1)%shape /= option_shape(keys(1))) /= 0, .false., "Incorrect option shape returned")
+    call report_test("[Correct option info size]", info(1)%size /= 6 .or. info(2)%size /= 3, .false., "Incorrect option size returned")
+    call c_f_pointer(info(2)%data, integer_vector_view, (/int(info(2)%size)/))
+    call report_test("[Extracted correct option info data]", count(integer_vector_view /= (/42, 43, 44/)) > 0, .false., "Retrieved incorrect option data")
+    call report_test("[Option info handle]", option_rank(info(1)%handle) /= 2, .false., "Option info returned invalid handle")
+
+    call get_option_info(key, prefix_keys, prefix_info, stat)
+    call report_test("[Extracted option info by prefix]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving option info")
+    call report_test("[Correct number of options by prefix]", size(prefix_keys) /= 2 .or. size(prefix_info) /= 2, .false., "Incorrect number of options returned")
+    if(size(prefix_keys) == 2) then
+      call report_test("[Correct option keys by prefix]", any(prefix_keys /= keys(:2)), .false., "Incorrect option keys returned")
+      call report_test("[Correct option info by prefix]", any(prefix_info%type /= info(:2)%type), .false., "Incorrect option info returned")
+    end if
+    deallocate(prefix_keys, prefix_info)
+
+    call get_option_info(trim(key) // "/missing", prefix_keys, prefix_info, stat)
+    call report_test("[Key error when extracting option info by prefix]", stat /= SPUD_KEY_ERROR, .false., "Returned incorrect error code when retrieving option info")
+
+    call test_delete_option(key)
+
+  end subroutine test_option_info
+
+  subroutine test_child_enumeration(key)
+    character(len = *), intent(in) :: key
+
+    character(len = 255) :: child_name
+    character(len = 255), dimension(:), allocatable :: child_names
+    integer :: child_count, i, stat
+    type(option_handle) :: child_handle, handle
+
+    call set_option(trim(key) // "/child_a", 42, stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+    call set_option(trim(key) // "/child_b", 43, stat)
+    call report_test("[New option]", stat /= SPUD_NEW_KEY_WARNING, .false., "Failed to return new key warning when setting option")
+
+    call get_child_names(key, child_names, stat)
+    call report_test("[Extracted child names]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving child names")
+    call report_test("[Correct number of child names]", size(child_names) /= 2, .false., "Incorrect number of child names returned")
+    if(size(child_names) == 2) then
+      call report_test("[Correct child names]", child_names(1) /= "child_a" .or. child_names(2) /= "child_b", .false., "Incorrect child names returned")
+    end if
+    deallocate(child_names)
+    call get_child_names(trim(key) // "/missing", child_names, stat)
+    call report_test("[Key error when extracting child names]", stat /= SPUD_KEY_ERROR, .false., "Returned incorrect error code when retrieving child names")
+
+    call get_option_handle(key, handle, stat)
+    call get_number_of_children(handle, child_count, stat)
+    call report_test("[Extracted number of children by handle]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving number of children")
+    call report_test("[Correct number of children by handle]", child_count /= 2, .false., "Incorrect number of children returned")
+    do i = 0, child_count - 1
+      call get_child_name(handle, i, child_name, stat)
+      call report_test("[Extracted child name by handle]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving child name")
+      call get_child_handle(handle, i, child_handle, stat)
+      call report_test("[Extracted child handle by index]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving child handle")
+      call report_test("[Correct child handle by index]", option_type(child_handle) /= SPUD_INTEGER, .false., "Incorrect child handle returned")
+    end do
+    call report_test("[Correct child name by handle]", child_name /= "child_b", .false., "Incorrect child name returned")
+    call get_child_name(handle, child_count, child_name, stat)
+    call report_test("[Key error when extracting child name by handle]", stat /= SPUD_KEY_ERROR, .false., "Returned incorrect error code when retrieving child name")
+
+    call test_delete_option(key)
+
+  end subroutine test_child_enumeration
+
+  subroutine test_find_options(key)
+    character(len = *), intent(in) :: key
+
+    character(len = 255), dimension(:), allocatable :: keys
+    integer :: stat, test_integer_scalar
+    type(option_handle), dimension(:), allocatable :: handles
+
+    call set_option(trim(key) // "/field::A/boundary::In/value", 1, stat)
+    call set_option(trim(key) // "/field::A/boundary::Out/value", 2, stat)
+    call set_option(trim(key) // "/field::B/boundary::In/value", 3, stat)
+    call set_option(trim(key) // "/other/boundary::In/value", 4, stat)
+    call add_option(trim(key) // "/other/repeated", stat)
+    call add_option(trim(key) // "/other/repeated[1]", stat)
+
+    call find_options(trim(key) // "/field::*/boundary::*", keys, handles, stat)
+    call report_test("[Found options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when finding options")
+    call report_test("[Number of options found]", size(keys) /= 3 .or. size(handles) /= 3, .false., "Incorrect number of options found")
+    if(size(keys) == 3) then
+      call report_test("[Keys of options found]", keys(1) /= trim(key) // "/field::A/boundary::In" .or. &
+        & keys(3) /= trim(key) // "/field::B/boundary::In", .false., "Incorrect keys returned")
+      call get_option(trim(keys(2)) // "/value", test_integer_scalar, stat)
+      call report_test("[Key of option found]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 2, .false., "Retrieved incorrect option data")
+      call get_child_handle(handles(3), "value", handles(1), stat)
+      call get_option(handles(1), test_integer_scalar, stat)
+      call report_test("[Handle of option found]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 3, .false., "Retrieved incorrect option data")
+    end if
+    deallocate(keys, handles)
+
+    call find_options(trim(key) // "/*/boundary::In", keys, stat = stat)
+    call report_test("[Options found by wildcard]", stat /= SPUD_NO_ERROR .or. size(keys) /= 3, .false., "Incorrect number of options found")
+    deallocate(keys)
+    call find_options(trim(key) // "/field/boundary::In", keys, stat = stat)
+    call report_test("[Options found by unnamed key]", stat /= SPUD_NO_ERROR .or. size(keys) /= 2, .false., "Incorrect number of options found")
+    deallocate(keys)
+    call find_options(trim(key) // "/field::*/boundary[1]", keys, stat = stat)
+    call report_test("[Options found by index]", stat /= SPUD_NO_ERROR .or. size(keys) /= 1, .false., "Incorrect number of options found")
+    if(size(keys) == 1) then
+      call report_test("[Key of option found by index]", keys(1) /= trim(key) // "/field::A/boundary::Out", .false., "Incorrect key returned")
+    end if
+    deallocate(keys)
+    call find_options(trim(key) // "/field::A/b*::O*t/v*", keys, stat = stat)
+    call report_test("[Options found by partial wildcard]", stat /= SPUD_NO_ERROR .or. size(keys) /= 1, .false., "Incorrect number of options found")
+    deallocate(keys)
+    call find_options(trim(key) // "/other/*", keys, stat = stat)
+    call report_test("[Repeated options found]", stat /= SPUD_NO_ERROR .or. size(keys) /= 3, .false., "Incorrect number of options found")
+    if(size(keys) == 3) then
+      call report_test("[Keys of repeated options found]", keys(3) /= trim(key) // "/other/repeated[1]", .false., "Incorrect key returned")
+    end if
+    deallocate(keys)
+
+    call find_options(trim(key) // "/missing/*", keys, stat = stat)
+    call report_test("[No options found]", stat /= SPUD_NO_ERROR .or. size(keys) /= 0, .false., "Incorrect number of options found")
+    deallocate(keys)
+    call find_options(trim(key) // "/field[A]", keys, stat = stat)
+    call report_test("[Key error when finding options]", stat /= SPUD_KEY_ERROR, .false., "Returned incorrect error code when finding options")
+
+    call test_delete_option(key)
+
+  end subroutine test_find_options
+
+  subroutine test_option_contexts(key)
+    character(len = *), intent(in) :: key
+
+    integer :: stat, test_integer_scalar
+    type(option_context) :: context_a, context_b
+    type(option_handle) :: handle
+
+    call create_context(context_a)
+    call create_context(context_b)
+
+    call set_option(key, 42, stat, context = context_a)
+    call report_test("[New option in context]", stat /= SPUD_NEW_KEY_WARNING, .false., "Returned incorrect error code when setting option")
+    call set_option(key, 43, stat, context = context_b)
+    call report_test("[New option in context]", stat /= SPUD_NEW_KEY_WARNING, .false., "Returned incorrect error code when setting option")
+
+    call get_option(key, test_integer_scalar, stat, context = context_a)
+    call report_test("[Option in first context]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 42, .false., "Retrieved incorrect option data")
+    call get_option(key, test_integer_scalar, stat, context = context_b)
+    call report_test("[Option in second context]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 43, .false., "Retrieved incorrect option data")
+    call report_test("[Default options unchanged by contexts]", have_option(key), .false., "Found option set in a context")
+
+    call get_option_handle(key, handle, stat, context = context_a)
+    call report_test("[Extracted option handle in context]", stat /= SPUD_NO_ERROR, .false., "Returned error code when retrieving option handle")
+    call get_option(handle, test_integer_scalar, stat, context = context_a)
+    call report_test("[Option by handle in context]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 42, .false., "Retrieved incorrect option data")
+    call get_option(handle, test_integer_scalar, stat, context = context_b)
+    call report_test("[Handle rejected by another context]", stat /= SPUD_HANDLE_ERROR, .false., "Returned incorrect error code when using handle")
+
+    call clear_options(context = context_a)
+    call report_test("[Cleared options in context]", have_option(key, context = context_a), .false., "Found cleared option")
+    call report_test("[Other context unchanged by clear]", .not. have_option(key, context = context_b), .false., "Missing option")
+
+    call destroy_context(context_a)
+    call destroy_context(context_b)
+
+    ! A context which was never created refers to the default options
+    call set_option(key, 44, stat, context = context_a)
+    call get_option(key, test_integer_scalar, stat)
+    call report_test("[Uncreated context refers to default options]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 44, .false., &
+      & "Retrieved incorrect option data")
+
+    call test_delete_option(key)
+
+  end subroutine test_option_contexts
+
+  subroutine test_profiling(key, filename)
+    character(len = *), intent(in) :: key
+    character(len = *), intent(in) :: filename
+
+    character(len = 1024) :: line
+    integer :: hits, misses, mutations, stat, test_integer_scalar, unit
+    logical :: found_key, found_missing
+    real(D) :: lookup_time
+
+    call start_profiling(filename)
+    call set_option(key, 42, stat)
+    call get_option(key, test_integer_scalar, stat)
+    call get_option(key, test_integer_scalar, stat)
+    call report_test("[Missing option while profiling]", have_option(trim(key) // "/missing"), .false., "Found missing option")
+    call stop_profiling(stat)
+    call report_test("[Wrote profile]", stat /= SPUD_NO_ERROR, .false., "Returned error code when writing profile")
+
+    found_key = .false.
+    found_missing = .false.
+    open(newunit = unit, file = filename, status = "old", action = "read")
+    read(unit, "(a)") line
+    call report_test("[Profile header]", line /= "key,hits,misses,mutations,lookup_time", .false., "Incorrect profile header")
+    do
+      read(unit, "(a)", iostat = stat) line
+      if(stat /= 0) exit
+      if(line(:len(key) + 3) == '"' // key // '",') then
+        read(line(len(key) + 4:), *) hits, misses, mutations, lookup_time
+        found_key = hits >= 2 .and. misses == 0 .and. mutations == 1
+      else if(line(:len(key) + 11) == '"' // key // '/missing",') then
+        read(line(len(key) + 12:), *) hits, misses, mutations, lookup_time
+        found_missing = hits == 0 .and. misses == 1 .and. mutations == 0
+      end if
+    end do
+    close(unit, status = "delete")
+    call report_test("[Profiled lookups and changes]", .not. found_key, .false., "Incorrect profile of option")
+    call report_test("[Profiled misses]", .not. found_missing, .false., "Incorrect profile of missing option")
+
+    call get_option(key, test_integer_scalar, stat)
+    call stop_profiling(stat)
+    call report_test("[Stopped profiling]", stat /= SPUD_NO_ERROR, .false., "Returned error code when not profiling")
+
+    call test_delete_option(key)
+
+  end subroutine test_profiling
     
 end subroutine test_fspud
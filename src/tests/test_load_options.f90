@@ -0,0 +1,684 @@
+!    Copyright (C) 2007 Imperial College London and others.
+!
+!    Please see the AUTHORS file in the main source directory for a full list
+!    of copyright holders.
+!
+!    Applied Modelling and Computation Group
+!    Department of Earth Science and Engineering
+!    Imperial College London
+!
+!    David.Ham@Imperial.ac.uk
+!
+!    This library is free software; you can redistribute it and/or
+!    modify it under the terms of the GNU Lesser General Public
+!    License as published by the Free Software Foundation,
+!    version 2.1 of the License.
+!
+!    This library is distributed in the hope that it will be useful,
+!    but WITHOUT ANY WARRANTY; without even the implied warranty of
+!    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+!    Lesser General Public License for more details.
+!
+!    You should have received a copy of the GNU Lesser General Public
+!    License along with this library; if not, write to the Free Software
+!    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+!    USA
+
+subroutine test_load_options
+
+  use iso_c_binding
+  use spud
+  use unittest_tools
+
+  implicit none
+
+  integer, parameter :: D = kind(0.0D0)
+  real(D), parameter :: tol = epsilon(0.0)
+
+  print *, "*** Testing write_options and load_options ***"
+  call test_write_and_load("test_load_options.xml")
+
+  print *, "*** Testing load_options with an invalid file ***"
+  call test_load_invalid("test_load_options_invalid.xml")
+
+  print *, "*** Testing write_snapshot and load_options from a snapshot ***"
+  call test_snapshot("test_load_options_snapshot.xml")
+
+  print *, "*** Testing load_options with unusual real values ***"
+  call test_real_values("test_load_options_reals.xml")
+
+  print *, "*** Testing freeze_options and load_frozen_options ***"
+  call test_frozen_options("test_load_options_frozen.img")
+
+  print *, "*** Testing load_lazy_options ***"
+  call test_lazy_options("test_load_options_lazy.xml")
+
+  print *, "*** Testing write_changes and load_changes ***"
+  call test_changes("test_load_options_checkpoint.xml", "test_load_options_changes.xml")
+
+  print *, "*** Testing write_options_buffer and load_options_buffer ***"
+  call test_options_buffer()
+
+  print *, "*** Testing write_options and load_options with binary sidecar files ***"
+  call test_sidecars("test_load_options_sidecar.xml", "test_load_options_sidecar.raw")
+
+  print *, "*** Testing write_options and load_options with compressed files ***"
+  call test_compressed("test_load_options_compressed.xml")
+
+contains
+
+  subroutine test_write_and_load(filename)
+    character(len = *), intent(in) :: filename
+
+    character(len = 255) :: test_char
+    integer :: stat, test_integer_scalar, unit
+    integer, dimension(2, 3) :: integer_tensor_val, test_integer_tensor
+    real(D) :: real_exact_val, test_real_scalar
+    real(D), dimension(3) :: real_vector_val, test_real_vector
+
+    real_vector_val = (/42.0_D, 43.0_D, 44.0_D/)
+    integer_tensor_val = reshape((/42, 43, 44, 45, 46, 47/), (/2, 3/))
+    ! Needs 17 significant digits to read back exactly
+    real_exact_val = 0.1_D
+    real_exact_val = real_exact_val + 0.2_D
+
+    ! Load an empty file to set the name of the root element
+    open(newunit = unit, file = filename, action = "write", status = "replace")
+    write(unit, "(a)") '<?xml version="1.0" encoding="utf-8" ?>'
+    write(unit, "(a)") '<options/>'
+    close(unit)
+    call load_options(filename, stat)
+    call report_test("[Loaded options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options")
+
+    call set_option("/real_scalar", 42.0_D, stat)
+    call set_option("/real_vector", real_vector_val, stat)
+    call set_option("/real_exact", real_exact_val, stat)
+    call set_option("/integer_tensor", integer_tensor_val, stat)
+    call set_option("/parent::first/integer_scalar", 42, stat)
+    call set_option("/parent::second/integer_scalar", 43, stat)
+    call set_option("/parent::second/character", "Forty & <Two>", stat)
+    call set_option_attribute("/parent::second/attribute", "Forty Two", stat)
+
+    call write_options("missing_directory/" // filename, stat)
+    call report_test("[File error when writing to missing directory]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when writing options")
+    call write_options(filename, stat)
+    call report_test("[Wrote options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when writing options")
+    call clear_options()
+
+    call load_options(filename, stat)
+    call report_test("[Loaded options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options")
+
+    call get_option("/real_scalar", test_real_scalar, stat)
+    call report_test("[Loaded real scalar]", stat /= SPUD_NO_ERROR .or. abs(test_real_scalar - 42.0_D) > tol, .false., "Retrieved incorrect option data")
+    call get_option("/real_vector", test_real_vector, stat)
+    call report_test("[Loaded real vector]", stat /= SPUD_NO_ERROR .or. maxval(abs(test_real_vector - real_vector_val)) > tol, .false., "Retrieved incorrect option data")
+    call get_option("/real_exact", test_real_scalar, stat)
+    call report_test("[Loaded real scalar exactly]", stat /= SPUD_NO_ERROR .or. test_real_scalar /= real_exact_val, .false., "Retrieved inexact option data")
+    call get_option("/integer_tensor", test_integer_tensor, stat)
+    call report_test("[Loaded integer tensor]", stat /= SPUD_NO_ERROR .or. count(test_integer_tensor /= integer_tensor_val) > 0, .false., "Retrieved incorrect option data")
+    call report_test("[Loaded named options]", option_count("/parent") /= 2, .false., "Incorrect number of named options loaded")
+    call get_option("/parent::first/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Loaded integer scalar]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 42, .false., "Retrieved incorrect option data")
+    call get_option("/parent[1]/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Loaded integer scalar]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 43, .false., "Retrieved incorrect option data")
+    call get_option("/parent::second/character", test_char, stat)
+    call report_test("[Loaded character]", stat /= SPUD_NO_ERROR .or. test_char /= "Forty & <Two>", .false., "Retrieved incorrect option data")
+    call get_option("/parent::second/attribute", test_char, stat)
+    call report_test("[Loaded attribute]", stat /= SPUD_NO_ERROR .or. test_char /= "Forty Two", .false., "Retrieved incorrect option data")
+    call get_option("/parent::second/name", test_char, stat)
+    call report_test("[Loaded name attribute]", stat /= SPUD_NO_ERROR .or. test_char /= "second", .false., "Retrieved incorrect option data")
+
+    call clear_options()
+
+  end subroutine test_write_and_load
+
+  subroutine test_load_invalid(filename)
+    character(len = *), intent(in) :: filename
+
+    integer :: stat, test_integer_scalar, unit
+
+    call load_options("missing_" // filename, stat)
+    call report_test("[File error when loading missing file]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when loading options")
+
+    ! An end tag which does not match its element, after valid data
+    open(newunit = unit, file = filename, action = "write", status = "replace")
+    write(unit, "(a)") '<options><integer_scalar><integer_value rank="0">43</integer_value></integer_scalar><a></b></options>'
+    close(unit)
+
+    call set_option("/integer_scalar", 42, stat)
+    call load_options(filename, stat)
+    call report_test("[File error when loading invalid file]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when loading options")
+    call get_option("/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Options unchanged after invalid file]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 42, .false., "Loading an invalid file changed the options")
+    call report_test("[Options unchanged after invalid file]", have_option("/a"), .false., "Loading an invalid file changed the options")
+
+    call clear_options()
+
+  end subroutine test_load_invalid
+
+  subroutine test_real_values(filename)
+    character(len = *), intent(in) :: filename
+
+    integer :: i, stat, unit
+    real(D), dimension(8) :: real_vector_val, test_real_vector
+
+    ! Values are read as by a string stream: hexadecimal and spelled out
+    ! infinities are 0, and values too large for a double are clamped
+    real_vector_val = (/0.0_D, 0.0_D, huge(0.0_D), -huge(0.0_D), 1.5_D, 0.0_D, 2.5E-30_D, 0.0_D/)
+    open(newunit = unit, file = filename, action = "write", status = "replace")
+    write(unit, "(a)") '<?xml version="1.0" encoding="utf-8" ?>'
+    write(unit, "(a)") '<options><real_vector><real_value rank="1" shape="8">' // &
+      & '0x10 Infinity 1e400 -1e400 1.5abc 1e 2.5e-30 +inf</real_value></real_vector></options>'
+    close(unit)
+
+    do i = 1, 2
+      if(i == 1) then
+        call load_options(filename, stat)
+      else
+        call load_lazy_options(filename, stat)
+      end if
+      call report_test("[Loaded unusual real values]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options")
+      call get_option("/real_vector", test_real_vector, stat)
+      call report_test("[Unusual real values]", stat /= SPUD_NO_ERROR .or. &
+        & any(abs(test_real_vector - real_vector_val) > tol * abs(real_vector_val)), .false., "Retrieved incorrect option data")
+    end do
+
+    call clear_options()
+    open(newunit = unit, file = filename, status = "old")
+    close(unit, status = "delete")
+
+  end subroutine test_real_values
+
+  subroutine test_snapshot(filename)
+    character(len = *), intent(in) :: filename
+
+    integer :: stat, test_integer_scalar, unit
+    integer, dimension(2, 3) :: integer_tensor_val, test_integer_tensor
+    character(len = 255) :: test_char
+
+    integer_tensor_val = reshape((/42, 43, 44, 45, 46, 47/), (/2, 3/))
+
+    call write_snapshot("missing_" // filename, stat)
+    call report_test("[File error when writing snapshot of missing file]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when writing snapshot")
+
+    open(newunit = unit, file = filename, action = "write", status = "replace")
+    write(unit, "(a)") '<?xml version="1.0" encoding="utf-8" ?>'
+    write(unit, "(a)") '<options><integer_scalar><integer_value rank="0">42</integer_value></integer_scalar></options>'
+    close(unit)
+    call load_options(filename, stat)
+    call report_test("[Loaded options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options")
+
+    ! Options set before writing the snapshot are only present if the snapshot
+    ! is loaded in place of the XML file
+    call set_option("/integer_tensor", integer_tensor_val, stat)
+    call set_option("/parent::first/character", "Forty & <Two>", stat)
+    call write_snapshot(filename, stat)
+    call report_test("[Wrote snapshot]", stat /= SPUD_NO_ERROR, .false., "Returned error code when writing snapshot")
+    call clear_options()
+
+    call load_options(filename, stat)
+    call report_test("[Loaded options from snapshot]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options")
+    call get_option("/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Loaded integer scalar from snapshot]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 42, .false., "Retrieved incorrect option data")
+    call get_option("/integer_tensor", test_integer_tensor, stat)
+    call report_test("[Loaded integer tensor from snapshot]", stat /= SPUD_NO_ERROR .or. count(test_integer_tensor /= integer_tensor_val) > 0, .false., "Retrieved incorrect option data")
+    call get_option("/parent::first/character", test_char, stat)
+    call report_test("[Loaded character from snapshot]", stat /= SPUD_NO_ERROR .or. test_char /= "Forty & <Two>", .false., "Retrieved incorrect option data")
+    call get_option("/parent[0]/name", test_char, stat)
+    call report_test("[Loaded name attribute from snapshot]", stat /= SPUD_NO_ERROR .or. test_char /= "first", .false., "Retrieved incorrect option data")
+    call clear_options()
+
+    ! A snapshot is ignored once the XML file changes
+    open(newunit = unit, file = filename, action = "write", status = "replace")
+    write(unit, "(a)") '<?xml version="1.0" encoding="utf-8" ?>'
+    write(unit, "(a)") '<options><integer_scalar><integer_value rank="0">43</integer_value></integer_scalar></options>'
+    close(unit)
+    call load_options(filename, stat)
+    call report_test("[Loaded options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options")
+    call get_option("/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Stale snapshot ignored]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 43, .false., "Loaded a snapshot of a changed file")
+    call report_test("[Stale snapshot ignored]", have_option("/integer_tensor"), .false., "Loaded a snapshot of a changed file")
+
+    call clear_options()
+    open(newunit = unit, file = filename // ".snapshot", status = "old")
+    close(unit, status = "delete")
+
+  end subroutine test_snapshot
+
+  subroutine test_frozen_options(filename)
+    character(len = *), intent(in) :: filename
+
+    character(len = 255) :: test_char
+    character(len = 255), dimension(:), allocatable :: keys
+    integer :: stat, test_integer_scalar, unit
+    integer, dimension(2) :: test_shape
+    integer, dimension(2, 3) :: integer_tensor_val, test_integer_tensor
+    real(D) :: test_real_scalar
+    real(D), dimension(3) :: real_vector_val, test_real_vector
+
+    real_vector_val = (/42.0_D, 43.0_D, 44.0_D/)
+    integer_tensor_val = reshape((/42, 43, 44, 45, 46, 47/), (/2, 3/))
+
+    call set_option("/real_scalar", 42.0_D, stat)
+    call set_option("/real_vector", real_vector_val, stat)
+    call set_option("/integer_tensor", integer_tensor_val, stat)
+    call set_option("/parent::first/integer_scalar", 42, stat)
+    call set_option("/parent::second/integer_scalar", 43, stat)
+    call set_option("/parent::second/character", "Forty & <Two>", stat)
+    call set_option_attribute("/parent::second/attribute", "Forty Two", stat)
+    call add_option("/repeated", stat)
+    call add_option("/repeated", stat)
+    call set_option("/repeated[1]/integer_scalar", 44, stat)
+
+    call freeze_options(filename, stat)
+    call report_test("[Froze options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when freezing options")
+    call clear_options()
+
+    call load_frozen_options(filename, stat)
+    call report_test("[Loaded frozen options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading frozen options")
+
+    call get_option("/real_scalar", test_real_scalar, stat)
+    call report_test("[Frozen real scalar]", stat /= SPUD_NO_ERROR .or. abs(test_real_scalar - 42.0_D) > tol, .false., "Retrieved incorrect option data")
+    call get_option("/real_vector", test_real_vector, stat)
+    call report_test("[Frozen real vector]", stat /= SPUD_NO_ERROR .or. maxval(abs(test_real_vector - real_vector_val)) > tol, .false., "Retrieved incorrect option data")
+    call get_option("/integer_tensor", test_integer_tensor, stat)
+    call report_test("[Frozen integer tensor]", stat /= SPUD_NO_ERROR .or. count(test_integer_tensor /= integer_tensor_val) > 0, .false., "Retrieved incorrect option data")
+    test_shape = option_shape("/integer_tensor", stat)
+    call report_test("[Frozen integer tensor shape]", stat /= SPUD_NO_ERROR .or. any(test_shape /= (/2, 3/)), .false., "Retrieved incorrect option shape")
+    call report_test("[Frozen option type]", option_type("/real_vector") /= SPUD_REAL, .false., "Retrieved incorrect option type")
+    call report_test("[Frozen option rank]", option_rank("/real_vector") /= 1, .false., "Retrieved incorrect option rank")
+    call get_option("/real_scalar", test_integer_scalar, stat)
+    call report_test("[Type error from frozen options]", stat /= SPUD_TYPE_ERROR, .false., "Returned incorrect error code")
+
+    call report_test("[Frozen named options]", option_count("/parent") /= 2, .false., "Incorrect number of named options")
+    call get_option("/parent/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Frozen first named option]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 42, .false., "Retrieved incorrect option data")
+    call get_option("/parent[1]/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Frozen indexed named option]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 43, .false., "Retrieved incorrect option data")
+    call get_option("/parent::second/character", test_char, stat)
+    call report_test("[Frozen character]", stat /= SPUD_NO_ERROR .or. test_char /= "Forty & <Two>", .false., "Retrieved incorrect option data")
+    call get_option("/parent::second/attribute", test_char, stat)
+    call report_test("[Frozen attribute]", stat /= SPUD_NO_ERROR .or. test_char /= "Forty Two", .false., "Retrieved incorrect option data")
+    call get_option("/parent[1]/name", test_char, stat)
+    call report_test("[Frozen name attribute]", stat /= SPUD_NO_ERROR .or. test_char /= "second", .false., "Retrieved incorrect option data")
+    call report_test("[Frozen repeated options]", option_count("/repeated") /= 2, .false., "Incorrect number of repeated options")
+    call get_option("/repeated[1]/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Frozen repeated option]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 44, .false., "Retrieved incorrect option data")
+    call report_test("[Frozen missing option]", have_option("/repeated/integer_scalar"), .false., "Found missing option")
+    call report_test("[Frozen missing option]", have_option("/parent::third"), .false., "Found missing option")
+    call get_child_name("/parent::second", 2, test_char, stat)
+    call report_test("[Frozen child name]", stat /= SPUD_NO_ERROR .or. test_char /= "character", .false., "Retrieved incorrect child name")
+    call find_options("/parent/integer_scalar", keys, stat = stat)
+    call report_test("[Frozen options found]", stat /= SPUD_NO_ERROR .or. size(keys) /= 2, .false., "Incorrect number of options found")
+    deallocate(keys)
+    call find_options("/*/integer_scalar", keys, stat = stat)
+    call report_test("[Frozen options found by wildcard]", stat /= SPUD_NO_ERROR .or. size(keys) /= 3, .false., "Incorrect number of options found")
+    if(size(keys) == 3) then
+      call report_test("[Frozen keys found]", keys(3) /= "/repeated[1]/integer_scalar", .false., "Incorrect key returned")
+    end if
+    deallocate(keys)
+
+    ! Changing the options copies the image into an ordinary options tree
+    call set_option("/integer_scalar", 45, stat)
+    call report_test("[New option in frozen options]", stat /= SPUD_NEW_KEY_WARNING, .false., "Returned incorrect error code when setting option")
+    call get_option("/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Set option in frozen options]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 45, .false., "Retrieved incorrect option data")
+    call get_option("/parent::second/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Options kept after change]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 43, .false., "Retrieved incorrect option data")
+    call get_option("/parent::second/attribute", test_char, stat)
+    call report_test("[Options kept after change]", stat /= SPUD_NO_ERROR .or. test_char /= "Forty Two", .false., "Retrieved incorrect option data")
+
+    ! A file which is not an image is rejected, leaving the options unchanged
+    call load_frozen_options("test_load_options.xml", stat)
+    call report_test("[File error when loading invalid image]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when loading frozen options")
+    call load_frozen_options("missing_" // filename, stat)
+    call report_test("[File error when loading missing image]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when loading frozen options")
+    call report_test("[Options unchanged after invalid image]", .not. have_option("/integer_scalar"), .false., "Loading an invalid image changed the options")
+
+    call clear_options()
+    open(newunit = unit, file = filename, status = "old")
+    close(unit, status = "delete")
+
+  end subroutine test_frozen_options
+
+  subroutine test_lazy_options(filename)
+    character(len = *), intent(in) :: filename
+
+    integer :: stat, test_integer_scalar, unit
+    integer, dimension(2) :: test_shape
+    integer, dimension(2, 3) :: integer_tensor_val, test_integer_tensor
+    real(D) :: test_real_scalar
+    real(D), dimension(3) :: real_vector_val, test_real_vector
+
+    real_vector_val = (/42.0_D, 43.0_D, 44.0_D/)
+    integer_tensor_val = reshape((/42, 43, 44, 45, 46, 47/), (/2, 3/))
+
+    ! Load an empty file to set the name of the root element
+    open(newunit = unit, file = filename, action = "write", status = "replace")
+    write(unit, "(a)") '<?xml version="1.0" encoding="utf-8" ?>'
+    write(unit, "(a)") '<options/>'
+    close(unit)
+    call load_options(filename, stat)
+
+    call set_option("/real_scalar", 42.0_D, stat)
+    call set_option("/real_vector", real_vector_val, stat)
+    call set_option("/integer_tensor", integer_tensor_val, stat)
+    call set_option("/parent::first/integer_scalar", 42, stat)
+
+    call write_options(filename, stat)
+    call report_test("[Wrote options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when writing options")
+    call clear_options()
+
+    call load_lazy_options(filename, stat)
+    call report_test("[Loaded lazy options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading lazy options")
+
+    ! The shape is known before the data is converted
+    test_shape = option_shape("/integer_tensor", stat)
+    call report_test("[Lazy integer tensor shape]", stat /= SPUD_NO_ERROR .or. any(test_shape /= (/2, 3/)), .false., "Retrieved incorrect option shape")
+    call report_test("[Lazy option type]", option_type("/real_vector") /= SPUD_REAL, .false., "Retrieved incorrect option type")
+    call get_option("/integer_tensor", test_integer_tensor, stat)
+    call report_test("[Lazy integer tensor]", stat /= SPUD_NO_ERROR .or. count(test_integer_tensor /= integer_tensor_val) > 0, .false., "Retrieved incorrect option data")
+    call get_option("/real_vector", test_real_vector, stat)
+    call report_test("[Lazy real vector]", stat /= SPUD_NO_ERROR .or. maxval(abs(test_real_vector - real_vector_val)) > tol, .false., "Retrieved incorrect option data")
+    call get_option("/real_scalar", test_integer_scalar, stat)
+    call report_test("[Type error from lazy options]", stat /= SPUD_TYPE_ERROR, .false., "Returned incorrect error code")
+
+    ! Data which has not been read may be replaced
+    call set_option("/parent::first/integer_scalar", 43, stat)
+    call get_option("/parent::first/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Set option in lazy options]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 43, .false., "Retrieved incorrect option data")
+
+    ! Data which has not been read is converted when written
+    call write_options(filename, stat)
+    call load_options(filename, stat)
+    call get_option("/real_scalar", test_real_scalar, stat)
+    call report_test("[Lazy options written]", stat /= SPUD_NO_ERROR .or. abs(test_real_scalar - 42.0_D) > tol, .false., "Retrieved incorrect option data")
+
+    call load_lazy_options("missing_" // filename, stat)
+    call report_test("[File error when loading missing lazy options]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when loading lazy options")
+
+    call clear_options()
+    open(newunit = unit, file = filename, status = "old")
+    close(unit, status = "delete")
+
+  end subroutine test_lazy_options
+
+  subroutine test_changes(filename, changes_filename)
+    character(len = *), intent(in) :: filename
+    character(len = *), intent(in) :: changes_filename
+
+    character(len = 255) :: test_char
+    character(len = 255), dimension(:), allocatable :: keys
+    integer :: stat, test_integer_scalar, unit
+    integer, dimension(:), allocatable :: changes
+    integer(c_long) :: generation
+
+    open(newunit = unit, file = filename, action = "write", status = "replace")
+    write(unit, "(a)") '<?xml version="1.0" encoding="utf-8" ?>'
+    write(unit, "(a)") '<options><integer_scalar><integer_value rank="0">42</integer_value></integer_scalar>' // &
+      & '<real_scalar><real_value rank="0">42.0</real_value></real_scalar>' // &
+      & '<parent name="first"><character><string_value>Forty Two</string_value></character></parent></options>'
+    close(unit)
+    call load_options(filename, stat)
+    call report_test("[Loaded options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options")
+
+    generation = get_generation()
+    call report_test("[No changes]", have_changed("/", generation), .false., "Options changed without being set")
+    call set_option("/integer_scalar", 43, stat)
+    call set_option("/parent::second/integer_scalar", 44, stat)
+    call delete_option("/real_scalar", stat)
+    call report_test("[Changed option]", .not. have_changed("/integer_scalar", generation), .false., "Set option not changed")
+    call report_test("[Changed root]", .not. have_changed("/", generation), .false., "Options not changed")
+    call report_test("[Unchanged option]", have_changed("/parent::first", generation), .false., "Option changed without being set")
+    call report_test("[Deleted option]", .not. have_changed("/real_scalar/real_value", generation), .false., "Deleted option not changed")
+
+    call get_changes(generation, keys, changes)
+    call report_test("[Number of changes]", size(keys) /= 3 .or. size(changes) /= 3, .false., "Incorrect number of changes")
+    if(size(keys) == 3) then
+      call report_test("[Changed keys]", keys(1) /= "/integer_scalar" .or. keys(2) /= "/parent::second/integer_scalar" .or. &
+        & keys(3) /= "/real_scalar", .false., "Incorrect keys returned")
+      call report_test("[Kinds of changes]", changes(1) /= SPUD_CHANGE_SET .or. changes(2) /= SPUD_CHANGE_ADD .or. &
+        & changes(3) /= SPUD_CHANGE_DELETE, .false., "Incorrect kinds of change returned")
+    end if
+    deallocate(keys, changes)
+
+    call write_changes(changes_filename, generation, stat)
+    call report_test("[Wrote changes]", stat /= SPUD_NO_ERROR, .false., "Returned error code when writing changes")
+    call write_changes("missing_directory/" // changes_filename, generation, stat)
+    call report_test("[File error when writing changes]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when writing changes")
+
+    ! The changes are applied to the options they were made to
+    call load_options(filename, stat)
+    call load_changes(changes_filename, stat)
+    call report_test("[Loaded changes]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading changes")
+    call get_option("/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Loaded changed option]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 43, .false., "Retrieved incorrect option data")
+    call get_option("/parent::second/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Loaded added option]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 44, .false., "Retrieved incorrect option data")
+    call report_test("[Loaded deleted option]", have_option("/real_scalar"), .false., "Deleted option present")
+    call get_option("/parent::first/character", test_char, stat)
+    call report_test("[Kept unchanged option]", stat /= SPUD_NO_ERROR .or. test_char /= "Forty Two", .false., "Retrieved incorrect option data")
+
+    call load_changes("missing_" // changes_filename, stat)
+    call report_test("[File error when loading missing changes]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when loading changes")
+    call load_changes(filename, stat)
+    call report_test("[File error when loading options as changes]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when loading changes")
+
+    call clear_options()
+    open(newunit = unit, file = filename, status = "old")
+    close(unit, status = "delete")
+    open(newunit = unit, file = changes_filename, status = "old")
+    close(unit, status = "delete")
+
+  end subroutine test_changes
+
+  subroutine test_options_buffer()
+    character(len = 1, kind = c_char), dimension(:), allocatable :: buffer, reloaded_buffer
+    character(len = 255) :: test_char
+    integer :: stat, test_integer_scalar
+    real(D), dimension(3) :: test_real_vector
+
+    call set_option("/integer_scalar", 42, stat)
+    call set_option("/parent::first/real_vector", (/1.0_D, 2.0_D, 3.0_D/), stat)
+    call set_option("/parent::first/character", "Forty Two", stat)
+
+    call write_options_buffer("/", buffer, stat)
+    call report_test("[Wrote options buffer]", stat /= SPUD_NO_ERROR .or. size(buffer) == 0, .false., "Returned error code when writing options buffer")
+    call clear_options()
+    call load_options_buffer("/", buffer, stat)
+    call report_test("[Loaded options buffer]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options buffer")
+    call get_option("/integer_scalar", test_integer_scalar, stat)
+    call report_test("[Loaded integer scalar]", stat /= SPUD_NO_ERROR .or. test_integer_scalar /= 42, .false., "Retrieved incorrect option data")
+    call get_option("/parent::first/real_vector", test_real_vector, stat)
+    call report_test("[Loaded real vector]", stat /= SPUD_NO_ERROR .or. any(abs(test_real_vector - (/1.0_D, 2.0_D, 3.0_D/)) > tol), .false., "Retrieved incorrect option data")
+    call write_options_buffer("/", reloaded_buffer, stat)
+    call report_test("[Round trip options buffer]", size(reloaded_buffer) /= size(buffer), .false., "Options changed by round trip")
+    if(size(reloaded_buffer) == size(buffer)) then
+      call report_test("[Round trip options buffer contents]", any(reloaded_buffer /= buffer), .false., "Options changed by round trip")
+    end if
+    deallocate(buffer, reloaded_buffer)
+
+    ! A subtree can be loaded below a different key
+    call write_options_buffer("/parent::first", buffer, stat)
+    call report_test("[Wrote subtree buffer]", stat /= SPUD_NO_ERROR, .false., "Returned error code when writing options buffer")
+    call load_options_buffer("/parent::second", buffer, stat)
+    call report_test("[Loaded subtree buffer]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options buffer")
+    call get_option("/parent::second/character", test_char, stat)
+    call report_test("[Loaded subtree option]", stat /= SPUD_NO_ERROR .or. test_char /= "Forty Two", .false., "Retrieved incorrect option data")
+    call get_option("/parent::second/name", test_char, stat)
+    call report_test("[Renamed subtree]", stat /= SPUD_NO_ERROR .or. test_char /= "second", .false., "Loaded subtree kept its name attribute")
+
+    buffer(1) = "X"
+    call load_options_buffer("/parent::third", buffer, stat)
+    call report_test("[File error when loading corrupt buffer]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when loading options buffer")
+    call report_test("[Corrupt buffer not loaded]", have_option("/parent::third"), .false., "Option added from corrupt buffer")
+    deallocate(buffer)
+
+    call write_options_buffer("/missing", buffer, stat)
+    call report_test("[Key error when writing missing buffer]", stat /= SPUD_KEY_ERROR .or. size(buffer) /= 0, .false., "Returned incorrect error code when writing options buffer")
+    deallocate(buffer)
+
+    call clear_options()
+
+  end subroutine test_options_buffer
+
+  subroutine test_sidecars(filename, raw_filename)
+    character(len = *), intent(in) :: filename
+    character(len = *), intent(in) :: raw_filename
+
+    integer :: i, stat, unit
+    integer, dimension(2, 3) :: test_integer_tensor
+    logical :: file_exists
+    real(D), dimension(3) :: test_real_short_vector
+    real(D), dimension(4) :: test_real_raw_vector
+    real(D), dimension(10) :: test_real_vector
+
+    open(newunit = unit, file = filename, action = "write", status = "replace")
+    write(unit, "(a)") '<?xml version="1.0" encoding="utf-8" ?>'
+    write(unit, "(a)") '<options/>'
+    close(unit)
+    call load_options(filename, stat)
+    call set_option("/real_vector", (/(real(i, D) / 3.0_D, i = 1, 10)/), stat)
+    call set_option("/integer_tensor", reshape((/1, 2, 3, 4, 5, 6/), (/2, 3/)), stat)
+    call set_option("/real_short_vector", (/1.0_D, 2.0_D, 3.0_D/), stat)
+
+    call write_options(filename, stat, sidecar_threshold = 5)
+    call report_test("[Wrote options with sidecars]", stat /= SPUD_NO_ERROR, .false., "Returned error code when writing options")
+    inquire(file = filename // ".0.npy", exist = file_exists)
+    call report_test("[Wrote real vector sidecar]", .not. file_exists, .false., "Sidecar file not written")
+    inquire(file = filename // ".1.npy", exist = file_exists)
+    call report_test("[Wrote integer tensor sidecar]", .not. file_exists, .false., "Sidecar file not written")
+    inquire(file = filename // ".2.npy", exist = file_exists)
+    call report_test("[Short vector written as text]", file_exists, .false., "Sidecar file written below threshold")
+
+    call clear_options()
+    call load_options(filename, stat)
+    call report_test("[Loaded options with sidecars]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options")
+    call get_option("/real_vector", test_real_vector, stat)
+    call report_test("[Loaded real vector sidecar]", stat /= SPUD_NO_ERROR .or. &
+      & any(abs(test_real_vector - (/(real(i, D) / 3.0_D, i = 1, 10)/)) > 0.0_D), .false., "Retrieved incorrect option data")
+    call get_option("/integer_tensor", test_integer_tensor, stat)
+    call report_test("[Loaded integer tensor sidecar]", stat /= SPUD_NO_ERROR .or. &
+      & any(test_integer_tensor /= reshape((/1, 2, 3, 4, 5, 6/), (/2, 3/))), .false., "Retrieved incorrect option data")
+    call get_option("/real_short_vector", test_real_short_vector, stat)
+    call report_test("[Loaded short vector]", stat /= SPUD_NO_ERROR .or. &
+      & any(abs(test_real_short_vector - (/1.0_D, 2.0_D, 3.0_D/)) > tol), .false., "Retrieved incorrect option data")
+    do i = 0, 1
+      open(newunit = unit, file = filename // "." // char(ichar("0") + i) // ".npy", status = "old")
+      close(unit, status = "delete")
+    end do
+
+    ! Raw values in native byte order
+    open(newunit = unit, file = raw_filename, access = "stream", form = "unformatted", status = "replace")
+    write(unit) (/1.5_D, 2.5_D, 3.5_D, 4.5_D/)
+    close(unit)
+    open(newunit = unit, file = filename, action = "write", status = "replace")
+    write(unit, "(a)") '<?xml version="1.0" encoding="utf-8" ?>'
+    write(unit, "(a)") '<options><real_vector><real_value rank="1" shape="4" file="' // raw_filename // '"/></real_vector></options>'
+    close(unit)
+    call load_options(filename, stat)
+    call report_test("[Loaded options with raw sidecar]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options")
+    call get_option("/real_vector", test_real_raw_vector, stat)
+    call report_test("[Loaded raw sidecar]", stat /= SPUD_NO_ERROR .or. &
+      & any(abs(test_real_raw_vector - (/1.5_D, 2.5_D, 3.5_D, 4.5_D/)) > 0.0_D), .false., "Retrieved incorrect option data")
+    call report_test("[No file attribute]", have_option("/real_vector/__value/file"), .false., "Kept file attribute")
+
+    ! Sidecars removed or cut short after loading are reported when first read,
+    ! including by copies made before the data was read
+    call load_options(filename, stat)
+    call copy_option("/real_vector", "/real_vector_copy", stat)
+    open(newunit = unit, file = raw_filename, status = "old")
+    close(unit, status = "delete")
+    call get_option("/real_vector", test_real_raw_vector, stat)
+    call report_test("[File error for removed sidecar]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when retrieving option data")
+    call get_option("/real_vector_copy", test_real_raw_vector, stat)
+    call report_test("[File error for copy of removed sidecar]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when retrieving option data")
+    call write_options(filename // ".copy", stat)
+    call report_test("[File error when writing removed sidecar]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when writing options")
+    inquire(file = filename // ".copy", exist = file_exists)
+    call report_test("[No options written with removed sidecar]", file_exists, .false., "Options file written")
+    open(newunit = unit, file = raw_filename, access = "stream", form = "unformatted", status = "replace")
+    write(unit) (/1.5_D, 2.5_D/)
+    close(unit)
+    call get_option("/real_vector", test_real_raw_vector, stat)
+    call report_test("[File error for truncated sidecar]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when retrieving option data")
+    open(newunit = unit, file = raw_filename, access = "stream", form = "unformatted", status = "replace")
+    write(unit) (/1.5_D, 2.5_D, 3.5_D, 4.5_D/)
+    close(unit)
+    call get_option("/real_vector", test_real_raw_vector, stat)
+    call report_test("[Loaded restored sidecar]", stat /= SPUD_NO_ERROR .or. &
+      & any(abs(test_real_raw_vector - (/1.5_D, 2.5_D, 3.5_D, 4.5_D/)) > 0.0_D), .false., "Retrieved incorrect option data")
+    call get_option("/real_vector_copy", test_real_raw_vector, stat)
+    call report_test("[Loaded copy of restored sidecar]", stat /= SPUD_NO_ERROR .or. &
+      & any(abs(test_real_raw_vector - (/1.5_D, 2.5_D, 3.5_D, 4.5_D/)) > 0.0_D), .false., "Retrieved incorrect option data")
+
+    open(newunit = unit, file = filename, action = "write", status = "replace")
+    write(unit, "(a)") '<?xml version="1.0" encoding="utf-8" ?>'
+    write(unit, "(a)") '<options><real_vector><real_value rank="1" shape="5" file="' // raw_filename // '"/></real_vector></options>'
+    close(unit)
+    call load_options(filename, stat)
+    call report_test("[File error when loading sidecar of wrong shape]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when loading options")
+
+    call clear_options()
+    open(newunit = unit, file = filename, status = "old")
+    close(unit, status = "delete")
+    open(newunit = unit, file = raw_filename, status = "old")
+    close(unit, status = "delete")
+
+  end subroutine test_sidecars
+
+  subroutine test_compressed(filename)
+    character(len = *), intent(in) :: filename
+
+    character(len = 4), dimension(2), parameter :: suffixes = (/".gz ", ".bz2"/)
+    character, dimension(:), allocatable :: compressed_data
+    integer :: file_size, i, stat, unit
+    real(D), dimension(1000) :: test_real_vector
+
+    open(newunit = unit, file = filename, action = "write", status = "replace")
+    write(unit, "(a)") '<?xml version="1.0" encoding="utf-8" ?>'
+    write(unit, "(a)") '<options/>'
+    close(unit)
+    call load_options(filename, stat)
+    call set_option("/real_vector", (/(real(i, D), i = 1, 1000)/), stat)
+
+    do i = 1, size(suffixes)
+      call write_options(filename // trim(suffixes(i)), stat)
+      call report_test("[Wrote compressed options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when writing options")
+      call clear_options()
+      call load_options(filename // trim(suffixes(i)), stat)
+      call report_test("[Loaded compressed options]", stat /= SPUD_NO_ERROR, .false., "Returned error code when loading options")
+      call get_option("/real_vector", test_real_vector, stat)
+      call report_test("[Loaded compressed real vector]", stat /= SPUD_NO_ERROR .or. &
+        & any(test_real_vector /= (/(real(i, D), i = 1, 1000)/)), .false., "Retrieved incorrect option data")
+
+      ! The same data without the suffix, which is detected from its contents
+      inquire(file = filename // trim(suffixes(i)), size = file_size)
+      allocate(compressed_data(file_size))
+      open(newunit = unit, file = filename // trim(suffixes(i)), access = "stream", form = "unformatted", status = "old")
+      read(unit) compressed_data
+      close(unit, status = "delete")
+      open(newunit = unit, file = filename, access = "stream", form = "unformatted", status = "replace")
+      write(unit) compressed_data
+      close(unit)
+      call clear_options()
+      call load_options(filename, stat)
+      call get_option("/real_vector", test_real_vector, stat)
+      call report_test("[Detected compressed file]", stat /= SPUD_NO_ERROR .or. &
+        & any(test_real_vector /= (/(real(i, D), i = 1, 1000)/)), .false., "Retrieved incorrect option data")
+
+      open(newunit = unit, file = filename, access = "stream", form = "unformatted", status = "replace")
+      write(unit) compressed_data(:file_size / 2)
+      close(unit)
+      call load_options(filename, stat)
+      call report_test("[File error when loading truncated compressed file]", stat /= SPUD_FILE_ERROR, .false., "Returned incorrect error code when loading options")
+      deallocate(compressed_data)
+    end do
+
+    call clear_options()
+    open(newunit = unit, file = filename, status = "old")
+    close(unit, status = "delete")
+
+  end subroutine test_compressed
+
+end subroutine test_load_options
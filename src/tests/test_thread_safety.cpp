@@ -0,0 +1,372 @@
+/*  Copyright (C) 2007 Imperial College London and others.
+
+    Please see the AUTHORS file in the main source directory for a full list
+    of copyright holders.
+
+    Applied Modelling and Computation Group
+    Department of Earth Science and Engineering
+    Imperial College London
+
+    David.Ham@Imperial.ac.uk
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation,
+    version 2.1 of the License.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+    USA
+*/
+
+// Hammers option lookups from many threads at once, with and without a thread
+// changing other options at the same time, on an ordinary, a lazily loaded
+// and a frozen options tree.
+
+#include <pthread.h>
+
+#include <algorithm>
+#include <cstdio>
+#include <fstream>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include "spud"
+
+using namespace std;
+
+const int field_count = 100;
+const int reader_count = 8;
+const int reader_iterations = 200;
+const int writer_iterations = 2000;
+const int resize_small = 10;
+const int resize_large = 1000;
+
+const char* image_filename = "test_thread_safety.img";
+const char* lazy_filename = "test_thread_safety.xml";
+
+struct ReaderArgs{
+  bool use_handles;
+  int mismatches;
+};
+
+void report_test(const string& title, const bool& fail, const string& msg){
+  if(fail){
+    cout << "Fail: " << title << "; error: " << msg << endl;
+  }else{
+    cout << "Pass: " << title << endl;
+  }
+}
+
+string field_key(const int& i){
+  ostringstream key;
+  key << "/field::Field" << i;
+  return key.str();
+}
+
+void add_fields(){
+  for(int i = 0;i < field_count;i++){
+    string key = field_key(i);
+    Spud::set_option(key + "/scalar", double(i));
+    vector<double> vector_val;
+    for(int j = 0;j < 10;j++){
+      vector_val.push_back(i + j);
+    }
+    Spud::set_option(key + "/vector", vector_val);
+    Spud::set_option(key + "/index", i);
+    Spud::set_option(key + "/description", field_key(i).substr(8));
+  }
+}
+
+void set_fields(){
+  Spud::clear_options();
+  add_fields();
+}
+
+// Count the options of field i which cannot be found or have the wrong value
+int check_field(const int& i, const bool& use_handles){
+  string key = field_key(i);
+  int mismatches = 0;
+
+  double scalar_val = -1.0;
+  vector<double> vector_val;
+  int index_val = -1;
+  string description_val;
+  if(use_handles){
+    Spud::OptionHandle field, child;
+    if(Spud::get_option_handle(key, field) != Spud::SPUD_NO_ERROR){
+      return 4;
+    }
+    if(Spud::get_child_handle(field, "scalar", child) == Spud::SPUD_NO_ERROR){
+      Spud::get_option(child, scalar_val);
+    }
+    if(Spud::get_child_handle(field, "vector", child) == Spud::SPUD_NO_ERROR){
+      Spud::get_option(child, vector_val);
+    }
+    if(Spud::get_child_handle(field, "index", child) == Spud::SPUD_NO_ERROR){
+      Spud::get_option(child, index_val);
+    }
+    if(Spud::get_child_handle(field, "description", child) == Spud::SPUD_NO_ERROR){
+      Spud::get_option(child, description_val);
+    }
+  }else{
+    Spud::get_option(key + "/scalar", scalar_val);
+    Spud::get_option(key + "/vector", vector_val);
+    Spud::get_option(key + "/index", index_val);
+    Spud::get_option(key + "/description", description_val);
+  }
+
+  if(scalar_val != double(i)){
+    mismatches++;
+  }
+  if(vector_val.size() != 10 or vector_val[9] != double(i + 9)){
+    mismatches++;
+  }
+  if(index_val != i){
+    mismatches++;
+  }
+  if(description_val != key.substr(8)){
+    mismatches++;
+  }
+
+  return mismatches;
+}
+
+void* read_fields(void* arg){
+  ReaderArgs* args = (ReaderArgs*)arg;
+  for(int n = 0;n < reader_iterations;n++){
+    for(int i = 0;i < field_count;i++){
+      args->mismatches += check_field(i, args->use_handles);
+    }
+    if(Spud::option_count("/field") != field_count){
+      args->mismatches++;
+    }
+  }
+
+  return NULL;
+}
+
+// Repeatedly add, change and delete an option outside the fields being read
+void* write_scratch(void* arg){
+  int* errors = (int*)arg;
+  for(int n = 0;n < writer_iterations;n++){
+    if(Spud::set_option("/scratch/value", n) != Spud::SPUD_NEW_KEY_WARNING){
+      (*errors)++;
+    }
+    if(Spud::delete_option("/scratch") != Spud::SPUD_NO_ERROR){
+      (*errors)++;
+    }
+  }
+
+  return NULL;
+}
+
+// Fill and check a private context, which no other thread can see
+void* use_context(void* arg){
+  int* mismatches = (int*)arg;
+  Spud::OptionContext context;
+  for(int n = 0;n < writer_iterations;n++){
+    Spud::set_option(context, "/private/value", n);
+    int value = -1;
+    Spud::get_option(context, "/private/value", value);
+    if(value != n){
+      (*mismatches)++;
+    }
+  }
+  if(Spud::option_count(context, "/field") != 0){
+    (*mismatches)++;
+  }
+
+  return NULL;
+}
+
+// Run reader_count threads each using its own context, alongside readers of
+// the default options, and return the total number of mismatches seen
+int stress_contexts(){
+  vector<pthread_t> threads(reader_count);
+  vector<int> context_mismatches(reader_count, 0);
+  vector<pthread_t> readers(reader_count);
+  vector<ReaderArgs> args(reader_count);
+
+  for(int i = 0;i < reader_count;i++){
+    pthread_create(&threads[i], NULL, use_context, &context_mismatches[i]);
+    args[i].use_handles = false;
+    args[i].mismatches = 0;
+    pthread_create(&readers[i], NULL, read_fields, &args[i]);
+  }
+
+  int mismatches = 0;
+  for(int i = 0;i < reader_count;i++){
+    pthread_join(threads[i], NULL);
+    pthread_join(readers[i], NULL);
+    mismatches += context_mismatches[i] + args[i].mismatches;
+  }
+
+  return mismatches;
+}
+
+// Run reader_count readers, and optionally one writer, and return the total
+// number of mismatches and errors seen
+int stress(const bool& use_handles, const bool& with_writer){
+  vector<pthread_t> readers(reader_count);
+  vector<ReaderArgs> args(reader_count);
+  pthread_t writer;
+  int writer_errors = 0;
+
+  for(int i = 0;i < reader_count;i++){
+    args[i].use_handles = use_handles;
+    args[i].mismatches = 0;
+    pthread_create(&readers[i], NULL, read_fields, &args[i]);
+  }
+  if(with_writer){
+    pthread_create(&writer, NULL, write_scratch, &writer_errors);
+  }
+
+  int mismatches = 0;
+  for(int i = 0;i < reader_count;i++){
+    pthread_join(readers[i], NULL);
+    mismatches += args[i].mismatches;
+  }
+  if(with_writer){
+    pthread_join(writer, NULL);
+  }
+
+  return mismatches + writer_errors;
+}
+
+// Repeatedly resize an option between resize_small and resize_large values
+void* write_resize(void* arg){
+  int* errors = (int*)arg;
+  for(int n = 0;n < writer_iterations;n++){
+    vector<double> val(n % 2 == 0 ? resize_large : resize_small, double(resize_small));
+    if(Spud::set_option("/resize/value", val) != Spud::SPUD_NO_ERROR){
+      (*errors)++;
+    }
+  }
+
+  return NULL;
+}
+
+// Read the option being resized into a buffer sized for the small option,
+// checking that the data is only copied when it fits and that nothing is
+// written past the end of the buffer
+void* read_resize(void* arg){
+  ReaderArgs* args = (ReaderArgs*)arg;
+  Spud::OptionHandle handle;
+  if(Spud::get_option_handle("/resize/value", handle) != Spud::SPUD_NO_ERROR){
+    args->mismatches++;
+    return NULL;
+  }
+  for(int n = 0;n < reader_iterations * 10;n++){
+    vector<double> val(2 * resize_small, -1.0);
+    int shape[2] = {resize_small, -1};
+    Spud::OptionError get_err = args->use_handles ?
+      Spud::get_option_checked(handle, Spud::SPUD_DOUBLE, 1, shape, &val[0]) :
+      Spud::get_option_checked("/resize/value", Spud::SPUD_DOUBLE, 1, shape, &val[0]);
+    if(get_err == Spud::SPUD_NO_ERROR){
+      if(shape[0] != resize_small or count(val.begin(), val.begin() + resize_small, double(resize_small)) != resize_small){
+        args->mismatches++;
+      }
+    }else if(get_err == Spud::SPUD_HANDLE_ERROR){
+      // Handles are invalidated by every change, so look the option up again
+      if(Spud::get_option_handle("/resize/value", handle) != Spud::SPUD_NO_ERROR){
+        args->mismatches++;
+      }
+    }else if(get_err != Spud::SPUD_SHAPE_ERROR){
+      args->mismatches++;
+    }
+    if(count(val.begin() + resize_small, val.end(), -1.0) != resize_small){
+      args->mismatches++;
+    }
+  }
+
+  return NULL;
+}
+
+// Run reader_count checked readers alongside a writer resizing the option
+// they read, and return the total number of mismatches and errors seen
+int stress_resize(const bool& use_handles){
+  vector<pthread_t> readers(reader_count);
+  vector<ReaderArgs> args(reader_count);
+  pthread_t writer;
+  int writer_errors = 0;
+
+  Spud::set_option("/resize/value", vector<double>(resize_small, double(resize_small)));
+  for(int i = 0;i < reader_count;i++){
+    args[i].use_handles = use_handles;
+    args[i].mismatches = 0;
+    pthread_create(&readers[i], NULL, read_resize, &args[i]);
+  }
+  pthread_create(&writer, NULL, write_resize, &writer_errors);
+
+  int mismatches = 0;
+  for(int i = 0;i < reader_count;i++){
+    pthread_join(readers[i], NULL);
+    mismatches += args[i].mismatches;
+  }
+  pthread_join(writer, NULL);
+  Spud::delete_option("/resize");
+
+  return mismatches + writer_errors;
+}
+
+int main(int argc, char** argv){
+  cout << "*** Testing concurrent lookups ***" << endl;
+  set_fields();
+
+  report_test("[Concurrent key lookups]", stress(false, false) != 0, "Retrieved incorrect option data");
+  report_test("[Concurrent handle lookups]", stress(true, false) != 0, "Retrieved incorrect option data");
+  report_test("[Concurrent key lookups with writer]", stress(false, true) != 0, "Retrieved incorrect option data");
+  report_test("[Options unchanged by writer]", Spud::have_option("/scratch") or Spud::option_count("/field") != field_count, "Options tree changed");
+  report_test("[Concurrent private contexts]", stress_contexts() != 0, "Retrieved incorrect option data");
+  report_test("[Options unchanged by private contexts]", Spud::have_option("/private"), "Options tree changed");
+  report_test("[Checked key lookups with resizing writer]", stress_resize(false) != 0, "Retrieved incorrect option data");
+  report_test("[Checked handle lookups with resizing writer]", stress_resize(true) != 0, "Retrieved incorrect option data");
+
+  cout << "*** Testing concurrent lookups in lazily loaded options ***" << endl;
+  // Load an empty file to set the name of the root element
+  ofstream lazy_file(lazy_filename);
+  lazy_file << "<?xml version=\"1.0\" encoding=\"utf-8\" ?>" << endl << "<options/>" << endl;
+  lazy_file.close();
+  report_test("[Loaded options]", Spud::load_options(lazy_filename) != Spud::SPUD_NO_ERROR, "Returned error code when loading options");
+  add_fields();
+  report_test("[Wrote options]", Spud::write_options(lazy_filename) != Spud::SPUD_NO_ERROR, "Returned error code when writing options");
+  report_test("[Loaded lazy options]", Spud::load_lazy_options(lazy_filename) != Spud::SPUD_NO_ERROR, "Returned error code when loading lazy options");
+  remove(lazy_filename);
+
+  vector<string> lazy_keys;
+  vector<size_t> lazy_sizes;
+  vector<Spud::logical_t> converted;
+  Spud::get_lazy_statistics(lazy_keys, lazy_sizes, converted);
+  report_test("[Data read lazily]", lazy_keys.size() != 3 * field_count or count(converted.begin(), converted.end(), true) != 0, "Incorrect lazy statistics");
+  // The readers convert the data of each option as they first read it
+  report_test("[Concurrent key lookups in lazy options]", stress(false, false) != 0, "Retrieved incorrect option data");
+  report_test("[Concurrent handle lookups in lazy options]", stress(true, false) != 0, "Retrieved incorrect option data");
+  Spud::get_lazy_statistics(lazy_keys, lazy_sizes, converted);
+  report_test("[Lazy data converted]", count(converted.begin(), converted.end(), true) != 3 * field_count, "Incorrect lazy statistics");
+
+  cout << "*** Testing concurrent lookups in frozen options ***" << endl;
+  report_test("[Froze options]", Spud::freeze_options(image_filename) != Spud::SPUD_NO_ERROR, "Returned error code when freezing options");
+  report_test("[Loaded frozen options]", Spud::load_frozen_options(image_filename) != Spud::SPUD_NO_ERROR, "Returned error code when loading frozen options");
+
+  report_test("[Concurrent key lookups in frozen options]", stress(false, false) != 0, "Retrieved incorrect option data");
+  report_test("[Concurrent handle lookups in frozen options]", stress(true, false) != 0, "Retrieved incorrect option data");
+  // The writer thaws the image while the readers are running
+  report_test("[Concurrent key lookups with writer in frozen options]", stress(false, true) != 0, "Retrieved incorrect option data");
+
+  Spud::clear_options();
+  // Only the root of the cleared options remains in their arena
+  size_t allocations, deallocations, system_allocations, bytes_in_use, bytes_reserved;
+  Spud::get_allocation_statistics(allocations, deallocations, system_allocations, bytes_in_use, bytes_reserved);
+  report_test("[Arena released on clear]", bytes_in_use > 1024 or bytes_reserved > 65536, "Options memory not released");
+
+  return 0;
+}